@@ -0,0 +1,89 @@
+"""
+Benchmark the loading of functions compiled with ``cache=True``, in fresh
+interpreters: the time from the import of the module defining them to the
+return of their first calls, with an empty ("cold") and a populated ("warm")
+on-disk cache.
+"""
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+
+CACHED_MODULE = """if 1:
+    import numpy as np
+    from numba import njit
+
+    @njit(cache=True)
+    def relax(A, Anew):
+        error = 0.0
+        for j in range(1, A.shape[0] - 1):
+            for i in range(1, A.shape[1] - 1):
+                Anew[j, i] = 0.25 * (A[j, i + 1] + A[j, i - 1]
+                                     + A[j - 1, i] + A[j + 1, i])
+                error = max(error, abs(Anew[j, i] - A[j, i]))
+        return error
+
+    @njit(cache=True)
+    def summarize(a):
+        return np.sort(a)[a.size // 2], np.cumsum(a)[-1], a.std()
+
+    @njit(cache=True)
+    def count(words):
+        counts = {}
+        for w in words:
+            counts[w] = counts.get(w, 0) + 1
+        return len(counts)
+    """
+
+FIRST_CALLS = """if 1:
+    import time
+    import numpy as np
+    import numba
+    start = time.perf_counter()
+    import cache_usecase
+    a = np.ones((8, 8))
+    cache_usecase.relax(a, a.copy())
+    cache_usecase.summarize(a.ravel())
+    cache_usecase.count(["a", "b", "a"])
+    print(time.perf_counter() - start)
+    """
+
+# The number of runs of which the best time is reported
+RUNS = 3
+
+tempdir = None
+
+
+def setup():
+    global tempdir
+    tempdir = tempfile.mkdtemp(prefix='numba-bm-cache-')
+    with open(os.path.join(tempdir, 'cache_usecase.py'), 'w') as f:
+        f.write(CACHED_MODULE)
+
+
+def teardown():
+    shutil.rmtree(tempdir, ignore_errors=True)
+
+
+def _time_first_calls():
+    cache_dir = os.path.join(tempdir, 'cache')
+    env = dict(os.environ, NUMBA_CACHE_DIR=cache_dir)
+    out = subprocess.check_output([sys.executable, '-c', FIRST_CALLS],
+                                  cwd=tempdir, env=env)
+    return float(out)
+
+
+def track_cold_load():
+    timings = []
+    for _ in range(RUNS):
+        shutil.rmtree(os.path.join(tempdir, 'cache'), ignore_errors=True)
+        timings.append(_time_first_calls())
+    return min(timings)
+
+
+def track_warm_load():
+    # Populate the cache
+    _time_first_calls()
+    return min(_time_first_calls() for _ in range(RUNS))
@@ -0,0 +1,160 @@
+"""
+Benchmark the compilation time of representative functions, each compiled
+by a new dispatcher (the process-wide state of the compiler is warm).
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from numba import config, njit, types
+
+
+def scalar_loop(n):
+    acc = 0
+    for i in range(n):
+        if i % 3:
+            acc += i * i
+        else:
+            acc -= i
+    return acc
+
+
+def jacobi_relax_core(A, Anew):
+    error = 0.0
+    n = A.shape[0]
+    m = A.shape[1]
+    for j in range(1, n - 1):
+        for i in range(1, m - 1):
+            Anew[j, i] = 0.25 * (A[j, i + 1] + A[j, i - 1]
+                                 + A[j - 1, i] + A[j + 1, i])
+            error = max(error, abs(Anew[j, i] - A[j, i]))
+    return error
+
+
+def array_expr(a, b):
+    return np.sqrt(a * a + b * b) - np.exp(-a) * np.cos(b)
+
+
+def numpy_calls(a):
+    s = np.sort(a)
+    q = np.percentile(a, [10.0, 50.0, 90.0])
+    return s.sum(), np.cumsum(s)[-1], np.argmax(a), q.sum(), np.unique(s).size
+
+
+def containers(n):
+    lst = []
+    # Typed from its first item
+    counts = {-1: 0}
+    for i in range(n):
+        lst.append(i % 7)
+    total = 0
+    for x in lst:
+        counts[x] = counts.get(x, 0) + 1
+        total += x
+    return len(counts) - 1, total
+
+
+def _compile(func, sig):
+    njit(func).compile(sig)
+
+
+def _compile_specializations(func, sigs, mode):
+    disp = njit(func)
+    if mode == 'no_untyped_ir_cache':
+        disp._compiler._untyped_ir_cache = None
+    for sig in sigs:
+        disp.compile(sig)
+
+
+float_2d = types.float64[:, ::1]
+float_1d = types.float64[::1]
+
+# Specializations sharing the untyped IR of the first one
+jacobi_sigs = [(ty, ty) for ty in (float_2d, types.float32[:, ::1],
+                                   types.float64[:, :], types.float32[:, :])]
+numpy_calls_sigs = [(ty,) for ty in (float_1d, types.float32[::1],
+                                     types.int64[::1], types.float64[:])]
+
+
+def time_scalar_loop():
+    _compile(scalar_loop, (types.intp,))
+
+
+def time_array_loop():
+    _compile(jacobi_relax_core, (float_2d, float_2d))
+
+
+def time_array_expr():
+    _compile(array_expr, (float_1d, float_1d))
+
+
+def time_numpy_calls():
+    _compile(numpy_calls, (float_1d,))
+
+
+def time_containers():
+    _compile(containers, (types.intp,))
+
+
+# The difference between time_specializations and time_first_specialization
+# is the time taken by the later specializations, with and without the
+# untyped IR of the first one being reused.
+
+def time_first_specialization(mode):
+    _compile_specializations(jacobi_relax_core, jacobi_sigs[:1], mode)
+    _compile_specializations(numpy_calls, numpy_calls_sigs[:1], mode)
+
+
+def time_specializations(mode):
+    _compile_specializations(jacobi_relax_core, jacobi_sigs, mode)
+    _compile_specializations(numpy_calls, numpy_calls_sigs, mode)
+
+
+def track_untyped_front_end(mode):
+    # The time spent before type inference by the later specializations:
+    # the untyped passes, or the copy of the first specialization's IR
+    total = 0.0
+    for func, sigs in ((jacobi_relax_core, jacobi_sigs),
+                       (numpy_calls, numpy_calls_sigs)):
+        disp = njit(func)
+        if mode == 'no_untyped_ir_cache':
+            disp._compiler._untyped_ir_cache = None
+        for sig in sigs:
+            disp.compile(sig)
+        for sig in sigs[1:]:
+            for ev in disp.get_metadata(sig)['compile_profile']:
+                if ev.name == 'nopython_type_inference':
+                    break
+                total += ev.duration
+    return total
+
+
+for bench in (time_first_specialization, time_specializations,
+              track_untyped_front_end):
+    bench.params = ['untyped_ir_cache', 'no_untyped_ir_cache']
+
+
+# Independent functions compiled from a pool of threads, with the global
+# compiler lock (NUMBA_CONCURRENT_COMPILATION=0) or without it
+
+def _make_loop(k):
+    def loop(a):
+        acc = 0.0
+        for i in range(a.size):
+            acc += np.sqrt(a[i]) * k
+        return acc
+    return loop
+
+
+def time_warmup_threads(mode):
+    funcs = [njit(_make_loop(k)) for k in range(8)]
+    old = config.CONCURRENT_COMPILATION
+    config.CONCURRENT_COMPILATION = int(mode == 'concurrent')
+    try:
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            list(pool.map(lambda disp: disp.compile((float_1d,)), funcs))
+    finally:
+        config.CONCURRENT_COMPILATION = old
+
+
+time_warmup_threads.params = ['serial', 'concurrent']
@@ -0,0 +1,88 @@
+"""
+Benchmark the overhead of calling compiled functions from the interpreter.
+Each benchmark makes LOOPS calls of a trivial function.
+"""
+import numpy as np
+
+from numba import njit, types
+
+LOOPS = 1000
+
+
+@njit
+def noargs():
+    pass
+
+
+@njit
+def add(x, y):
+    return x + y
+
+
+@njit
+def first(a):
+    return a[0]
+
+
+@njit
+def with_defaults(x, y=1, z=2.0):
+    return x + y + z
+
+
+def setup():
+    global arr, ints, add_ii
+    arr = np.arange(10.0)
+    ints = list(range(LOOPS))
+    # Compile everything
+    noargs()
+    add(1, 2)
+    add(1.0, 2.0)
+    add((1, 2), (3,))
+    first(arr)
+    with_defaults(1)
+    with_defaults(1, z=3.0)
+    add_ii = add.specialize((types.int64, types.int64))
+
+
+def time_noargs():
+    for _ in range(LOOPS):
+        noargs()
+
+
+def time_int_args():
+    for _ in range(LOOPS):
+        add(1, 2)
+
+
+def time_float_args():
+    for _ in range(LOOPS):
+        add(1.0, 2.0)
+
+
+def time_tuple_args():
+    for _ in range(LOOPS):
+        add((1, 2), (3,))
+
+
+def time_array_arg():
+    for _ in range(LOOPS):
+        first(arr)
+
+
+def time_omitted_args():
+    for _ in range(LOOPS):
+        with_defaults(1)
+
+
+def time_keyword_args():
+    for _ in range(LOOPS):
+        with_defaults(1, z=3.0)
+
+
+def time_specialized():
+    for _ in range(LOOPS):
+        add_ii(1, 2)
+
+
+def time_map():
+    add.starmap(zip(ints, ints))
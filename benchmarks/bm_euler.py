@@ -1,9 +1,8 @@
 # Modified from a stackoverflow post by Hyperboreus:
 # http://stackoverflow.com/questions/6964392/speed-comparison-with-project-euler-c-vs-python-vs-erlang-vs-haskell
-from __future__ import print_function, division, absolute_import
 import math
 from numba import jit
-from numba.utils import benchmark
+from numba.core.utils import benchmark
 
 
 def py_factorCount(n):
@@ -48,16 +47,20 @@ def euler():
 answer = 842161320
 
 
-def numba_main():
+def time_numba():
     result = euler()
     assert result == answer
 
 
-def python_main():
+def time_python():
     result = py_euler()
     assert result == answer
 
 
+# The interpreted version is slow, time it once
+time_python.repeat = 1
+
+
 if __name__ == '__main__':
-    print(benchmark(python_main))
-    print(benchmark(numba_main))
+    print(benchmark(time_python))
+    print(benchmark(time_numba))
@@ -0,0 +1,82 @@
+"""
+Benchmark allocation-heavy functions with each allocator of the NRT (see
+NUMBA_NRT_ALLOCATOR), in fresh interpreters since the allocator can only be
+changed while no memory is allocated.
+"""
+import os
+import subprocess
+import sys
+
+
+WORKLOADS = """if 1:
+    import threading
+    import time
+    import numpy as np
+    from numba import njit
+
+    @njit
+    def small_temporaries(n):
+        acc = 0.0
+        for i in range(n):
+            acc += np.ones(i % 16 + 1).sum()
+        return acc
+
+    @njit
+    def mixed_sizes(n):
+        acc = 0.0
+        for i in range(n):
+            acc += np.empty((i * 7919) % 4096 + 1)[0] * 0.0
+        return acc
+
+    @njit(nogil=True)
+    def churn(n):
+        acc = 0
+        for i in range(n):
+            acc += np.arange(i % 32 + 1).sum()
+        return acc
+
+    def threaded_churn(n):
+        threads = [threading.Thread(target=churn, args=(n,))
+                   for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    def best_time(func, n):
+        func(10)
+        timings = []
+        for _ in range(5):
+            start = time.perf_counter()
+            func(n)
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    print(best_time(%s, 10 ** 5))
+    """
+
+ALLOCATORS = ['python', 'system', 'pool']
+
+
+def _time_workload(workload, allocator):
+    env = dict(os.environ, NUMBA_NRT_ALLOCATOR=allocator)
+    out = subprocess.check_output([sys.executable, '-c',
+                                   WORKLOADS % workload], env=env)
+    return float(out)
+
+
+def track_small_temporaries(allocator):
+    return _time_workload('small_temporaries', allocator)
+
+
+def track_mixed_sizes(allocator):
+    return _time_workload('mixed_sizes', allocator)
+
+
+def track_threaded_churn(allocator):
+    return _time_workload('threaded_churn', allocator)
+
+
+for bench in (track_small_temporaries, track_mixed_sizes,
+              track_threaded_churn):
+    bench.params = ALLOCATORS
@@ -0,0 +1,89 @@
+"""
+Benchmark the reference counting of the NRT on functions juggling arrays:
+with atomic operations (but non-atomic ones on the thread-local arrays), and
+with non-atomic operations only (see NUMBA_NRT_SINGLE_THREADED), in fresh
+interpreters since the operations are compiled when the NRT is initialized.
+The count of non-atomic operations left in the compiled code is also
+tracked.
+"""
+import json
+import os
+import subprocess
+import sys
+
+
+WORKLOADS = """if 1:
+    import json
+    import re
+    import time
+    import numpy as np
+    from numba import njit
+
+    @njit
+    def temporaries(n):
+        acc = 0.0
+        for i in range(n):
+            a = np.ones(i %% 8 + 1)
+            b = a[1:]
+            c = a * 2.0
+            acc += c.sum() + len(b)
+        return acc
+
+    @njit
+    def shared(a, n):
+        acc = 0.0
+        for i in range(n):
+            b = a[i %% a.size:]
+            acc += b[0]
+        return acc
+
+    def args_temporaries():
+        return temporaries, (10 ** 5,)
+
+    def args_shared():
+        return shared, (np.ones(100), 10 ** 5)
+
+    func, args = args_%s()
+    func(*args)
+    timings = []
+    for _ in range(5):
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    llvm = func.inspect_llvm(func.signatures[0])
+    ops = len(re.findall(r'call void @NRT_(?:incref|decref)_local\\(', llvm))
+    print(json.dumps({'local_ops': ops, 'time': min(timings)}))
+    """
+
+MODES = ['atomic', 'single_threaded']
+
+_results = {}
+
+
+def _run_workload(workload, mode):
+    key = workload, mode
+    if key not in _results:
+        single_threaded = '1' if mode == 'single_threaded' else '0'
+        env = dict(os.environ, NUMBA_NRT_SINGLE_THREADED=single_threaded)
+        out = subprocess.check_output([sys.executable, '-c',
+                                       WORKLOADS % workload], env=env)
+        _results[key] = json.loads(out)
+    return _results[key]
+
+
+def track_temporaries_local_ops(mode):
+    return _run_workload('temporaries', mode)['local_ops']
+
+
+def track_temporaries(mode):
+    return _run_workload('temporaries', mode)['time']
+
+
+def track_shared(mode):
+    return _run_workload('shared', mode)['time']
+
+
+for bench in (track_temporaries_local_ops, track_temporaries, track_shared):
+    bench.params = MODES
+    if bench.__name__.endswith('_local_ops'):
+        bench.unit = 'calls'
@@ -0,0 +1,118 @@
+"""
+Benchmark the pruning of the NRT reference count operations (see
+NUMBA_NRT_REFCT_PRUNING) on loops reading reference counted values: the
+count of atomic increments and decrements left in the compiled code, and
+the execution time.  Each pruning mode is run in a fresh interpreter, as it
+is read at import time.
+"""
+import json
+import os
+import subprocess
+import sys
+
+
+WORKLOADS = """if 1:
+    import json
+    import re
+    import time
+    import numpy as np
+    from numba import njit, float64
+    from numba.experimental import jitclass
+    from numba.typed import List
+
+    @njit
+    def rows(a):
+        acc = 0.0
+        for row in a:
+            acc += row[0]
+        return acc
+
+    @njit
+    def typed_list(lst):
+        acc = 0.0
+        for i in range(len(lst)):
+            acc += lst[i][0]
+        return acc
+
+    @jitclass([('values', float64[:])])
+    class Holder(object):
+        def __init__(self, values):
+            self.values = values
+
+    @njit
+    def jitclass_member(holder, n):
+        acc = 0.0
+        for i in range(n):
+            acc += holder.values[i %% holder.values.size]
+        return acc
+
+    def args_rows():
+        return rows, (np.ones((10 ** 5, 4)),)
+
+    def args_typed_list():
+        lst = List()
+        for i in range(10 ** 4):
+            lst.append(np.ones(4))
+        return typed_list, (lst,)
+
+    def args_jitclass_member():
+        return jitclass_member, (Holder(np.ones(100)), 10 ** 5)
+
+    func, args = args_%s()
+    func(*args)
+    timings = []
+    for _ in range(5):
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    llvm = func.inspect_llvm(func.signatures[0])
+    ops = len(re.findall(r'call void @NRT_(?:incref|decref)(?:_local)?\\(',
+                         llvm))
+    print(json.dumps({'refct_ops': ops, 'time': min(timings)}))
+    """
+
+PRUNINGS = ['block', 'dataflow']
+
+_results = {}
+
+
+def _run_workload(workload, pruning):
+    key = workload, pruning
+    if key not in _results:
+        env = dict(os.environ, NUMBA_NRT_REFCT_PRUNING=pruning)
+        out = subprocess.check_output([sys.executable, '-c',
+                                       WORKLOADS % workload], env=env)
+        _results[key] = json.loads(out)
+    return _results[key]
+
+
+def track_rows_refct_ops(pruning):
+    return _run_workload('rows', pruning)['refct_ops']
+
+
+def track_rows(pruning):
+    return _run_workload('rows', pruning)['time']
+
+
+def track_typed_list_refct_ops(pruning):
+    return _run_workload('typed_list', pruning)['refct_ops']
+
+
+def track_typed_list(pruning):
+    return _run_workload('typed_list', pruning)['time']
+
+
+def track_jitclass_member_refct_ops(pruning):
+    return _run_workload('jitclass_member', pruning)['refct_ops']
+
+
+def track_jitclass_member(pruning):
+    return _run_workload('jitclass_member', pruning)['time']
+
+
+for bench in (track_rows_refct_ops, track_rows, track_typed_list_refct_ops,
+              track_typed_list, track_jitclass_member_refct_ops,
+              track_jitclass_member):
+    bench.params = PRUNINGS
+    if bench.__name__.endswith('_refct_ops'):
+        bench.unit = 'calls'
@@ -0,0 +1,108 @@
+"""
+Benchmark compiled kernels built on the supported NumPy API.
+"""
+import numpy as np
+
+from numba import njit
+
+N = 2 ** 20
+
+
+@njit
+def reductions(a):
+    return a.sum(), a.mean(), a.std(), a.min(), np.argmax(a)
+
+
+@njit
+def sort(a):
+    return np.sort(a)
+
+
+@njit
+def cumulative(a):
+    return np.cumsum(a), np.diff(a)
+
+
+@njit
+def where(a, b):
+    return np.where(a > b, a, b)
+
+
+@njit
+def histogram(a):
+    return np.histogram(a, bins=100)
+
+
+@njit
+def unique(a):
+    return np.unique(a)
+
+
+@njit
+def array_expr(a, b):
+    return np.exp(-a * a) * np.cos(b) + np.log1p(b)
+
+
+@njit
+def fancy_indexing(a, idx):
+    return a[idx]
+
+
+@njit
+def reshape_transpose(a):
+    return np.ascontiguousarray(a.reshape((2 ** 10, -1)).T)
+
+
+def setup():
+    global a, b, ints, idx
+    rs = np.random.RandomState(0)
+    a = rs.random_sample(N)
+    b = rs.random_sample(N)
+    ints = rs.randint(0, 1000, N)
+    idx = rs.randint(0, N, N // 8)
+    # Compile everything
+    reductions(a)
+    sort(a)
+    cumulative(a)
+    where(a, b)
+    histogram(a)
+    unique(ints)
+    array_expr(a, b)
+    fancy_indexing(a, idx)
+    reshape_transpose(a)
+
+
+def time_reductions():
+    reductions(a)
+
+
+def time_sort():
+    sort(a)
+
+
+def time_cumulative():
+    cumulative(a)
+
+
+def time_where():
+    where(a, b)
+
+
+def time_histogram():
+    histogram(a)
+
+
+def time_unique():
+    unique(ints)
+
+
+def time_array_expr():
+    array_expr(a, b)
+
+
+def time_fancy_indexing():
+    fancy_indexing(a, idx)
+
+
+def time_reshape_transpose():
+    reshape_transpose(a)
@@ -0,0 +1,76 @@
+"""
+Benchmark the scaling of parallel (``parallel=True``) functions with the
+number of threads.
+"""
+import numpy as np
+
+from numba import config, njit, prange, set_num_threads
+
+N = 2 ** 22
+
+
+def thread_counts():
+    """
+    The powers of two up to the number of threads, and the latter.
+    """
+    counts = []
+    n = 1
+    while n < config.NUMBA_NUM_THREADS:
+        counts.append(n)
+        n *= 2
+    counts.append(config.NUMBA_NUM_THREADS)
+    return counts
+
+
+@njit(parallel=True)
+def prange_reduction(a):
+    acc = 0.0
+    for i in prange(a.size):
+        acc += np.sqrt(a[i])
+    return acc
+
+
+@njit(parallel=True)
+def array_expr(a, b):
+    return np.sin(a) * np.cos(b) + a * b
+
+
+@njit(parallel=True)
+def stencil_rows(A, out):
+    for j in prange(1, A.shape[0] - 1):
+        for i in range(1, A.shape[1] - 1):
+            out[j, i] = 0.25 * (A[j, i + 1] + A[j, i - 1]
+                                + A[j - 1, i] + A[j + 1, i])
+
+
+def setup(nthreads):
+    global a, b, A, out
+    a = np.random.RandomState(0).random_sample(N)
+    b = a[::-1].copy()
+    A = a.reshape((2 ** 11, -1))
+    out = np.zeros_like(A)
+    set_num_threads(nthreads)
+    # Compile everything
+    prange_reduction(a)
+    array_expr(a, b)
+    stencil_rows(A, out)
+
+
+def teardown(nthreads):
+    set_num_threads(config.NUMBA_NUM_THREADS)
+
+
+def time_prange_reduction(nthreads):
+    prange_reduction(a)
+
+
+def time_array_expr(nthreads):
+    array_expr(a, b)
+
+
+def time_stencil_rows(nthreads):
+    stencil_rows(A, out)
+
+
+for bench in (time_prange_reduction, time_array_expr, time_stencil_rows):
+    bench.params = thread_counts()
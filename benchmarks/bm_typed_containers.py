@@ -0,0 +1,100 @@
+"""
+Benchmark the operations of the typed containers (numba.typed.Dict and
+numba.typed.List), in compiled code and from the interpreter.
+"""
+import numpy as np
+
+from numba import njit, typed, types
+
+N = 10000
+
+
+@njit
+def dict_insert(keys):
+    d = {}
+    for i in range(keys.size):
+        d[keys[i]] = i
+    return d
+
+
+@njit
+def dict_lookup(d, keys):
+    acc = 0
+    for i in range(keys.size):
+        acc += d[keys[i]]
+    return acc
+
+
+@njit
+def list_append(n):
+    lst = typed.List.empty_list(types.float64)
+    for i in range(n):
+        lst.append(i * 0.5)
+    return lst
+
+
+@njit
+def list_iterate(lst):
+    acc = 0.0
+    for x in lst:
+        acc += x
+    return acc
+
+
+@njit
+def list_sort(lst):
+    lst.sort()
+
+
+def setup():
+    global keys, dct, lst, unsorted
+    keys = np.random.RandomState(0).randint(0, 2 ** 31, N)
+    dct = dict_insert(keys)
+    dict_lookup(dct, keys)
+    lst = list_append(N)
+    list_iterate(lst)
+    unsorted = typed.List(np.random.RandomState(0).random_sample(N))
+    list_sort(unsorted.copy())
+
+
+def time_dict_insert():
+    dict_insert(keys)
+
+
+def time_dict_lookup():
+    dict_lookup(dct, keys)
+
+
+def time_list_append():
+    list_append(N)
+
+
+def time_list_iterate():
+    list_iterate(lst)
+
+
+def time_list_sort():
+    # Includes the copy of the unsorted list
+    list_sort(unsorted.copy())
+
+
+def time_interp_dict_setitem():
+    d = typed.Dict.empty(types.int64, types.int64)
+    for i in range(1000):
+        d[i] = i
+
+
+def time_interp_dict_getitem():
+    for i in range(1000):
+        dct[keys[i]]
+
+
+def time_interp_list_append():
+    lst = typed.List.empty_list(types.float64)
+    for i in range(1000):
+        lst.append(0.5)
+
+
+def time_interp_list_iterate():
+    for _ in lst:
+        pass
@@ -0,0 +1,68 @@
+"""
+Benchmark the throughput of ufuncs and gufuncs built with @vectorize and
+@guvectorize, on each target.
+"""
+import numpy as np
+
+from numba import guvectorize, vectorize
+
+N = 2 ** 20
+
+SIGNATURES = ['float64(float64, float64)', 'float32(float32, float32)']
+
+
+def _kernel(x, y):
+    return x * y + np.sqrt(abs(x - y))
+
+
+ufunc_cpu = vectorize(SIGNATURES)(_kernel)
+ufunc_parallel = vectorize(SIGNATURES, target='parallel')(_kernel)
+
+
+def _moving_mean(a, window, out):
+    acc = 0.0
+    for i in range(window[0]):
+        acc += a[i]
+        out[i] = acc / (i + 1)
+    for i in range(window[0], a.shape[0]):
+        acc += a[i] - a[i - window[0]]
+        out[i] = acc / window[0]
+
+
+GU_SIGNATURE = ['void(float64[:], int64[:], float64[:])']
+gufunc_cpu = guvectorize(GU_SIGNATURE, '(n),()->(n)')(_moving_mean)
+gufunc_parallel = guvectorize(GU_SIGNATURE, '(n),()->(n)',
+                              target='parallel')(_moving_mean)
+
+
+def setup():
+    global a, b, a32, b32, rows
+    a = np.random.RandomState(0).random_sample(N)
+    b = a[::-1].copy()
+    a32 = a.astype(np.float32)
+    b32 = b.astype(np.float32)
+    rows = a.reshape((2 ** 10, -1))
+
+
+def time_vectorize_cpu():
+    ufunc_cpu(a, b)
+
+
+def time_vectorize_cpu_float32():
+    ufunc_cpu(a32, b32)
+
+
+def time_vectorize_cpu_broadcast():
+    ufunc_cpu(rows, rows[0])
+
+
+def time_vectorize_parallel():
+    ufunc_parallel(a, b)
+
+
+def time_guvectorize_cpu():
+    gufunc_cpu(rows, 16)
+
+
+def time_guvectorize_parallel():
+    gufunc_parallel(rows, 16)
@@ -0,0 +1,148 @@
+#! /usr/bin/env python
+"""
+Benchmark the compilation time of a corpus of large functions.
+
+The corpus is compiled with and without the memoized function type
+resolutions (NUMBA_RESOLUTION_CACHE), in fresh interpreters.
+
+The best and median compilation times of several runs are reported, along
+with the hits and misses of the resolution cache.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+
+CORPUS = """if 1:
+    import json
+    import time
+
+    import numpy as np
+
+    from numba import njit
+    from numba.core.registry import cpu_target
+
+    def jacobi_relax_core(A, Anew):
+        error = 0.0
+        n = A.shape[0]
+        m = A.shape[1]
+        for j in range(1, n - 1):
+            for i in range(1, m - 1):
+                Anew[j, i] = 0.25 * (A[j, i + 1] + A[j, i - 1]
+                                     + A[j - 1, i] + A[j + 1, i])
+                error = max(error, abs(Anew[j, i] - A[j, i]))
+        return error
+
+    def nbody_step(pos, vel, mass, dt, eps):
+        n = pos.shape[0]
+        acc = np.zeros_like(pos)
+        energy = 0.0
+        for i in range(n):
+            for j in range(n):
+                if i == j:
+                    continue
+                dx = pos[j, 0] - pos[i, 0]
+                dy = pos[j, 1] - pos[i, 1]
+                dz = pos[j, 2] - pos[i, 2]
+                r2 = dx * dx + dy * dy + dz * dz + eps * eps
+                inv = mass[j] / (r2 * np.sqrt(r2))
+                acc[i, 0] += dx * inv
+                acc[i, 1] += dy * inv
+                acc[i, 2] += dz * inv
+                energy -= 0.5 * mass[i] * mass[j] / np.sqrt(r2)
+        vel += acc * dt
+        pos += vel * dt
+        for i in range(n):
+            energy += 0.5 * mass[i] * np.sum(vel[i] ** 2)
+        return energy
+
+    def summarize(a, bins):
+        s = np.sort(a)
+        hist, edges = np.histogram(a, bins=bins)
+        q = np.percentile(a, [10.0, 50.0, 90.0])
+        u = np.unique(np.round(a))
+        c = np.cumsum(s)
+        x = np.interp(q, s, c)
+        return (np.mean(a), np.std(a), np.median(a), hist.sum(),
+                edges[-1], u.size, x.sum(), np.argmax(a), np.argmin(a))
+
+    def black_scholes(S, K, T, r, sigma):
+        out = np.empty((2, S.size))
+        for i in range(S.size):
+            d1 = ((np.log(S[i] / K[i]) + (r + 0.5 * sigma * sigma) * T[i])
+                  / (sigma * np.sqrt(T[i])))
+            d2 = d1 - sigma * np.sqrt(T[i])
+            cnd1 = 0.5 * (1.0 + np.tanh(0.7978845608 * d1))
+            cnd2 = 0.5 * (1.0 + np.tanh(0.7978845608 * d2))
+            disc = np.exp(-r * T[i])
+            out[0, i] = S[i] * cnd1 - K[i] * disc * cnd2
+            out[1, i] = K[i] * disc * (1.0 - cnd2) - S[i] * (1.0 - cnd1)
+        return out
+
+    def word_counts(words):
+        counts = {}
+        lengths = []
+        for w in words:
+            key = w.strip().lower()
+            if key in counts:
+                counts[key] += 1
+            else:
+                counts[key] = 1
+            lengths.append(len(key))
+        best = ''
+        best_count = 0
+        for k, v in counts.items():
+            if v > best_count or (v == best_count and k < best):
+                best, best_count = k, v
+        return best, best_count, sum(lengths) / max(len(lengths), 1)
+
+    a = np.random.random(100)
+    pos = np.random.random((8, 3))
+    corpus = [
+        (jacobi_relax_core, (np.zeros((8, 8)), np.zeros((8, 8)))),
+        (nbody_step, (pos, np.zeros_like(pos), np.ones(8), 0.01, 0.1)),
+        (summarize, (a, 10)),
+        (black_scholes, (a + 1.0, a + 1.0, a + 0.5, 0.02, 0.3)),
+        (word_counts, (["a", "b ", "A"],)),
+    ]
+    start = time.perf_counter()
+    for func, args in corpus:
+        njit(func)(*args)
+    elapsed = time.perf_counter() - start
+    info = cpu_target.typing_context.resolution_cache_info()
+    print(json.dumps([elapsed, info.hits, info.misses]))
+    """
+
+
+def time_corpus(enabled, repeat):
+    env = dict(os.environ, NUMBA_RESOLUTION_CACHE=str(int(enabled)))
+    runs = []
+    for _ in range(repeat):
+        out = subprocess.check_output([sys.executable, '-c', CORPUS], env=env)
+        runs.append(json.loads(out))
+    return runs
+
+
+def report(name, runs):
+    timings = [elapsed for elapsed, _, _ in runs]
+    _, hits, misses = runs[-1]
+    print('%-12s best %.3f s, median %.3f s (%d runs), '
+          '%d hits, %d misses'
+          % (name, min(timings), statistics.median(timings), len(timings),
+             hits, misses))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('-r', '--repeat', type=int, default=5,
+                        help='number of runs of each benchmark')
+    args = parser.parse_args()
+    report('memoized', time_corpus(True, args.repeat))
+    report('not memoized', time_corpus(False, args.repeat))
+
+
+if __name__ == '__main__':
+    main()
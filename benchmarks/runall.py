@@ -1,90 +1,203 @@
 #! /usr/bin/env python
-from __future__ import print_function, division, absolute_import
+"""
+Run the numba benchmark suite and write the results as JSON.
+
+The benchmarks are discovered in the "bm_*.py" modules of this directory,
+following the conventions of airspeed velocity (asv):
+
+- a "time_*" function is timed, the best and median times of a call are
+  reported;
+- a "track_*" function returns the value to report, in the unit given by its
+  "unit" attribute (default "seconds");
+- the "params" attribute of a benchmark lists the values of its (single)
+  parameter, the benchmark is run once for each of them;
+- the "repeat" attribute of a benchmark overrides the number of timings;
+- the module-level "setup" and "teardown" functions, if any, are called with
+  the parameter (if any) before and after each benchmark.
+
+The results can be compared with those of a previous run with "--compare",
+which exits with status 1 if a benchmark regressed, to be used with
+"git bisect run".
+"""
+import argparse
+import importlib
+import json
 import os
-import numpy as np
-from matplotlib import pyplot
-from numba.utils import benchmark
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import timeit
 
 BENCHMARK_PREFIX = 'bm_'
-
-
-def discover_files(startdir=os.curdir):
-    for root, dirs, files in os.walk(startdir):
-        for path in files:
-            if path.startswith(BENCHMARK_PREFIX):
-                fullpath = os.path.join(root, path)
-                yield fullpath
-
-
-try:
-    from importlib import import_module
-except ImportError:
-    # Approximative fallback for Python < 2.7
-    def import_module(modulename):
-        module = __import__(modulename)
-        for comp in modulename.split('.')[:-1]:
-            module = getattr(module, comp)
-        return module
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
 
 
 def discover_modules():
-    for fullpath in discover_files():
-        path = os.path.relpath(fullpath)
+    for path in sorted(os.listdir(BENCHMARK_DIR)):
         root, ext = os.path.splitext(path)
-        if ext != '.py':
-            continue
-        modulename = root.replace(os.path.sep, '.')
-        yield import_module(modulename)
-
-
-def discover():
-    for m in discover_modules():
-        yield m.main
-
-
-def run(mod):
-
-    name = mod.__name__[len(BENCHMARK_PREFIX):]
-    print('running', name, end=' ...\n')
+        if path.startswith(BENCHMARK_PREFIX) and ext == '.py':
+            yield importlib.import_module(root)
 
-    bmr = benchmark(mod.python_main)
-    python_best = bmr.best
-    print('\tpython', python_best, 'seconds')
 
-    bmr = benchmark(mod.numba_main)
-    numba_best = bmr.best
-    print('\tnumba', numba_best, 'seconds')
-
-    print('\tspeedup', python_best / numba_best)
-
-    return name, numba_best / python_best
-
-
-def main():
-    # Generate timings
-    labels = []
-    scores = []
+def discover_benchmarks(pattern=None):
+    """
+    Yield the (name, module, function, parameter) of the benchmarks, whose
+    name matches the regular expression *pattern*.
+    """
     for mod in discover_modules():
-        label, result = run(mod)
-        labels.append(label)
-        scores.append(result)
-
-    # Plot
-    width = 0.8
-    ind = np.arange(len(labels))
-    fig, ax = pyplot.subplots()
-
-    ax.bar(ind, scores, width)
+        for attr in sorted(vars(mod)):
+            func = getattr(mod, attr)
+            if not (attr.startswith(('time_', 'track_')) and callable(func)):
+                continue
+            base = '%s.%s' % (mod.__name__, attr)
+            params = getattr(func, 'params', None)
+            if params is None:
+                cases = [(base, ())]
+            else:
+                cases = [('%s(%r)' % (base, param), (param,))
+                         for param in params]
+            for name, args in cases:
+                if pattern is None or re.search(pattern, name):
+                    yield name, mod, func, args
+
+
+def run_benchmark(mod, func, args, repeat):
+    repeat = getattr(func, 'repeat', repeat)
+    if hasattr(mod, 'setup'):
+        mod.setup(*args)
+    try:
+        if func.__name__.startswith('track_'):
+            return {'kind': 'track',
+                    'unit': getattr(func, 'unit', 'seconds'),
+                    'value': func(*args)}
+        timer = timeit.Timer(lambda: func(*args))
+        # The first call warms up the benchmark (e.g. compiles it)
+        timer.timeit(1)
+        number, _ = timer.autorange()
+        timings = [t / number for t in timer.repeat(repeat, number)]
+        return {'kind': 'time',
+                'unit': 'seconds',
+                'best': min(timings),
+                'median': statistics.median(timings),
+                'number': number,
+                'repeat': repeat}
+    finally:
+        if hasattr(mod, 'teardown'):
+            mod.teardown(*args)
+
+
+def get_git_revision():
+    try:
+        out = subprocess.check_output(['git', 'rev-parse', 'HEAD'],
+                                      cwd=BENCHMARK_DIR,
+                                      stderr=subprocess.DEVNULL)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.decode().strip()
+
+
+def get_metadata():
+    import llvmlite
+    import numpy as np
+    import numba
+    from numba.core import config
+
+    return {'numba': numba.__version__,
+            'llvmlite': llvmlite.__version__,
+            'numpy': np.__version__,
+            'python': platform.python_version(),
+            'git_revision': get_git_revision(),
+            'platform': platform.platform(),
+            'machine': platform.machine(),
+            'cpu_count': os.cpu_count(),
+            'num_threads': config.NUMBA_NUM_THREADS,
+            'threading_layer': config.THREADING_LAYER}
+
+
+def get_value(result):
+    return result['best'] if result['kind'] == 'time' else result['value']
+
+
+def format_value(result):
+    value = get_value(result)
+    if result['unit'] != 'seconds':
+        return '%g %s' % (value, result['unit'])
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('us', 1e-6)):
+        if value >= scale:
+            break
+    else:
+        unit, scale = 'ns', 1e-9
+    return '%.3f %s' % (value / scale, unit)
+
+
+def compare(results, baseline, threshold):
+    """
+    Print the ratios of *results* to *baseline*, and return the names of
+    the benchmarks slower than *threshold* times the baseline.
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        value, base_value = get_value(result), get_value(baseline[name])
+        if base_value:
+            ratio = value / base_value
+        else:
+            # E.g. a count of operations which were all optimized away: any
+            # nonzero value is a regression
+            ratio = float('inf') if value else 1.0
+        flag = ''
+        if ratio > threshold:
+            flag = '  REGRESSION'
+            regressions.append(name)
+        print('%-60s %6.2fx%s' % (name, ratio, flag))
+    return regressions
 
-    # Draw horizontal line at y=1
-    ax.axhline(y=1, xmax=ind[-1], color='r')
 
-    ax.set_ylabel('Normalized to CPython')
-    ax.set_title('Numba Benchmark')
-    ax.set_xticks(ind + (width/2))
-    ax.set_xticklabels(labels)
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('-b', '--bench', metavar='REGEX',
+                        help='only run the benchmarks matching REGEX')
+    parser.add_argument('-r', '--repeat', type=int, default=5,
+                        help='number of timings of each benchmark')
+    parser.add_argument('-o', '--output', metavar='FILE',
+                        help='write the results to FILE as JSON')
+    parser.add_argument('--compare', metavar='FILE',
+                        help='compare with the results of a previous run')
+    parser.add_argument('--threshold', type=float, default=1.1,
+                        help='slowdown ratio reported as a regression '
+                             'by --compare (default: %(default)s)')
+    parser.add_argument('-l', '--list', action='store_true',
+                        help='list the benchmarks and exit')
+    args = parser.parse_args()
+
+    sys.path.insert(0, BENCHMARK_DIR)
+    benchmarks = list(discover_benchmarks(args.bench))
+    if args.list:
+        for name, _, _, _ in benchmarks:
+            print(name)
+        return
+
+    results = {}
+    for name, mod, func, params in benchmarks:
+        result = run_benchmark(mod, func, params, args.repeat)
+        results[name] = result
+        print('%-60s %s' % (name, format_value(result)))
+        sys.stdout.flush()
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'metadata': get_metadata(), 'results': results}, f,
+                      indent=2, sort_keys=True)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+        print()
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
 
-    pyplot.show()
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,82 @@
+#! /usr/bin/env python
+"""
+Benchmark the startup time of numba, in fresh interpreters:
+
+- "import": the time taken by ``python -c "import numba"``;
+- "first call": the time from the start of ``import numba`` to the return of
+  the first call of a function loaded from the on-disk cache.
+
+The best and median times of several runs are reported.
+"""
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+
+CACHED_MODULE = """if 1:
+    from numba import njit
+
+    @njit(cache=True)
+    def add(x, y):
+        return x + y
+    """
+
+FIRST_CALL = """if 1:
+    import time
+    start = time.perf_counter()
+    import numba
+    import startup_usecase
+    startup_usecase.add(1, 2)
+    print(time.perf_counter() - start)
+    """
+
+
+def time_import(repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.check_call([sys.executable, '-c', 'import numba'])
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def time_first_call(repeat):
+    tempdir = tempfile.mkdtemp(prefix='numba-startup-')
+    try:
+        with open(os.path.join(tempdir, 'startup_usecase.py'), 'w') as f:
+            f.write(CACHED_MODULE)
+        env = dict(os.environ, NUMBA_CACHE_DIR=os.path.join(tempdir, 'cache'))
+        cmd = [sys.executable, '-c', FIRST_CALL]
+        # Populate the cache
+        subprocess.check_call(cmd, cwd=tempdir, env=env,
+                              stdout=subprocess.DEVNULL)
+        timings = []
+        for _ in range(repeat):
+            out = subprocess.check_output(cmd, cwd=tempdir, env=env)
+            timings.append(float(out))
+        return timings
+    finally:
+        shutil.rmtree(tempdir, ignore_errors=True)
+
+
+def report(name, timings):
+    print('%-12s best %.3f s, median %.3f s (%d runs)'
+          % (name, min(timings), statistics.median(timings), len(timings)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('-r', '--repeat', type=int, default=10,
+                        help='number of runs of each benchmark')
+    args = parser.parse_args()
+    report('import', time_import(args.repeat))
+    report('first call', time_first_call(args.repeat))
+
+
+if __name__ == '__main__':
+    main()
@@ -2,6 +2,7 @@
 Expose top-level symbols that are safe for import *
 """
 
+import importlib
 import platform
 import re
 import sys
@@ -34,26 +35,9 @@ from numba.core.types import *
 from numba.core.decorators import (cfunc, generated_jit, jit, njit, stencil,
                                    jit_module)
 
-# Re-export vectorize decorators and the thread layer querying function
-from numba.np.ufunc import (vectorize, guvectorize, threading_layer,
-                            get_num_threads, set_num_threads)
-
 # Re-export Numpy helpers
 from numba.np.numpy_support import carray, farray, from_dtype
 
-# Re-export experimental
-from numba import experimental
-
-# Re-export experimental.jitclass as jitclass, this is deprecated
-from numba.experimental.jitclass.decorators import _warning_jitclass as jitclass
-
-# Initialize withcontexts
-import numba.core.withcontexts
-from numba.core.withcontexts import objmode_context as objmode
-
-# Bytes/unicode array support
-import numba.cpython.charseq
-
 # Keep this for backward compatibility.
 test = runtests.main
 
@@ -211,3 +195,46 @@ config.USING_SVML = _try_enable_svml()
 
 # Initialize typed containers
 import numba.typed
+
+# The following are re-exported lazily: their modules are only imported on
+# first access, as they are costly to import and not needed by every program.
+# {name: (module name, attribute name or None for the module itself)}
+_lazy_attributes = {
+    # vectorize decorators and the thread layer querying function
+    'vectorize': ('numba.np.ufunc', 'vectorize'),
+    'guvectorize': ('numba.np.ufunc', 'guvectorize'),
+    'threading_layer': ('numba.np.ufunc', 'threading_layer'),
+    'get_num_threads': ('numba.np.ufunc', 'get_num_threads'),
+    'set_num_threads': ('numba.np.ufunc', 'set_num_threads'),
+    'experimental': ('numba.experimental', None),
+    # experimental.jitclass as jitclass, this is deprecated
+    'jitclass': ('numba.experimental.jitclass.decorators',
+                 '_warning_jitclass'),
+    'objmode': ('numba.core.withcontexts', 'objmode_context'),
+}
+
+
+def _load_lazy_attribute(name):
+    modname, attr = _lazy_attributes[name]
+    value = importlib.import_module(modname)
+    if attr is not None:
+        value = getattr(value, attr)
+    globals()[name] = value
+    return value
+
+
+def __getattr__(name):
+    if name in _lazy_attributes:
+        return _load_lazy_attribute(name)
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_lazy_attributes))
+
+
+if sys.version_info < (3, 7):
+    # Module __getattr__ is not supported (PEP 562)
+    for _name in _lazy_attributes:
+        _load_lazy_attribute(_name)
+    del _name
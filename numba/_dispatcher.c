@@ -115,6 +115,9 @@ typedef struct DispatcherObject{
     PyObject *argnames;
     /* Tuple of default values */
     PyObject *defargs;
+    /* The number of calls after which a definition is hot (see
+       Dispatcher_call()), 0 to not track it */
+    unsigned long long hot_calls;
 } DispatcherObject;
 
 
@@ -166,6 +169,7 @@ Dispatcher_init(DispatcherObject *self, PyObject *args, PyObject *kwds)
     self->interpdef = NULL;
     self->has_stararg = has_stararg;
     self->exact_match_required = exact_match_required;
+    self->hot_calls = 0;
     return 0;
 }
 
@@ -173,9 +177,85 @@ static PyObject *
 Dispatcher_clear(DispatcherObject *self, PyObject *args)
 {
     dispatcher_clear(self->dispatcher);
+    self->firstdef = NULL;
+    self->fallbackdef = NULL;
+    self->interpdef = NULL;
+    Py_RETURN_NONE;
+}
+
+static PyObject *
+Dispatcher_remove(DispatcherObject *self, PyObject *args)
+{
+    PyObject *cfunc;
+
+    if (!PyArg_ParseTuple(args, "O", &cfunc)) {
+        return NULL;
+    }
+    dispatcher_remove_defn(self->dispatcher, (void*) cfunc);
+    /* Don't keep borrowed references to the removed definition */
+    if (self->firstdef == cfunc) {
+        self->firstdef = NULL;
+    }
+    if (self->fallbackdef == cfunc) {
+        self->fallbackdef = NULL;
+    }
+    if (self->interpdef == cfunc) {
+        self->interpdef = NULL;
+    }
+    Py_RETURN_NONE;
+}
+
+static PyObject *
+Dispatcher_set_hot_calls(DispatcherObject *self, PyObject *args)
+{
+    unsigned long long hot_calls;
+
+    if (!PyArg_ParseTuple(args, "K", &hot_calls)) {
+        return NULL;
+    }
+    self->hot_calls = hot_calls;
+    Py_RETURN_NONE;
+}
+
+static PyObject *
+Dispatcher_set_track_usage(DispatcherObject *self, PyObject *args)
+{
+    int track;
+
+    if (!PyArg_ParseTuple(args, "p", &track)) {
+        return NULL;
+    }
+    dispatcher_set_track_usage(self->dispatcher, track);
     Py_RETURN_NONE;
 }
 
+/* Return a list of (cfunc, last use) tuples for the definitions, where
+   the last use is a counter value, larger for more recently used ones */
+static PyObject *
+Dispatcher_last_uses(DispatcherObject *self, PyObject *args)
+{
+    int i, count;
+    PyObject *res, *item;
+
+    count = dispatcher_count(self->dispatcher);
+    res = PyList_New(count);
+    if (!res) {
+        return NULL;
+    }
+    for (i = 0; i < count; ++i) {
+        item = Py_BuildValue("(OK)",
+                             (PyObject *) dispatcher_get_function(
+                                self->dispatcher, i),
+                             dispatcher_last_used(self->dispatcher, i));
+        if (!item) {
+            Py_DECREF(res);
+            return NULL;
+        }
+        PyList_SET_ITEM(res, i, item);
+    }
+    return res;
+}
+
 static
 PyObject*
 Dispatcher_Insert(DispatcherObject *self, PyObject *args)
@@ -497,6 +577,25 @@ find_named_args(DispatcherObject *self, PyObject **pargs, PyObject **pkws)
     return 0;
 }
 
+/* Call the Python dispatcher's _on_hot() (e.g. for tiered compilation) if
+   *cfunc*, just returned by dispatcher_resolve(), has now been resolved
+   self->hot_calls times.  Errors are reported without failing the call. */
+static void
+notify_if_hot(DispatcherObject *self, PyObject *cfunc)
+{
+    PyObject *res;
+
+    if (!self->hot_calls
+        || dispatcher_last_calls(self->dispatcher) != self->hot_calls) {
+        return;
+    }
+    res = PyObject_CallMethod((PyObject *) self, "_on_hot", "O", cfunc);
+    if (res == NULL) {
+        PyErr_WriteUnraisable((PyObject *) self);
+    }
+    Py_XDECREF(res);
+}
+
 static PyObject*
 Dispatcher_call(DispatcherObject *self, PyObject *args, PyObject *kws)
 {
@@ -572,8 +671,12 @@ Dispatcher_call(DispatcherObject *self, PyObject *args, PyObject *kws)
     }
 
     if (matches == 1) {
-        /* Definition is found */
+        /* Definition is found.  Hold a reference to it during the call,
+           as the definition may be removed meanwhile (e.g. evicted). */
+        Py_INCREF(cfunc);
+        notify_if_hot(self, cfunc);
         retval = call_cfunc(self, cfunc, args, kws, locals);
+        Py_DECREF(cfunc);
     } else if (matches == 0) {
         /* No matching definition */
         if (self->can_compile) {
@@ -603,10 +706,173 @@ CLEANUP:
     return retval;
 }
 
+/* The number of distinct argument types whose definition is remembered
+   by Dispatcher_map() */
+#define MAP_CACHE_SIZE 4
+
+typedef struct {
+    /* The type codes of the arguments, NULL if the entry is unused */
+    int *tys;
+    /* Owned reference to the definition */
+    PyObject *cfunc;
+} map_cache_entry;
+
+/*
+ * Call the dispatcher for each item of an iterable, as (item,) or, with
+ * *star*, as tuple(item).  The definitions are resolved once for each
+ * distinct argument types; the calls which cannot be resolved directly
+ * (e.g. which need compiling, or folding named arguments) go through
+ * Dispatcher_call().  The results are appended to a new list, or stored
+ * in the *out* sequence.
+ */
+static PyObject *
+Dispatcher_map(DispatcherObject *self, PyObject *args)
+{
+    PyObject *iterable, *out = Py_None, *iter, *item, *callargs, *res;
+    PyObject *result = NULL, *cfunc, *locals = NULL;
+    map_cache_entry cache[MAP_CACHE_SIZE];
+    map_cache_entry *entry;
+    Py_ssize_t nargs, argct, i = 0, j;
+    int star, matches, k, rc, next_entry = 0;
+    int *tys;
+    PyThreadState *ts = PyThreadState_Get();
+
+    if (!PyArg_ParseTuple(args, "Oi|O", &iterable, &star, &out)) {
+        return NULL;
+    }
+    if (ts->use_tracing && ts->c_profilefunc) {
+        locals = PyEval_GetLocals();
+        if (locals == NULL) {
+            return NULL;
+        }
+    }
+    iter = PyObject_GetIter(iterable);
+    if (iter == NULL) {
+        return NULL;
+    }
+    nargs = PyTuple_GET_SIZE(self->argnames);
+    tys = malloc((nargs + 1) * sizeof(int));
+    if (tys == NULL) {
+        Py_DECREF(iter);
+        return PyErr_NoMemory();
+    }
+    memset(cache, 0, sizeof(cache));
+    if (out == Py_None) {
+        result = PyList_New(0);
+        if (result == NULL) {
+            goto CLEANUP;
+        }
+    } else {
+        Py_INCREF(out);
+        result = out;
+    }
+
+    while ((item = PyIter_Next(iter)) != NULL) {
+        if (star) {
+            callargs = PySequence_Tuple(item);
+        } else {
+            callargs = PyTuple_Pack(1, item);
+        }
+        Py_DECREF(item);
+        if (callargs == NULL) {
+            goto ERROR;
+        }
+        cfunc = NULL;
+        argct = PyTuple_GET_SIZE(callargs);
+        /* The arguments need no folding if all are given positionally */
+        if (!self->has_stararg && argct == nargs) {
+            for (j = 0; j < argct; ++j) {
+                tys[j] = typeof_typecode((PyObject *) self,
+                                         PyTuple_GET_ITEM(callargs, j));
+                if (tys[j] == -1) {
+                    /* Let Dispatcher_call() deal with it */
+                    PyErr_Clear();
+                    break;
+                }
+            }
+            for (k = 0; j == argct && k < MAP_CACHE_SIZE; ++k) {
+                if (cache[k].tys != NULL
+                    && !memcmp(cache[k].tys, tys, argct * sizeof(int))) {
+                    cfunc = cache[k].cfunc;
+                    break;
+                }
+            }
+            if (j == argct && cfunc == NULL) {
+                cfunc = dispatcher_resolve(self->dispatcher, tys, &matches,
+                                           !self->can_compile,
+                                           self->exact_match_required
+                                           | self->can_compile);
+                if (matches == 1) {
+                    /* Remember it, replacing the oldest entry */
+                    entry = &cache[next_entry];
+                    next_entry = (next_entry + 1) % MAP_CACHE_SIZE;
+                    if (entry->tys == NULL) {
+                        entry->tys = malloc((nargs + 1) * sizeof(int));
+                        if (entry->tys == NULL) {
+                            Py_DECREF(callargs);
+                            PyErr_NoMemory();
+                            goto ERROR;
+                        }
+                    }
+                    memcpy(entry->tys, tys, argct * sizeof(int));
+                    Py_INCREF(cfunc);
+                    Py_XSETREF(entry->cfunc, cfunc);
+                    notify_if_hot(self, cfunc);
+                } else {
+                    cfunc = NULL;
+                }
+            }
+        }
+        if (cfunc != NULL) {
+            res = call_cfunc(self, cfunc, callargs, NULL, locals);
+        } else {
+            res = Dispatcher_call(self, callargs, NULL);
+        }
+        Py_DECREF(callargs);
+        if (res == NULL) {
+            goto ERROR;
+        }
+        if (out == Py_None) {
+            rc = PyList_Append(result, res);
+        } else {
+            rc = PySequence_SetItem(result, i, res);
+        }
+        Py_DECREF(res);
+        if (rc) {
+            goto ERROR;
+        }
+        ++i;
+    }
+    if (!PyErr_Occurred()) {
+        goto CLEANUP;
+    }
+
+ERROR:
+    Py_CLEAR(result);
+CLEANUP:
+    for (k = 0; k < MAP_CACHE_SIZE; ++k) {
+        free(cache[k].tys);
+        Py_XDECREF(cache[k].cfunc);
+    }
+    free(tys);
+    Py_DECREF(iter);
+    return result;
+}
+
 static PyMethodDef Dispatcher_methods[] = {
     { "_clear", (PyCFunction)Dispatcher_clear, METH_NOARGS, NULL },
     { "_insert", (PyCFunction)Dispatcher_Insert, METH_VARARGS,
       "insert new definition"},
+    { "_remove", (PyCFunction)Dispatcher_remove, METH_VARARGS,
+      "remove a definition"},
+    { "_set_hot_calls", (PyCFunction)Dispatcher_set_hot_calls, METH_VARARGS,
+      "set the number of calls after which _on_hot() is called"},
+    { "_set_track_usage", (PyCFunction)Dispatcher_set_track_usage,
+      METH_VARARGS, "set whether resolutions update the usage counters"},
+    { "_last_uses", (PyCFunction)Dispatcher_last_uses, METH_NOARGS,
+      "return the definitions with their last use"},
+    { "_map", (PyCFunction)Dispatcher_map, METH_VARARGS,
+      "call the dispatcher for each item of an iterable"},
     { NULL },
 };
 
@@ -658,6 +924,196 @@ static PyTypeObject DispatcherType = {
 };
 
 
+
+/*
+ * A callable bound to a single compiled definition of a dispatcher.  It
+ * skips the argument folding and the overload resolution of
+ * Dispatcher_call().  When checked, the type codes of the arguments must
+ * be exactly the ones of the definition.
+ */
+typedef struct SpecializationObject {
+    PyObject_HEAD
+    /* The Python dispatcher, for typing the arguments */
+    PyObject *dispatcher;
+    /* Owned reference to the definition */
+    PyObject *cfunc;
+    Py_ssize_t argct;
+    /* The type codes of the arguments, NULL if unchecked */
+    int *tys;
+} SpecializationObject;
+
+static int
+Specialization_traverse(SpecializationObject *self, visitproc visit, void *arg)
+{
+    Py_VISIT(self->dispatcher);
+    Py_VISIT(self->cfunc);
+    return 0;
+}
+
+static int
+Specialization_clear(SpecializationObject *self)
+{
+    Py_CLEAR(self->dispatcher);
+    Py_CLEAR(self->cfunc);
+    return 0;
+}
+
+static void
+Specialization_dealloc(SpecializationObject *self)
+{
+    PyObject_GC_UnTrack((PyObject *) self);
+    Specialization_clear(self);
+    free(self->tys);
+    Py_TYPE(self)->tp_free((PyObject *) self);
+}
+
+static int
+Specialization_init(SpecializationObject *self, PyObject *args, PyObject *kwds)
+{
+    PyObject *dispatcher, *cfunc, *typecodes;
+    Py_ssize_t i, argct;
+    int *tys = NULL;
+
+    if (!PyArg_ParseTuple(args, "OOnO", &dispatcher, &cfunc, &argct,
+                          &typecodes)) {
+        return -1;
+    }
+    if (!PyObject_TypeCheck(dispatcher, &DispatcherType)) {
+        PyErr_SetString(PyExc_TypeError, "must be a dispatcher");
+        return -1;
+    }
+    if (!PyObject_TypeCheck(cfunc, &PyCFunction_Type)) {
+        PyErr_SetString(PyExc_TypeError, "must be builtin_function_or_method");
+        return -1;
+    }
+    if (typecodes != Py_None) {
+        typecodes = PySequence_Fast(typecodes, "type codes must be a sequence");
+        if (!typecodes) {
+            return -1;
+        }
+        if (PySequence_Fast_GET_SIZE(typecodes) != argct) {
+            PyErr_SetString(PyExc_ValueError,
+                            "expected one type code per argument");
+            Py_DECREF(typecodes);
+            return -1;
+        }
+        /* Allocate at least one item, so that NULL means unchecked */
+        tys = malloc((argct + 1) * sizeof(int));
+        if (!tys) {
+            Py_DECREF(typecodes);
+            PyErr_NoMemory();
+            return -1;
+        }
+        for (i = 0; i < argct; ++i) {
+            tys[i] = PyLong_AsLong(PySequence_Fast_GET_ITEM(typecodes, i));
+        }
+        Py_DECREF(typecodes);
+        if (PyErr_Occurred()) {
+            free(tys);
+            return -1;
+        }
+    }
+    Specialization_clear(self);
+    free(self->tys);
+    Py_INCREF(dispatcher);
+    self->dispatcher = dispatcher;
+    Py_INCREF(cfunc);
+    self->cfunc = cfunc;
+    self->argct = argct;
+    self->tys = tys;
+    return 0;
+}
+
+static PyObject*
+Specialization_call(SpecializationObject *self, PyObject *args, PyObject *kws)
+{
+    Py_ssize_t i;
+    int tc;
+    PyThreadState *ts = PyThreadState_Get();
+    PyObject *locals = NULL;
+
+    if (self->cfunc == NULL) {
+        PyErr_SetString(PyExc_RuntimeError, "specialization not initialized");
+        return NULL;
+    }
+    if (kws != NULL && PyDict_Size(kws) > 0) {
+        PyErr_SetString(PyExc_TypeError,
+                        "specializations only take positional arguments");
+        return NULL;
+    }
+    if (PyTuple_GET_SIZE(args) != self->argct) {
+        PyErr_Format(PyExc_TypeError,
+                     "expected %zd arguments, got %zd",
+                     self->argct, PyTuple_GET_SIZE(args));
+        return NULL;
+    }
+    if (self->tys != NULL) {
+        for (i = 0; i < self->argct; ++i) {
+            tc = typeof_typecode(self->dispatcher, PyTuple_GET_ITEM(args, i));
+            if (tc != self->tys[i]) {
+                if (tc != -1 || !PyErr_Occurred()) {
+                    PyErr_Format(PyExc_TypeError,
+                                 "argument %zd does not have the type of "
+                                 "the specialization", i);
+                }
+                return NULL;
+            }
+        }
+    }
+    /* Like the dispatcher's calls, go through call_cfunc() so that the
+       call is visible to the profiler */
+    if (ts->use_tracing && ts->c_profilefunc) {
+        locals = PyEval_GetLocals();
+        if (locals == NULL) {
+            return NULL;
+        }
+    }
+    return call_cfunc((DispatcherObject *) self->dispatcher, self->cfunc,
+                      args, NULL, locals);
+}
+
+static PyTypeObject SpecializationType = {
+    PyVarObject_HEAD_INIT(NULL, 0)
+    "_dispatcher.Specialization",                /* tp_name */
+    sizeof(SpecializationObject),                /* tp_basicsize */
+    0,                                           /* tp_itemsize */
+    (destructor)Specialization_dealloc,          /* tp_dealloc */
+    0,                                           /* tp_print */
+    0,                                           /* tp_getattr */
+    0,                                           /* tp_setattr */
+    0,                                           /* tp_compare */
+    0,                                           /* tp_repr */
+    0,                                           /* tp_as_number */
+    0,                                           /* tp_as_sequence */
+    0,                                           /* tp_as_mapping */
+    0,                                           /* tp_hash */
+    (PyCFunctionWithKeywords)Specialization_call, /* tp_call*/
+    0,                                           /* tp_str*/
+    0,                                           /* tp_getattro*/
+    0,                                           /* tp_setattro*/
+    0,                                           /* tp_as_buffer*/
+    Py_TPFLAGS_DEFAULT | Py_TPFLAGS_BASETYPE | Py_TPFLAGS_HAVE_GC, /* tp_flags*/
+    "Specialization object",                     /* tp_doc */
+    (traverseproc) Specialization_traverse,      /* tp_traverse */
+    (inquiry) Specialization_clear,              /* tp_clear */
+    0,                                           /* tp_richcompare */
+    0,                                           /* tp_weaklistoffset */
+    0,                                           /* tp_iter */
+    0,                                           /* tp_iternext */
+    0,                                           /* tp_methods */
+    0,                                           /* tp_members */
+    0,                                           /* tp_getset */
+    0,                                           /* tp_base */
+    0,                                           /* tp_dict */
+    0,                                           /* tp_descr_get */
+    0,                                           /* tp_descr_set */
+    0,                                           /* tp_dictoffset */
+    (initproc)Specialization_init,               /* tp_init */
+    0,                                           /* tp_alloc */
+    0,                                           /* tp_new */
+};
+
+
 static PyObject *compute_fingerprint(PyObject *self, PyObject *args)
 {
     PyObject *val;
@@ -688,5 +1144,13 @@ MOD_INIT(_dispatcher) {
     Py_INCREF(&DispatcherType);
     PyModule_AddObject(m, "Dispatcher", (PyObject*)(&DispatcherType));
 
+    SpecializationType.tp_new = PyType_GenericNew;
+    if (PyType_Ready(&SpecializationType) < 0) {
+        return MOD_ERROR_VAL;
+    }
+    Py_INCREF(&SpecializationType);
+    PyModule_AddObject(m, "Specialization",
+                       (PyObject*)(&SpecializationType));
+
     return MOD_SUCCESS_VAL(m);
 }
@@ -19,6 +19,9 @@ dispatcher_del(dispatcher_t *obj);
 void
 dispatcher_add_defn(dispatcher_t *obj, int tys[], void* callable);
 
+void
+dispatcher_remove_defn(dispatcher_t *obj, void* callable);
+
 void*
 dispatcher_resolve(dispatcher_t *obj, int sig[], int *matches,
                    int allow_unsafe, int exact_match_required);
@@ -26,6 +29,22 @@ dispatcher_resolve(dispatcher_t *obj, int sig[], int *matches,
 int
 dispatcher_count(dispatcher_t *obj);
 
+void*
+dispatcher_get_function(dispatcher_t *obj, int index);
+
+/* Whether dispatcher_resolve() updates the usage counters read by
+   dispatcher_last_used() and dispatcher_last_calls() (off by default) */
+void
+dispatcher_set_track_usage(dispatcher_t *obj, int track);
+
+unsigned long long
+dispatcher_last_used(dispatcher_t *obj, int index);
+
+/* The number of times the definition returned by the last successful
+   dispatcher_resolve() has been resolved, including this time */
+unsigned long long
+dispatcher_last_calls(dispatcher_t *obj);
+
 #ifdef __cplusplus
     }
 #endif
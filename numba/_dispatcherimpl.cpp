@@ -4,12 +4,14 @@
 
 typedef std::vector<Type> TypeTable;
 typedef std::vector<void*> Functions;
+typedef std::vector<unsigned long long> Ticks;
 
 struct _opaque_dispatcher {};
 
 class Dispatcher: public _opaque_dispatcher {
 public:
-    Dispatcher(TypeManager *tm, int argct): argct(argct), tm(tm) { }
+    Dispatcher(TypeManager *tm, int argct)
+        : argct(argct), tm(tm), trackUsage(false), clock(0), lastCalls(0) { }
 
     void addDefinition(Type args[], void *callable) {
         overloads.reserve(argct + overloads.size());
@@ -17,6 +19,20 @@ public:
             overloads.push_back(args[i]);
         }
         functions.push_back(callable);
+        lastUsed.push_back(++clock);
+        calls.push_back(0);
+    }
+
+    void removeDefinition(void *callable) {
+        for (int i = functions.size() - 1; i >= 0; --i) {
+            if (functions[i] == callable) {
+                functions.erase(functions.begin() + i);
+                lastUsed.erase(lastUsed.begin() + i);
+                calls.erase(calls.begin() + i);
+                overloads.erase(overloads.begin() + i * argct,
+                                overloads.begin() + (i + 1) * argct);
+            }
+        }
     }
 
     void* resolve(Type sig[], int &matches, bool allow_unsafe,
@@ -39,6 +55,10 @@ public:
                                          exact_match_required);
         }
         if (matches == 1) {
+            if (trackUsage) {
+                lastUsed[selected] = ++clock;
+                lastCalls = ++calls[selected];
+            }
             return functions[selected];
         }
         return NULL;
@@ -46,9 +66,19 @@ public:
 
     int count() const { return functions.size(); }
 
+    void setTrackUsage(bool track) { trackUsage = track; }
+
+    void *getFunction(int index) const { return functions[index]; }
+
+    unsigned long long getLastUsed(int index) const { return lastUsed[index]; }
+
+    unsigned long long getLastCalls() const { return lastCalls; }
+
     void clear() {
         functions.clear();
         overloads.clear();
+        lastUsed.clear();
+        calls.clear();
     }
 
 private:
@@ -59,6 +89,16 @@ private:
     // A flattened array of argument types to all overloads
     // (invariant: sizeof(overloads) == argct * sizeof(functions))
     TypeTable overloads;
+    // Whether resolutions update the usage counters below
+    bool trackUsage;
+    // The value of the clock when each overload was last resolved (or added)
+    Ticks lastUsed;
+    // A counter ticking at each successful resolution
+    unsigned long long clock;
+    // The number of times each overload was resolved
+    Ticks calls;
+    // The number of times the last resolved overload was resolved
+    unsigned long long lastCalls;
 };
 
 
@@ -91,6 +131,12 @@ dispatcher_add_defn(dispatcher_t *obj, int tys[], void* callable) {
     disp->addDefinition(args, callable);
 }
 
+void
+dispatcher_remove_defn(dispatcher_t *obj, void* callable) {
+    Dispatcher *disp = static_cast<Dispatcher*>(obj);
+    disp->removeDefinition(callable);
+}
+
 void*
 dispatcher_resolve(dispatcher_t *obj, int sig[], int *count, int allow_unsafe,
                    int exact_match_required) {
@@ -106,3 +152,27 @@ dispatcher_count(dispatcher_t *obj) {
     Dispatcher *disp = static_cast<Dispatcher*>(obj);
     return disp->count();
 }
+
+void*
+dispatcher_get_function(dispatcher_t *obj, int index) {
+    Dispatcher *disp = static_cast<Dispatcher*>(obj);
+    return disp->getFunction(index);
+}
+
+void
+dispatcher_set_track_usage(dispatcher_t *obj, int track) {
+    Dispatcher *disp = static_cast<Dispatcher*>(obj);
+    disp->setTrackUsage((bool) track);
+}
+
+unsigned long long
+dispatcher_last_used(dispatcher_t *obj, int index) {
+    Dispatcher *disp = static_cast<Dispatcher*>(obj);
+    return disp->getLastUsed(index);
+}
+
+unsigned long long
+dispatcher_last_calls(dispatcher_t *obj) {
+    Dispatcher *disp = static_cast<Dispatcher*>(obj);
+    return disp->getLastCalls();
+}
@@ -147,11 +147,22 @@ class TypeAnnotation(object):
 
             return io.getvalue()
 
-    def html_annotate(self, outfile):
+    def html_annotate(self, outfile, line_profile=None):
+        """
+        Write the annotations of the compiled functions as HTML to
+        *outfile*.  If *line_profile* (a dict of line number to
+        numba.core.lineprofile.LineStats) is given, only this function is
+        written, with its profile.
+        """
         # ensure that annotation information is assembled
         self.annotate_raw()
         # make a deep copy ahead of the pending mutations
         func_data = copy.deepcopy(self.func_data)
+        if line_profile is not None:
+            func_key = self._get_func_key()
+            func_data = {func_key: func_data[func_key]}
+            func_data[func_key]['line_profile'] = _format_line_profile(
+                line_profile)
 
         key = 'python_indent'
         for this_func in func_data.values():
@@ -205,8 +216,7 @@ class TypeAnnotation(object):
             indent_len = len(_getindent(line))
             func_data['ir_indent'][num].append(indent_len)
 
-        func_key = (self.func_id.filename + ':' + str(self.func_id.firstlineno + 1),
-                    self.signature)
+        func_key = self._get_func_key()
         if self.lifted_from is not None and self.lifted_from[1]['num_lifted_loops'] > 0:
             # This is a lifted loop function that is being compiled. Get the
             # numba ir for lines in loop function to use for annotating
@@ -267,11 +277,33 @@ class TypeAnnotation(object):
                         func_data['python_tags'][num] = 'object_tag'
         return self.func_data
 
+    def _get_func_key(self):
+        return (self.func_id.filename + ':' + str(self.func_id.firstlineno + 1),
+                self.signature)
 
     def __str__(self):
         return self.annotate()
 
 
+def _format_line_profile(line_profile):
+    """
+    Format the hits and cycles of the lines in *line_profile* for the HTML
+    annotations, including the lines without stats.
+    """
+    timed = any(st.cycles is not None for st in line_profile.values())
+    total = sum(st.cycles for st in line_profile.values()) if timed else 0
+    width = 12 + (24 if timed else 0)
+    formatted = defaultdict(lambda: ' ' * width)
+    for line, st in line_profile.items():
+        text = '%12d' % st.hits
+        if timed:
+            text += ' %16d' % st.cycles
+            if total:
+                text += ' %5.1f%%' % (100.0 * st.cycles / total)
+        formatted[line] = text.ljust(width)
+    return formatted
+
+
 re_longest_white_prefix = re.compile('^\s*')
 
 
@@ -2,6 +2,7 @@ from collections import namedtuple, defaultdict
 import copy
 import os
 import sys
+import threading
 from itertools import permutations, takewhile
 from contextlib import contextmanager
 
@@ -12,9 +13,9 @@ import llvmlite.llvmpy.core as lc
 from llvmlite.llvmpy.core import Type, Constant, LLVMException
 import llvmlite.binding as ll
 
-from numba.core import types, utils, typing, datamodel, debuginfo, funcdesc, config, cgutils, imputils
+from numba.core import types, utils, typing, datamodel, debuginfo, funcdesc, config, cgutils, imputils, bytecode
 from numba import _dynfunc, _helperlib
-from numba.core.compiler_lock import global_compiler_lock
+from numba.core.compiler_lock import serial_compiler_lock, registry_lock
 from numba.core.pythonapi import PythonAPI
 from numba.np import arrayobj
 from numba.core.imputils import (user_function, user_generator,
@@ -44,10 +45,13 @@ class OverloadSelector(object):
         self._cache = {}
 
     def find(self, sig):
-        out = self._cache.get(sig)
+        # append() replaces the cache rather than clearing it, so that a
+        # concurrent lookup can't store a result missing the new version
+        cache = self._cache
+        out = cache.get(sig)
         if out is None:
             out = self._find(sig)
-            self._cache[sig] = out
+            cache[sig] = out
         return out
 
     def _find(self, sig):
@@ -145,7 +149,7 @@ class OverloadSelector(object):
         """
         assert isinstance(sig, tuple), (value, sig)
         self.versions.append((sig, value))
-        self._cache.clear()
+        self._cache = {}
 
 
 @utils.runonce
@@ -249,7 +253,10 @@ class BaseContext(object):
         self.special_ops = {}
         self.cached_internal_func = {}
         self._pid = None
-        self._codelib_stack = []
+        # The stack of active code libraries is per-thread, as lowering
+        # can happen concurrently (see NUMBA_CONCURRENT_COMPILATION) and
+        # subtargets share it with their parent context.
+        self._codelib_tls = threading.local()
 
         self._boundscheck = False
 
@@ -263,6 +270,7 @@ class BaseContext(object):
         For subclasses to add initializer
         """
 
+    @registry_lock
     def refresh(self):
         """
         Refresh context with new declarations from known registries.
@@ -358,6 +366,7 @@ class BaseContext(object):
             obj.cached_internal_func = {}
         return obj
 
+    @registry_lock
     def install_registry(self, registry):
         """
         Install a *registry* (a imputils.Registry instance) of function
@@ -394,10 +403,12 @@ class BaseContext(object):
         for impl, sig in defns:
             self._get_constants.append(impl, sig)
 
+    @registry_lock
     def insert_user_function(self, func, fndesc, libs=()):
         impl = user_function(fndesc, libs)
         self._defns[func].append(impl, impl.signature)
 
+    @registry_lock
     def add_user_function(self, func, fndesc, libs=()):
         if func not in self._defns:
             msg = "{func} is not a registered user function"
@@ -410,6 +421,7 @@ class BaseContext(object):
         impl = user_generator(gendesc, libs)
         self._generators[genty] = gendesc, impl
 
+    @registry_lock
     def remove_user_function(self, func):
         """
         Remove user function *func*.
@@ -516,6 +528,7 @@ class BaseContext(object):
         """
         try:
             impl = self._get_constants.find((ty,))
+            self._note_implementation(impl)
             return impl(self, builder, ty, val)
         except NotImplementedError:
             raise NotImplementedError("Cannot lower constant of type '%s'" % (ty,))
@@ -552,9 +565,12 @@ class BaseContext(object):
             overloads = self._defns[key]
 
         try:
-            return _wrap_impl(overloads.find(sig.args), self, sig)
+            impl = overloads.find(sig.args)
         except NotImplementedError:
             pass
+        else:
+            self._note_implementation(impl)
+            return _wrap_impl(impl, self, sig)
         if isinstance(fn, types.Type):
             # It's a type instance => try to find a definition for the type class
             try:
@@ -611,18 +627,16 @@ class BaseContext(object):
                     return impl_ret_borrowed(context, builder, attrty, llval)
                 return imp
 
-        # Lookup specific getattr implementation for this type and attribute
-        overloads = self._getattrs[attr]
-        try:
-            return overloads.find((typ,))
-        except NotImplementedError:
-            pass
-        # Lookup generic getattr implementation for this type
-        overloads = self._getattrs[None]
-        try:
-            return overloads.find((typ,))
-        except NotImplementedError:
-            pass
+        # Lookup specific getattr implementation for this type and attribute,
+        # then generic getattr implementation for this type
+        for key in (attr, None):
+            overloads = self._getattrs[key]
+            try:
+                impl = overloads.find((typ,))
+            except NotImplementedError:
+                continue
+            self._note_implementation(impl)
+            return impl
 
         raise NotImplementedError("No definition for lowering %s.%s" % (typ, attr))
 
@@ -641,18 +655,16 @@ class BaseContext(object):
                 return impl(self, builder, sig, args, attr)
             return wrapped
 
-        # Lookup specific setattr implementation for this type and attribute
-        overloads = self._setattrs[attr]
-        try:
-            return wrap_setattr(overloads.find((typ, valty)))
-        except NotImplementedError:
-            pass
-        # Lookup generic setattr implementation for this type
-        overloads = self._setattrs[None]
-        try:
-            return wrap_setattr(overloads.find((typ, valty)))
-        except NotImplementedError:
-            pass
+        # Lookup specific setattr implementation for this type and attribute,
+        # then generic setattr implementation for this type
+        for key in (attr, None):
+            overloads = self._setattrs[key]
+            try:
+                impl = overloads.find((typ, valty))
+            except NotImplementedError:
+                continue
+            self._note_implementation(impl)
+            return wrap_setattr(impl)
 
         raise NotImplementedError("No definition for lowering %s.%s = %s"
                                   % (typ, attr, valty))
@@ -710,6 +722,7 @@ class BaseContext(object):
             return val
         try:
             impl = self._casts.find((fromty, toty))
+            self._note_implementation(impl)
             return impl(self, builder, fromty, toty, val)
         except NotImplementedError:
             raise NotImplementedError(
@@ -817,21 +830,34 @@ class BaseContext(object):
     def get_dummy_type(self):
         return GENERIC_POINTER
 
+    def get_internal_function_cache(self):
+        """
+        Return the persistent cache (a caching.InternalFunctionCache) of
+        the functions compiled by compile_subroutine(), or None if they are
+        not persisted.  Targets able to reload their code libraries may
+        override this.
+        """
+        return None
+
     def _compile_subroutine_no_cache(self, builder, impl, sig, locals={},
-                                     flags=None):
+                                     flags=None, persistent=False):
         """
         Invoke the compiler to compile a function to be used inside a
         nopython function, but without generating code to call that
         function.
 
+        If *persistent* is true, the resulting library can be serialized.
+
         Note this context's flags are not inherited.
         """
         # Compile
         from numba.core import compiler
 
-        with global_compiler_lock:
+        with serial_compiler_lock:
             codegen = self.codegen()
             library = codegen.create_library(impl.__name__)
+            if persistent:
+                library.enable_object_caching()
             if flags is None:
                 flags = compiler.Flags()
             flags.set('no_compile')
@@ -854,7 +880,9 @@ class BaseContext(object):
         Return an instance of CompileResult.
 
         If *caching* evaluates True, the function keeps the compiled function
-        for reuse in *.cached_internal_func*.
+        for reuse in *.cached_internal_func*, and in the persistent cache
+        returned by get_internal_function_cache() (only with the default
+        *flags*).
         """
         cache_key = (impl.__code__, sig, type(self.error_model))
         if not caching:
@@ -866,12 +894,32 @@ class BaseContext(object):
                 cache_key += tuple(c.cell_contents for c in impl.__closure__)
             cached = self.cached_internal_func.get(cache_key)
         if cached is None:
-            cres = self._compile_subroutine_no_cache(builder, impl, sig,
-                                                     locals=locals,
-                                                     flags=flags)
-            self.cached_internal_func[cache_key] = cres
-
-        cres = self.cached_internal_func[cache_key]
+            persistent = None
+            if caching and flags is None:
+                persistent = self.get_internal_function_cache()
+            index_key = None
+            if persistent is not None:
+                index_key = persistent.index_key(impl, sig, locals, self)
+            cres = None
+            if index_key is not None:
+                cres = persistent.load(index_key, self)
+            if cres is None and index_key is not None:
+                # The key is folded into the symbols, which other
+                # processes then load
+                with bytecode.FunctionIdentity.tagged_unique_names(
+                        persistent.symbol_tag(index_key)):
+                    cres = self._compile_subroutine_no_cache(
+                        builder, impl, sig, locals=locals, flags=flags,
+                        persistent=True)
+                persistent.save(index_key, cres)
+            elif cres is None:
+                cres = self._compile_subroutine_no_cache(
+                    builder, impl, sig, locals=locals, flags=flags)
+            # With concurrent compilation, another thread may have compiled
+            # the same function meanwhile: all callers link the first one
+            cres = self.cached_internal_func.setdefault(cache_key, cres)
+        else:
+            cres = cached
         # Allow inlining the function inside callers.
         self.active_code_library.add_linking_library(cres.library)
         return cres
@@ -1123,12 +1171,29 @@ class BaseContext(object):
         """
         return lc.Module(name)
 
+    @property
+    def _codelib_stack(self):
+        try:
+            return self._codelib_tls.stack
+        except AttributeError:
+            stack = self._codelib_tls.stack = []
+            return stack
+
     @property
     def active_code_library(self):
         """Get the active code library
         """
         return self._codelib_stack[-1]
 
+    def _note_implementation(self, impl):
+        """
+        Record the lowering implementation *impl* in the active code library,
+        if any (see CodeLibrary.note_implementation()).
+        """
+        stack = self._codelib_stack
+        if stack:
+            stack[-1].note_implementation(impl)
+
     @contextmanager
     def push_code_library(self, lib):
         """Push the active code library for the context
@@ -4,9 +4,11 @@ From NumbaPro
 """
 
 from collections import namedtuple, OrderedDict
+import contextlib
 import dis
 import inspect
 import itertools
+import threading
 from types import CodeType, ModuleType
 
 from numba.core import errors, utils
@@ -297,6 +299,30 @@ class FunctionIdentity(object):
     (the two might be distinct, e.g. in the `@generated_jit` case).
     """
     _unique_ids = itertools.count(1)
+    # The stack of tags folded into the unique names created by the
+    # current thread, see tagged_unique_names()
+    _tags = threading.local()
+
+    @classmethod
+    @contextlib.contextmanager
+    def tagged_unique_names(cls, tag):
+        """
+        A context manager folding *tag* into the unique names of the
+        functions created by the current thread until it exits.  Code
+        persisted across processes is compiled this way, with a tag
+        identifying its contents, so that its symbols don't clash with
+        those of different code compiled by other processes (the counter
+        of unique ids is per process).
+        """
+        try:
+            stack = cls._tags.stack
+        except AttributeError:
+            stack = cls._tags.stack = []
+        stack.append(tag)
+        try:
+            yield
+        finally:
+            stack.pop()
 
     @classmethod
     def from_function(cls, pyfunc):
@@ -335,7 +361,12 @@ class FunctionIdentity(object):
         # several different function objects with distinct closure
         # variables, so we make sure to disambiguate using an unique id.
         uid = next(cls._unique_ids)
-        self.unique_name = '{}${}'.format(self.func_qualname, uid)
+        tags = getattr(cls._tags, 'stack', None)
+        if tags:
+            self.unique_name = '{}$k{}${}'.format(self.func_qualname,
+                                                  tags[-1], uid)
+        else:
+            self.unique_name = '{}${}'.format(self.func_qualname, uid)
 
         return self
 
@@ -7,23 +7,35 @@ from abc import ABCMeta, abstractmethod, abstractproperty
 import contextlib
 import errno
 import hashlib
+import copy
 import inspect
 import itertools
+import numbers
 import os
 import pickle
+import re
 import sys
 import tempfile
+import time
+import types as pytypes
 import warnings
 
+try:
+    import sqlite3
+except ImportError:
+    # Python can be built without SQLite support
+    sqlite3 = None
+
 from numba.misc.appdirs import AppDirs
-from numba.core.utils import add_metaclass, file_replace
+from numba.core.utils import add_metaclass, cached_property, file_replace
 
 import numba
 from numba.core.errors import NumbaWarning
 from numba.core.base import BaseContext
 from numba.core.codegen import CodeLibrary
 from numba.core.compiler import CompileResult
-from numba.core import config, compiler
+from numba.core.bytecode import get_function_object
+from numba.core import config, compiler, types
 
 
 def _get_codegen(obj):
@@ -46,6 +58,80 @@ def _cache_log(msg, *args):
         print(msg)
 
 
+def _hash_code_object(h, code):
+    """
+    Feed the relevant contents of *code* (including nested code objects)
+    to the hash object *h*.  Filenames and line numbers are left out, so
+    that the result does not depend on where the source is installed.
+    """
+    h.update(code.co_code)
+    h.update(repr((code.co_names, code.co_varnames, code.co_freevars,
+                   code.co_cellvars, code.co_argcount,
+                   code.co_kwonlyargcount, code.co_flags)).encode('utf-8'))
+    for const in code.co_consts:
+        if isinstance(const, pytypes.CodeType):
+            _hash_code_object(h, const)
+        elif isinstance(const, frozenset):
+            # Iteration order depends on hash randomization
+            h.update(repr(sorted(map(repr, const))).encode('utf-8'))
+        else:
+            h.update(repr(const).encode('utf-8'))
+
+
+def _iter_code_names(code):
+    """
+    Yield the global and attribute names used by *code* and its nested
+    code objects.
+    """
+    for name in code.co_names:
+        yield name
+    for const in code.co_consts:
+        if isinstance(const, pytypes.CodeType):
+            yield from _iter_code_names(const)
+
+
+def _iter_jitted_dependencies(py_func):
+    """
+    Yield the Python functions of the jitted functions referenced by
+    *py_func*, either as globals or as attributes of global modules.
+    """
+    glbls = py_func.__globals__
+    names = set(_iter_code_names(py_func.__code__))
+    modules = [v for v in map(glbls.get, names)
+               if isinstance(v, pytypes.ModuleType)]
+    candidates = [glbls.get(name) for name in names]
+    candidates += [getattr(mod, name, None)
+                   for mod in modules for name in names]
+    for obj in candidates:
+        func = get_function_object(obj)
+        if func is not obj and isinstance(func, pytypes.FunctionType):
+            yield func
+
+
+def _get_content_stamp(py_func, py_file, _seen=None):
+    """
+    Get a stamp for *py_func* derived from the contents of its source file,
+    its bytecode and, recursively, those of the jitted functions it calls.
+    Unlike the file timestamp, it is stable across reinstallations.
+    """
+    if _seen is None:
+        _seen = set()
+    _seen.add(py_func)
+    h = hashlib.sha256()
+    if py_file is not None and os.path.isfile(py_file):
+        with open(py_file, 'rb') as f:
+            h.update(f.read())
+    _hash_code_object(h, py_func.__code__)
+    for dep in _iter_jitted_dependencies(py_func):
+        if dep not in _seen:
+            try:
+                dep_file = inspect.getfile(dep)
+            except TypeError:
+                dep_file = None
+            h.update(_get_content_stamp(dep, dep_file, _seen).encode('ascii'))
+    return h.hexdigest()
+
+
 @add_metaclass(ABCMeta)
 class _Cache(object):
 
@@ -158,9 +244,23 @@ class _SourceFileBackedLocatorMixin(object):
     """
     A cache locator mixin for functions which are backed by a well-known
     Python source file.
+
+    By default the cache is keyed on the source file's timestamp and size.
+    With NUMBA_CACHE_CONTENT_HASH, it is keyed on a hash of the source,
+    the bytecode and the jitted dependencies instead, so that the cache
+    survives reinstallation of unchanged sources.
     """
 
     def get_source_stamp(self):
+        if config.CACHE_CONTENT_HASH:
+            py_file = (None if getattr(sys, 'frozen', False)
+                       else self._py_file)
+            return _get_content_stamp(self._py_func, py_file)
+        return self._file_stamp
+
+    def _get_file_stamp(self):
+        # Called by the constructor, when the function is decorated: the
+        # file could be modified before the cache is first used
         if getattr(sys, 'frozen', False):
             st = os.stat(sys.executable)
         else:
@@ -192,8 +292,10 @@ class _UserProvidedCacheLocator(_SourceFileBackedLocatorMixin, _CacheLocator):
     `numba.config.CACHE_DIR`
     """
     def __init__(self, py_func, py_file):
+        self._py_func = py_func
         self._py_file = py_file
         self._lineno = py_func.__code__.co_firstlineno
+        self._file_stamp = self._get_file_stamp()
         drive, path = os.path.splitdrive(os.path.abspath(self._py_file))
         subpath = os.path.dirname(path).lstrip(os.path.sep)
         self._cache_path = os.path.join(config.CACHE_DIR, subpath)
@@ -216,8 +318,10 @@ class _InTreeCacheLocator(_SourceFileBackedLocatorMixin, _CacheLocator):
     """
 
     def __init__(self, py_func, py_file):
+        self._py_func = py_func
         self._py_file = py_file
         self._lineno = py_func.__code__.co_firstlineno
+        self._file_stamp = self._get_file_stamp()
         self._cache_path = os.path.join(os.path.dirname(self._py_file), '__pycache__')
 
     def get_cache_path(self):
@@ -231,8 +335,10 @@ class _UserWideCacheLocator(_SourceFileBackedLocatorMixin, _CacheLocator):
     """
 
     def __init__(self, py_func, py_file):
+        self._py_func = py_func
         self._py_file = py_file
         self._lineno = py_func.__code__.co_firstlineno
+        self._file_stamp = self._get_file_stamp()
         appdirs = AppDirs(appname="numba", appauthor=False)
         cache_dir = appdirs.user_cache_dir
         cache_subpath = os.path.dirname(py_file)
@@ -583,6 +689,214 @@ class IndexDataCacheFile(object):
             raise
 
 
+class BoundedCacheStore(object):
+    """
+    Implements a cache store bounded to *max_size* bytes of data, shared
+    by all the functions cached in a directory.
+
+    The entries are kept in a single SQLite database, indexed on the
+    function's filename base and a digest of the index key, so that a
+    lookup only reads and unpickles the requested entry (the database is
+    memory-mapped where possible).  As different keys may have the same
+    digest, the pickled key is stored along with the entry and compared
+    with the requested one.  Once the total size exceeds *max_size*, the
+    least recently used entries are evicted.  SQLite's locking makes the
+    store safe to use from several processes at once; the database is in
+    WAL mode, so that loading doesn't wait for the other processes saving.
+    """
+    _db_name = 'numba-cache.db'
+
+    # Bumped when the schema changes, stored as the database's user_version
+    _schema_version = 1
+    _schema = [
+        """CREATE TABLE IF NOT EXISTS entries (
+            name TEXT NOT NULL,
+            digest TEXT NOT NULL,
+            key BLOB NOT NULL,
+            stamp BLOB NOT NULL,
+            data BLOB NOT NULL,
+            size INTEGER NOT NULL,
+            atime REAL NOT NULL
+        )""",
+        "CREATE INDEX IF NOT EXISTS entries_digest ON entries (name, digest)",
+        "CREATE INDEX IF NOT EXISTS entries_atime ON entries (atime)",
+    ]
+
+    # How long to wait for another process to release the database
+    _timeout = 30.0
+    # Same for the update of the access time on load, which is best-effort
+    _atime_timeout = 0.1
+    _mmap_size = 256 * 1024 * 1024
+    _clock = time.time
+
+    def __init__(self, cache_path, filename_base, source_stamp, max_size):
+        self._cache_path = cache_path
+        self._db_path = os.path.join(self._cache_path, self._db_name)
+        self._name = filename_base
+        # Entries are stale if either the source or Numba changed
+        self._source_stamp = self._dump((numba.__version__, source_stamp))
+        self._max_size = max_size
+
+    def flush(self):
+        try:
+            with self._transaction() as conn:
+                conn.execute("DELETE FROM entries WHERE name = ?",
+                             (self._name,))
+        except sqlite3.OperationalError as e:
+            # E.g. the database is locked for too long by another process
+            warnings.warn("Cannot flush the cache entries of %r from %r: %s"
+                          % (self._name, self._db_path, e), NumbaWarning)
+
+    def save(self, key, data):
+        """
+        Save a new cache entry with *key* and *data*, evicting the least
+        recently used entries if the store grows too large.
+        """
+        data = self._dump(data)
+        row = (self._name, self._key_digest(key), self._dump(key),
+               self._source_stamp, data, len(data), self._clock())
+        try:
+            with self._transaction() as conn:
+                rowid = self._find(conn, key)
+                if rowid is not None:
+                    conn.execute("DELETE FROM entries WHERE rowid = ?",
+                                 (rowid,))
+                conn.execute("INSERT INTO entries (name, digest, key, stamp, "
+                             "data, size, atime) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                             row)
+                # Stale entries of this function can never be loaded again
+                conn.execute("DELETE FROM entries WHERE name = ? "
+                             "AND stamp != ?",
+                             (self._name, self._source_stamp))
+                self._evict(conn)
+        except sqlite3.OperationalError as e:
+            # E.g. the database is locked for too long by another process
+            _cache_log("[cache] cannot save to %r: %s", self._db_path, e)
+            return
+        _cache_log("[cache] data saved to %r", self._db_path)
+
+    def load(self, key):
+        """
+        Load a cache entry with *key*.
+        """
+        try:
+            with self._connect() as conn:
+                rowid = self._find(conn, key)
+                if rowid is None:
+                    return
+                stamp, data = conn.execute("SELECT stamp, data FROM entries "
+                                           "WHERE rowid = ?",
+                                           (rowid,)).fetchone()
+                if stamp != self._source_stamp:
+                    return
+                # Don't wait for a concurrent writer: a missed update only
+                # affects the eviction order
+                conn.execute("PRAGMA busy_timeout = %d"
+                             % (self._atime_timeout * 1000,))
+                try:
+                    conn.execute("UPDATE entries SET atime = ? "
+                                 "WHERE rowid = ?", (self._clock(), rowid))
+                except sqlite3.OperationalError:
+                    pass
+        except sqlite3.OperationalError as e:
+            _cache_log("[cache] cannot load from %r: %s", self._db_path, e)
+            return
+        _cache_log("[cache] data loaded from %r", self._db_path)
+        return pickle.loads(data)
+
+    def _evict(self, conn):
+        total, = conn.execute("SELECT TOTAL(size) FROM entries").fetchone()
+        if total <= self._max_size:
+            return
+        victims = []
+        for rowid, size in conn.execute("SELECT rowid, size "
+                                        "FROM entries ORDER BY atime"):
+            if total <= self._max_size:
+                break
+            victims.append((rowid,))
+            total -= size
+        conn.executemany("DELETE FROM entries WHERE rowid = ?", victims)
+        _cache_log("[cache] evicted %d entries from %r",
+                   len(victims), self._db_path)
+
+    @contextlib.contextmanager
+    def _connect(self):
+        # Autocommit mode, transactions are managed explicitly
+        conn = sqlite3.connect(self._db_path, timeout=self._timeout,
+                               isolation_level=None)
+        try:
+            conn.execute("PRAGMA mmap_size = %d" % (self._mmap_size,))
+            self._ensure_schema(conn)
+            yield conn
+        finally:
+            conn.close()
+
+    def _ensure_schema(self, conn):
+        """
+        Create the schema of the database if not done yet.
+        """
+        if self._get_schema_version(conn) == self._schema_version:
+            return
+        # These must be set outside a transaction; both persist in the
+        # database.  WAL lets the loads read while another process writes.
+        conn.execute("PRAGMA auto_vacuum = FULL")
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Another process may have created it meanwhile
+            if self._get_schema_version(conn) != self._schema_version:
+                for statement in self._schema:
+                    conn.execute(statement)
+                conn.execute("PRAGMA user_version = %d"
+                             % (self._schema_version,))
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        else:
+            conn.execute("COMMIT")
+
+    def _get_schema_version(self, conn):
+        version, = conn.execute("PRAGMA user_version").fetchone()
+        return version
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        with self._connect() as conn:
+            # Take the write lock upfront to avoid deadlocking with
+            # another writer
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            else:
+                conn.execute("COMMIT")
+
+    def _dump(self, obj):
+        return pickle.dumps(obj, protocol=-1)
+
+    def _key_digest(self, key):
+        # Not the pickle of the key, which is not stable across processes:
+        # the pickles of the Numba types include process-dependent
+        # attributes, whereas their representations are their names
+        return hashlib.sha256(repr(key).encode('utf-8')).hexdigest()
+
+    def _find(self, conn, key):
+        """
+        Return the rowid of the entry of this function with *key*, or None.
+        Keys are compared by equality, as in the index of the file-based
+        cache, since distinct keys can have the same digest (e.g. the types
+        of same-named classes).
+        """
+        for rowid, pickled_key in conn.execute(
+                "SELECT rowid, key FROM entries WHERE name = ? AND digest = ?",
+                (self._name, self._key_digest(key))):
+            if pickle.loads(pickled_key) == key:
+                return rowid
+        return None
+
+
 class Cache(_Cache):
     """
     A per-function compilation cache.  The cache saves data in separate
@@ -600,6 +914,10 @@ class Cache(_Cache):
     Separate index and data files per Python version avoid pickle
     compatibility problems.
 
+    If NUMBA_CACHE_MAX_SIZE is set, the data is instead saved in a
+    ``BoundedCacheStore`` shared by all functions cached in the same
+    directory.
+
     Note:
     This contains the driver logic only.  The core logic is provided
     by a subclass of ``_CacheImpl`` specified as *_impl_class* in the subclass.
@@ -612,13 +930,25 @@ class Cache(_Cache):
         self._name = repr(py_func)
         self._impl = self._impl_class(py_func)
         self._cache_path = self._impl.locator.get_cache_path()
+        self.enable()
+
+    @cached_property
+    def _cache_file(self):
+        # Created on first use rather than when the function is decorated,
+        # as the source stamp can be costly to compute (e.g. the content
+        # hash of the function and its dependencies)
         # This may be a bit strict but avoids us maintaining a magic number
         source_stamp = self._impl.locator.get_source_stamp()
         filename_base = self._impl.filename_base
-        self._cache_file = IndexDataCacheFile(cache_path=self._cache_path,
-                                              filename_base=filename_base,
-                                              source_stamp=source_stamp)
-        self.enable()
+        if config.CACHE_MAX_SIZE > 0 and sqlite3 is not None:
+            return BoundedCacheStore(cache_path=self._cache_path,
+                                     filename_base=filename_base,
+                                     source_stamp=source_stamp,
+                                     max_size=config.CACHE_MAX_SIZE)
+        else:
+            return IndexDataCacheFile(cache_path=self._cache_path,
+                                      filename_base=filename_base,
+                                      source_stamp=source_stamp)
 
     def __repr__(self):
         return "<%s py_func=%r>" % (self.__class__.__name__, self._name)
@@ -692,7 +1022,14 @@ class Cache(_Cache):
         Compute index key for the given signature and codegen.
         It includes a description of the OS and target architecture.
         """
-        return (sig, codegen.magic_tuple())
+        key = (sig, codegen.magic_tuple())
+        if config.NRT_TRACE_ALLOC:
+            # Keep the code tracing the allocations apart
+            key += ('nrt_trace_alloc',)
+        if config.NRT_SINGLE_THREADED:
+            # The NRT linked into the code uses non-atomic refcounts
+            key += ('nrt_single_threaded',)
+        return key
 
 
 class FunctionCache(Cache):
@@ -702,6 +1039,265 @@ class FunctionCache(Cache):
     _impl_class = CompileResultCacheImpl
 
 
+def _hash_internal_value(h, value, seen):
+    """
+    Feed a deterministic description of *value*, as referenced by the
+    implementation of an internal function, to the hash object *h*.
+    Return False if *value* cannot be described reliably.
+    """
+    if value is None or isinstance(value, (bool, str, bytes)):
+        h.update(repr(value).encode('utf-8'))
+    elif isinstance(value, numbers.Number):
+        # Includes NumPy scalars
+        h.update(("%s:%r" % (type(value).__name__, value)).encode('utf-8'))
+    elif isinstance(value, (tuple, list)):
+        h.update(("%s:%d" % (type(value).__name__, len(value))).encode('utf-8'))
+        return all(_hash_internal_value(h, v, seen) for v in value)
+    elif isinstance(value, pytypes.ModuleType):
+        h.update(("module:%s" % value.__name__).encode('utf-8'))
+    elif isinstance(value, pytypes.FunctionType):
+        return _hash_internal_function(h, value, seen)
+    elif isinstance(value, types.Type):
+        h.update(("type:%s" % value).encode('utf-8'))
+    else:
+        func = get_function_object(value)
+        if func is not value:
+            # A dispatcher
+            return _hash_internal_value(h, func, seen)
+        name = getattr(value, '__qualname__', None)
+        module = getattr(value, '__module__', None)
+        if name is None or module is None:
+            # E.g. arrays, or arbitrary instances
+            return False
+        # Classes, builtin functions...
+        h.update(("%s.%s" % (module, name)).encode('utf-8'))
+    return True
+
+
+def _hash_internal_function(h, func, seen):
+    """
+    Feed *func*'s code, closure variables and referenced globals to the
+    hash object *h*, recursing into the functions it references.
+    """
+    if func in seen:
+        h.update(("seen:%s" % func.__qualname__).encode('utf-8'))
+        return True
+    seen.add(func)
+    h.update(("function:%s.%s" % (func.__module__, func.__qualname__))
+             .encode('utf-8'))
+    _hash_code_object(h, func.__code__)
+    for cell in func.__closure__ or ():
+        if not _hash_internal_value(h, cell.cell_contents, seen):
+            return False
+    glbls = func.__globals__
+    for name in sorted(set(_iter_code_names(func.__code__))):
+        if name in glbls:
+            h.update(name.encode('utf-8'))
+            if not _hash_internal_value(h, glbls[name], seen):
+                return False
+    return True
+
+
+# The unique names made by FunctionIdentity, as found in mangled symbols
+# ("$" is mangled as "$24"): "<qualname>$<uid>", or "<qualname>$k<tag>$<uid>"
+# for the code compiled with tagged_unique_names()
+_unique_name_re = re.compile(r'\$24(k[0-9a-f]+\$24)?[0-9]+')
+
+
+def _has_untagged_symbols(library):
+    """
+    Whether *library* defines functions named by an unique id alone, which
+    may be given to different functions by other processes.
+    """
+    for name in library.get_defined_symbols():
+        for m in _unique_name_re.finditer(name):
+            if m.group(1) is None:
+                return True
+    return False
+
+
+def _is_numba_function(func):
+    """
+    Whether *func* is part of Numba, whose code is keyed by its version.
+    """
+    module = getattr(func, '__module__', None) or ''
+    return module == 'numba' or module.startswith('numba.')
+
+
+class InternalFunctionCache(object):
+    """
+    A persistent cache of the functions compiled by
+    ``BaseContext.compile_subroutine()``, such as sorting or linear algebra
+    helpers, shared by all processes.  Entries are keyed on a hash of the
+    implementation (its code, closure variables and referenced globals,
+    recursively), the signature, the relevant target options and config,
+    the Numba version and the target architecture; each is stored in its
+    own file.
+
+    The functions are compiled with their key folded into the names of
+    their symbols (see symbol_tag()), which therefore don't clash with
+    other code compiled or loaded in the process.  Those linking functions
+    compiled beforehand, e.g. overload implementations, which are named by
+    a per-process counter, are not saved.
+
+    Only the source of Numba (through its version) and of the functions
+    hashed into the key is accounted for.  A function whose code includes
+    other implementations from outside Numba, such as user ``@overload``,
+    ``@intrinsic`` or ``register_jitable`` functions, is not saved.
+    Functions decorated with ``register_jitable`` are compiled by their own
+    dispatcher, not through ``compile_subroutine()``, and are never saved
+    on their own.
+    """
+
+    def __init__(self, cache_path):
+        self._cache_path = cache_path
+        # {key: the functions hashed into the key}, until the function is
+        # loaded or saved
+        self._covered = {}
+
+    @property
+    def cache_path(self):
+        return self._cache_path
+
+    def index_key(self, impl, sig, locals, target_context):
+        """
+        Compute the key of the internal function *impl* compiled for *sig*
+        in *target_context*, or return None if it cannot be cached.
+        """
+        # The subtargets of dispatchers hold ParallelOptions, which are true
+        # even when disabled
+        parallel = target_context.auto_parallel
+        if target_context.fastmath or getattr(parallel, 'enabled', parallel):
+            return
+        h = hashlib.sha256()
+        h.update(repr((numba.__version__, sys.version_info[:2],
+                       _get_codegen(target_context).magic_tuple(),
+                       type(target_context.error_model).__name__,
+                       target_context.enable_nrt,
+                       target_context.enable_debuginfo,
+                       target_context.enable_boundscheck,
+                       # The config changing the generated code
+                       config.OPT, config.NRT_TRACE_ALLOC,
+                       config.NRT_SINGLE_THREADED,
+                       config.STACK_ARRAY_MAX_BYTES,
+                       str(sig.args), str(sig.return_type),
+                       sorted((k, str(v)) for k, v in locals.items())))
+                 .encode('utf-8'))
+        seen = set()
+        if not _hash_internal_function(h, impl, seen):
+            return
+        key = h.hexdigest()
+        self._covered[key] = seen
+        return key
+
+    def symbol_tag(self, key):
+        """
+        The tag folded into the names of the symbols of the function
+        compiled for *key* (see FunctionIdentity.tagged_unique_names()).
+        """
+        return key[:16]
+
+    def load(self, key, target_context):
+        """
+        Load the compile result for *key*, or return None if not found.
+        """
+        path = self._data_path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except EnvironmentError:
+            return
+        codegen = target_context.codegen()
+        try:
+            libdata, fndesc, signature = pickle.loads(data)
+            library = codegen.unserialize_library(libdata)
+        except Exception:
+            # A truncated or corrupted file, it will be overwritten
+            _cache_log("[cache] invalid internal function in %r", path)
+            return
+        self._covered.pop(key, None)
+        _cache_log("[cache] internal function loaded from %r", path)
+        return compiler.compile_result(
+            typing_context=target_context.typing_context,
+            target_context=target_context,
+            library=library,
+            fndesc=fndesc,
+            signature=signature,
+            objectmode=False,
+            interpmode=False,
+            lifted=(),
+            reload_init=[],
+            )
+
+    def save(self, key, cres):
+        """
+        Save the compile result *cres* of an internal function for *key*.
+        """
+        covered = self._covered.pop(key, ())
+        if cres.library.has_dynamic_globals or cres.reload_init:
+            return
+        if _has_untagged_symbols(cres.library):
+            return
+        # The code of the other implementations isn't part of the key
+        for func in cres.library.iter_implementations():
+            if func not in covered and not _is_numba_function(func):
+                _cache_log("[cache] internal function not saved, it "
+                           "includes %r", func)
+                return
+        # Those don't need to be pickled and may fail
+        fndesc = copy.copy(cres.fndesc)
+        fndesc.typemap = fndesc.calltypes = None
+        data = pickle.dumps((cres.library.serialize_using_object_code(),
+                             fndesc, cres.signature), protocol=-1)
+        path = self._data_path(key)
+        tmpname = '%s.tmp.%d' % (path, os.getpid())
+        try:
+            with open(tmpname, "wb") as f:
+                f.write(data)
+            file_replace(tmpname, path)
+        except EnvironmentError:
+            # The cache is best-effort
+            try:
+                os.unlink(tmpname)
+            except OSError:
+                pass
+            return
+        _cache_log("[cache] internal function saved to %r", path)
+
+    def _data_path(self, key):
+        return os.path.join(self._cache_path, '%s.nbc' % (key,))
+
+
+_internal_function_caches = {}
+
+
+def get_internal_function_cache():
+    """
+    Return the InternalFunctionCache for the current configuration, or None
+    if its directory cannot be written to.  It is located in the
+    "internal" subdirectory of NUMBA_CACHE_DIR if set, or of the user-wide
+    cache directory.
+    """
+    if config.CACHE_DIR:
+        base = config.CACHE_DIR
+    else:
+        base = AppDirs(appname="numba", appauthor=False).user_cache_dir
+    path = os.path.join(base, 'internal')
+    try:
+        return _internal_function_caches[path]
+    except KeyError:
+        pass
+    try:
+        os.makedirs(path, exist_ok=True)
+        tempfile.TemporaryFile(dir=path).close()
+    except OSError:
+        cache = None
+    else:
+        cache = InternalFunctionCache(path)
+    _internal_function_caches[path] = cache
+    return cache
+
+
 # Remember used cache filename prefixes.
 _lib_cache_prefixes = set([''])
 
@@ -9,10 +9,10 @@ import llvmlite.llvmpy.passes as lp
 import llvmlite.binding as ll
 import llvmlite.ir as llvmir
 
-from numba.core import utils, config, cgutils
+from numba.core import utils, config, cgutils, compile_profiler
 from numba.core.runtime.nrtopt import remove_redundant_nrt_refct
 from numba.core.runtime import rtsys
-from numba.core.compiler_lock import require_global_compiler_lock
+from numba.core.compiler_lock import codegen_lock
 from numba.misc.inspection import disassemble_elf_to_cfg
 
 
@@ -88,17 +88,37 @@ class CodeLibrary(object):
     _finalized = False
     _object_caching_enabled = False
     _disable_inspection = False
-
-    def __init__(self, codegen, name):
+    _ir_released = False
+    # Whether the final module is owned by an execution engine, which keeps
+    # it resident for the lifetime of the process
+    _engine_owns_module = False
+    # The object code of the final module, kept until its symbols are written
+    # to the perf map (see NUMBA_PERF_MAP)
+    _perf_map_object = None
+
+    @codegen_lock
+    def __init__(self, codegen, name, opt_level=None):
         self._codegen = codegen
         self._name = name
+        # LLVM optimization level, None means NUMBA_OPT
+        self._opt_level = opt_level
         self._linking_libraries = []   # maintain insertion order
+        # Libraries whose symbols are referenced by this library instead of
+        # being linked in (see NUMBA_LINK_BY_REFERENCE); they are kept alive
+        # as long as this library
+        self._referenced_libraries = []
         self._final_module = ll.parse_assembly(
             str(self._codegen._create_empty_module(self._name)))
         self._final_module.name = cgutils.normalize_ir_text(self._name)
         self._shared_module = None
+        # The bitcode of the module for linking, once the IR is released
+        self._shared_bitcode = None
         # Track names of the dynamic globals
         self._dynamic_globals = []
+        # Objects whose memory is addressed by the code of this library
+        self._kept_alive = []
+        # The Python functions implementing code lowered into this library
+        self._implementations = set()
 
     @property
     def has_dynamic_globals(self):
@@ -130,7 +150,8 @@ class CodeLibrary(object):
         """
         # Enforce data layout to enable layout-specific optimizations
         ll_module.data_layout = self._codegen._data_layout
-        with self._codegen._function_pass_manager(ll_module) as fpm:
+        with self._codegen._function_pass_manager(
+                ll_module, self._opt_level) as fpm:
             # Run function-level optimizations to reduce memory usage and improve
             # module-level optimization.
             for func in ll_module.functions:
@@ -142,7 +163,11 @@ class CodeLibrary(object):
         """
         Internal: optimize this library's final module.
         """
-        self._codegen._mpm.run(self._final_module)
+        if self._opt_level is None:
+            self._codegen._mpm.run(self._final_module)
+        else:
+            mpm = self._codegen._module_pass_manager(self._opt_level)
+            mpm.run(self._final_module)
         self._final_module = remove_redundant_nrt_refct(self._final_module)
 
     def _get_module_for_linking(self):
@@ -157,6 +182,10 @@ class CodeLibrary(object):
         self._ensure_finalized()
         if self._shared_module is not None:
             return self._shared_module
+        if self._shared_bitcode is not None:
+            # The IR was released: parse it again once, for all the callers
+            self._shared_module = ll.parse_bitcode(self._shared_bitcode)
+            return self._shared_module
         mod = self._final_module
         to_fix = []
         nfuncs = 0
@@ -196,6 +225,15 @@ class CodeLibrary(object):
         library._ensure_finalized()
         self._linking_libraries.append(library)
 
+    def keep_alive(self, obj):
+        """
+        Keep *obj* alive as long as this library, e.g. because its address
+        is embedded in the code.  The libraries this library is linked into
+        keep it alive too.
+        """
+        self._kept_alive.append(obj)
+
+    @codegen_lock
     def add_ir_module(self, ir_module):
         """
         Add a LLVM IR module's contents to this library.
@@ -208,20 +246,45 @@ class CodeLibrary(object):
         ll_module.verify()
         self.add_llvm_module(ll_module)
 
+    @codegen_lock
     def add_llvm_module(self, ll_module):
-        self._optimize_functions(ll_module)
+        with compile_profiler.record('function_optimization', 'llvm'):
+            self._optimize_functions(ll_module)
         # TODO: we shouldn't need to recreate the LLVM module object
         ll_module = remove_redundant_nrt_refct(ll_module)
         self._final_module.link_in(ll_module)
 
+    def note_implementation(self, func):
+        """
+        Record that code implemented by the Python function *func* (e.g.
+        the function being compiled, or a lowering implementation) was
+        lowered into this library.
+        """
+        self._implementations.add(func)
+
+    def iter_implementations(self):
+        """
+        Iterate over the Python functions implementing the code of this
+        library and of the libraries linked into it or referenced by it.
+        """
+        seen = set()
+        todo = [self]
+        while todo:
+            library = todo.pop()
+            if library in seen:
+                continue
+            seen.add(library)
+            yield from library._implementations
+            todo.extend(library._linking_libraries)
+            todo.extend(library._referenced_libraries)
+
+    @codegen_lock
     def finalize(self):
         """
         Finalize the library.  After this call, nothing can be added anymore.
         Finalization involves various stages of code optimization and
         linking.
         """
-        require_global_compiler_lock()
-
         # Report any LLVM-related problems to the user
         self._codegen._check_llvm_bugs()
 
@@ -236,17 +299,59 @@ class CodeLibrary(object):
         for library in self._linking_libraries:
             if library not in seen:
                 seen.add(library)
+                if self._can_link_by_reference(library):
+                    self._add_referenced_library(library)
+                    continue
                 self._final_module.link_in(
                     library._get_module_for_linking(), preserve=True,
                 )
+                # The linked-in code may itself reference other libraries
+                for referenced in library._referenced_libraries:
+                    self._add_referenced_library(referenced)
 
         # Optimize the module after all dependences are linked in above,
         # to allow for inlining.
-        self._optimize_final_module()
+        with compile_profiler.record('module_optimization', 'llvm'):
+            self._optimize_final_module()
 
         self._final_module.verify()
         self._finalize_final_module()
 
+    def _can_link_by_reference(self, library):
+        """
+        Whether *library* can be referenced by symbol rather than linked
+        into this library.
+        """
+        return False
+
+    def _add_referenced_library(self, library):
+        if library not in self._referenced_libraries:
+            self._referenced_libraries.append(library)
+
+    def _iter_referenced_libraries(self):
+        """
+        Iterate over the libraries referenced by this library, directly or
+        not, each one after the libraries it references itself.
+        """
+        seen = set()
+
+        def visit(library):
+            for referenced in library._referenced_libraries:
+                if referenced not in seen:
+                    seen.add(referenced)
+                    yield from visit(referenced)
+                    yield referenced
+
+        return visit(self)
+
+    def _get_referenced_symbols(self):
+        names = set()
+        for library in self._referenced_libraries:
+            for fn in library._get_module_for_linking().functions:
+                if not fn.is_declaration:
+                    names.add(fn.name)
+        return names
+
     def _finalize_dyanmic_globals(self):
         # Scan for dynamic globals
         for gv in self._final_module.global_variables:
@@ -255,9 +360,11 @@ class CodeLibrary(object):
 
     def _verify_declare_only_symbols(self):
         # Verify that no declare-only function compiled by numba.
+        referenced = self._get_referenced_symbols()
         for fn in self._final_module.functions:
             # We will only check for symbol name starting with '_ZN5numba'
-            if fn.is_declaration and fn.name.startswith('_ZN5numba'):
+            if (fn.is_declaration and fn.name.startswith('_ZN5numba')
+                    and fn.name not in referenced):
                 msg = 'Symbol {} not linked properly'
                 raise AssertionError(msg.format(fn.name))
 
@@ -277,7 +384,8 @@ class CodeLibrary(object):
         cleanup = self._codegen._add_module(self._final_module)
         if cleanup:
             weakref.finalize(self, cleanup)
-        self._finalize_specific()
+        with compile_profiler.record('finalize_object', 'llvm'):
+            self._finalize_specific()
 
         self._finalized = True
 
@@ -291,6 +399,49 @@ class CodeLibrary(object):
             if asm:
                 dump("ASSEMBLY %s" % self._name, self.get_asm_str(), 'asm')
 
+    @codegen_lock
+    def release_ir(self):
+        """
+        Release the LLVM IR of this finalized library, keeping only what is
+        needed to execute it, to link it into other libraries (as bitcode)
+        and to serialize it with its object code.  The inspection methods
+        cannot be used anymore afterwards.  The final module is kept: the
+        execution engine owning it keeps its IR in native memory anyway, so
+        this does not free the bulk of the IR.  The module for linking is
+        parsed again from the bitcode when the library is first linked into
+        a caller.
+        """
+        self._ensure_finalized()
+        if self._ir_released:
+            return
+        self._shared_bitcode = self._get_module_for_linking().as_bitcode()
+        self._shared_module = None
+        self._ir_released = True
+
+    def get_retained_sizes(self):
+        """
+        Return a dictionary estimating the memory, in bytes, retained by
+        this library: the size of the LLVM IR of its modules, measured as
+        bitcode, split between the IR held by the library alone and the IR
+        of the module owned by the execution engine, the size of the
+        bitcode kept for linking and of the object code kept for caching.
+        """
+        self._ensure_finalized()
+        modules = {id(mod): mod
+                   for mod in [self._final_module, self._shared_module]
+                   if mod is not None}
+        engine_ir = 0
+        if self._engine_owns_module:
+            engine_ir = len(modules.pop(id(self._final_module)).as_bitcode())
+        llvm_ir = sum(len(mod.as_bitcode()) for mod in modules.values())
+        object_code = 0
+        if self._object_caching_enabled and self._compiled_object:
+            object_code = len(self._compiled_object)
+        return {'llvm_ir': llvm_ir,
+                'engine_ir': engine_ir,
+                'linking_bitcode': len(self._shared_bitcode or b''),
+                'object_code': object_code}
+
     def get_defined_functions(self):
         """
         Get all functions defined in the library.  The library must have
@@ -301,14 +452,30 @@ class CodeLibrary(object):
             if not fn.is_declaration:
                 yield fn
 
+    def get_defined_symbols(self):
+        """
+        Get the names of the functions defined in the library and in the
+        libraries it references.  The library must have been finalized.
+        """
+        names = {fn.name for fn in self.get_defined_functions()}
+        for library in self._iter_referenced_libraries():
+            for fn in library._get_module_for_linking().functions:
+                if not fn.is_declaration:
+                    names.add(fn.name)
+        return names
+
     def get_function(self, name):
         return self._final_module.get_function(name)
 
     def _sentry_cache_disable_inspection(self):
+        if self._ir_released:
+            raise RuntimeError("the LLVM IR of %r was released, compile "
+                               "without lean=True to inspect it" % (self,))
         if self._disable_inspection:
             warnings.warn('Inspection disabled for cached code. '
                           'Invalid result is returned.')
 
+    @codegen_lock
     def get_llvm_str(self):
         """
         Get the human-readable form of the LLVM module.
@@ -316,6 +483,7 @@ class CodeLibrary(object):
         self._sentry_cache_disable_inspection()
         return str(self._final_module)
 
+    @codegen_lock
     def get_asm_str(self):
         """
         Get the human-readable assembly.
@@ -403,6 +571,8 @@ class CodeLibrary(object):
             self = ll_module.__library
         except AttributeError:
             return
+        if config.PERF_MAP:
+            self._perf_map_object = buf
         if self._object_caching_enabled:
             self._compiled = True
             self._compiled_object = buf
@@ -419,27 +589,40 @@ class CodeLibrary(object):
         if self._object_caching_enabled and self._compiled_object:
             buf = self._compiled_object
             self._compiled_object = None
+            if config.PERF_MAP:
+                self._perf_map_object = buf
             return buf
 
+    @codegen_lock
     def serialize_using_bitcode(self):
         """
         Serialize this library using its bitcode as the cached representation.
         """
         self._ensure_finalized()
+        if self._ir_released:
+            return (self._name, 'bitcode', self._shared_bitcode)
         return (self._name, 'bitcode', self._final_module.as_bitcode())
 
+    @codegen_lock
     def serialize_using_object_code(self):
         """
         Serialize this library using its object code as the cached
         representation.  We also include its bitcode for further inlining
-        with other libraries.
+        with other libraries, and the bitcode of the libraries it references
+        by symbol so that they can be defined again when unserializing.
         """
         self._ensure_finalized()
+        referenced = tuple(
+            (library._name, library._get_module_for_linking().as_bitcode())
+            for library in self._iter_referenced_libraries())
         data = (self._get_compiled_object(),
-                self._get_module_for_linking().as_bitcode())
-        return (self._name, 'object', data)
+                self._get_module_for_linking().as_bitcode(),
+                referenced)
+        # 'object2' adds the referenced libraries to the 'object' payload
+        return (self._name, 'object2', data)
 
     @classmethod
+    @codegen_lock
     def _unserialize(cls, codegen, state):
         name, kind, data = state
         self = codegen.create_library(name)
@@ -449,8 +632,22 @@ class CodeLibrary(object):
             self._final_module = ll.parse_bitcode(data)
             self._finalize_final_module()
             return self
-        elif kind == 'object':
-            object_code, shared_bitcode = data
+        elif kind in ('object', 'object2'):
+            if kind == 'object':
+                object_code, shared_bitcode = data
+                referenced = ()
+            else:
+                object_code, shared_bitcode, referenced = data
+            # Define the referenced symbols first, in dependency order.
+            # Their linkage is "linkonce_odr", so they don't clash with
+            # definitions already in the process.
+            for ref_name, ref_bitcode in referenced:
+                library = codegen.create_library(ref_name)
+                library._referenced_libraries = list(
+                    self._referenced_libraries)
+                library._final_module = ll.parse_bitcode(ref_bitcode)
+                library._finalize_final_module()
+                self._referenced_libraries.append(library)
             self.enable_object_caching()
             self._set_compiled_object(object_code)
             self._shared_module = ll.parse_bitcode(shared_bitcode)
@@ -489,6 +686,11 @@ class AOTCodeLibrary(CodeLibrary):
 
 class JITCodeLibrary(CodeLibrary):
 
+    # The final module is added to the MCJIT engine, which cannot remove
+    # it (see JITCPUCodegen._add_module())
+    _engine_owns_module = True
+
+    @codegen_lock
     def get_pointer_to_function(self, name):
         """
         Generate native code for function named *name* and return a pointer
@@ -510,9 +712,30 @@ class JITCodeLibrary(CodeLibrary):
         else:
             return self._codegen._engine.get_function_address(name)
 
+    def _can_link_by_reference(self, library):
+        if not config.LINK_BY_REFERENCE:
+            return False
+        if not (isinstance(library, JITCodeLibrary)
+                and library.codegen is self._codegen):
+            return False
+        # Callees marked inline are still linked in, so that LLVM can
+        # inline them across modules
+        for fn in library._get_module_for_linking().functions:
+            if fn.is_declaration:
+                continue
+            # Some llvmlite versions yield the whole attribute group as a
+            # single space-separated string
+            attrs = b' '.join(fn.attributes).split()
+            if b'alwaysinline' in attrs:
+                return False
+        return True
+
     def _finalize_specific(self):
         self._codegen._scan_and_fix_unresolved_refs(self._final_module)
         self._codegen._engine.finalize_object()
+        if self._perf_map_object is not None:
+            self._codegen._engine.write_perf_map(self._perf_map_object)
+            self._perf_map_object = None
 
 
 class RuntimeLinker(object):
@@ -622,6 +845,18 @@ class JitEngine(object):
         self._defined_symbols.add(gv.name)
         return self._ee.add_global_mapping(gv, addr)
 
+    def write_perf_map(self, buf):
+        """Write the functions of the object code *buf*, once loaded,
+        to the perf map of the process (see NUMBA_PERF_MAP).
+        """
+        from numba.misc import perfmap
+
+        symbols = list(perfmap.iter_function_symbols(buf))
+        # The symbols of *buf* are defined, they can be looked up
+        entries = perfmap.get_function_addresses(
+            symbols, self._ee.get_function_address)
+        perfmap.perf_map.write(entries)
+
     #
     # The remaining methods are re-export of the ExecutionEngine APIs
     #
@@ -680,31 +915,32 @@ class BaseCPUCodegen(object):
         """
         return self._target_data
 
-    def create_library(self, name):
+    def create_library(self, name, opt_level=None):
         """
         Create a :class:`CodeLibrary` object for use with this codegen
-        instance.
+        instance.  *opt_level* overrides the LLVM optimization level
+        (NUMBA_OPT) of the library.
         """
-        return self._library_class(self, name)
+        return self._library_class(self, name, opt_level=opt_level)
 
     def unserialize_library(self, serialized):
         return self._library_class._unserialize(self, serialized)
 
-    def _module_pass_manager(self):
+    def _module_pass_manager(self, opt_level=None):
         pm = ll.create_module_pass_manager()
         self._tm.add_analysis_passes(pm)
-        with self._pass_manager_builder() as pmb:
+        with self._pass_manager_builder(opt_level) as pmb:
             pmb.populate(pm)
         return pm
 
-    def _function_pass_manager(self, llvm_module):
+    def _function_pass_manager(self, llvm_module, opt_level=None):
         pm = ll.create_function_pass_manager(llvm_module)
         self._tm.add_analysis_passes(pm)
-        with self._pass_manager_builder() as pmb:
+        with self._pass_manager_builder(opt_level) as pmb:
             pmb.populate(pm)
         return pm
 
-    def _pass_manager_builder(self):
+    def _pass_manager_builder(self, opt_level=None):
         """
         Create a PassManagerBuilder.
 
@@ -713,8 +949,10 @@ class BaseCPUCodegen(object):
         or function pass manager.  Otherwise some optimizations will be
         missed...
         """
+        if opt_level is None:
+            opt_level = config.OPT
         pmb = lp.create_pass_manager_builder(
-            opt=config.OPT, loop_vectorize=config.LOOP_VECTORIZE)
+            opt=opt_level, loop_vectorize=config.LOOP_VECTORIZE)
         return pmb
 
     def _check_llvm_bugs(self):
@@ -853,6 +1091,7 @@ class JITCPUCodegen(BaseCPUCodegen):
         # # Early bind the engine method to avoid keeping a reference to self.
         # return functools.partial(self._engine.remove_module, module)
 
+    @codegen_lock
     def set_env(self, env_name, env):
         """Set the environment address.
 
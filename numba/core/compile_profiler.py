@@ -0,0 +1,187 @@
+"""
+Compile-time profiling.
+
+The wall time of every compiler pass and LLVM code generation phase is
+recorded as a ``ProfileEvent`` in the metadata of the compilation it belongs
+to (``metadata['compile_profile']``, see ``Dispatcher.get_metadata()``).
+
+If NUMBA_COMPILE_PROFILE is set, or after ``enable()``, the events are
+accumulated process-wide, from which an aggregate report or a Chrome trace
+can be produced.  They also record the memory allocated while
+``tracemalloc`` is tracing, which ``enable()`` starts (and ``reset()``
+stops).
+"""
+
+import collections
+import contextlib
+import json
+import os
+import threading
+import timeit
+import tracemalloc
+
+from numba.core import config
+
+
+ProfileEvent = collections.namedtuple(
+    'ProfileEvent',
+    # *allocated* is the net number of bytes allocated, None if not traced
+    ['name', 'category', 'start', 'duration', 'allocated', 'thread'])
+
+ProfileStats = collections.namedtuple(
+    'ProfileStats', ['count', 'duration', 'allocated'])
+
+
+# The per-thread stack of the event lists of the compilations in progress
+_tls = threading.local()
+
+# Process-wide events, only recorded if NUMBA_COMPILE_PROFILE is set or
+# after enable()
+_lock = threading.Lock()
+_events = []
+_enabled = False
+# Whether enable() started tracemalloc, which reset() then stops
+_started_tracemalloc = False
+
+
+def _recording_stack():
+    try:
+        return _tls.stack
+    except AttributeError:
+        stack = _tls.stack = []
+        return stack
+
+
+@contextlib.contextmanager
+def recording():
+    """
+    A context manager collecting the events recorded by the current thread
+    into a new list, which is returned.  This is used once per compilation;
+    the events of nested compilations go to their own list.
+    """
+    events = []
+    stack = _recording_stack()
+    stack.append(events)
+    try:
+        yield events
+    finally:
+        stack.pop()
+
+
+@contextlib.contextmanager
+def record(name, category):
+    """
+    A context manager recording an event for the enclosed code.
+    """
+    profiling = config.COMPILE_PROFILE or _enabled
+    trace_alloc = profiling and tracemalloc.is_tracing()
+    if trace_alloc:
+        mem_start = tracemalloc.get_traced_memory()[0]
+    start = timeit.default_timer()
+    try:
+        yield
+    finally:
+        duration = timeit.default_timer() - start
+        allocated = None
+        if trace_alloc:
+            allocated = tracemalloc.get_traced_memory()[0] - mem_start
+        ev = ProfileEvent(name, category, start, duration, allocated,
+                          threading.get_ident())
+        stack = _recording_stack()
+        if stack:
+            stack[-1].append(ev)
+        if profiling:
+            with _lock:
+                _events.append(ev)
+
+
+def get_events():
+    """
+    Return the list of process-wide events recorded so far.
+    """
+    with _lock:
+        return list(_events)
+
+
+def enable():
+    """
+    Record the events process-wide, as if NUMBA_COMPILE_PROFILE was set,
+    and start ``tracemalloc`` if it is not already tracing, so that the
+    memory allocated is recorded.
+    """
+    global _enabled, _started_tracemalloc
+    with _lock:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _started_tracemalloc = True
+        _enabled = True
+
+
+def reset():
+    """
+    Discard the process-wide events recorded so far, and undo ``enable()``:
+    ``tracemalloc`` is stopped if ``enable()`` started it.
+    """
+    global _enabled, _started_tracemalloc
+    with _lock:
+        del _events[:]
+        if _started_tracemalloc:
+            tracemalloc.stop()
+            _started_tracemalloc = False
+        _enabled = False
+
+
+def aggregate(events=None):
+    """
+    Aggregate *events* (by default the process-wide events) per
+    (category, name) and return a dict of ``ProfileStats``, ordered by
+    decreasing total duration.
+    """
+    if events is None:
+        events = get_events()
+    counts = collections.Counter()
+    durations = collections.Counter()
+    allocated = collections.Counter()
+    for ev in events:
+        key = ev.category, ev.name
+        counts[key] += 1
+        durations[key] += ev.duration
+        allocated[key] += ev.allocated or 0
+    keys = sorted(counts, key=lambda k: durations[k], reverse=True)
+    return collections.OrderedDict(
+        (k, ProfileStats(counts[k], durations[k], allocated[k]))
+        for k in keys)
+
+
+def print_report(events=None, file=None):
+    """
+    Print a table of the aggregated *events* (by default the process-wide
+    events).
+    """
+    fmt = "{:<24} {:<40} {:>8} {:>12} {:>14}"
+    print(fmt.format("category", "name", "count", "time (s)",
+                     "allocated (B)"), file=file)
+    for (category, name), stats in aggregate(events).items():
+        print(fmt.format(category, name, stats.count,
+                         "%.6f" % stats.duration, stats.allocated),
+              file=file)
+
+
+def dump_chrome_trace(filename, events=None):
+    """
+    Write *events* (by default the process-wide events) to *filename* in
+    the Chrome trace event format, viewable in chrome://tracing or Perfetto.
+    """
+    if events is None:
+        events = get_events()
+    pid = os.getpid()
+    trace = []
+    for ev in events:
+        entry = {'name': ev.name, 'cat': ev.category, 'ph': 'X',
+                 'ts': ev.start * 1e6, 'dur': ev.duration * 1e6,
+                 'pid': pid, 'tid': ev.thread}
+        if ev.allocated is not None:
+            entry['args'] = {'allocated': ev.allocated}
+        trace.append(entry)
+    with open(filename, 'w') as f:
+        json.dump({'traceEvents': trace, 'displayTimeUnit': 'ms'}, f)
@@ -1,10 +1,13 @@
 from collections import namedtuple
 import copy
+import threading
+import types as pytypes
 import warnings
 from numba.core.tracing import event
 
 from numba.core import (utils, errors, typing, interpreter, bytecode, postproc,
-                        config, callconv, cpu)
+                        config, callconv, cpu, compile_profiler, types, consts,
+                        ir)
 from numba.parfors.parfor import ParforDiagnostics
 from numba.core.inline_closurecall import InlineClosureCallPass
 from numba.core.errors import CompilerError
@@ -20,14 +23,15 @@ from numba.core.untyped_passes import (ExtractByteCode, TranslateByteCode,
                                        MakeFunctionToJitFunction,
                                        CanonicalizeLoopExit,
                                        CanonicalizeLoopEntry, LiteralUnroll,
-                                       ReconstructSSA,
+                                       ReconstructSSA, CacheUntypedIR,
                                        )
 
 from numba.core.typed_passes import (NopythonTypeInference, AnnotateTypes,
                                      NopythonRewrites, PreParforPass,
                                      ParforPass, DumpParforDiagnostics,
                                      IRLegalization, NoPythonBackend,
-                                     InlineOverloads, PreLowerStripPhis)
+                                     InlineOverloads, PreLowerStripPhis,
+                                     StackAllocArrays, ThreadLocalRefct)
 
 from numba.core.object_mode_passes import (ObjectModeFrontEnd,
                                            ObjectModeBackEnd, CompileInterpMode)
@@ -66,6 +70,10 @@ class Flags(utils.ConfigOptions):
         'fastmath': cpu.FastMathOptions(False),
         'noalias': False,
         'inline': cpu.InlineOptions('never'),
+        # LLVM optimization level, None means NUMBA_OPT
+        'opt_level': None,
+        # Instrument the function to profile its lines
+        'profile': cpu.ProfileOptions(False),
     }
 
 
@@ -93,6 +101,10 @@ CR_FIELDS = ["typing_context",
              ]
 
 
+# Metadata entries only needed for inspection, which hold on to the IR
+_INSPECTION_METADATA = frozenset(['preserved_ir', 'parfor_diagnostics'])
+
+
 class CompileResult(namedtuple("_CompileResult", CR_FIELDS)):
     """
     A structure holding results from the compilation of a function.
@@ -144,6 +156,26 @@ class CompileResult(namedtuple("_CompileResult", CR_FIELDS)):
                  )
         return cr
 
+    def lean(self):
+        """
+        Release the compilation artifacts only needed for inspection (the
+        LLVM IR, the type annotation, the typing maps and the function IR)
+        and return the resulting CompileResult.  What is needed to execute
+        the function, to call it from other functions and to cache it is
+        kept.
+        """
+        if self.library is not None:
+            self.library.release_ir()
+        if self.fndesc is not None:
+            self.fndesc.typemap = self.fndesc.calltypes = None
+        metadata = self.metadata
+        if metadata is not None:
+            metadata = {k: v for k, v in metadata.items()
+                        if k not in _INSPECTION_METADATA}
+            if 'line_profile' in metadata:
+                metadata['line_profile'].type_annotation = None
+        return self._replace(type_annotation=None, metadata=metadata)
+
     def dump(self, tab=''):
         print(f'{tab}DUMP {type(self).__name__} {self.entry_point}')
         self.signature.dump(tab=tab + '  ')
@@ -255,6 +287,180 @@ class StateDict(dict):
         self[attr] = value
 
 
+_missing = object()
+
+
+def _referenced_names(code):
+    """
+    The global names read by *code* and the functions nested in it.
+    """
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, pytypes.CodeType):
+            names |= _referenced_names(const)
+    return names
+
+
+def _frontend_arg_key(ty):
+    # The parts of an argument type read by the untyped passes, see
+    # dead_branch_prune(), rewrite_semantic_constants() and
+    # find_literally_calls()
+    if isinstance(ty, (types.Literal, types.NoneType, types.Omitted)):
+        return ty
+    if isinstance(ty, types.BaseTuple):
+        return types.BaseTuple, ty.count
+    if isinstance(ty, types.Array):
+        return types.Array, ty.ndim
+    return None
+
+
+class UntypedIRCache(object):
+    """
+    A store of the Numba IR produced by the untyped passes of the nopython
+    pipeline for a function, just before type inference.  The untyped
+    passes read little of the argument types, so a copy of the IR can be
+    used to compile the other specializations of the function.
+
+    The IR holds the values of the function's globals and freevars, the
+    store is emptied when any of them is rebound.  Those of the functions
+    inlined into it are not checked.
+    """
+
+    def __init__(self, py_func):
+        self._py_func = py_func
+        self._lock = threading.Lock()
+        self._irs = {}
+        # The {global name: value} and freevar values the IRs were
+        # produced with
+        self._globals = None
+        self._freevars = None
+
+    @staticmethod
+    def accepts(flags):
+        """
+        Whether compilations with *flags* can use the cache.  Those that may
+        fall back to object mode, or use parfors (whose diagnostics are
+        collected by the untyped passes) don't.
+        """
+        return not (flags.enable_pyobject or flags.force_pyobject or
+                    flags.auto_parallel.enabled)
+
+    def _index_key(self, args, return_type, flags):
+        return (tuple(_frontend_arg_key(ty) for ty in args),
+                isinstance(return_type, types.PyObject),
+                flags.no_rewrites, flags.enable_ssa)
+
+    def _snapshot(self):
+        func = self._py_func
+        globs = func.__globals__
+        names = _referenced_names(func.__code__)
+        glbls = {name: globs.get(name, _missing) for name in names}
+        freevars = []
+        for cell in func.__closure__ or ():
+            try:
+                freevars.append(cell.cell_contents)
+            except ValueError:
+                # Empty cell
+                freevars.append(_missing)
+        return glbls, freevars
+
+    def _is_valid(self):
+        func = self._py_func
+        globs = func.__globals__
+        for name, value in self._globals.items():
+            if globs.get(name, _missing) is not value:
+                return False
+        closure = func.__closure__ or ()
+        if len(closure) != len(self._freevars):
+            return False
+        for cell, value in zip(closure, self._freevars):
+            try:
+                contents = cell.cell_contents
+            except ValueError:
+                contents = _missing
+            if contents is not value:
+                return False
+        return True
+
+    def _copy(self, func_ir):
+        # The compiler passes mutate the IR in place, so its contents are
+        # deep-copied, but not the constant values it refers to (as with
+        # Global.__deepcopy__).  The analyses of the post-processor are
+        # kept, the memo maps them onto the copied blocks.
+        new_ir = copy.copy(func_ir)
+        memo = {}
+        for block in func_ir.blocks.values():
+            for inst in block.body:
+                if (isinstance(inst, ir.Assign) and
+                        isinstance(inst.value, (ir.Const, ir.Global,
+                                                ir.FreeVar))):
+                    values = [inst.value.value]
+                elif isinstance(inst, (ir.StaticRaise, ir.StaticTryRaise)):
+                    values = [inst.exc_class, inst.exc_args]
+                else:
+                    continue
+                for value in values:
+                    memo[id(value)] = value
+        new_ir.blocks = copy.deepcopy(func_ir.blocks, memo)
+        new_ir._definitions = copy.deepcopy(func_ir._definitions, memo)
+        new_ir.generator_info = copy.deepcopy(func_ir.generator_info, memo)
+        new_ir.variable_lifetime = copy.deepcopy(func_ir.variable_lifetime,
+                                                 memo)
+        new_ir.block_entry_vars = copy.deepcopy(func_ir.block_entry_vars,
+                                                memo)
+        new_ir._consts = consts.ConstantInference(new_ir)
+        return new_ir
+
+    def get(self, func_id, args, return_type, flags):
+        """
+        Return a copy of the IR stored for compiling *func_id* with the
+        given argument types, return type and flags, or None.
+        """
+        if func_id.func is not self._py_func:
+            return None
+        key = self._index_key(args, return_type, flags)
+        with self._lock:
+            if self._irs and not self._is_valid():
+                self._clear()
+            func_ir = self._irs.get(key)
+            if func_ir is None:
+                return None
+            new_ir = self._copy(func_ir)
+        # The function identity gives the compiled code a unique name
+        new_ir.func_id = func_id
+        return new_ir
+
+    def put(self, args, return_type, flags, func_ir):
+        """
+        Store a copy of *func_ir*, as produced by the untyped passes for
+        the given argument types, return type and flags.
+        """
+        if func_ir.func_id.func is not self._py_func:
+            return
+        try:
+            stored = self._copy(func_ir)
+        except Exception:
+            # Some value can't be copied, the untyped passes will run for
+            # every specialization
+            return
+        key = self._index_key(args, return_type, flags)
+        with self._lock:
+            if not self._irs:
+                self._globals, self._freevars = self._snapshot()
+            elif not self._is_valid():
+                # Rebound while the function was compiled
+                return
+            self._irs[key] = stored
+
+    def _clear(self):
+        self._irs.clear()
+        self._globals = self._freevars = None
+
+    def clear(self):
+        with self._lock:
+            self._clear()
+
+
 def _make_subtarget(targetctx, flags):
     """
     Make a new target context from the given target context and flags.
@@ -307,6 +513,10 @@ class CompilerBase(object):
         self.state.typemap = None
         self.state.calltypes = None
         self.state.type_annotation = None
+        # an optional UntypedIRCache to reuse the untyped IR from, and
+        # whether the IR was taken from it
+        self.state.untyped_ir_cache = None
+        self.state.untyped_ir_reused = False
         # holds arbitrary inter-pipeline stage meta data
         self.state.metadata = {}
         self.state.reload_init = []
@@ -348,6 +558,23 @@ class CompilerBase(object):
         FixupArgs().run_pass(self.state)
         return self._compile_ir()
 
+    def _reuse_untyped_ir(self):
+        """
+        Start from a copy of the IR stored in the untyped IR cache for this
+        compilation, if any, instead of running the untyped passes.
+        """
+        cache = self.state.untyped_ir_cache
+        if (self.state.func_ir is not None or cache is None or
+                not cache.accepts(self.state.flags)):
+            return
+        with compile_profiler.record('reuse_untyped_ir', 'nopython'):
+            func_ir = cache.get(self.state.func_id, self.state.args,
+                                self.state.return_type, self.state.flags)
+        if func_ir is not None:
+            self.state.func_ir = func_ir
+            self.state.untyped_ir_reused = True
+            FixupArgs().run_pass(self.state)
+
     def define_pipelines(self):
         """Child classes override this to customize the pipelines in use.
         """
@@ -357,6 +584,12 @@ class CompilerBase(object):
         """
         Populate and run compiler pipeline
         """
+        with compile_profiler.recording() as events:
+            self.state.metadata['compile_profile'] = events
+            self._reuse_untyped_ir()
+            return self._run_pipelines()
+
+    def _run_pipelines(self):
         pms = self.define_pipelines()
         for pm in pms:
             pipeline_name = pm.pipeline_name
@@ -444,33 +677,38 @@ class DefaultPassBuilder(object):
         if state.func_ir is None:
             pm.add_pass(TranslateByteCode, "analyzing bytecode")
             pm.add_pass(FixupArgs, "fix up args")
-        pm.add_pass(IRProcessing, "processing IR")
-        pm.add_pass(WithLifting, "Handle with contexts")
-
-        # pre typing
-        if not state.flags.no_rewrites:
-            pm.add_pass(RewriteSemanticConstants, "rewrite semantic constants")
-            pm.add_pass(DeadBranchPrune, "dead branch pruning")
-            pm.add_pass(GenericRewrites, "nopython rewrites")
-
-        pm.add_pass(InlineClosureLikes,
-                    "inline calls to locally defined closures")
-        # convert any remaining closures into functions
-        pm.add_pass(MakeFunctionToJitFunction,
-                    "convert make_function into JIT functions")
-        # inline functions that have been determined as inlinable and rerun
-        # branch pruning, this needs to be run after closures are inlined as
-        # the IR repr of a closure masks call sites if an inlinable is called
-        # inside a closure
-        pm.add_pass(InlineInlinables, "inline inlinable functions")
-        if not state.flags.no_rewrites:
-            pm.add_pass(DeadBranchPrune, "dead branch pruning")
-
-        pm.add_pass(FindLiterallyCalls, "find literally calls")
-        pm.add_pass(LiteralUnroll, "handles literal_unroll")
+        if not state.untyped_ir_reused:
+            pm.add_pass(IRProcessing, "processing IR")
+            pm.add_pass(WithLifting, "Handle with contexts")
+
+            # pre typing
+            if not state.flags.no_rewrites:
+                pm.add_pass(RewriteSemanticConstants,
+                            "rewrite semantic constants")
+                pm.add_pass(DeadBranchPrune, "dead branch pruning")
+                pm.add_pass(GenericRewrites, "nopython rewrites")
+
+            pm.add_pass(InlineClosureLikes,
+                        "inline calls to locally defined closures")
+            # convert any remaining closures into functions
+            pm.add_pass(MakeFunctionToJitFunction,
+                        "convert make_function into JIT functions")
+            # inline functions that have been determined as inlinable and
+            # rerun branch pruning, this needs to be run after closures are
+            # inlined as the IR repr of a closure masks call sites if an
+            # inlinable is called inside a closure
+            pm.add_pass(InlineInlinables, "inline inlinable functions")
+            if not state.flags.no_rewrites:
+                pm.add_pass(DeadBranchPrune, "dead branch pruning")
+
+            pm.add_pass(FindLiterallyCalls, "find literally calls")
+            pm.add_pass(LiteralUnroll, "handles literal_unroll")
+
+            if state.flags.enable_ssa:
+                pm.add_pass(ReconstructSSA, "ssa")
+            if state.untyped_ir_cache is not None:
+                pm.add_pass(CacheUntypedIR, "cache the untyped IR")
 
-        if state.flags.enable_ssa:
-            pm.add_pass(ReconstructSSA, "ssa")
         # typing
         pm.add_pass(NopythonTypeInference, "nopython frontend")
         pm.add_pass(AnnotateTypes, "annotate types")
@@ -486,6 +724,8 @@ class DefaultPassBuilder(object):
             pm.add_pass(NopythonRewrites, "nopython rewrites")
         if state.flags.auto_parallel.enabled:
             pm.add_pass(ParforPass, "convert to parfors")
+        pm.add_pass(StackAllocArrays, "allocate arrays on the stack")
+        pm.add_pass(ThreadLocalRefct, "find thread-local reference counts")
 
         # legalise
         pm.add_pass(IRLegalization,
@@ -540,7 +780,8 @@ class DefaultPassBuilder(object):
 
 
 def compile_extra(typingctx, targetctx, func, args, return_type, flags,
-                  locals, library=None, pipeline_class=Compiler):
+                  locals, library=None, pipeline_class=Compiler,
+                  untyped_ir_cache=None):
     """Compiler entry point
 
     Parameter
@@ -562,9 +803,13 @@ def compile_extra(typingctx, targetctx, func, args, return_type, flags,
         If it is ``None``, a new CodeLibrary is used.
     pipeline_class : type like numba.compiler.CompilerBase
         compiler pipeline
+    untyped_ir_cache : UntypedIRCache
+        Used to reuse the IR produced by the untyped passes for previous
+        compilations of the function.
     """
     pipeline = pipeline_class(typingctx, targetctx, library,
                               args, return_type, flags, locals)
+    pipeline.state.untyped_ir_cache = untyped_ir_cache
     return pipeline.compile_extra(func)
 
 
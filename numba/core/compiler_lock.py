@@ -1,6 +1,8 @@
 import threading
 import functools
 
+from numba.core import config
+
 
 # Lock for the preventing multiple compiler execution
 class _CompilerLock(object):
@@ -45,6 +47,114 @@ class _CompilerLock(object):
 
 global_compiler_lock = _CompilerLock()
 
+# Narrow locks protecting the state shared by all compilations.  They are
+# always taken, but only matter when NUMBA_CONCURRENT_COMPILATION is enabled
+# since the global compiler lock serializes everything otherwise.
+# - codegen_lock: the LLVM context, the JIT engine and the code libraries
+#   (LLVM is not thread-safe within a single context).
+# - registry_lock: the typing and target context registries.
+codegen_lock = _CompilerLock()
+registry_lock = _CompilerLock()
+
+
+# Per-thread count of the dispatcher compilations in progress
+_compiling = threading.local()
+
+
+def _compile_depth():
+    return getattr(_compiling, 'depth', 0)
+
+
+class _SerialCompilerLock(_CompilerLock):
+    """
+    Acquires the global compiler lock, unless concurrent compilation is
+    enabled in which case the narrow locks are relied upon instead.
+    """
+
+    def __init__(self):
+        self._taken = threading.local()
+
+    def _stack(self):
+        try:
+            return self._taken.stack
+        except AttributeError:
+            stack = self._taken.stack = []
+            return stack
+
+    def acquire(self):
+        take = not config.CONCURRENT_COMPILATION
+        if take:
+            global_compiler_lock.acquire()
+        self._stack().append(take)
+
+    def release(self):
+        if self._stack().pop():
+            global_compiler_lock.release()
+
+    def is_locked(self):
+        return global_compiler_lock.is_locked()
+
+
+serial_compiler_lock = _SerialCompilerLock()
+
+
+class DispatcherLock(_CompilerLock):
+    """
+    Guards the compilation of new specializations for a single dispatcher.
+
+    By default this is the global compiler lock.  With concurrent
+    compilation enabled, each dispatcher has its own lock so that
+    independent dispatchers compile in parallel.  To remain deadlock-free,
+    a thread that is already compiling (i.e. a nested compilation of a
+    callee) never waits for another dispatcher's lock: it compiles without
+    it, which at worst duplicates work that the dispatcher discards.
+    """
+
+    _GLOBAL, _OWN, _NONE = range(3)
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._taken = threading.local()
+
+    def _stack(self):
+        try:
+            return self._taken.stack
+        except AttributeError:
+            stack = self._taken.stack = []
+            return stack
+
+    def acquire(self):
+        if not config.CONCURRENT_COMPILATION:
+            global_compiler_lock.acquire()
+            how = self._GLOBAL
+        elif self._lock.acquire(blocking=_compile_depth() == 0):
+            how = self._OWN
+        else:
+            how = self._NONE
+        self._stack().append(how)
+        _compiling.depth = _compile_depth() + 1
+
+    def release(self):
+        _compiling.depth = _compile_depth() - 1
+        how = self._stack().pop()
+        if how == self._GLOBAL:
+            global_compiler_lock.release()
+        elif how == self._OWN:
+            self._lock.release()
+
+    def is_locked(self):
+        if not config.CONCURRENT_COMPILATION:
+            return global_compiler_lock.is_locked()
+        return super(DispatcherLock, self).is_locked()
+
+
+def thread_is_compiling():
+    """
+    Whether the current thread is running a compilation (and therefore
+    holds locks that another compilation may need).
+    """
+    return _compile_depth() > 0 or global_compiler_lock.is_locked()
+
 
 def require_global_compiler_lock():
     """Sentry that checks the global_compiler_lock is acquired.
@@ -2,8 +2,8 @@ import timeit
 from abc import abstractmethod, ABCMeta
 from collections import namedtuple, OrderedDict
 import inspect
-from numba.core.compiler_lock import global_compiler_lock
-from numba.core import errors, config, transforms
+from numba.core.compiler_lock import serial_compiler_lock
+from numba.core import errors, config, transforms, compile_profiler
 from numba.core.utils import add_metaclass
 from numba.core.tracing import event
 from numba.core.postproc import PostProcessor
@@ -256,7 +256,7 @@ class PassManager(object):
         exc.args = (newmsg,)
         return exc
 
-    @global_compiler_lock  # this need a lock, likely calls LLVM
+    @serial_compiler_lock  # this need a lock, likely calls LLVM
     def _runPass(self, index, pss, internal_state):
         mutated = False
 
@@ -285,12 +285,13 @@ class PassManager(object):
         # wire in the analysis info so it's accessible
         pss.analysis = self._analysis
 
-        with SimpleTimer() as init_time:
-            mutated |= check(pss.run_initialization, internal_state)
-        with SimpleTimer() as pass_time:
-            mutated |= check(pss.run_pass, internal_state)
-        with SimpleTimer() as finalize_time:
-            mutated |= check(pss.run_finalizer, internal_state)
+        with compile_profiler.record(pss.name(), self.pipeline_name):
+            with SimpleTimer() as init_time:
+                mutated |= check(pss.run_initialization, internal_state)
+            with SimpleTimer() as pass_time:
+                mutated |= check(pss.run_pass, internal_state)
+            with SimpleTimer() as finalize_time:
+                mutated |= check(pss.run_finalizer, internal_state)
 
         # Check that if the pass is an instance of a FunctionPass that it hasn't
         # emitted ir.Dels.
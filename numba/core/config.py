@@ -192,6 +192,17 @@ class _EnvReloader(object):
         # Contains path to the directory
         CACHE_DIR = _readenv("NUMBA_CACHE_DIR", str, "")
 
+        # Key the cache on a hash of the source, bytecode and jitted
+        # dependencies rather than on the source file timestamp
+        CACHE_CONTENT_HASH = _readenv("NUMBA_CACHE_CONTENT_HASH", int, 0)
+
+        # Maximum size in bytes of the on-disk cache in a directory, the
+        # least recently used entries are evicted beyond it (0 = unbounded)
+        CACHE_MAX_SIZE = _readenv("NUMBA_CACHE_MAX_SIZE", int, 0)
+
+        # Persist the internally compiled helper functions on disk
+        CACHE_INTERNAL = _readenv("NUMBA_CACHE_INTERNAL", int, 0)
+
         # Enable tracing support
         TRACE = _readenv("NUMBA_TRACE", int, 0)
 
@@ -208,6 +219,27 @@ class _EnvReloader(object):
         # Optimization level
         OPT = _readenv("NUMBA_OPT", int, 3)
 
+        # Optimization level of the first tier of tiered compilation
+        TIERED_OPT = _readenv("NUMBA_TIERED_OPT", int, 1)
+
+        # Number of calls of a specialization (not counting the one compiling
+        # it) after which its optimized tier is compiled
+        TIER_UP_CALLS = _readenv("NUMBA_TIER_UP_CALLS", int, 1000)
+
+        # Reference the already compiled callees by symbol instead of
+        # linking a copy of them into every caller
+        LINK_BY_REFERENCE = _readenv("NUMBA_LINK_BY_REFERENCE", int, 0)
+
+        # Release the compilation artifacts only needed for inspection
+        # (LLVM IR, type annotations) once a function is compiled
+        LEAN_COMPILE = _readenv("NUMBA_LEAN_COMPILE", int, 0)
+
+        # Memoize the function type resolutions of the typing contexts
+        RESOLUTION_CACHE = _readenv("NUMBA_RESOLUTION_CACHE", int, 1)
+
+        # Include the compiled code of the dispatchers when pickling them
+        PICKLE_CODE = _readenv("NUMBA_PICKLE_CODE", int, 0)
+
         # Force dump of Python bytecode
         DUMP_BYTECODE = _readenv("NUMBA_DUMP_BYTECODE", int, DEBUG_FRONTEND)
 
@@ -298,6 +330,12 @@ class _EnvReloader(object):
         # choose parallel backend to use
         THREADING_LAYER = _readenv("NUMBA_THREADING_LAYER", str, 'default')
 
+        # Allow independent dispatchers to compile concurrently from
+        # different threads instead of serializing on the global compiler
+        # lock
+        CONCURRENT_COMPILATION = _readenv("NUMBA_CONCURRENT_COMPILATION",
+                                          int, 0)
+
         # CUDA Configs
 
         # Force CUDA compute capability to a specific version
@@ -360,6 +398,14 @@ class _EnvReloader(object):
         ENABLE_PROFILING = _readenv(
             "NUMBA_ENABLE_PROFILING", int, int(RUNNING_UNDER_PROFILER))
 
+        # Writes the JIT-compiled functions to the perf map of the process
+        # (/tmp/perf-<pid>.map), to name them in native profilers
+        PERF_MAP = _readenv("NUMBA_PERF_MAP", int, 0)
+
+        # Enables process-wide compile-time profiling, including memory
+        # allocations (see numba.core.compile_profiler)
+        COMPILE_PROFILE = _readenv("NUMBA_COMPILE_PROFILE", int, 0)
+
         # Debug Info
 
         # The default value for the `debug` flag
@@ -369,6 +415,30 @@ class _EnvReloader(object):
         # gdb binary location
         GDB_BINARY = _readenv("NUMBA_GDB_BINARY", str, '/usr/bin/gdb')
 
+        # The allocator of the NRT: 'python' (the raw memory allocator of
+        # CPython), 'system' (the C library's malloc) or 'pool' (a pooled
+        # allocator with thread caches)
+        NRT_ALLOCATOR = _readenv("NUMBA_NRT_ALLOCATOR", str, 'python')
+
+        # Trace the NRT allocations of the compiled functions by source line
+        NRT_TRACE_ALLOC = _readenv("NUMBA_NRT_TRACE_ALLOC", int, 0)
+
+        # The maximum size in bytes of the arrays of constant shape, which do
+        # not escape the function, allocated on the stack instead of by the
+        # NRT; 0 disables the stack allocation of arrays
+        STACK_ARRAY_MAX_BYTES = _readenv("NUMBA_STACK_ARRAY_MAX_BYTES", int,
+                                         1024)
+
+        # The pruning of the NRT reference count operations of the compiled
+        # code: 'block' (the pairs within each basic block) or 'dataflow'
+        # (also the pairs across blocks, and the hoisting out of loops)
+        NRT_REFCT_PRUNING = _readenv("NUMBA_NRT_REFCT_PRUNING", str,
+                                     'block')
+
+        # Use non-atomic reference count operations in the NRT, for processes
+        # running the compiled code from a single thread
+        NRT_SINGLE_THREADED = _readenv("NUMBA_NRT_SINGLE_THREADED", int, 0)
+
         # CUDA Memory management
         CUDA_MEMORY_MANAGER = _readenv("NUMBA_CUDA_MEMORY_MANAGER", str,
                                        'default')
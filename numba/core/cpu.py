@@ -15,7 +15,7 @@ from numba.core.runtime import rtsys
 from numba.core.compiler_lock import global_compiler_lock
 import numba.core.entrypoints
 from numba.core.cpu_options import (ParallelOptions, FastMathOptions,
-                                    InlineOptions)
+                                    InlineOptions, ProfileOptions)
 from numba.cpython import setobj, listobj
 
 # Keep those structures in sync with _dynfunc.c.
@@ -58,6 +58,7 @@ class CPUContext(BaseContext):
 
         # Initialize additional implementations
         import numba.cpython.unicode
+        import numba.cpython.charseq
         import numba.typed.dictimpl
         import numba.experimental.function_type
 
@@ -88,6 +89,12 @@ class CPUContext(BaseContext):
     def codegen(self):
         return self._internal_codegen
 
+    def get_internal_function_cache(self):
+        if not config.CACHE_INTERNAL or self.aot_mode:
+            return None
+        from numba.core.caching import get_internal_function_cache
+        return get_internal_function_cache()
+
     @cached_property
     def call_conv(self):
         return callconv.CPUCallConv(self)
@@ -246,6 +253,11 @@ class CPUTargetOptions(TargetOptions):
         "error_model": str,
         "parallel": ParallelOptions,
         "inline": InlineOptions,
+        "tiered": bool,
+        "max_overloads": int,
+        "lean": bool,
+        "pickle_code": bool,
+        "profile": ProfileOptions,
     }
 
 
@@ -120,3 +120,25 @@ class InlineOptions(object):
         The raw value
         """
         return self._inline
+
+
+class ProfileOptions(object):
+    """
+    Options for controlling the line profiling instrumentation.
+    """
+
+    def __init__(self, value):
+        if isinstance(value, bool):
+            self.enabled = value
+            self.cycles = False
+        elif value == 'cycles':
+            self.enabled = True
+            self.cycles = True
+        else:
+            msg = "Expected profile option to be either a bool or 'cycles'"
+            raise ValueError(msg)
+
+    def __bool__(self):
+        return self.enabled
+
+    __nonzero__ = __bool__
@@ -94,6 +94,36 @@ def jit(signature_or_function=None, locals={}, target='cpu', cache=False,
                 debugging. You can also set the NUMBA_BOUNDSCHECK environment
                 variable to 0 or 1 to globally override this flag.
 
+            tiered: bool
+                Set to True to first compile each specialization at a low
+                optimization level, and swap in a fully optimized version
+                compiled in the background once it has been called
+                NUMBA_TIER_UP_CALLS times. Default value is False.
+
+            max_overloads: int
+                If set, caps the dispatcher's overload table; the least
+                recently called specializations are dropped from it beyond
+                the cap (their code stays loaded). Default value is None
+                (unbounded).
+
+            lean: bool
+                Set to True to release the compilation artifacts only needed
+                for inspection (LLVM IR, type annotations) once each
+                specialization is compiled. Default value is taken from the
+                NUMBA_LEAN_COMPILE environment variable.
+
+            pickle_code: bool
+                Set to True to include the compiled code of the function in
+                its pickles, so that it is not compiled again when unpickled
+                in a compatible process. Default value is taken from the
+                NUMBA_PICKLE_CODE environment variable.
+
+            profile: bool or str
+                Set to True to count the executions of each source line of
+                the function, or to 'cycles' to also count the CPU cycles
+                spent in each line. The profile is obtained with the
+                dispatcher's line_profile() method. Default value is False.
+
     Returns
     --------
     A callable usable as a compiled function.  Actual compiling will be
@@ -6,14 +6,16 @@ import functools
 import os
 import struct
 import sys
+import threading
 import types as pytypes
 import uuid
 import weakref
+from concurrent import futures
 from copy import deepcopy
 
 from numba import _dispatcher
-from numba.core import utils, types, errors, typing, serialize, config, compiler, sigutils
-from numba.core.compiler_lock import global_compiler_lock
+from numba.core import utils, types, errors, typing, serialize, config, compiler, sigutils, ir
+from numba.core.compiler_lock import DispatcherLock, thread_is_compiling
 from numba.core.typeconv.rules import default_type_manager
 from numba.core.typing.templates import fold_arguments
 from numba.core.typing.typeof import Purpose, typeof
@@ -51,6 +53,13 @@ class _FunctionCompiler(object):
         # compilation to avoid compilation attempt on them.  The values are
         # the exceptions.
         self._failed_cache = {}
+        # The IR produced by the untyped passes, shared by the compilations
+        # of all signatures.  Custom pipelines may not run the default
+        # untyped passes, they don't use it.
+        if pipeline_class is compiler.Compiler:
+            self._untyped_ir_cache = compiler.UntypedIRCache(py_func)
+        else:
+            self._untyped_ir_cache = None
 
     def fold_argument_types(self, args, kws):
         """
@@ -106,7 +115,8 @@ class _FunctionCompiler(object):
                                       impl,
                                       args=args, return_type=return_type,
                                       flags=flags, locals=self.locals,
-                                      pipeline_class=self.pipeline_class)
+                                      pipeline_class=self.pipeline_class,
+                                      untyped_ir_cache=self._untyped_ir_cache)
         # Check typing error if object mode is used
         if cres.typing_error is not None and not flags.enable_pyobject:
             raise cres.typing_error
@@ -129,6 +139,8 @@ class _GeneratedFunctionCompiler(_FunctionCompiler):
         super(_GeneratedFunctionCompiler, self).__init__(
             py_func, targetdescr, targetoptions, locals, pipeline_class)
         self.impls = set()
+        # Each signature usually has its own implementation function
+        self._untyped_ir_cache = None
 
     def get_globals_for_reduction(self):
         # This will recursively get the globals used by any nested
@@ -161,12 +173,63 @@ class _GeneratedFunctionCompiler(_FunctionCompiler):
 
 
 _CompileStats = collections.namedtuple(
-    '_CompileStats', ('cache_path', 'cache_hits', 'cache_misses'))
+    '_CompileStats', ('cache_path', 'cache_hits', 'cache_misses', 'tiers',
+                      'evictions'))
+
+# Tiers of tiered compilation (jit(tiered=True))
+TIER_QUICK = 0
+TIER_OPTIMIZED = 1
+
+# The modules of the compilation artifacts traversed by _artifact_size()
+_ARTIFACT_MODULES = frozenset([ir.__name__,
+                               'numba.core.annotations.type_annotations'])
+
+
+def _get_code_guard(targetctx):
+    """
+    Return what must match for compiled code to be reused in another
+    process, see Dispatcher.__reduce__().
+    """
+    import numba
+    # The NRT linked into the code uses non-atomic refcounts if
+    # NRT_SINGLE_THREADED is set
+    return (numba.__version__, targetctx.codegen().magic_tuple(),
+            bool(config.NRT_SINGLE_THREADED))
 
 
-class _CompilingCounter(object):
+def _artifact_size(obj, seen):
+    """
+    Estimate the memory, in bytes, retained by the compilation artifact
+    *obj* (e.g. a function IR or a typing map).  Only containers and IR
+    nodes are traversed: other objects (types, globals...) are shared with
+    the rest of the process.  Objects whose id is in *seen* are not counted
+    again.
+    """
+    size = 0
+    stack = [obj]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        elif type(obj).__module__ in _ARTIFACT_MODULES:
+            stack.extend(vars(obj).values())
+        elif not isinstance(obj, (str, bytes)):
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+    return size
+
+
+class _CompilingCounter(threading.local):
     """
     A simple counter that increment in __enter__ and decrement in __exit__.
+    The count is per-thread, so that only the thread doing a compilation
+    sees the dispatcher as compiling (e.g. for recursion detection).
     """
 
     def __init__(self):
@@ -224,11 +287,16 @@ class _DispatcherBase(_dispatcher.Dispatcher):
 
         self.doc = py_func.__doc__
         self._compiling_counter = _CompilingCounter()
+        # Serializes compilation of new specializations
+        self._compile_lock = DispatcherLock()
+        # Guards the overload table (self.overloads and the C-level table)
+        self._overloads_lock = threading.RLock()
         weakref.finalize(self, self._make_finalizer())
 
     def _reset_overloads(self):
-        self._clear()
-        self.overloads.clear()
+        with self._overloads_lock:
+            self._clear()
+            self.overloads.clear()
 
     def _make_finalizer(self):
         """
@@ -277,8 +345,23 @@ class _DispatcherBase(_dispatcher.Dispatcher):
     def add_overload(self, cres):
         args = tuple(cres.signature.args)
         sig = [a._code for a in args]
-        self._insert(sig, cres.entry_point, cres.objectmode, cres.interpmode)
-        self.overloads[args] = cres
+        with self._overloads_lock:
+            self._insert(sig, cres.entry_point, cres.objectmode,
+                         cres.interpmode)
+            self.overloads[args] = cres
+
+    def _add_overload_once(self, cres):
+        """
+        Add the overload unless another thread already added one for the
+        same argument types (only possible with concurrent compilation).
+        Return the compile result actually registered.
+        """
+        with self._overloads_lock:
+            existing = self.overloads.get(tuple(cres.signature.args))
+            if existing is not None:
+                return existing
+            self.add_overload(cres)
+            return cres
 
     def fold_argument_types(self, args, kws):
         return self._compiler.fold_argument_types(args, kws)
@@ -504,7 +587,7 @@ class _DispatcherBase(_dispatcher.Dispatcher):
             for ver, res in utils.iteritems(overloads):
                 print("%s %s" % (self.py_func.__name__, ver), file=file)
                 print('-' * 80, file=file)
-                print(res.type_annotation, file=file)
+                print(self._get_type_annotation(res), file=file)
                 print('=' * 80, file=file)
         else:
             if file is not None:
@@ -564,12 +647,40 @@ class _DispatcherBase(_dispatcher.Dispatcher):
         out = collections.OrderedDict()
         for sig in signatures:
             cres = self.overloads[sig]
-            ta = cres.type_annotation
+            ta = self._get_type_annotation(cres)
             key = (ta.func_id.filename + ':' + str(ta.func_id.firstlineno + 1),
                    ta.signature)
             out[key] = ta.annotate_raw()[key]
         return out
 
+    def line_profile(self, signature=None):
+        """
+        Get the line profile (a :class:`numba.core.lineprofile.LineProfile`)
+        of the overload of the function for *signature*, compiled with
+        ``profile=True``.  If no signature is supplied, a dictionary of
+        signature to line profile is returned for all profiled overloads.
+        """
+        if signature is not None:
+            cres = self.overloads[tuple(signature)]
+            profile = (cres.metadata or {}).get('line_profile')
+            if profile is None:
+                raise ValueError("%s%s was not compiled with profile=True"
+                                 % (self.py_func.__name__, cres.signature))
+            return profile
+        out = collections.OrderedDict()
+        for sig, cres in self.overloads.items():
+            profile = (cres.metadata or {}).get('line_profile')
+            if profile is not None:
+                out[sig] = profile
+        return out
+
+    def _get_type_annotation(self, cres):
+        if cres.type_annotation is None:
+            raise RuntimeError("the type annotation of %s%s was released, "
+                               "compile without lean=True to inspect it"
+                               % (self.py_func.__name__, cres.signature))
+        return cres.type_annotation
+
     def _explain_ambiguous(self, *args, **kws):
         """
         Callback for the C _Dispatcher object.
@@ -630,6 +741,42 @@ class _DispatcherBase(_dispatcher.Dispatcher):
         return tp
 
 
+_precompile_executor = None
+
+
+def _get_precompile_executor():
+    """
+    Return the executor used by Dispatcher.precompile() by default.
+    """
+    global _precompile_executor
+    if _precompile_executor is None:
+        _precompile_executor = futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix='numba-precompile')
+    return _precompile_executor
+
+
+class Specialization(_dispatcher.Specialization):
+    """
+    A callable bound to a single compiled overload of a dispatcher, see
+    Dispatcher.specialize().
+    """
+
+    def __init__(self, dispatcher, cres, unchecked=False):
+        args = cres.signature.args
+        typecodes = None if unchecked else [a._code for a in args]
+        super(Specialization, self).__init__(dispatcher, cres.entry_point,
+                                             len(args), typecodes)
+        self.py_func = dispatcher.py_func
+        self.signature = cres.signature
+        self.unchecked = unchecked
+        # Keep the compiled code alive, even if the overload is evicted
+        self._cres = cres
+
+    def __repr__(self):
+        return "<Specialization %s%s>" % (self.py_func.__name__,
+                                          self.signature)
+
+
 class Dispatcher(_DispatcherBase):
     """
     Implementation of user-facing dispatcher objects (i.e. created using
@@ -687,6 +834,37 @@ class Dispatcher(_DispatcherBase):
                                         targetoptions, locals, pipeline_class)
         self._cache_hits = collections.Counter()
         self._cache_misses = collections.Counter()
+        # Background compilations in progress, {argument types: Future}
+        self._pending_compiles = {}
+        # Tiered compilation: overloads are first compiled at a low
+        # optimization level, then recompiled in the background
+        self._tiered = targetoptions.get('tiered', False)
+        if self._tiered:
+            self._tier_up_compiler = compiler_class(
+                py_func, self.targetdescr, dict(targetoptions, tiered=False),
+                locals, pipeline_class)
+            self._tier_up_compiler._untyped_ir_cache = \
+                self._compiler._untyped_ir_cache
+        # {argument types: tier} for tiered compilation
+        self._tiers = {}
+        if self._tiered:
+            # Have the native dispatcher call _on_hot()
+            self._set_hot_calls(max(config.TIER_UP_CALLS, 1))
+        # Cap on the overload table, the least recently used overloads are
+        # dropped beyond it
+        self._max_overloads = targetoptions.get('max_overloads')
+        if self._max_overloads is not None and self._max_overloads < 1:
+            raise ValueError("max_overloads must be at least 1, got %r"
+                             % (self._max_overloads,))
+        if self._tiered or self._max_overloads is not None:
+            # Have the native dispatcher count the calls of its definitions
+            self._set_track_usage(True)
+        self._evictions = 0
+        # Release the compilation artifacts only needed for inspection
+        self._lean = targetoptions.get('lean', bool(config.LEAN_COMPILE))
+        # Include the compiled code of the overloads when pickled
+        self._pickle_code = targetoptions.get('pickle_code',
+                                              bool(config.PICKLE_CODE))
 
         self._type = types.Dispatcher(self)
         self.typingctx.insert_global(self, self._type)
@@ -715,22 +893,24 @@ class Dispatcher(_DispatcherBase):
         """
         Reduce the instance for pickling.  This will serialize
         the original function as well the compilation options and
-        compiled signatures, but not the compiled code itself.
+        compiled signatures, but not the compiled code itself, unless
+        the dispatcher was created with pickle_code=True.
         """
         if self._can_compile:
             sigs = []
         else:
             sigs = [cr.signature for cr in self.overloads.values()]
         globs = self._compiler.get_globals_for_reduction()
+        compiled = self._reduce_compiled() if self._pickle_code else None
         return (serialize._rebuild_reduction,
                 (self.__class__, str(self._uuid),
                  serialize._reduce_function(self.py_func, globs),
                  self.locals, self.targetoptions, self._impl_kind,
-                 self._can_compile, sigs))
+                 self._can_compile, sigs, compiled))
 
     @classmethod
     def _rebuild(cls, uuid, func_reduced, locals, targetoptions, impl_kind,
-                 can_compile, sigs):
+                 can_compile, sigs, compiled=None):
         """
         Rebuild an Dispatcher instance after it was __reduce__'d.
         """
@@ -742,11 +922,43 @@ class Dispatcher(_DispatcherBase):
         self = cls(py_func, locals, targetoptions, impl_kind)
         # Make sure this deserialization will be merged with subsequent ones
         self._set_uuid(uuid)
+        if compiled is not None:
+            self._rebuild_compiled(compiled)
         for sig in sigs:
             self.compile(sig)
         self._can_compile = can_compile
         return self
 
+    def _reduce_compiled(self):
+        """
+        Serialize the compiled code of the overloads which can be reused
+        in another process, like the cache does, along with the guard
+        checked before reusing it.
+        """
+        with self._overloads_lock:
+            overloads = list(self.overloads.items())
+        payloads = []
+        for args, cres in overloads:
+            if (cres.interpmode or cres.lifted or cres.library is None
+                    or cres.library.has_dynamic_globals
+                    or self._tiers.get(args) == TIER_QUICK):
+                # Compiled again on demand in the other process
+                continue
+            payloads.append(cres._reduce())
+        return _get_code_guard(self.targetctx), payloads
+
+    def _rebuild_compiled(self, compiled):
+        """
+        Add the overloads serialized by _reduce_compiled(), unless they were
+        compiled for another CPU or Numba version.
+        """
+        guard, payloads = compiled
+        if guard != _get_code_guard(self.targetctx):
+            return
+        for payload in payloads:
+            cres = compiler.CompileResult._rebuild(self.targetctx, *payload)
+            self._add_reloaded_overload(cres)
+
     @property
     def _uuid(self):
         """
@@ -767,12 +979,25 @@ class Dispatcher(_DispatcherBase):
         self._memo[u] = self
         self._recent.append(self)
 
-    @global_compiler_lock
     def compile(self, sig):
         if not self._can_compile:
             raise RuntimeError("compilation disabled")
+        # Wait for a background compilation of the same signature rather
+        # than duplicating it.  A thread which is already compiling must
+        # not wait, as it may hold locks the background compilation needs.
+        args, return_type = sigutils.normalize_signature(sig)
+        pending = self._pending_compiles.get(tuple(args))
+        if pending is not None and not thread_is_compiling():
+            try:
+                return pending.result()
+            except futures.CancelledError:
+                # The precompilation was cancelled before it started
+                pass
+        return self._compile_now(sig)
+
+    def _compile_now(self, sig):
         # Use counter to track recursion compilation depth
-        with self._compiling_counter:
+        with self._compile_lock, self._compiling_counter:
             args, return_type = sigutils.normalize_signature(sig)
             # Don't recompile if signature already exists
             existing = self.overloads.get(tuple(args))
@@ -782,12 +1007,7 @@ class Dispatcher(_DispatcherBase):
             cres = self._cache.load_overload(sig, self.targetctx)
             if cres is not None:
                 self._cache_hits[sig] += 1
-                # XXX fold this in add_overload()? (also see compiler.py)
-                if not cres.objectmode and not cres.interpmode:
-                    self.targetctx.insert_user_function(cres.entry_point,
-                                                        cres.fndesc, [cres.library])
-                self.add_overload(cres)
-                return cres.entry_point
+                return self._add_reloaded_overload(cres).entry_point
 
             self._cache_misses[sig] += 1
             try:
@@ -796,9 +1016,248 @@ class Dispatcher(_DispatcherBase):
                 def folded(args, kws):
                     return self._compiler.fold_argument_types(args, kws)[1]
                 raise e.bind_fold_arguments(folded)
-            self.add_overload(cres)
-            self._cache.save_overload(sig, cres)
-            return cres.entry_point
+            registered = self._add_overload_once(cres)
+            if registered is cres:
+                if self._tiered and not cres.objectmode:
+                    # The optimized tier is compiled once it is hot
+                    self._tiers[tuple(args)] = TIER_QUICK
+                    self._make_lean(cres)
+                else:
+                    self._cache.save_overload(sig, cres)
+                    self._make_lean(cres)
+            self._cap_overloads()
+            return registered.entry_point
+
+    def _add_reloaded_overload(self, cres):
+        """
+        Add the overload *cres* unserialized from the cache (or a pickle)
+        and return the compile result actually registered.
+        """
+        # XXX fold this in add_overload()? (also see compiler.py)
+        if not cres.objectmode and not cres.interpmode:
+            self.targetctx.insert_user_function(cres.entry_point,
+                                                cres.fndesc, [cres.library])
+        registered = self._add_overload_once(cres)
+        if registered is cres:
+            if self._tiered:
+                # Only the optimized tier is serialized
+                self._tiers[tuple(cres.signature.args)] = TIER_OPTIMIZED
+            self._make_lean(cres)
+        self._cap_overloads()
+        return registered
+
+    def specialize(self, sig, unchecked=False):
+        """
+        Compile (if needed) the given signature and return a callable
+        bound to its overload.  Calling it skips the overload resolution:
+        it only checks that the positional arguments have exactly the
+        types of the signature, or nothing at all if *unchecked* is true.
+        """
+        args, return_type = sigutils.normalize_signature(sig)
+        cres = self.overloads.get(tuple(args))
+        if cres is None:
+            self.compile(sig)
+            cres = self.overloads[tuple(args)]
+        if cres.interpmode:
+            raise TypeError("cannot specialize %s%s, it runs in the "
+                            "interpreter" % (self.py_func.__name__,
+                                             cres.signature))
+        return Specialization(self, cres, unchecked)
+
+    def map(self, iterable, out=None):
+        """
+        Call the function with each item of *iterable* as argument and
+        return the list of results.  If *out* is given (e.g. a preallocated
+        NumPy array), the results are stored in it instead and it is
+        returned.  The overload is resolved once for each distinct argument
+        types rather than for each call.
+        """
+        return self._map(iterable, False, out)
+
+    def starmap(self, iterable, out=None):
+        """
+        Like map(), but each item of *iterable* is a sequence of the
+        positional arguments of the call.
+        """
+        return self._map(iterable, True, out)
+
+    def _on_hot(self, cfunc):
+        """
+        Called by the native dispatcher when the definition *cfunc* has been
+        called NUMBA_TIER_UP_CALLS times: if it is the quick tier of a
+        specialization, schedule the compilation of its optimized tier.
+
+        Only the resolutions by the native dispatcher are counted: not the
+        call compiling the definition, nor the calls through specialize()
+        handles, and map() and starmap() count once per distinct argument
+        types.  The count restarts when a definition is replaced (see
+        _replace_overload()).
+        """
+        with self._overloads_lock:
+            for args, cres in self.overloads.items():
+                if cres.entry_point is cfunc:
+                    break
+            else:
+                return
+            if self._tiers.get(args) != TIER_QUICK:
+                return
+        _get_precompile_executor().submit(self._tier_up, args, cres)
+
+    def _tier_up(self, args, quick):
+        """
+        Executor task for tiered compilation: compile the optimized tier
+        of *quick* and swap it into the overloads.
+        """
+        if self.overloads.get(args) is not quick:
+            # Reset (e.g. by recompile()) in the meantime
+            return
+        try:
+            with self._compile_lock, self._compiling_counter:
+                cres = self._tier_up_compiler.compile(
+                    args, quick.signature.return_type)
+        except Exception:
+            # Keep running the quick tier, which did compile
+            return
+        with self._overloads_lock:
+            if self.overloads.get(args) is not quick:
+                return
+            self._replace_overload(quick, cres)
+            self._tiers[args] = TIER_OPTIMIZED
+        self._cache.save_overload(args, cres)
+        self._make_lean(cres)
+
+    def _make_lean(self, cres):
+        """
+        With lean compilation, release the inspection artifacts of the
+        registered overload *cres* (once it is cached) and return the
+        compile result replacing it.
+        """
+        if not self._lean:
+            return cres
+        lean = cres.lean()
+        args = tuple(cres.signature.args)
+        with self._overloads_lock:
+            if self.overloads.get(args) is cres:
+                self.overloads[args] = lean
+        return lean
+
+    def _replace_overload(self, old, new):
+        """
+        Atomically replace the overload *old* with *new*, which must have
+        the same argument types.
+        """
+        with self._overloads_lock:
+            self.overloads[tuple(new.signature.args)] = new
+            # The native dispatcher cannot replace a definition in place.
+            # Meanwhile, calls resolve through compile().  The call count
+            # of the new definition (see _on_hot()) starts from zero.
+            self._remove(old.entry_point)
+            self._insert([a._code for a in new.signature.args],
+                         new.entry_point, new.objectmode, new.interpmode)
+            self._retire_overload(old)
+
+    def _retire_overload(self, cres):
+        """
+        Drop the references of the dispatcher and the target context to the
+        overload *cres*, which was removed from the overloads.  Running calls
+        hold its entry point, and the callers compiled against it hold its
+        library, so its code is released once both are gone.
+        """
+        if cres.objectmode or cres.interpmode:
+            return
+        try:
+            self.targetctx.remove_user_function(cres.entry_point)
+        except KeyError:
+            pass
+        if cres.environment is not None:
+            # The code refers to the environment, which the entry point
+            # owns: the callers linking the library must keep it alive too
+            cres.library.keep_alive(cres.environment)
+
+    def _cap_overloads(self):
+        """
+        Drop the least recently used overloads beyond max_overloads from
+        the overload table.  The callers already compiled against them are
+        unaffected, but they are compiled again if needed.  No memory is
+        reclaimed: their code stays in the execution engine.
+        """
+        if self._max_overloads is None:
+            return
+        with self._overloads_lock:
+            excess = len(self.overloads) - self._max_overloads
+            if excess <= 0:
+                return
+            # The native dispatcher tracks the uses of its definitions; the
+            # most recently added overload counts as used.  Interpreter mode
+            # overloads are not in it.
+            last_uses = dict(self._last_uses())
+            by_use = sorted(self.overloads.items(),
+                            key=lambda item: last_uses.get(
+                                item[1].entry_point, 0))
+            for args, cres in by_use[:excess]:
+                del self.overloads[args]
+                self._tiers.pop(args, None)
+                # Running calls hold a reference to the entry point
+                self._remove(cres.entry_point)
+                self._retire_overload(cres)
+                # The LLVM module stays in the execution engine, as
+                # removing it from MCJIT is unsafe (see _add_module())
+                self._evictions += 1
+
+    def precompile(self, signatures, executor=None):
+        """
+        Compile the given *signatures* in the background and return a list
+        of :class:`concurrent.futures.Future`, one per signature, whose
+        result is the compiled entry point.
+
+        *executor* is a thread-based :class:`concurrent.futures.Executor`
+        used to run the compilations; by default a single background
+        thread shared by all dispatchers is used.  Calls and compilations
+        requesting a signature while it is being precompiled wait for the
+        in-flight compilation instead of starting a duplicate one.
+        """
+        if not self._can_compile:
+            raise RuntimeError("compilation disabled")
+        if executor is None:
+            executor = _get_precompile_executor()
+        result = []
+        for sig in signatures:
+            args, return_type = sigutils.normalize_signature(sig)
+            key = tuple(args)
+            with self._overloads_lock:
+                existing = self.overloads.get(key)
+                fut = self._pending_compiles.get(key)
+                if existing is None and fut is None:
+                    fut = self._pending_compiles[key] = futures.Future()
+                    try:
+                        executor.submit(self._run_precompile, key, sig, fut)
+                    except BaseException:
+                        # E.g. the executor was shut down
+                        del self._pending_compiles[key]
+                        raise
+            if fut is None:
+                fut = futures.Future()
+                fut.set_result(existing.entry_point)
+            result.append(fut)
+        return result
+
+    def _run_precompile(self, key, sig, fut):
+        """
+        Executor task for precompile(): compile *sig* and resolve *fut*.
+        """
+        if not fut.set_running_or_notify_cancel():
+            with self._overloads_lock:
+                del self._pending_compiles[key]
+            return
+        try:
+            entry_point = self._compile_now(sig)
+        except BaseException as e:
+            fut.set_exception(e)
+        else:
+            fut.set_result(entry_point)
+        finally:
+            with self._overloads_lock:
+                del self._pending_compiles[key]
 
     def get_compile_result(self, sig):
         """Compile (if needed) and return the compilation result with the
@@ -809,6 +1268,40 @@ class Dispatcher(_DispatcherBase):
             self.compile(atypes)
         return self.overloads[atypes]
 
+    def get_retained_sizes(self, signature=None):
+        """
+        Estimate the memory, in bytes, retained by the compilation artifacts
+        of the given signature, as a dictionary with the following keys:
+
+        - "llvm_ir": the size of the LLVM IR kept for inspection or for
+          linking into callers, measured as bitcode;
+        - "engine_ir": the size of the LLVM IR of the module owned by the
+          execution engine, measured as bitcode, which is never released;
+        - "linking_bitcode": the bitcode kept for linking into callers;
+        - "object_code": the object code kept for caching;
+        - "type_annotation": the annotated function IR and typing maps;
+        - "metadata": the other metadata of the compilation.
+
+        If no signature is given, a dictionary mapping all the compiled
+        signatures to their sizes is returned.
+        """
+        if signature is None:
+            return dict((sig, self.get_retained_sizes(sig))
+                        for sig in self.signatures)
+        cres = self.overloads[signature]
+        sizes = {'llvm_ir': 0, 'engine_ir': 0, 'linking_bitcode': 0,
+                 'object_code': 0}
+        if cres.library is not None:
+            sizes.update(cres.library.get_retained_sizes())
+        seen = set()
+        annotation = [cres.type_annotation]
+        if cres.fndesc is not None:
+            annotation += [cres.fndesc.typemap, cres.fndesc.calltypes]
+        sizes['type_annotation'] = sum(_artifact_size(obj, seen)
+                                       for obj in annotation)
+        sizes['metadata'] = _artifact_size(cres.metadata, seen)
+        return sizes
+
     def recompile(self):
         """
         Recompile all signatures afresh.
@@ -818,7 +1311,11 @@ class Dispatcher(_DispatcherBase):
         # Ensure the old overloads are disposed of, including compiled functions.
         self._make_finalizer()()
         self._reset_overloads()
+        self._tiers.clear()
         self._cache.flush()
+        # Start the untyped passes afresh
+        if self._compiler._untyped_ir_cache is not None:
+            self._compiler._untyped_ir_cache.clear()
         self._can_compile = True
         try:
             for sig in sigs:
@@ -832,6 +1329,8 @@ class Dispatcher(_DispatcherBase):
             cache_path=self._cache.cache_path,
             cache_hits=self._cache_hits,
             cache_misses=self._cache_misses,
+            tiers=dict(self._tiers),
+            evictions=self._evictions,
             )
 
     def parallel_diagnostics(self, signature=None, level=1):
@@ -888,6 +1387,10 @@ class LiftedCode(_DispatcherBase):
 
         self.typingctx = typingctx
         self.targetctx = targetctx
+        if flags.opt_level is not None:
+            # Lifted code is not tiered, always fully optimize it
+            flags = flags.copy()
+            flags.opt_level = None
         self.flags = flags
         self.locals = locals
 
@@ -907,10 +1410,9 @@ class LiftedCode(_DispatcherBase):
         """
         pass
 
-    @global_compiler_lock
     def compile(self, sig):
         # Use counter to track recursion compilation depth
-        with self._compiling_counter:
+        with self._compile_lock, self._compiling_counter:
             # XXX this is mostly duplicated from Dispatcher.
             flags = self.flags
             args, return_type = sigutils.normalize_signature(sig)
@@ -937,8 +1439,7 @@ class LiftedCode(_DispatcherBase):
             # Check typing error if object mode is used
             if cres.typing_error is not None and not flags.enable_pyobject:
                 raise cres.typing_error
-            self.add_overload(cres)
-            return cres.entry_point
+            return self._add_overload_once(cres).entry_point
 
 
 class LiftedLoop(LiftedCode):
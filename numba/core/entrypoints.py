@@ -1,11 +1,118 @@
+import hashlib
+import json
 import logging
+import os
+import sys
 import warnings
+from importlib import import_module
 
-from pkg_resources import iter_entry_points
+from numba.core import config
+from numba.misc.appdirs import AppDirs
 
 _already_initialized = False
 logger = logging.getLogger(__name__)
 
+# The number of sys.path configurations remembered by the entry point cache
+_ENTRY_POINT_CACHE_SIZE = 16
+
+# The suffixes of the metadata of the distributions installed in a directory
+_DIST_INFO_SUFFIXES = ('.dist-info', '.egg-info')
+
+
+def _get_cache_file():
+    if config.CACHE_DIR:
+        base = config.CACHE_DIR
+    else:
+        base = AppDirs(appname="numba", appauthor=False).user_cache_dir
+    return os.path.join(base, 'entrypoints.json')
+
+
+def _get_dists_stamp(path):
+    """
+    Return the names and modification times of the distribution metadata
+    in the sys.path entry *path*.
+    """
+    try:
+        if not os.path.isdir(path):
+            # A zip file, which is a distribution itself
+            return os.stat(path).st_mtime_ns
+        with os.scandir(path) as entries:
+            return sorted((entry.name, entry.stat().st_mtime_ns)
+                          for entry in entries
+                          if entry.name.endswith(_DIST_INFO_SUFFIXES))
+    except OSError:
+        return None
+
+
+def _get_path_stamp():
+    """
+    Return a digest of sys.path, which changes when a distribution is
+    installed in, upgraded in or removed from one of its directories.
+    Only the distribution metadata is looked at, so that the digest is
+    stable while other files are edited (e.g. in the current directory,
+    which is skipped).
+    """
+    h = hashlib.sha256(sys.version.encode())
+    for path in sys.path:
+        if not path:
+            continue
+        path = os.path.abspath(path)
+        h.update(repr((path, _get_dists_stamp(path))).encode())
+    return h.hexdigest()
+
+
+def _scan_entry_points():
+    """
+    Return the (module name, attributes) of the `init` entry points of the
+    `numba_extensions` group.
+    """
+    from pkg_resources import iter_entry_points
+
+    return [(entry_point.module_name, list(entry_point.attrs))
+            for entry_point in iter_entry_points('numba_extensions', 'init')]
+
+
+def _get_init_entry_points():
+    # If pkg_resources is already imported (and possibly customized), it is
+    # authoritative and cheap to scan; otherwise the scan is cached on disk
+    # for the current sys.path to avoid importing it.
+    if 'pkg_resources' in sys.modules:
+        return _scan_entry_points()
+
+    cache_file = _get_cache_file()
+    stamp = _get_path_stamp()
+    try:
+        with open(cache_file) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        cache = {}
+    if not isinstance(cache, dict):
+        cache = {}
+    if stamp in cache:
+        return [tuple(entry) for entry in cache[stamp]]
+
+    entries = _scan_entry_points()
+    # Forget the least recently scanned configurations
+    while len(cache) >= _ENTRY_POINT_CACHE_SIZE:
+        del cache[next(iter(cache))]
+    cache[stamp] = entries
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        tmpname = '%s.tmp.%d' % (cache_file, os.getpid())
+        with open(tmpname, 'w') as f:
+            json.dump(cache, f)
+        os.replace(tmpname, cache_file)
+    except OSError:
+        logger.debug('Failed writing the entry point cache %s', cache_file)
+    return entries
+
+
+def _load_entry_point(module_name, attrs):
+    obj = import_module(module_name)
+    for attr in attrs:
+        obj = getattr(obj, attr)
+    return obj
+
 
 def init_all():
     '''Execute all `numba_extensions` entry points with the name `init`
@@ -19,13 +126,13 @@ def init_all():
     # Must put this here to avoid extensions re-triggering initialization
     _already_initialized = True
 
-    for entry_point in iter_entry_points('numba_extensions', 'init'):
-        logger.debug('Loading extension: %s', entry_point)
+    for module_name, attrs in _get_init_entry_points():
+        logger.debug('Loading extension: %s:%s', module_name, '.'.join(attrs))
         try:
-            func = entry_point.load()
+            func = _load_entry_point(module_name, attrs)
             func()
         except Exception as e:
             msg = "Numba extension module '{}' failed to load due to '{}({})'."
-            warnings.warn(msg.format(entry_point.module_name, type(e).__name__,
+            warnings.warn(msg.format(module_name, type(e).__name__,
                                      str(e)), stacklevel=2)
-            logger.debug('Extension loading failed for: %s', entry_point)
+            logger.debug('Extension loading failed for: %s', module_name)
@@ -245,3 +245,96 @@ def _split_mangled_ident(mangled):
     return mangled[:at], mangled[at:]
 
 
+# Mangled type code to Numba type names, or C type names otherwise
+CODE2NAME = {code: name for name, code in C2CODE.items()}
+CODE2NAME.update((C2CODE[cname], str(typ)) for typ, cname in N2C.items())
+
+_re_escaped_chars = re.compile(r'(?:\$[0-9a-f]{2})+', re.I)
+
+
+def demangle(mangled):
+    """
+    Demangle a name mangled by mangle() into a readable
+    "<identifier>(<argument types>)" string; templated types are rendered as
+    "<name>(<parameters>)".
+    """
+    if not mangled.startswith(PREFIX):
+        raise ValueError('input is not a mangled name')
+    try:
+        name, pos = _demangle_name(mangled, len(PREFIX))
+        args = []
+        while pos < len(mangled):
+            arg, pos = _demangle_type_or_value(mangled, pos)
+            args.append(arg)
+    except (IndexError, ValueError):
+        raise ValueError('invalid mangled name: %r' % (mangled,))
+    return '%s(%s)' % (name, ', '.join(args))
+
+
+def _unescape_string(text):
+    """
+    Reverse _escape_string() and _fix_lead_digit().
+
+    The latter isn't exactly reversible: an identifier starting with an
+    underscore followed by a digit (e.g. "_1x") is mangled as is, and is
+    demangled without its leading underscore ("1x").
+    """
+    if text[:1] == '_' and text[1:2].isdigit():
+        text = text[1:]
+
+    def repl(m):
+        return bytes.fromhex(m.group(0).replace('$', '')).decode('utf8')
+    return re.sub(_re_escaped_chars, repl, text)
+
+
+def _demangle_identifier(mangled, pos):
+    end = pos
+    while mangled[end].isdigit():
+        end += 1
+    length = int(mangled[pos:end])
+    text = mangled[end:end + length]
+    if len(text) != length:
+        raise ValueError('truncated identifier')
+    return _unescape_string(text), end + length
+
+
+def _demangle_template_params(mangled, pos):
+    if mangled[pos:pos + 1] != 'I':
+        return '', pos
+    pos += 1
+    params = []
+    while mangled[pos] != 'E':
+        param, pos = _demangle_type_or_value(mangled, pos)
+        params.append(param)
+    return '(%s)' % ', '.join(params), pos + 1
+
+
+def _demangle_name(mangled, pos):
+    if mangled[pos] != 'N':
+        ident, pos = _demangle_identifier(mangled, pos)
+        params, pos = _demangle_template_params(mangled, pos)
+        return ident + params, pos
+    pos += 1
+    parts = []
+    while mangled[pos] not in 'IE':
+        part, pos = _demangle_identifier(mangled, pos)
+        parts.append(part)
+    params, pos = _demangle_template_params(mangled, pos)
+    if mangled[pos] != 'E':
+        raise ValueError('unterminated nested name')
+    return '.'.join(parts) + params, pos + 1
+
+
+def _demangle_type_or_value(mangled, pos):
+    c = mangled[pos]
+    if c == 'L':
+        # Integer literal
+        end = mangled.index('E', pos)
+        if mangled[pos + 1] != 'i':
+            raise ValueError('unsupported literal')
+        return str(int(mangled[pos + 2:end])), end + 1
+    elif c == 'N' or c.isdigit():
+        return _demangle_name(mangled, pos)
+    elif c in CODE2NAME:
+        return CODE2NAME[c], pos + 1
+    raise ValueError('unsupported type code %r' % (c,))
@@ -0,0 +1,133 @@
+"""
+Line-level profiling of compiled functions (see the ``profile`` option of
+:func:`~numba.jit`).
+
+The lowering of a profiled function increments the hit counter of each
+source line every time the execution enters the code of the line, and
+optionally accumulates the cycles (as read by LLVM's ``readcyclecounter``
+intrinsic) spent in the line, callees included.  The counters live in NumPy
+arrays owned by the LineProfile of the function, which is kept in the
+metadata of its compile result and by its code library (so that the code of
+the callers it is linked into doesn't outlive the counters).
+"""
+from collections import namedtuple, OrderedDict
+from contextlib import closing
+from io import StringIO
+
+import numpy as np
+
+
+LineStats = namedtuple('LineStats', ('hits', 'cycles'))
+
+
+class LineProfile(object):
+    """
+    The hit counts, and optionally the cycles, of the source lines of a
+    compiled function.  The counters are updated in place by the compiled
+    code, without synchronization: they are approximate if the function
+    runs in several threads at once.
+    """
+
+    def __init__(self, func_ir, cycles=False):
+        self.func_id = func_ir.func_id
+        self.filename = func_ir.loc.filename
+        lines = set()
+        for block in func_ir.blocks.values():
+            for inst in block.body:
+                if self.is_profiled(inst.loc):
+                    lines.add(inst.loc.line)
+        self.lines = sorted(lines)
+        self._indices = {line: i for i, line in enumerate(self.lines)}
+        self.hits = np.zeros(len(self.lines), dtype=np.uint64)
+        # The last slot accumulates the cycles not attributed to a line
+        # (e.g. after returning)
+        self.cycles = (np.zeros(len(self.lines) + 1, dtype=np.uint64)
+                       if cycles else None)
+        # The type annotation of the function, to render the profile
+        self.type_annotation = None
+
+    def __repr__(self):
+        return "<LineProfile of %s>" % (self.func_id.func_qualname,)
+
+    def is_profiled(self, loc):
+        """
+        Whether the IR at *loc* is profiled, i.e. it belongs to the source
+        of the function (rather than to inlined code).
+        """
+        return loc.filename == self.filename and loc.line is not None
+
+    def get_index(self, line):
+        """
+        Return the index of the counters of *line*, None if the line is not
+        profiled.
+        """
+        return self._indices.get(line)
+
+    @property
+    def sink_index(self):
+        """
+        The index of the cycles not attributed to a line.
+        """
+        return len(self.lines)
+
+    def reset(self):
+        """
+        Reset the counters to zero.
+        """
+        self.hits[:] = 0
+        if self.cycles is not None:
+            self.cycles[:] = 0
+
+    def get_stats(self):
+        """
+        Return an ordered dict of line number to LineStats(hits, cycles);
+        cycles are None if they are not profiled.
+        """
+        stats = OrderedDict()
+        for i, line in enumerate(self.lines):
+            cycles = int(self.cycles[i]) if self.cycles is not None else None
+            stats[line] = LineStats(int(self.hits[i]), cycles)
+        return stats
+
+    def format(self):
+        """
+        Return the profile as text, along with the source of the function.
+        """
+        from numba.core.annotations.type_annotations import SourceLines
+
+        source = SourceLines(self.func_id.func)
+        stats = self.get_stats()
+        total = (sum(st.cycles for st in stats.values())
+                 if self.cycles is not None else 0)
+        with closing(StringIO()) as io:
+            print("# File: %s" % self.filename, file=io)
+            print("# Function: %s" % self.func_id.func_qualname, file=io)
+            print("%6s %12s %16s %7s  %s" % ("Line", "Hits", "Cycles",
+                                             "%", "Source"), file=io)
+            for num in (source if source.avail else stats):
+                st = stats.get(num)
+                hits = cycles = percent = ''
+                if st is not None:
+                    hits = st.hits
+                    if st.cycles is not None:
+                        cycles = st.cycles
+                        if total:
+                            percent = '%.1f' % (100.0 * st.cycles / total)
+                print("%6d %12s %16s %7s  %s" % (num, hits, cycles, percent,
+                                                 source[num]), file=io)
+            return io.getvalue()
+
+    def __str__(self):
+        return self.format()
+
+    def html_annotate(self, outfile):
+        """
+        Write the profile to the file-like *outfile* as HTML, in the type
+        annotation of the function.
+        """
+        if self.type_annotation is None:
+            raise RuntimeError("the type annotation of %s was released, "
+                               "compile without lean=True to render it"
+                               % (self.func_id.func_qualname,))
+        self.type_annotation.html_annotate(outfile,
+                                           line_profile=self.get_stats())
@@ -3,6 +3,7 @@ from collections import namedtuple
 import operator
 from functools import partial
 
+from llvmlite import ir as llvmir
 from llvmlite.llvmpy.core import Constant, Type, Builder
 
 from numba import _dynfunc
@@ -86,12 +87,30 @@ class BaseLower(object):
         self.firstblk = min(self.blocks.keys())
         self.loc = -1
 
+        # The line profile of the function (see the ``profile`` option)
+        self.line_profile = (metadata.get('line_profile')
+                             if metadata is not None else None)
+
+        # The arrays allocated on the stack (see the StackAllocArrays pass)
+        self.stack_arrays = (metadata.get('stack_arrays', {})
+                             if metadata is not None else {})
+
+        # The variables holding values confined to the thread, whose
+        # reference counts are updated non-atomically (see the
+        # ThreadLocalRefct pass)
+        self.thread_local = (metadata.get('thread_local', frozenset())
+                             if metadata is not None else frozenset())
+
         # Specializes the target context as seen inside the Lowerer
         # This adds:
         #  - environment: the python execution environment
         self.context = context.subtarget(environment=self.env,
                                          fndesc=self.fndesc)
 
+        # Whether the MemInfos allocated by the function are traced
+        self.trace_alloc = (config.NRT_TRACE_ALLOC and
+                            self.context.enable_nrt)
+
         # Debuginfo
         dibuildercls = (self.context.DIBuilder
                         if self.context.enable_debuginfo
@@ -131,11 +150,20 @@ class BaseLower(object):
         self.debuginfo.mark_subprogram(function=self.builder.function,
                                        name=self.fndesc.qualname,
                                        loc=self.func_ir.loc)
+        if self.line_profile is not None:
+            self.init_line_profile()
+        if self.trace_alloc:
+            # The allocation site of the statement of the calling traced
+            # function, if any, to which the allocations are accounted
+            self.outer_alloc_site = self.context.nrt.get_outer_alloc_site(
+                self.builder)
 
     def post_lower(self):
         """
         Called after all blocks are lowered
         """
+        if self.trace_alloc:
+            self.leave_alloc_sites()
         self.debuginfo.finalize()
 
     def pre_block(self, block):
@@ -172,6 +200,7 @@ class BaseLower(object):
         self.context.declare_env_global(self.module, envname)
 
     def lower(self):
+        self.library.note_implementation(self.func_ir.func_id.func)
         # Emit the Env into the module
         self.emit_environment_object()
         if self.generator_info is None:
@@ -259,14 +288,119 @@ class BaseLower(object):
         Lower the given block.
         """
         self.pre_block(block)
+        profiled_line = None
+        hit_lines = set()
+        entered_site = None
         for inst in block.body:
             self.loc = inst.loc
+            if self.line_profile is not None:
+                profiled_line = self.profile_line(inst, profiled_line,
+                                                  hit_lines)
+            alloc_site = self.get_alloc_site(inst)
+            if alloc_site is not None and alloc_site != entered_site:
+                self.context.nrt.enter_alloc_site(
+                    self.builder, self.outer_alloc_site, alloc_site)
+                entered_site = alloc_site
             defaulterrcls = partial(LoweringError, loc=self.loc)
             with new_error_context('lowering "{inst}" at {loc}', inst=inst,
-                                   loc=self.loc, errcls_=defaulterrcls):
+                                   loc=self.loc, errcls_=defaulterrcls), \
+                    self.context.nrt.alloc_site(alloc_site):
                 self.lower_inst(inst)
         self.post_block(block)
 
+    def get_alloc_site(self, inst):
+        """
+        Return the name of the allocation site of *inst*, None if the
+        allocations are not traced.
+        """
+        if not self.trace_alloc:
+            return None
+        return "%s\t%s\t%s" % (self.fndesc.qualname, inst.loc.line,
+                               inst.loc.filename)
+
+    def leave_alloc_sites(self):
+        """
+        Emit the leaving of the allocation sites before each return of the
+        current function, including those propagating exceptions.
+        """
+        for block in self.function.blocks:
+            if isinstance(block.terminator, llvmir.Ret):
+                self.builder.position_before(block.terminator)
+                self.context.nrt.leave_alloc_site(self.builder,
+                                                  self.outer_alloc_site)
+
+    def init_line_profile(self):
+        """
+        Emit the set up of the line profiling of the current function.
+        """
+        profile = self.line_profile
+        # The addresses of the counters are embedded in the code, which
+        # callers may have linked in and outlive the compile result
+        self.library.keep_alive(profile)
+        self.profile_hits = self._get_profile_counters(profile.hits)
+        if profile.cycles is not None:
+            self.profile_cycles = self._get_profile_counters(profile.cycles)
+            # The cycle counter when the current line was entered, and the
+            # index of the line
+            self.profile_start = cgutils.alloca_once_value(
+                self.builder, self._read_cycle_counter())
+            self.profile_index = cgutils.alloca_once_value(
+                self.builder, Constant.int(Type.int(64), profile.sink_index))
+
+    def _get_profile_counters(self, arr):
+        ptr = self.context.add_dynamic_addr(self.builder, arr.ctypes.data,
+                                            info='line profile counters')
+        return self.builder.bitcast(ptr, Type.pointer(Type.int(64)))
+
+    def _read_cycle_counter(self):
+        fnty = Type.function(Type.int(64), [])
+        fn = self.module.get_or_insert_function(fnty,
+                                                name='llvm.readcyclecounter')
+        return self.builder.call(fn, [])
+
+    def profile_line(self, inst, profiled_line, hit_lines):
+        """
+        Emit the profiling of the line of *inst*, given the line of the
+        previous profiled instruction of the block, *profiled_line*.  A line
+        is hit once per execution of the block, however many of its
+        instructions are interleaved with those of other lines (as the lines
+        of *hit_lines*).  Return the line profiled last.
+        """
+        profile = self.line_profile
+        if not profile.is_profiled(inst.loc):
+            return profiled_line
+        line = inst.loc.line
+        index = profile.get_index(line)
+        if index is None:
+            return profiled_line
+        if line not in hit_lines:
+            hit_lines.add(line)
+            ptr = cgutils.gep(self.builder, self.profile_hits, index)
+            self.builder.store(
+                self.builder.add(self.builder.load(ptr),
+                                 Constant.int(Type.int(64), 1)),
+                ptr)
+        if line != profiled_line and profile.cycles is not None:
+            self._switch_profiled_line(index)
+        if profile.cycles is not None and isinstance(inst, ir.Return):
+            # Attribute the cycles of the line before returning
+            self._switch_profiled_line(profile.sink_index)
+        return line
+
+    def _switch_profiled_line(self, index):
+        """
+        Add the cycles elapsed since the current line was entered to its
+        counter, and make the line of *index* the current one.
+        """
+        builder = self.builder
+        now = self._read_cycle_counter()
+        ptr = builder.gep(self.profile_cycles,
+                          [builder.load(self.profile_index)])
+        elapsed = builder.sub(now, builder.load(self.profile_start))
+        builder.store(builder.add(builder.load(ptr), elapsed), ptr)
+        builder.store(now, self.profile_start)
+        builder.store(Constant.int(Type.int(64), index), self.profile_index)
+
     def create_cpython_wrapper(self, release_gil=False):
         """
         Create CPython wrapper(s) around this function (or generator).
@@ -535,13 +669,15 @@ class Lower(BaseLower):
             return res
 
         elif isinstance(value, ir.Expr):
+            if inst.target.name in self.stack_arrays:
+                return self.lower_stack_array(ty, inst)
             return self.lower_expr(ty, value)
 
         elif isinstance(value, ir.Var):
             val = self.loadvar(value.name)
             oty = self.typeof(value.name)
             res = self.context.cast(self.builder, val, oty, ty)
-            self.incref(ty, res)
+            self.incref(ty, res, local=inst.target.name in self.thread_local)
             return res
 
         elif isinstance(value, ir.Arg):
@@ -769,6 +905,28 @@ class Lower(BaseLower):
         impl = self.context.get_function(print, fixed_sig)
         impl(self.builder, argvals)
 
+    def lower_stack_array(self, resty, inst):
+        """
+        Lower the array constructor call assigned by *inst* as an array
+        allocated on the stack, with no MemInfo.
+        """
+        from numba.np.arrayobj import numpy_stack_array
+
+        func_name, shape = self.stack_arrays[inst.target.name]
+        expr = inst.value
+        signature = self.fndesc.calltypes[expr]
+        argvals = []
+        if func_name in ('array', 'asarray'):
+            seq = expr.args[0]
+            argvals.append(self.context.cast(self.builder,
+                                             self.loadvar(seq.name),
+                                             self.typeof(seq.name),
+                                             signature.args[0]))
+        res = numpy_stack_array(self.context, self.builder, func_name,
+                                signature, argvals, shape)
+        return self.context.cast(self.builder, res, signature.return_type,
+                                 resty)
+
     def lower_call(self, resty, expr):
         signature = self.fndesc.calltypes[expr]
         self.debug_print("# lower_call: expr = {0}".format(expr))
@@ -1297,7 +1455,7 @@ class Lower(BaseLower):
 
         # Clean up existing value stored in the variable
         old = self.loadvar(name)
-        self.decref(fetype, old)
+        self.decref(fetype, old, local=name in self.thread_local)
 
         # Store variable
         ptr = self.getvar(name)
@@ -1322,7 +1480,8 @@ class Lower(BaseLower):
         self._alloca_var(name, fetype)
 
         ptr = self.getvar(name)
-        self.decref(fetype, self.builder.load(ptr))
+        self.decref(fetype, self.builder.load(ptr),
+                    local=name in self.thread_local)
         # Zero-fill variable to avoid double frees on subsequent dels
         self.builder.store(Constant.null(ptr.type.pointee), ptr)
 
@@ -1344,17 +1503,17 @@ class Lower(BaseLower):
                                          loc=self.loc)
         return aptr
 
-    def incref(self, typ, val):
+    def incref(self, typ, val, local=False):
         if not self.context.enable_nrt:
             return
 
-        self.context.nrt.incref(self.builder, typ, val)
+        self.context.nrt.incref(self.builder, typ, val, local=local)
 
-    def decref(self, typ, val):
+    def decref(self, typ, val, local=False):
         if not self.context.enable_nrt:
             return
 
-        self.context.nrt.decref(self.builder, typ, val)
+        self.context.nrt.decref(self.builder, typ, val, local=local)
 
 
 def _lit_or_omitted(value):
@@ -77,6 +77,20 @@ class TargetOptions(object):
         if 'inline' in kws:
             flags.set('inline', kws.pop('inline'))
 
+        if 'profile' in kws:
+            flags.set('profile', kws.pop('profile'))
+
+        if kws.pop('tiered', False):
+            # The dispatcher compiles the optimized tier separately
+            flags.set('opt_level', config.TIERED_OPT)
+
+        # The overload table is bounded by the dispatcher
+        kws.pop('max_overloads', None)
+
+        # Compile results are made lean, and pickled, by the dispatcher
+        kws.pop('lean', None)
+        kws.pop('pickle_code', None)
+
         flags.set("enable_pyobject_looplift")
 
         if kws:
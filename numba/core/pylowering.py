@@ -72,6 +72,9 @@ class PyLower(BaseLower):
 
         self._live_vars = set()
 
+        # Object mode code doesn't allocate through the NRT
+        self.trace_alloc = False
+
     def pre_lower(self):
         super(PyLower, self).pre_lower()
         self.init_pyapi()
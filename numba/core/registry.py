@@ -1,4 +1,5 @@
 import contextlib
+import threading
 
 from numba.core.descriptors import TargetDescriptor
 from numba.core import utils, typing, dispatcher, cpu
@@ -6,7 +7,7 @@ from numba.core import utils, typing, dispatcher, cpu
 # -----------------------------------------------------------------------------
 # Default CPU target descriptors
 
-class _NestedContext(object):
+class _NestedContext(threading.local):
     _typing_context = None
     _target_context = None
 
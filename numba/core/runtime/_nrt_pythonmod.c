@@ -2,6 +2,7 @@
 #define NUMBA_EXPORT_DATA(_vartype) static _vartype
 
 #include "_nrt_python.c"
+#include "nrt_pool.h"
 
 static PyObject *
 memsys_shutdown(PyObject *self, PyObject *args) {
@@ -17,6 +18,20 @@ memsys_use_cpython_allocator(PyObject *self, PyObject *args) {
     Py_RETURN_NONE;
 }
 
+static PyObject *
+memsys_use_system_allocator(PyObject *self, PyObject *args) {
+    NRT_MemSys_set_allocator(malloc, realloc, free);
+    Py_RETURN_NONE;
+}
+
+static PyObject *
+memsys_use_pool_allocator(PyObject *self, PyObject *args) {
+    NRT_MemSys_set_allocator(NRT_Pool_malloc,
+                             NRT_Pool_realloc,
+                             NRT_Pool_free);
+    Py_RETURN_NONE;
+}
+
 static PyObject *
 memsys_set_atomic_inc_dec(PyObject *self, PyObject *args) {
     PyObject *addr_inc_obj, *addr_dec_obj;
@@ -65,6 +80,67 @@ memsys_get_stats_mi_free(PyObject *self, PyObject *args) {
     return PyLong_FromSize_t(NRT_MemSys_get_stats_mi_free());
 }
 
+/*
+ * Return the statistics of the allocation sites, as a list of (name,
+ * allocs, frees, alloc_bytes, free_bytes) tuples.
+ */
+static PyObject *
+memsys_get_alloc_sites(PyObject *self, PyObject *args) {
+    NRT_AllocSite *site;
+    PyObject *sites = PyList_New(0);
+    if (sites == NULL)
+        return NULL;
+    for (site = NRT_MemSys_get_alloc_sites(); site; site = site->next) {
+        PyObject *item = Py_BuildValue("snnnn", site->name,
+                                       (Py_ssize_t) site->allocs,
+                                       (Py_ssize_t) site->frees,
+                                       (Py_ssize_t) site->alloc_bytes,
+                                       (Py_ssize_t) site->free_bytes);
+        if (item == NULL || PyList_Append(sites, item)) {
+            Py_XDECREF(item);
+            Py_DECREF(sites);
+            return NULL;
+        }
+        Py_DECREF(item);
+    }
+    return sites;
+}
+
+/*
+ * Return the statistics of the pooled allocator, as a tuple of the global
+ * counters and a list of (block size, live blocks, cached blocks) tuples of
+ * the size classes.
+ */
+static PyObject *
+memsys_get_pool_stats(PyObject *self, PyObject *args) {
+    NRT_PoolStats stats;
+    PyObject *classes;
+    int i;
+    NRT_Pool_get_stats(&stats);
+    classes = PyList_New(NRT_POOL_NUM_CLASSES);
+    if (classes == NULL)
+        return NULL;
+    for (i = 0; i < NRT_POOL_NUM_CLASSES; ++i) {
+        PyObject *item = Py_BuildValue("nnn",
+                                       (Py_ssize_t) stats.class_block_size[i],
+                                       (Py_ssize_t) stats.class_live[i],
+                                       (Py_ssize_t) stats.class_cached[i]);
+        if (item == NULL) {
+            Py_DECREF(classes);
+            return NULL;
+        }
+        PyList_SET_ITEM(classes, i, item);
+    }
+    return Py_BuildValue("nnnnnnN",
+                         (Py_ssize_t) stats.allocs,
+                         (Py_ssize_t) stats.frees,
+                         (Py_ssize_t) stats.requested_bytes,
+                         (Py_ssize_t) stats.used_bytes,
+                         (Py_ssize_t) stats.cached_bytes,
+                         (Py_ssize_t) stats.reserved_bytes,
+                         classes);
+}
+
 
 /*
  * Create a new MemInfo with a owner PyObject
@@ -118,6 +194,8 @@ static PyMethodDef ext_methods[] = {
 #define declmethod(func) { #func , ( PyCFunction )func , METH_VARARGS , NULL }
 #define declmethod_noargs(func) { #func , ( PyCFunction )func , METH_NOARGS, NULL }
     declmethod_noargs(memsys_use_cpython_allocator),
+    declmethod_noargs(memsys_use_system_allocator),
+    declmethod_noargs(memsys_use_pool_allocator),
     declmethod_noargs(memsys_shutdown),
     declmethod(memsys_set_atomic_inc_dec),
     declmethod(memsys_set_atomic_cas),
@@ -125,6 +203,8 @@ static PyMethodDef ext_methods[] = {
     declmethod_noargs(memsys_get_stats_free),
     declmethod_noargs(memsys_get_stats_mi_alloc),
     declmethod_noargs(memsys_get_stats_mi_free),
+    declmethod_noargs(memsys_get_pool_stats),
+    declmethod_noargs(memsys_get_alloc_sites),
     declmethod(meminfo_new),
     declmethod(meminfo_alloc),
     declmethod(meminfo_alloc_safe),
@@ -172,6 +252,10 @@ declmethod(MemInfo_data);
 declmethod(MemInfo_varsize_free);
 declmethod(MemInfo_varsize_realloc);
 declmethod(MemInfo_release);
+declmethod(MemInfo_trace_alloc);
+declmethod(AllocSite_get_outer);
+declmethod(AllocSite_enter);
+declmethod(AllocSite_leave);
 declmethod(Allocate);
 declmethod(Free);
 declmethod(get_api);
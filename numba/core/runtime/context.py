@@ -1,3 +1,7 @@
+import contextlib
+import hashlib
+import threading
+
 from llvmlite import ir
 
 from numba.core import types, cgutils
@@ -11,11 +15,116 @@ class NRTContext(object):
     def __init__(self, context, enabled):
         self._context = context
         self._enabled = enabled
+        # The stack of the allocation sites being lowered is per-thread, as
+        # lowering can happen concurrently (see NUMBA_CONCURRENT_COMPILATION)
+        # and subtargets share it with their parent context.
+        self._alloc_sites_tls = threading.local()
+
+    @property
+    def _alloc_sites(self):
+        try:
+            return self._alloc_sites_tls.stack
+        except AttributeError:
+            stack = self._alloc_sites_tls.stack = []
+            return stack
 
     def _require_nrt(self):
         if not self._enabled:
             raise RuntimeError("NRT required but not enabled")
 
+    @contextlib.contextmanager
+    def alloc_site(self, name):
+        """
+        Trace the MemInfos allocated by the code lowered in the context as
+        allocated at the site *name*, unless it is None (see
+        NUMBA_NRT_TRACE_ALLOC).
+        """
+        if name is None:
+            yield
+            return
+        self._alloc_sites.append(name)
+        try:
+            yield
+        finally:
+            self._alloc_sites.pop()
+
+    def _get_alloc_site_args(self, builder, name):
+        """
+        Return the slot and name arguments of the NRT functions taking the
+        allocation site *name*.
+        """
+        mod = builder.module
+        suffix = hashlib.sha1(name.encode('utf-8')).hexdigest()
+        slot_name = "_numba_alloc_site.%s" % suffix
+        name_name = "_numba_alloc_site_name.%s" % suffix
+        if slot_name not in mod.globals:
+            # The site, looked up by name by the first allocation
+            slot = ir.GlobalVariable(mod, cgutils.voidptr_t, name=slot_name)
+            slot.linkage = 'internal'
+            slot.initializer = cgutils.get_null_value(slot.type.pointee)
+            cgutils.global_constant(mod, name_name, cgutils.make_bytearray(
+                name.encode('utf-8') + b'\x00'))
+        slot = mod.globals[slot_name]
+        strptr = mod.globals[name_name]
+        return slot, builder.bitcast(strptr, cgutils.voidptr_t)
+
+    def _trace_alloc(self, builder, meminfo):
+        """
+        Emit the tracing of the allocation of *meminfo* at the current
+        allocation site, if any.  *meminfo* is returned.
+        """
+        if not self._alloc_sites:
+            return meminfo
+        slot, name = self._get_alloc_site_args(builder,
+                                               self._alloc_sites[-1])
+        fnty = ir.FunctionType(ir.VoidType(),
+                               [cgutils.voidptr_t,
+                                cgutils.voidptr_t.as_pointer(),
+                                cgutils.voidptr_t])
+        fn = builder.module.get_or_insert_function(
+            fnty, name="NRT_MemInfo_trace_alloc")
+        builder.call(fn, [meminfo, slot, name])
+        return meminfo
+
+    def get_outer_alloc_site(self, builder):
+        """
+        Emit the lookup of the allocation site of the statement running in
+        the outermost traced function, NULL if none.  Traced functions do
+        this on entry, see enter_alloc_site() and leave_alloc_site().
+        """
+        fnty = ir.FunctionType(cgutils.voidptr_t, [])
+        fn = builder.module.get_or_insert_function(
+            fnty, name="NRT_AllocSite_get_outer")
+        return builder.call(fn, [])
+
+    def enter_alloc_site(self, builder, outer, name):
+        """
+        Emit the entering of a statement at the allocation site *name*.  If
+        *outer*, as returned by get_outer_alloc_site() on entry, is NULL,
+        the allocations made by the statement, including those in the
+        functions it calls, are traced at *name*.  Otherwise, they are traced
+        at the site of the outer function's statement.
+        """
+        slot, name = self._get_alloc_site_args(builder, name)
+        fnty = ir.FunctionType(ir.VoidType(),
+                               [cgutils.voidptr_t,
+                                cgutils.voidptr_t.as_pointer(),
+                                cgutils.voidptr_t])
+        fn = builder.module.get_or_insert_function(
+            fnty, name="NRT_AllocSite_enter")
+        builder.call(fn, [outer, slot, name])
+
+    def leave_alloc_site(self, builder, outer):
+        """
+        Emit the leaving of the allocation sites of a traced function when
+        it returns.  *outer* is as returned by get_outer_alloc_site() on
+        entry.
+        """
+        fnty = ir.FunctionType(ir.VoidType(), [cgutils.voidptr_t])
+        fn = builder.module.get_or_insert_function(
+            fnty, name="NRT_AllocSite_leave")
+        builder.call(fn, [outer])
+
     def allocate(self, builder, size):
         """
         Low-level allocate a new memory area of `size` bytes.
@@ -51,7 +160,7 @@ class NRTContext(object):
         fnty = ir.FunctionType(cgutils.voidptr_t, [cgutils.intp_t])
         fn = mod.get_or_insert_function(fnty, name="NRT_MemInfo_alloc_safe")
         fn.return_value.add_attribute("noalias")
-        return builder.call(fn, [size])
+        return self._trace_alloc(builder, builder.call(fn, [size]))
 
     def meminfo_alloc_dtor(self, builder, size, dtor):
         self._require_nrt()
@@ -62,8 +171,8 @@ class NRTContext(object):
         fn = mod.get_or_insert_function(fnty,
                                         name="NRT_MemInfo_alloc_dtor_safe")
         fn.return_value.add_attribute("noalias")
-        return builder.call(fn, [size,
-                                 builder.bitcast(dtor, cgutils.voidptr_t)])
+        return self._trace_alloc(builder, builder.call(
+            fn, [size, builder.bitcast(dtor, cgutils.voidptr_t)]))
 
     def meminfo_alloc_aligned(self, builder, size, align):
         """
@@ -85,7 +194,7 @@ class NRTContext(object):
             align = self._context.get_constant(types.uint32, align)
         else:
             assert align.type == u32, "align must be a uint32"
-        return builder.call(fn, [size, align])
+        return self._trace_alloc(builder, builder.call(fn, [size, align]))
 
     def meminfo_new_varsize(self, builder, size):
         """
@@ -101,7 +210,7 @@ class NRTContext(object):
         fnty = ir.FunctionType(cgutils.voidptr_t, [cgutils.intp_t])
         fn = mod.get_or_insert_function(fnty, name="NRT_MemInfo_new_varsize")
         fn.return_value.add_attribute("noalias")
-        return builder.call(fn, [size])
+        return self._trace_alloc(builder, builder.call(fn, [size]))
 
     def meminfo_new_varsize_dtor(self, builder, size, dtor):
         """
@@ -115,7 +224,7 @@ class NRTContext(object):
                                [cgutils.intp_t, cgutils.voidptr_t])
         fn = mod.get_or_insert_function(
             fnty, name="NRT_MemInfo_new_varsize_dtor")
-        return builder.call(fn, [size, dtor])
+        return self._trace_alloc(builder, builder.call(fn, [size, dtor]))
 
     def meminfo_varsize_alloc(self, builder, meminfo, size):
         """
@@ -211,17 +320,23 @@ class NRTContext(object):
             fn.args[0].add_attribute("nocapture")
             builder.call(fn, [mi])
 
-    def incref(self, builder, typ, value):
+    def incref(self, builder, typ, value, local=False):
         """
-        Recursively incref the given *value* and its members.
+        Recursively incref the given *value* and its members.  If *local*,
+        the value is confined to the current thread and the reference counts
+        are incremented with non-atomic operations.
         """
-        self._call_incref_decref(builder, typ, value, "NRT_incref")
+        funcname = "NRT_incref_local" if local else "NRT_incref"
+        self._call_incref_decref(builder, typ, value, funcname)
 
-    def decref(self, builder, typ, value):
+    def decref(self, builder, typ, value, local=False):
         """
-        Recursively decref the given *value* and its members.
+        Recursively decref the given *value* and its members.  If *local*,
+        the value is confined to the current thread and the reference counts
+        are decremented with non-atomic operations.
         """
-        self._call_incref_decref(builder, typ, value, "NRT_decref")
+        funcname = "NRT_decref_local" if local else "NRT_decref"
+        self._call_incref_decref(builder, typ, value, funcname)
 
     def get_nrt_api(self, builder):
         """Calls NRT_get_api(), which returns the NRT API function table.
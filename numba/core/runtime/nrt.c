@@ -7,6 +7,13 @@
 #define MIN(a, b) ((a) < (b)) ? (a) : (b)
 #endif
 
+#ifdef _MSC_VER
+#define THREAD_LOCAL(ty) __declspec(thread) ty
+#else
+/* Non-standard C99 extension that's understood by gcc and clang */
+#define THREAD_LOCAL(ty) __thread ty
+#endif
+
 
 typedef int (*atomic_meminfo_cas_func)(void **ptr, void *cmp,
                                        void *repl, void **oldptr);
@@ -50,6 +57,8 @@ struct MemSys {
     int shutting;
     /* Stats */
     size_t stats_alloc, stats_free, stats_mi_alloc, stats_mi_free;
+    /* The list of the allocation sites, see NRT_MemInfo_trace_alloc() */
+    NRT_AllocSite *alloc_sites;
     /* System allocation functions */
     struct {
         NRT_malloc_func malloc;
@@ -123,6 +132,10 @@ size_t NRT_MemSys_get_stats_mi_free() {
     return TheMSys.stats_mi_free;
 }
 
+NRT_AllocSite *NRT_MemSys_get_alloc_sites(void) {
+    return TheMSys.alloc_sites;
+}
+
 static
 size_t nrt_testing_atomic_inc(size_t *ptr){
     /* non atomic */
@@ -333,6 +346,145 @@ void NRT_MemInfo_dump(NRT_MemInfo *mi, FILE *out) {
     fprintf(out, "MemInfo %p refcount %zu\n", mi, mi->refct);
 }
 
+/*
+ * Allocation tracing.
+ */
+
+/* The destructor information of a traced MemInfo */
+typedef struct {
+    NRT_dtor_function dtor;
+    void *dtor_info;
+    NRT_AllocSite *site;
+    size_t size;
+} nrt_traced_info;
+
+static
+void nrt_atomic_add_size(size_t *ptr, size_t val) {
+    /* Only the atomic CAS of pointers is available */
+    void *cur = *(void * volatile *) ptr;
+    void *old;
+    while (!TheMSys.atomic_cas((void **) ptr, cur,
+                               (void *) ((size_t) cur + val), &old)) {
+        cur = old;
+    }
+}
+
+static
+void nrt_traced_dtor(void *ptr, size_t size, void *info) {
+    nrt_traced_info *traced = info;
+    if (traced->dtor) {
+        traced->dtor(ptr, size, traced->dtor_info);
+    }
+    TheMSys.atomic_inc(&traced->site->frees);
+    nrt_atomic_add_size(&traced->site->free_bytes, traced->size);
+    TheMSys.allocator.free(traced);
+}
+
+static
+NRT_dtor_function nrt_meminfo_dtor(NRT_MemInfo *mi) {
+    /* The destructor of a MemInfo, ignoring the tracing */
+    if (mi->dtor == nrt_traced_dtor)
+        return ((nrt_traced_info *) mi->dtor_info)->dtor;
+    return mi->dtor;
+}
+
+static
+NRT_AllocSite *nrt_get_alloc_site(NRT_AllocSite **slot, const char *name) {
+    NRT_AllocSite *site = *slot;
+    void *old;
+    if (site)
+        return site;
+    for (site = TheMSys.alloc_sites; site; site = site->next) {
+        if (strcmp(site->name, name) == 0) {
+            *slot = site;
+            return site;
+        }
+    }
+    /* Not found: insert a new site.  Concurrent insertions of the same name
+       may duplicate it, the statistics of the duplicates are added up by
+       the readers. */
+    site = TheMSys.allocator.malloc(sizeof(NRT_AllocSite) + strlen(name) + 1);
+    if (site == NULL)
+        return NULL;
+    memset(site, 0, sizeof(NRT_AllocSite));
+    site->name = (char *) (site + 1);
+    strcpy(site->name, name);
+    site->next = TheMSys.alloc_sites;
+    while (!TheMSys.atomic_cas((void **) &TheMSys.alloc_sites, site->next,
+                               site, &old)) {
+        site->next = old;
+    }
+    *slot = site;
+    return site;
+}
+
+/* The allocation site (as the arguments of nrt_get_alloc_site()) of the
+   statement running in the outermost traced function of the thread, see
+   NRT_AllocSite_enter() */
+static THREAD_LOCAL(NRT_AllocSite **) nrt_outer_site_slot;
+static THREAD_LOCAL(const char *) nrt_outer_site_name;
+
+void *NRT_AllocSite_get_outer(void) {
+    return nrt_outer_site_slot;
+}
+
+void NRT_AllocSite_enter(void *outer, NRT_AllocSite **slot,
+                         const char *name) {
+    if (outer == NULL) {
+        nrt_outer_site_slot = slot;
+        nrt_outer_site_name = name;
+    }
+}
+
+void NRT_AllocSite_leave(void *outer) {
+    if (outer == NULL) {
+        nrt_outer_site_slot = NULL;
+        nrt_outer_site_name = NULL;
+    }
+}
+
+void NRT_MemInfo_trace_alloc(NRT_MemInfo *mi, NRT_AllocSite **slot,
+                             const char *name) {
+    NRT_AllocSite *site;
+    nrt_traced_info *traced;
+    if (mi == NULL)
+        return;
+    /* Allocations are accounted to the outermost traced function */
+    if (nrt_outer_site_slot != NULL)
+        site = nrt_get_alloc_site(nrt_outer_site_slot, nrt_outer_site_name);
+    else
+        site = nrt_get_alloc_site(slot, name);
+    if (site == NULL)
+        return;
+    traced = TheMSys.allocator.malloc(sizeof(nrt_traced_info));
+    if (traced == NULL)
+        return;
+    traced->dtor = mi->dtor;
+    traced->dtor_info = mi->dtor_info;
+    traced->site = site;
+    traced->size = mi->size;
+    mi->dtor = nrt_traced_dtor;
+    mi->dtor_info = traced;
+    TheMSys.atomic_inc(&site->allocs);
+    nrt_atomic_add_size(&site->alloc_bytes, mi->size);
+}
+
+static
+void nrt_trace_resize(NRT_MemInfo *mi, size_t size) {
+    /* Account the resizing of the data of a traced (varsize) MemInfo to
+       its site: growing is counted as allocated bytes and shrinking as
+       freed bytes, so that the live bytes stay exact */
+    nrt_traced_info *traced;
+    if (mi->dtor != nrt_traced_dtor)
+        return;
+    traced = mi->dtor_info;
+    if (size > traced->size)
+        nrt_atomic_add_size(&traced->site->alloc_bytes, size - traced->size);
+    else
+        nrt_atomic_add_size(&traced->site->free_bytes, traced->size - size);
+    traced->size = size;
+}
+
 /*
  * Resizable buffer API.
  */
@@ -372,7 +524,7 @@ NRT_MemInfo *NRT_MemInfo_new_varsize_dtor(size_t size, NRT_dtor_function dtor) {
 
 void *NRT_MemInfo_varsize_alloc(NRT_MemInfo *mi, size_t size)
 {
-    if (mi->dtor != nrt_varsize_dtor) {
+    if (nrt_meminfo_dtor(mi) != nrt_varsize_dtor) {
         nrt_fatal_error("ERROR: NRT_MemInfo_varsize_alloc called "
                         "with a non varsize-allocated meminfo");
         return NULL;  /* unreachable */
@@ -381,6 +533,7 @@ void *NRT_MemInfo_varsize_alloc(NRT_MemInfo *mi, size_t size)
     if (mi->data == NULL)
         return NULL;
     mi->size = size;
+    nrt_trace_resize(mi, size);
     NRT_Debug(nrt_debug_print("NRT_MemInfo_varsize_alloc %p size=%zu "
                               "-> data=%p\n", mi, size, mi->data));
     return mi->data;
@@ -388,7 +541,7 @@ void *NRT_MemInfo_varsize_alloc(NRT_MemInfo *mi, size_t size)
 
 void *NRT_MemInfo_varsize_realloc(NRT_MemInfo *mi, size_t size)
 {
-    if (mi->dtor != nrt_varsize_dtor) {
+    if (nrt_meminfo_dtor(mi) != nrt_varsize_dtor) {
         nrt_fatal_error("ERROR: NRT_MemInfo_varsize_realloc called "
                         "with a non varsize-allocated meminfo");
         return NULL;  /* unreachable */
@@ -397,6 +550,7 @@ void *NRT_MemInfo_varsize_realloc(NRT_MemInfo *mi, size_t size)
     if (mi->data == NULL)
         return NULL;
     mi->size = size;
+    nrt_trace_resize(mi, size);
     NRT_Debug(nrt_debug_print("NRT_MemInfo_varsize_realloc %p size=%zu "
                               "-> data=%p\n", mi, size, mi->data));
     return mi->data;
@@ -405,8 +559,10 @@ void *NRT_MemInfo_varsize_realloc(NRT_MemInfo *mi, size_t size)
 void NRT_MemInfo_varsize_free(NRT_MemInfo *mi, void *ptr)
 {
     NRT_Free(ptr);
-    if (ptr == mi->data)
+    if (ptr == mi->data) {
         mi->data = NULL;
+        nrt_trace_resize(mi, 0);
+    }
 }
 
 /*
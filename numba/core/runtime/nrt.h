@@ -32,6 +32,15 @@ typedef void *(*NRT_malloc_func)(size_t size);
 typedef void *(*NRT_realloc_func)(void *ptr, size_t new_size);
 typedef void (*NRT_free_func)(void *ptr);
 
+/* The statistics of the MemInfos allocated at an allocation site */
+typedef struct NRT_AllocSite {
+    struct NRT_AllocSite *next;
+    /* The name of the site */
+    char *name;
+    /* Count and bytes of the allocations and deallocations */
+    size_t allocs, frees, alloc_bytes, free_bytes;
+} NRT_AllocSite;
+
 
 /* Memory System API */
 
@@ -87,6 +96,12 @@ size_t NRT_MemSys_get_stats_mi_alloc(void);
 VISIBILITY_HIDDEN
 size_t NRT_MemSys_get_stats_mi_free(void);
 
+/*
+ * Return the first of the linked list of allocation sites.
+ */
+VISIBILITY_HIDDEN
+NRT_AllocSite *NRT_MemSys_get_alloc_sites(void);
+
 /* Memory Info API */
 
 /* Create a new MemInfo for external memory
@@ -194,6 +209,35 @@ void *NRT_MemInfo_varsize_realloc(NRT_MemInfo *mi, size_t size);
 VISIBILITY_HIDDEN
 void NRT_MemInfo_varsize_free(NRT_MemInfo *mi, void *ptr);
 
+/*
+ * Trace the allocation of the MemInfo *mi* at the allocation site *name*,
+ * i.e. count it, and its deallocation, in the statistics of the site.
+ * *slot* points to the site, set to NULL before it is looked up by name.
+ * If the thread is running a statement of an outer traced function (see
+ * NRT_AllocSite_enter()), the allocation is accounted to the site of that
+ * statement instead.
+ */
+VISIBILITY_HIDDEN
+void NRT_MemInfo_trace_alloc(NRT_MemInfo *mi, NRT_AllocSite **slot,
+                             const char *name);
+
+/*
+ * Allocation sites of the outermost traced function.  A traced function
+ * gets the outer site with NRT_AllocSite_get_outer() when entered, and
+ * passes it as *outer* to the functions below.  If it is NULL, the
+ * function is the outermost one: NRT_AllocSite_enter() makes the site
+ * *name* of each statement it runs (*slot* as for
+ * NRT_MemInfo_trace_alloc()) the outer site, and NRT_AllocSite_leave()
+ * clears the outer site when the function returns.
+ */
+VISIBILITY_HIDDEN
+void *NRT_AllocSite_get_outer(void);
+VISIBILITY_HIDDEN
+void NRT_AllocSite_enter(void *outer, NRT_AllocSite **slot,
+                         const char *name);
+VISIBILITY_HIDDEN
+void NRT_AllocSite_leave(void *outer);
+
 /*
  * Print debug info to FILE
  */
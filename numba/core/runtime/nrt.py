@@ -6,15 +6,35 @@ from llvmlite import binding as ll
 
 from numba.core.compiler_lock import global_compiler_lock
 from numba.core.typing.typeof import typeof_impl
-from numba.core import types
+from numba.core import config, types
 from numba.core.runtime import _nrt_python as _nrt
 
 _nrt_mstats = namedtuple("nrt_mstats", ["alloc", "free", "mi_alloc", "mi_free"])
 
+_nrt_pool_stats = namedtuple("nrt_pool_stats",
+                             ["allocs", "frees", "requested_bytes",
+                              "used_bytes", "cached_bytes", "reserved_bytes",
+                              "fragmentation", "size_classes"])
+
+_nrt_alloc_site = namedtuple("nrt_alloc_site",
+                             ["qualname", "filename", "lineno", "allocs",
+                              "frees", "alloc_bytes", "live_bytes"])
+
+_nrt_pool_class_stats = namedtuple("nrt_pool_class_stats",
+                                   ["block_size", "live", "cached"])
+
+# The functions installing the allocators of the NRT
+_allocators = {
+    'python': _nrt.memsys_use_cpython_allocator,
+    'system': _nrt.memsys_use_system_allocator,
+    'pool': _nrt.memsys_use_pool_allocator,
+}
+
 
 class _Runtime(object):
     def __init__(self):
         self._init = False
+        self._allocator = None
 
     @global_compiler_lock
     def initialize(self, ctx):
@@ -94,6 +114,101 @@ class _Runtime(object):
             mi = _nrt.meminfo_alloc(size)
         return MemInfo(mi)
 
+    @property
+    def allocator(self):
+        """
+        The name of the allocator of the NRT (see :meth:`set_allocator`).
+        """
+        return self._allocator
+
+    def set_allocator(self, name):
+        """
+        Set the allocator of the NRT: 'python' (the raw memory allocator of
+        CPython, the default), 'system' (the C library's malloc) or 'pool'
+        (a pooled allocator with thread caches, see :meth:`get_pool_stats`).
+
+        The allocator can only be changed while no NRT memory is allocated.
+        """
+        try:
+            use_allocator = _allocators[name]
+        except KeyError:
+            raise ValueError("unknown NRT allocator %r, expected one of %s"
+                             % (name, ", ".join(sorted(_allocators))))
+        if name == self._allocator:
+            return
+        stats = self.get_allocation_stats()
+        if stats.alloc != stats.free or stats.mi_alloc != stats.mi_free:
+            raise RuntimeError("cannot change the NRT allocator while "
+                               "memory is allocated")
+        use_allocator()
+        self._allocator = name
+
+    def get_pool_stats(self):
+        """
+        Returns a namedtuple of the statistics of the pooled allocator:
+
+        - allocs, frees: the count of allocations and deallocations;
+        - requested_bytes: the bytes requested by the live allocations;
+        - used_bytes: the bytes of the live allocations, including the
+          rounding up to the size classes;
+        - cached_bytes: the bytes of the free blocks held by the pool;
+        - reserved_bytes: the bytes obtained from the system allocator;
+        - fragmentation: the fraction of the reserved bytes not requested;
+        - size_classes: a list of (block_size, live, cached) namedtuples,
+          the counts of live and free blocks of each size class.
+
+        The statistics are approximate while other threads allocate.
+        """
+        (allocs, frees, requested, used, cached, reserved,
+         classes) = _nrt.memsys_get_pool_stats()
+        fragmentation = 1.0 - requested / reserved if reserved else 0.0
+        return _nrt_pool_stats(allocs=allocs, frees=frees,
+                               requested_bytes=requested, used_bytes=used,
+                               cached_bytes=cached, reserved_bytes=reserved,
+                               fragmentation=fragmentation,
+                               size_classes=[_nrt_pool_class_stats(*cls)
+                                             for cls in classes])
+
+    def get_allocation_sites(self):
+        """
+        Returns a list of namedtuples of the statistics of the allocation
+        sites traced with NUMBA_NRT_TRACE_ALLOC, i.e. the source lines of the
+        compiled functions allocating MemInfos.  The allocations made by
+        the library implementations and the traced functions called are
+        accounted to the line of the outermost traced function running:
+
+        - qualname, filename, lineno: the function and source line;
+        - allocs, frees: the count of allocations and deallocations;
+        - alloc_bytes: the bytes allocated, including the growth of
+          resizable containers;
+        - live_bytes: the bytes allocated and not freed yet.
+
+        The sites are sorted by decreasing live, then allocated, bytes.
+        """
+        totals = {}
+        for name, allocs, frees, alloc_bytes, free_bytes in \
+                _nrt.memsys_get_alloc_sites():
+            # The same site can be listed several times
+            total = totals.setdefault(name, [0, 0, 0, 0])
+            total[0] += allocs
+            total[1] += frees
+            total[2] += alloc_bytes
+            total[3] += free_bytes
+        sites = []
+        for name, (allocs, frees, alloc_bytes, free_bytes) in totals.items():
+            qualname, lineno, filename = name.split('\t', 2)
+            lineno = int(lineno) if lineno.isdigit() else None
+            sites.append(_nrt_alloc_site(qualname=qualname,
+                                         filename=filename,
+                                         lineno=lineno,
+                                         allocs=allocs,
+                                         frees=frees,
+                                         alloc_bytes=alloc_bytes,
+                                         live_bytes=alloc_bytes - free_bytes))
+        sites.sort(key=lambda site: (site.live_bytes, site.alloc_bytes),
+                   reverse=True)
+        return sites
+
     def get_allocation_stats(self):
         """
         Returns a namedtuple of (alloc, free, mi_alloc, mi_free) for count of
@@ -116,8 +231,8 @@ def typeof_meminfo(val, c):
 
 
 # Create runtime
-_nrt.memsys_use_cpython_allocator()
 rtsys = _Runtime()
+rtsys.set_allocator(config.NRT_ALLOCATOR)
 
 # Install finalizer
 _finalize(rtsys, _Runtime.shutdown)
@@ -0,0 +1,543 @@
+/*
+A size-class pooled allocator for the NRT.
+
+Allocations of up to NRT_POOL_MAX_SMALL_SIZE bytes are rounded up to one of
+NRT_POOL_NUM_CLASSES size classes (four per power of two above 128 bytes).
+The blocks of each class are carved out of chunks obtained from the system
+allocator, and never returned to it: freed blocks are kept in a free list of
+the thread freeing them, so that allocating and freeing is a list operation
+without synchronization in the common case.  The thread caches are bounded:
+blocks overflowing them, and the blocks cached by exiting threads, are moved
+to global free lists the thread caches are refilled from.  Larger
+allocations are passed through to the system allocator.
+
+Each block starts with a header recording its size class and the size
+requested, so that it can be freed without a lookup.
+
+The statistics of a thread cache are only updated by its thread, but they
+are read by NRT_Pool_get_stats() from any thread: they are accessed with
+relaxed atomic loads and stores.
+*/
+#include <string.h>
+#include "nrt_pool.h"
+
+#ifdef _MSC_VER
+#include <windows.h>
+#define NUMBA_WINTHREAD
+#else
+#include <pthread.h>
+#define NUMBA_PTHREAD
+#endif
+
+#if !defined MIN
+#define MIN(a, b) ((a) < (b)) ? (a) : (b)
+#endif
+
+#ifdef _MSC_VER
+#define THREAD_LOCAL(ty) __declspec(thread) ty
+/* Aligned accesses of size_t are atomic */
+#define LOAD_RELAXED(ptr) (*(volatile size_t *) (ptr))
+#define STORE_RELAXED(ptr, val) (*(volatile size_t *) (ptr) = (val))
+#else
+#define THREAD_LOCAL(ty) __thread ty
+#define LOAD_RELAXED(ptr) __atomic_load_n((ptr), __ATOMIC_RELAXED)
+#define STORE_RELAXED(ptr, val) \
+    __atomic_store_n((ptr), (val), __ATOMIC_RELAXED)
+#endif
+
+#define NRT_POOL_MAX_SMALL_SIZE 32768
+/* The size class of the allocations too large for the pool */
+#define LARGE_CLASS NRT_POOL_NUM_CLASSES
+/* Keeps the data of the blocks 16-byte aligned */
+#define HEADER_SIZE 16
+/* The size of the batches of blocks moved between the thread caches and
+   the global free lists, in bytes */
+#define BATCH_BYTES 16384
+
+
+typedef struct {
+    size_t size_class;
+    size_t requested;
+} block_header;
+
+typedef struct free_block {
+    struct free_block *next;
+} free_block;
+
+typedef struct {
+    free_block *head;
+    size_t count;
+} free_list;
+
+/* The free lists and statistics of a thread */
+typedef struct thread_cache {
+    free_list lists[NRT_POOL_NUM_CLASSES];
+    size_t allocs, frees, requested_bytes, used_bytes, large_bytes;
+    size_t live[NRT_POOL_NUM_CLASSES];
+    struct thread_cache *prev, *next;
+} thread_cache;
+
+
+/*
+ * Platform support: a lock, a thread-local pointer to the thread cache with
+ * a destructor called when the thread exits, and one-time initialization.
+ */
+
+static void cache_destroy(thread_cache *cache);
+static void pool_init(void);
+
+#ifdef NUMBA_WINTHREAD
+
+static SRWLOCK pool_lock = SRWLOCK_INIT;
+static DWORD cache_key;
+static INIT_ONCE pool_once = INIT_ONCE_STATIC_INIT;
+
+static void lock_pool(void) { AcquireSRWLockExclusive(&pool_lock); }
+static void unlock_pool(void) { ReleaseSRWLockExclusive(&pool_lock); }
+
+static VOID WINAPI
+cache_destructor(PVOID cache) {
+    if (cache)
+        cache_destroy((thread_cache *) cache);
+}
+
+static BOOL CALLBACK
+pool_init_once(PINIT_ONCE once, PVOID param, PVOID *context) {
+    pool_init();
+    return TRUE;
+}
+
+static int
+create_cache_key(void) {
+    cache_key = FlsAlloc(cache_destructor);
+    return cache_key == FLS_OUT_OF_INDEXES;
+}
+
+static void ensure_init(void) {
+    InitOnceExecuteOnce(&pool_once, pool_init_once, NULL, NULL);
+}
+static thread_cache *get_thread_cache(void) {
+    return (thread_cache *) FlsGetValue(cache_key);
+}
+static int set_thread_cache(thread_cache *cache) {
+    return !FlsSetValue(cache_key, cache);
+}
+
+#else
+
+static pthread_mutex_t pool_lock = PTHREAD_MUTEX_INITIALIZER;
+static pthread_key_t cache_key;
+static pthread_once_t pool_once = PTHREAD_ONCE_INIT;
+
+static void lock_pool(void) { pthread_mutex_lock(&pool_lock); }
+static void unlock_pool(void) { pthread_mutex_unlock(&pool_lock); }
+
+static void
+cache_destructor(void *cache) {
+    cache_destroy((thread_cache *) cache);
+}
+
+static void
+reinit_lock_after_fork(void) {
+    /* The lock was held by the forking thread, which is the only thread of
+       the child */
+    pthread_mutex_init(&pool_lock, NULL);
+}
+
+static int
+create_cache_key(void) {
+    /* Forking while another thread holds the lock would leave it locked
+       in the child */
+    pthread_atfork(lock_pool, unlock_pool, reinit_lock_after_fork);
+    return pthread_key_create(&cache_key, cache_destructor);
+}
+
+static void ensure_init(void) {
+    pthread_once(&pool_once, pool_init);
+}
+static thread_cache *get_thread_cache(void) {
+    return (thread_cache *) pthread_getspecific(cache_key);
+}
+static int set_thread_cache(thread_cache *cache) {
+    return pthread_setspecific(cache_key, cache);
+}
+
+#endif
+
+
+/*
+ * Global resources, protected by the lock.
+ */
+
+static struct {
+    int key_error;
+    /* The free lists the thread caches are refilled from */
+    free_list lists[NRT_POOL_NUM_CLASSES];
+    /* Bytes of the chunks obtained from the system allocator */
+    size_t chunk_bytes;
+    /* The list of the live thread caches */
+    thread_cache *caches;
+    /* The statistics of the exited threads (and of the operations done
+       without a thread cache) */
+    thread_cache retired;
+} ThePool;
+
+
+/* Set once the thread cache of the thread is destroyed: the thread is
+   exiting, and its later operations (e.g. from other thread-local
+   destructors) go through the global free lists rather than creating a new
+   thread cache, which would be leaked */
+static THREAD_LOCAL(int) cache_retired;
+
+
+static void
+pool_init(void) {
+    ThePool.key_error = create_cache_key();
+}
+
+
+/*
+ * Counters, updated by a single thread at a time (the thread owning the
+ * cache, or the holder of the lock).
+ */
+
+static void
+counter_add(size_t *counter, size_t delta) {
+    STORE_RELAXED(counter, LOAD_RELAXED(counter) + delta);
+}
+
+static void
+counter_sub(size_t *counter, size_t delta) {
+    STORE_RELAXED(counter, LOAD_RELAXED(counter) - delta);
+}
+
+
+/*
+ * Size classes.
+ */
+
+static size_t
+class_size(size_t cls) {
+    /* The usable size of the blocks of the class: multiples of 16 up to
+       128, then four classes per power of two */
+    size_t q, r, p;
+    if (cls < 8)
+        return 16 * (cls + 1);
+    q = (cls - 8) / 4;
+    r = (cls - 8) % 4;
+    p = 7 + q;
+    return ((size_t) 1 << p) + (r + 1) * ((size_t) 1 << (p - 2));
+}
+
+static size_t
+block_size(size_t cls) {
+    return HEADER_SIZE + class_size(cls);
+}
+
+static size_t
+size_to_class(size_t size) {
+    size_t p, step;
+    if (size <= 128)
+        return size ? (size + 15) / 16 - 1 : 0;
+    if (size > NRT_POOL_MAX_SMALL_SIZE)
+        return LARGE_CLASS;
+    /* Find p such that 2**p < size <= 2**(p + 1) */
+    p = 7;
+    while (((size_t) 1 << (p + 1)) < size)
+        p++;
+    step = (size_t) 1 << (p - 2);
+    return 8 + (p - 7) * 4 + (size - ((size_t) 1 << p) + step - 1) / step - 1;
+}
+
+static size_t
+batch_count(size_t cls) {
+    /* The number of blocks moved at once between the thread caches and the
+       global free lists; the thread caches hold at most twice as many */
+    size_t count = BATCH_BYTES / block_size(cls);
+    if (count < 2)
+        return 2;
+    if (count > 64)
+        return 64;
+    return count;
+}
+
+
+/*
+ * Free lists.
+ */
+
+static void
+list_push(free_list *list, void *block) {
+    free_block *fb = (free_block *) block;
+    fb->next = list->head;
+    list->head = fb;
+    counter_add(&list->count, 1);
+}
+
+static void *
+list_pop(free_list *list) {
+    free_block *fb = list->head;
+    list->head = fb->next;
+    counter_sub(&list->count, 1);
+    return fb;
+}
+
+static void
+list_move(free_list *dst, free_list *src, size_t count) {
+    /* Move up to *count* blocks from *src* to *dst* */
+    while (count-- && src->head)
+        list_push(dst, list_pop(src));
+}
+
+static int
+refill(free_list *list, size_t cls) {
+    /* Refill an empty thread cache list from the global free list, or from
+       a new chunk.  The lock must be held. */
+    size_t count = batch_count(cls);
+    list_move(list, &ThePool.lists[cls], count);
+    if (!list->head) {
+        size_t i, bsize = block_size(cls);
+        char *chunk = malloc(count * bsize);
+        if (chunk == NULL)
+            return 0;
+        ThePool.chunk_bytes += count * bsize;
+        for (i = 0; i < count; ++i)
+            list_push(list, chunk + i * bsize);
+    }
+    return 1;
+}
+
+
+/*
+ * Thread caches.
+ */
+
+static thread_cache *
+get_cache(void) {
+    thread_cache *cache;
+    ensure_init();
+    if (ThePool.key_error || cache_retired)
+        return NULL;
+    cache = get_thread_cache();
+    if (cache)
+        return cache;
+    cache = calloc(1, sizeof(thread_cache));
+    if (cache == NULL)
+        return NULL;
+    if (set_thread_cache(cache)) {
+        free(cache);
+        return NULL;
+    }
+    lock_pool();
+    cache->next = ThePool.caches;
+    if (ThePool.caches)
+        ThePool.caches->prev = cache;
+    ThePool.caches = cache;
+    unlock_pool();
+    return cache;
+}
+
+static void
+add_stats(thread_cache *dst, thread_cache *src) {
+    /* *dst* must be owned by the calling thread, or protected by the
+       lock */
+    size_t cls;
+    counter_add(&dst->allocs, LOAD_RELAXED(&src->allocs));
+    counter_add(&dst->frees, LOAD_RELAXED(&src->frees));
+    counter_add(&dst->requested_bytes, LOAD_RELAXED(&src->requested_bytes));
+    counter_add(&dst->used_bytes, LOAD_RELAXED(&src->used_bytes));
+    counter_add(&dst->large_bytes, LOAD_RELAXED(&src->large_bytes));
+    for (cls = 0; cls < NRT_POOL_NUM_CLASSES; ++cls)
+        counter_add(&dst->live[cls], LOAD_RELAXED(&src->live[cls]));
+}
+
+static void
+cache_destroy(thread_cache *cache) {
+    /* Give the blocks and the statistics of an exiting thread to the
+       pool */
+    size_t cls;
+    cache_retired = 1;
+    lock_pool();
+    for (cls = 0; cls < NRT_POOL_NUM_CLASSES; ++cls)
+        list_move(&ThePool.lists[cls], &cache->lists[cls], (size_t) -1);
+    add_stats(&ThePool.retired, cache);
+    if (cache->prev)
+        cache->prev->next = cache->next;
+    else
+        ThePool.caches = cache->next;
+    if (cache->next)
+        cache->next->prev = cache->prev;
+    unlock_pool();
+    free(cache);
+}
+
+
+/*
+ * Allocation functions.
+ */
+
+void *
+NRT_Pool_malloc(size_t size) {
+    block_header *hdr = NULL;
+    size_t cls = size_to_class(size);
+    thread_cache *cache = get_cache();
+    if (cache == NULL) {
+        /* Take the block from the pool directly */
+        lock_pool();
+        cache = &ThePool.retired;
+    }
+    if (cls == LARGE_CLASS) {
+        hdr = malloc(HEADER_SIZE + size);
+        if (hdr == NULL)
+            goto done;
+        counter_add(&cache->large_bytes, HEADER_SIZE + size);
+        counter_add(&cache->used_bytes, HEADER_SIZE + size);
+    } else if (cache == &ThePool.retired) {
+        free_list *list = &ThePool.lists[cls];
+        if (!list->head && !refill(list, cls))
+            goto done;
+        hdr = list_pop(list);
+    } else {
+        free_list *list = &cache->lists[cls];
+        if (!list->head) {
+            int ok;
+            lock_pool();
+            ok = refill(list, cls);
+            unlock_pool();
+            if (!ok)
+                return NULL;
+        }
+        hdr = list_pop(list);
+    }
+    if (cls != LARGE_CLASS) {
+        counter_add(&cache->live[cls], 1);
+        counter_add(&cache->used_bytes, block_size(cls));
+    }
+    hdr->size_class = cls;
+    hdr->requested = size;
+    counter_add(&cache->allocs, 1);
+    counter_add(&cache->requested_bytes, size);
+done:
+    if (cache == &ThePool.retired)
+        unlock_pool();
+    return hdr ? (char *) hdr + HEADER_SIZE : NULL;
+}
+
+void
+NRT_Pool_free(void *ptr) {
+    block_header *hdr;
+    size_t cls, size;
+    thread_cache *cache;
+    if (ptr == NULL)
+        return;
+    hdr = (block_header *) ((char *) ptr - HEADER_SIZE);
+    cls = hdr->size_class;
+    size = hdr->requested;
+    cache = get_cache();
+    if (cache == NULL) {
+        /* Give the block back to the pool directly */
+        lock_pool();
+        cache = &ThePool.retired;
+    }
+    counter_add(&cache->frees, 1);
+    counter_sub(&cache->requested_bytes, size);
+    if (cls == LARGE_CLASS) {
+        counter_sub(&cache->large_bytes, HEADER_SIZE + size);
+        counter_sub(&cache->used_bytes, HEADER_SIZE + size);
+        free(hdr);
+    } else {
+        counter_sub(&cache->live[cls], 1);
+        counter_sub(&cache->used_bytes, block_size(cls));
+        if (cache == &ThePool.retired) {
+            list_push(&ThePool.lists[cls], hdr);
+        } else {
+            free_list *list = &cache->lists[cls];
+            list_push(list, hdr);
+            if (list->count > 2 * batch_count(cls)) {
+                lock_pool();
+                list_move(&ThePool.lists[cls], list, batch_count(cls));
+                unlock_pool();
+            }
+        }
+    }
+    if (cache == &ThePool.retired)
+        unlock_pool();
+}
+
+void *
+NRT_Pool_realloc(void *ptr, size_t size) {
+    block_header *hdr;
+    size_t cls, old_size;
+    void *new_ptr;
+    if (ptr == NULL)
+        return NRT_Pool_malloc(size);
+    hdr = (block_header *) ((char *) ptr - HEADER_SIZE);
+    cls = hdr->size_class;
+    old_size = hdr->requested;
+    if (cls == size_to_class(size)) {
+        /* Resize in place */
+        thread_cache *cache = get_cache();
+        if (cls == LARGE_CLASS) {
+            hdr = realloc(hdr, HEADER_SIZE + size);
+            if (hdr == NULL)
+                return NULL;
+        }
+        if (cache == NULL) {
+            lock_pool();
+            cache = &ThePool.retired;
+        }
+        counter_add(&cache->requested_bytes, size - old_size);
+        if (cls == LARGE_CLASS) {
+            counter_add(&cache->large_bytes, size - old_size);
+            counter_add(&cache->used_bytes, size - old_size);
+        }
+        if (cache == &ThePool.retired)
+            unlock_pool();
+        hdr->requested = size;
+        return (char *) hdr + HEADER_SIZE;
+    }
+    new_ptr = NRT_Pool_malloc(size);
+    if (new_ptr == NULL)
+        return NULL;
+    memcpy(new_ptr, ptr, MIN(old_size, size));
+    NRT_Pool_free(ptr);
+    return new_ptr;
+}
+
+
+/*
+ * Statistics.
+ */
+
+void
+NRT_Pool_get_stats(NRT_PoolStats *stats) {
+    thread_cache total, *cache;
+    size_t cls;
+    memset(stats, 0, sizeof(NRT_PoolStats));
+    memset(&total, 0, sizeof(thread_cache));
+    lock_pool();
+    add_stats(&total, &ThePool.retired);
+    for (cls = 0; cls < NRT_POOL_NUM_CLASSES; ++cls)
+        stats->class_cached[cls] = ThePool.lists[cls].count;
+    /* The thread caches can't be destroyed while the lock is held, but
+       their threads keep updating them: the totals are not a consistent
+       snapshot */
+    for (cache = ThePool.caches; cache; cache = cache->next) {
+        add_stats(&total, cache);
+        for (cls = 0; cls < NRT_POOL_NUM_CLASSES; ++cls)
+            stats->class_cached[cls] +=
+                LOAD_RELAXED(&cache->lists[cls].count);
+    }
+    stats->reserved_bytes = ThePool.chunk_bytes + total.large_bytes;
+    unlock_pool();
+
+    stats->allocs = total.allocs;
+    stats->frees = total.frees;
+    stats->requested_bytes = total.requested_bytes;
+    stats->used_bytes = total.used_bytes;
+    for (cls = 0; cls < NRT_POOL_NUM_CLASSES; ++cls) {
+        stats->class_block_size[cls] = block_size(cls);
+        stats->class_live[cls] = total.live[cls];
+        stats->cached_bytes += stats->class_cached[cls] * block_size(cls);
+    }
+}
@@ -0,0 +1,54 @@
+/*
+A size-class pooled allocator, with thread caches, for the NRT.
+See NRT_MemSys_set_allocator().
+All functions described here are threadsafe.
+*/
+
+#ifndef NUMBA_NRT_POOL_H_
+#define NUMBA_NRT_POOL_H_
+
+#include <stdlib.h>
+#include "../../_numba_common.h"
+
+/* The number of size classes */
+#define NRT_POOL_NUM_CLASSES 40
+
+/*
+ * The statistics of the pool.  They are approximate while other threads
+ * allocate: the counters of each thread are read atomically, but not all
+ * at the same time.
+ */
+typedef struct {
+    /* Count of allocations and deallocations */
+    size_t allocs, frees;
+    /* Bytes requested by the live allocations */
+    size_t requested_bytes;
+    /* Bytes of the live allocations, including the headers and the
+       rounding up to the size classes */
+    size_t used_bytes;
+    /* Bytes of the free blocks held by the pool */
+    size_t cached_bytes;
+    /* Bytes obtained from the system allocator (the chunks the blocks are
+       carved out of, and the live allocations too large for the size
+       classes) */
+    size_t reserved_bytes;
+    /* The block size, count of live blocks and count of free blocks of
+       each size class */
+    size_t class_block_size[NRT_POOL_NUM_CLASSES];
+    size_t class_live[NRT_POOL_NUM_CLASSES];
+    size_t class_cached[NRT_POOL_NUM_CLASSES];
+} NRT_PoolStats;
+
+/*
+ * Allocation functions for NRT_MemSys_set_allocator().
+ */
+VISIBILITY_HIDDEN void *NRT_Pool_malloc(size_t size);
+VISIBILITY_HIDDEN void *NRT_Pool_realloc(void *ptr, size_t size);
+VISIBILITY_HIDDEN void NRT_Pool_free(void *ptr);
+
+/*
+ * Get the statistics of the pool.
+ */
+VISIBILITY_HIDDEN void NRT_Pool_get_stats(NRT_PoolStats *stats);
+
+#endif /* NUMBA_NRT_POOL_H_ */
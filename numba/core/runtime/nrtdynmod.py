@@ -4,7 +4,7 @@ Dynamically generate the NRT module
 
 
 from numba.core.config import MACHINE_BITS
-from numba.core import types, cgutils
+from numba.core import types, cgutils, config
 from llvmlite import ir, binding
 
 # Flag to enable debug print in NRT_incref and NRT_decref
@@ -40,12 +40,11 @@ def _define_nrt_meminfo_data(module):
     builder.ret(data_ptr)
 
 
-def _define_nrt_incref(module, atomic_incr):
+def _define_nrt_incref(module, atomic_incr, name="NRT_incref"):
     """
-    Implement NRT_incref in the module
+    Implement NRT_incref, or the function of the given *name*, in the module
     """
-    fn_incref = module.get_or_insert_function(incref_decref_ty,
-                                              name="NRT_incref")
+    fn_incref = module.get_or_insert_function(incref_decref_ty, name=name)
     # Cannot inline this for refcount pruning to work
     fn_incref.attributes.add('noinline')
     builder = ir.IRBuilder(fn_incref.append_basic_block())
@@ -61,16 +60,18 @@ def _define_nrt_incref(module, atomic_incr):
     builder.ret_void()
 
 
-def _define_nrt_decref(module, atomic_decr):
+def _define_nrt_decref(module, atomic_decr, name="NRT_decref", fences=True):
     """
-    Implement NRT_decref in the module
+    Implement NRT_decref, or the function of the given *name*, in the module.
+    The *fences* order the accesses to the memory with the decrement, which
+    is only needed if the MemInfo is shared by threads.
     """
-    fn_decref = module.get_or_insert_function(incref_decref_ty,
-                                              name="NRT_decref")
+    fn_decref = module.get_or_insert_function(incref_decref_ty, name=name)
     # Cannot inline this for refcount pruning to work
     fn_decref.attributes.add('noinline')
-    calldtor = module.add_function(ir.FunctionType(ir.VoidType(), [_pointer_type]),
-                                   name="NRT_MemInfo_call_dtor")
+    calldtor = module.get_or_insert_function(
+        ir.FunctionType(ir.VoidType(), [_pointer_type]),
+        name="NRT_MemInfo_call_dtor")
 
     builder = ir.IRBuilder(fn_decref.append_basic_block())
     [ptr] = fn_decref.args
@@ -86,7 +87,8 @@ def _define_nrt_decref(module, atomic_decr):
 
     # A release fence is used before the relevant write operation.
     # No-op on x86.  On POWER, it lowers to lwsync.
-    builder.fence("release")
+    if fences:
+        builder.fence("release")
     newrefct = builder.call(atomic_decr,
                             [builder.bitcast(ptr, atomic_decr.args[0].type)])
 
@@ -95,7 +97,8 @@ def _define_nrt_decref(module, atomic_decr):
     with cgutils.if_unlikely(builder, refct_eq_0):
         # An acquire fence is used after the relevant read operation.
         # No-op on x86.  On POWER, it lowers to lwsync.
-        builder.fence("acquire")
+        if fences:
+            builder.fence("acquire")
         builder.call(calldtor, [ptr])
     builder.ret_void()
 
@@ -105,19 +108,23 @@ def _define_nrt_decref(module, atomic_decr):
 _disable_atomicity = 0
 
 
-def _define_atomic_inc_dec(module, op, ordering):
+def _define_atomic_inc_dec(module, op, ordering, name=None):
     """Define a llvm function for atomic increment/decrement to the given module
     Argument ``op`` is the operation "add"/"sub".  Argument ``ordering`` is
-    the memory ordering.  The generated function returns the new value.
+    the memory ordering, or None for a non-atomic operation.  Argument
+    ``name`` is the name of the function, "nrt_atomic_<op>" by default.
+    The generated function returns the new value.
     """
     ftype = ir.FunctionType(_word_type, [_word_type.as_pointer()])
-    fn_atomic = ir.Function(module, ftype, name="nrt_atomic_{0}".format(op))
+    if name is None:
+        name = "nrt_atomic_{0}".format(op)
+    fn_atomic = ir.Function(module, ftype, name=name)
 
     [ptr] = fn_atomic.args
     bb = fn_atomic.append_basic_block()
     builder = ir.IRBuilder(bb)
     ONE = ir.Constant(_word_type, 1)
-    if not _disable_atomicity:
+    if ordering is not None:
         oldval = builder.atomic_rmw(op, ptr, ONE, ordering=ordering)
         # Perform the operation on the old value so that we can pretend returning
         # the "new" value.
@@ -127,7 +134,7 @@ def _define_atomic_inc_dec(module, op, ordering):
         oldval = builder.load(ptr)
         newval = getattr(builder, op)(oldval, ONE)
         builder.store(newval, ptr)
-        builder.ret(oldval)
+        builder.ret(newval)
 
     return fn_atomic
 
@@ -186,13 +193,28 @@ def create_nrt_module(ctx):
     # Implement LLVM module with atomic ops
     ir_mod = library.create_ir_module("nrt_module")
 
-    atomic_inc = _define_atomic_inc_dec(ir_mod, "add", ordering='monotonic')
-    atomic_dec = _define_atomic_inc_dec(ir_mod, "sub", ordering='monotonic')
+    # The reference counts need no atomic operations if the process runs the
+    # compiled code from a single thread
+    if _disable_atomicity or config.NRT_SINGLE_THREADED:
+        ordering = None
+    else:
+        ordering = 'monotonic'
+    atomic_inc = _define_atomic_inc_dec(ir_mod, "add", ordering=ordering)
+    atomic_dec = _define_atomic_inc_dec(ir_mod, "sub", ordering=ordering)
     _define_atomic_cas(ir_mod, ordering='monotonic')
+    # The plain operations on the reference counts of the values confined to
+    # a thread (see numba.core.typed_passes.ThreadLocalRefct)
+    local_inc = _define_atomic_inc_dec(ir_mod, "add", ordering=None,
+                                       name="nrt_local_add")
+    local_dec = _define_atomic_inc_dec(ir_mod, "sub", ordering=None,
+                                       name="nrt_local_sub")
 
     _define_nrt_meminfo_data(ir_mod)
     _define_nrt_incref(ir_mod, atomic_inc)
     _define_nrt_decref(ir_mod, atomic_dec)
+    _define_nrt_incref(ir_mod, local_inc, name="NRT_incref_local")
+    _define_nrt_decref(ir_mod, local_dec, name="NRT_decref_local",
+                       fences=False)
 
     _define_nrt_unresolved_abort(ctx, ir_mod)
 
@@ -4,15 +4,21 @@ NRT specific optimizations
 import re
 from collections import defaultdict, deque
 from llvmlite import binding as ll
-from numba.core import cgutils
+from numba.core import cgutils, config
 
-_regex_incref = re.compile(r'\s*(?:tail)?\s*call void @NRT_incref\((.*)\)')
-_regex_decref = re.compile(r'\s*(?:tail)?\s*call void @NRT_decref\((.*)\)')
+_regex_incref = re.compile(
+    r'\s*(?:tail)?\s*call void @NRT_incref(?:_local)?\((.*)\)')
+_regex_decref = re.compile(
+    r'\s*(?:tail)?\s*call void @NRT_decref(?:_local)?\((.*)\)')
 _regex_bb = re.compile(
     r'([\'"]?[-a-zA-Z$._][-a-zA-Z$._0-9]*[\'"]?:)|^define|^;\s*<label>')
+_regex_label = re.compile(r'("[^"]*"|[-a-zA-Z$._0-9]+):|;\s*<label>:(\d+)')
+_regex_target = re.compile(r'label %("[^"]*"|[-a-zA-Z$._0-9]+)')
+_regex_def = re.compile(r'\s*(%(?:"[^"]*"|[-a-zA-Z$._0-9]+))\s*=')
+_regex_operand = re.compile(r'.*\s(%(?:"[^"]*"|[-a-zA-Z$._0-9]+))$')
 
 
-def _remove_redundant_nrt_refct(llvmir):
+def _remove_redundant_nrt_refct(llvmir, cross_block=True):
     # Note: As soon as we have better utility in analyzing materialized LLVM
     #       module in llvmlite, we can redo this without so much string
     #       processing.
@@ -40,6 +46,8 @@ def _remove_redundant_nrt_refct(llvmir):
             if is_bb and bb_lines:
                 bb_lines = _process_basic_block(bb_lines)
             out += bb_lines
+        if cross_block:
+            out = _prune_across_blocks(out)
         return out
 
     def _extract_basic_blocks(func_lines):
@@ -146,6 +154,436 @@ def _remove_redundant_nrt_refct(llvmir):
     return '\n'.join(processed)
 
 
+class _BasicBlock(object):
+    """
+    A basic block of the textual LLVM IR of a function.
+    """
+
+    def __init__(self, name, label_line):
+        self.name = name
+        # None for the unlabelled entry block
+        self.label_line = label_line
+        self.lines = []
+        self.succs = []
+        self.preds = []
+
+    def refct_ops(self, regex):
+        """
+        Yield the positions and operands of the live incref or decref calls,
+        as matched by *regex*, of the block.  The operand is None unless it
+        is a local value (e.g. a null pointer or a constant expression).
+        """
+        for pos, ln in enumerate(self.lines):
+            if ln is not None:
+                m = regex.match(ln)
+                if m is not None:
+                    # The operand value, without its type and attributes
+                    v = _regex_operand.match(m.group(1).strip())
+                    yield pos, v.group(1) if v is not None else None
+
+    def has_decref(self, start=0, stop=None):
+        """
+        Whether a decref is called by the lines [start:stop] of the block.
+        """
+        return any(start <= pos and (stop is None or pos < stop)
+                   for pos, _ in self.refct_ops(_regex_decref))
+
+
+class _DominatorTree(object):
+    """
+    The dominator tree of a graph, from its nodes in reverse post-order and
+    their incoming edges (Cooper, Harvey and Kennedy's algorithm).  The
+    dominance queries take constant time.
+    """
+
+    def __init__(self, rpo, preds):
+        order = dict((n, i) for i, n in enumerate(rpo))
+        idom = {rpo[0]: rpo[0]}
+        changed = True
+        while changed:
+            changed = False
+            for n in rpo[1:]:
+                new = None
+                for p in preds(n):
+                    if p not in idom:
+                        continue
+                    if new is None:
+                        new = p
+                        continue
+                    # Intersect the dominators of p and new
+                    while p is not new:
+                        while order[p] > order[new]:
+                            p = idom[p]
+                        while order[new] > order[p]:
+                            new = idom[new]
+                if idom.get(n) is not new:
+                    idom[n] = new
+                    changed = True
+
+        # Number the nodes by a depth-first walk of the tree
+        children = defaultdict(list)
+        for n in rpo[1:]:
+            children[idom[n]].append(n)
+        self._enter = {}
+        self._leave = {}
+        counter = 0
+        stack = [(rpo[0], False)]
+        while stack:
+            n, leaving = stack.pop()
+            counter += 1
+            if leaving:
+                self._leave[n] = counter
+            else:
+                self._enter[n] = counter
+                stack.append((n, True))
+                stack.extend((c, False) for c in children[n])
+
+    def dominates(self, a, b):
+        """
+        Whether the node *a* dominates the node *b*.
+        """
+        return (a in self._enter and b in self._enter and
+                self._enter[a] <= self._enter[b] and
+                self._leave[b] <= self._leave[a])
+
+
+class _FunctionCFG(object):
+    """
+    The control flow graph of the textual LLVM IR of a function.
+    """
+
+    # The virtual exit node, succeeding the blocks which exit the function
+    _exit = object()
+
+    def __init__(self, func_lines):
+        assert func_lines[0].startswith('define')
+        assert func_lines[-1].startswith('}')
+        self.head = func_lines[0]
+        self.tail = func_lines[-1]
+        self.blocks = []
+        cur = _BasicBlock('', None)
+        for ln in func_lines[1:-1]:
+            m = _regex_label.match(ln)
+            if m is not None:
+                if cur.label_line is not None or cur.lines:
+                    self.blocks.append(cur)
+                cur = _BasicBlock(m.group(1) or m.group(2), ln)
+            elif ln:
+                cur.lines.append(ln)
+        self.blocks.append(cur)
+
+        # Whether the branches of the function could all be resolved
+        self.valid = True
+        block_map = dict((b.name, b) for b in self.blocks)
+        for b in self.blocks:
+            for ln in b.lines:
+                for name in _regex_target.findall(ln):
+                    succ = block_map.get(name)
+                    if succ is None:
+                        self.valid = False
+                    elif succ not in b.succs:
+                        b.succs.append(succ)
+                        succ.preds.append(b)
+
+    def analyze(self):
+        """
+        Compute the dominators, post-dominators and strongly connected
+        components of the blocks.
+        """
+        exits = [b for b in self.blocks if not b.succs]
+
+        def succs(b):
+            return b.succs if b.succs else [self._exit]
+
+        def preds(b):
+            return exits if b is self._exit else b.preds
+
+        self.doms = _DominatorTree(self._reverse_postorder(self.blocks[0],
+                                                           succs), preds)
+        # The blocks which cannot reach the exit of the function, e.g. in
+        # an infinite loop, are not post-dominated by any block
+        self.pdoms = _DominatorTree(self._reverse_postorder(self._exit,
+                                                            preds), succs)
+        self.sccs = self._strongly_connected_components()
+
+    def _reverse_postorder(self, root, succs):
+        seen = set([root])
+        postorder = []
+        stack = [(root, iter(succs(root)))]
+        while stack:
+            node, it = stack[-1]
+            for s in it:
+                if s not in seen and s is not self._exit:
+                    seen.add(s)
+                    stack.append((s, iter(succs(s))))
+                    break
+            else:
+                stack.pop()
+                postorder.append(node)
+        return postorder[::-1]
+
+    def _strongly_connected_components(self):
+        """
+        Map the blocks in a cycle to the set of blocks of their strongly
+        connected component (Tarjan's algorithm).
+        """
+        index = {}
+        lowlink = {}
+        stack = []
+        on_stack = set()
+        sccs = {}
+        for root in self.blocks:
+            if root in index:
+                continue
+            work = [(root, iter(root.succs))]
+            index[root] = lowlink[root] = len(index)
+            stack.append(root)
+            on_stack.add(root)
+            while work:
+                node, it = work[-1]
+                for s in it:
+                    if s not in index:
+                        index[s] = lowlink[s] = len(index)
+                        stack.append(s)
+                        on_stack.add(s)
+                        work.append((s, iter(s.succs)))
+                        break
+                    elif s in on_stack:
+                        lowlink[node] = min(lowlink[node], index[s])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        lowlink[parent] = min(lowlink[parent], lowlink[node])
+                    if lowlink[node] == index[node]:
+                        scc = set()
+                        while True:
+                            n = stack.pop()
+                            on_stack.discard(n)
+                            scc.add(n)
+                            if n is node:
+                                break
+                        if len(scc) > 1 or node in node.succs:
+                            for n in scc:
+                                sccs[n] = scc
+        return sccs
+
+    def reachable(self, starts, stop=None, within=None):
+        """
+        Return the blocks reachable from the *starts* without going through
+        *stop*, and staying *within* the given blocks if any.
+        """
+        seen = set()
+        todo = [b for b in starts if b is not stop]
+        while todo:
+            b = todo.pop()
+            if b not in seen and (within is None or b in within):
+                seen.add(b)
+                todo.extend(n for n in b.succs if n is not stop)
+        return seen
+
+    def _recurs_without(self, a, b):
+        # Whether the block *a* can be executed again without executing *b*
+        # in between; such a path is a cycle in the component of *a*
+        scc = self.sccs.get(a)
+        return (scc is not None and
+                a in self.reachable(a.succs, stop=b, within=scc))
+
+    def balanced(self, a, b):
+        """
+        Whether each execution of the block *a* is followed by an execution
+        of the block *b* before the next one of *a* and the exit of the
+        function, and each execution of *b* is preceded that way by one of
+        *a*.
+        """
+        return (a is not b and
+                self.doms.dominates(a, b) and
+                self.pdoms.dominates(b, a) and
+                not self._recurs_without(a, b) and
+                not self._recurs_without(b, a))
+
+    def loops(self):
+        """
+        Return the natural loops of the function as (header, body) pairs,
+        the innermost loops first.
+        """
+        bodies = defaultdict(set)
+        for b in self.blocks:
+            for h in b.succs:
+                if self.doms.dominates(h, b):
+                    # A back edge
+                    bodies[h] |= self._reaching(b, h)
+                    bodies[h].add(h)
+        return sorted(bodies.items(), key=lambda item: len(item[1]))
+
+    def _reaching(self, b, h):
+        seen = set()
+        todo = [b]
+        while todo:
+            n = todo.pop()
+            if n not in seen and n is not h:
+                seen.add(n)
+                todo.extend(n.preds)
+        return seen
+
+    def lines(self):
+        out = [self.head]
+        for b in self.blocks:
+            if b.label_line is not None:
+                out.append(b.label_line)
+            out.extend(ln for ln in b.lines if ln is not None)
+        out.append(self.tail)
+        return out
+
+
+def _prune_across_blocks(func_lines):
+    """
+    Prune the pairs of incref and decref calls on the same value in different
+    basic blocks, using the control flow graph of the function:
+
+    - a pair is removed if the incref block dominates the decref block, the
+      decref block post-dominates the incref block, each execution of one is
+      matched by an execution of the other, and no decref is called between
+      them, as the value could be released early otherwise;
+
+    - a pair balanced the same way inside a loop, on a value defined outside
+      the loop, is hoisted out of the loop: the incref is moved to the
+      preheader, and the decref to the exits, of the loop.  The value stays
+      referenced for the whole loop, so the decrefs called in the loop body
+      cannot release it early.
+    """
+    cfg = _FunctionCFG(func_lines)
+    increfs = set(b for b in cfg.blocks
+                  for _ in b.refct_ops(_regex_incref))
+    decrefs = set(b for b in cfg.blocks
+                  for _ in b.refct_ops(_regex_decref))
+    if not cfg.valid or not increfs or not decrefs or (
+            len(increfs | decrefs) == 1):
+        # Nothing to prune across blocks
+        return func_lines
+    cfg.analyze()
+    _prune_balanced_pairs(cfg)
+    if _hoist_out_of_loops(cfg):
+        # The hoisted pairs may now be pruned around the loops
+        _prune_balanced_pairs(cfg)
+    return cfg.lines()
+
+
+def _find_decref_blocks(cfg, blocks):
+    """
+    Map the values decref'ed in the *blocks* to these blocks.
+    """
+    decref_blocks = defaultdict(list)
+    for b in blocks:
+        for _, value in b.refct_ops(_regex_decref):
+            if value is not None and b not in decref_blocks[value]:
+                decref_blocks[value].append(b)
+    return decref_blocks
+
+
+def _prune_balanced_pairs(cfg):
+    """
+    Remove the incref and decref pairs across blocks of the *cfg* which are
+    balanced with no decref between them.
+    """
+    # Removing a pair can unblock the pairs around its decref
+    changed = True
+    while changed:
+        changed = False
+        decref_blocks = _find_decref_blocks(cfg, cfg.blocks)
+        for a in cfg.blocks:
+            for inc_pos, value in list(a.refct_ops(_regex_incref)):
+                if value is None or value not in decref_blocks:
+                    continue
+                # Only the first balanced decref is tried, to bound the
+                # search
+                for b in decref_blocks[value]:
+                    if cfg.balanced(a, b):
+                        if _prune_pair(cfg, a, inc_pos, b, value):
+                            changed = True
+                        break
+
+
+def _prune_pair(cfg, a, inc_pos, b, value):
+    """
+    Remove the incref at *inc_pos* of the block *a* and the first decref of
+    *value* in the block *b*, balanced, if no decref is called between them.
+    Return whether they were removed.
+    """
+    for dec_pos, v in b.refct_ops(_regex_decref):
+        if v == value:
+            break
+    else:
+        return False
+    if a.has_decref(start=inc_pos) or b.has_decref(stop=dec_pos):
+        return False
+    if any(blk.has_decref() for blk in cfg.reachable(a.succs, stop=b)):
+        return False
+    a.lines[inc_pos] = None
+    b.lines[dec_pos] = None
+    return True
+
+
+def _hoist_out_of_loops(cfg):
+    """
+    Hoist the incref and decref pairs balanced inside the loops of the *cfg*
+    out of them.  Return whether any pair was hoisted.
+    """
+    hoisted = False
+    for header, body in cfg.loops():
+        preheaders = [p for p in header.preds if p not in body]
+        if len(preheaders) != 1 or preheaders[0].succs != [header]:
+            continue
+        preheader = preheaders[0]
+        body_blocks = [blk for blk in cfg.blocks if blk in body]
+        if any(not blk.succs for blk in body_blocks):
+            # The function returns from inside the loop
+            continue
+        exits = []
+        for blk in body_blocks:
+            exits.extend(s for s in blk.succs
+                         if s not in body and s not in exits)
+        if not exits or any(p not in body for e in exits for p in e.preds):
+            continue
+        defined = set(m.group(1) for blk in body_blocks for ln in blk.lines
+                      if ln is not None
+                      for m in [_regex_def.match(ln)] if m is not None)
+        decref_blocks = _find_decref_blocks(cfg, body_blocks)
+        for a in body_blocks:
+            for inc_pos, value in list(a.refct_ops(_regex_incref)):
+                if value is None or value in defined:
+                    continue
+                for b in decref_blocks.get(value, ()):
+                    if cfg.balanced(a, b):
+                        _hoist_pair(a, inc_pos, b, value, preheader, exits)
+                        hoisted = True
+                        break
+    return hoisted
+
+
+def _hoist_pair(a, inc_pos, b, value, preheader, exits):
+    """
+    Move the incref at *inc_pos* of the block *a* to the end of the
+    *preheader*, and the first decref of *value* in the block *b* to the
+    start of each of the *exits*.
+    """
+    dec_pos = next(pos for pos, v in b.refct_ops(_regex_decref)
+                   if v == value)
+    incref = a.lines[inc_pos]
+    decref = b.lines[dec_pos]
+    a.lines[inc_pos] = None
+    b.lines[dec_pos] = None
+    # Before the terminator of the preheader
+    preheader.lines.insert(len(preheader.lines) - 1, incref)
+    for e in exits:
+        # After the phis of the exit
+        pos = 0
+        while (pos < len(e.lines) and
+               (e.lines[pos] is None or ' = phi ' in e.lines[pos])):
+            pos += 1
+        e.lines.insert(pos, decref)
+
+
 def remove_redundant_nrt_refct(ll_module):
     """
     Remove redundant reference count operations from the
@@ -153,20 +591,22 @@ def remove_redundant_nrt_refct(ll_module):
     line by line to remove the unnecessary nrt refct pairs within each block.
     Decref calls are moved after the last incref call in the block to avoid
     temporarily decref'ing to zero (which can happen due to hidden decref from
-    alias).
+    alias).  Unless config.NRT_REFCT_PRUNING is 'block', the pairs across
+    blocks are then pruned, or hoisted out of loops, from the control flow
+    graph of each function (see _prune_across_blocks()).
 
     Note: non-threadsafe due to usage of global LLVMcontext
     """
-    # Early escape if NRT_incref is not used
-    try:
-        ll_module.get_function('NRT_incref')
-    except NameError:
+    # Early escape if neither NRT_incref nor NRT_incref_local is used
+    if not any(fn.name in ('NRT_incref', 'NRT_incref_local')
+               for fn in ll_module.functions):
         return ll_module
 
     # the optimisation pass loses the name of module as it operates on
     # strings, so back it up and reset it on completion
     name = ll_module.name
-    newll = _remove_redundant_nrt_refct(str(ll_module))
+    cross_block = config.NRT_REFCT_PRUNING != 'block'
+    newll = _remove_redundant_nrt_refct(str(ll_module), cross_block)
     new_mod = ll.parse_assembly(newll)
     new_mod.name = cgutils.normalize_ir_text(name)
     return new_mod
@@ -17,7 +17,10 @@ from numba.core.ir_utils import (raise_on_unsupported_feature, warn_deprecated,
                                  check_and_legalize_ir, guard,
                                  dead_code_elimination, simplify_CFG,
                                  get_definition, remove_dels,
-                                 build_definitions)
+                                 build_definitions, find_callname,
+                                 find_const, require)
+from numba.core.analysis import (compute_cfg_from_blocks, compute_use_defs,
+                                 compute_live_map)
 from numba.core import postproc
 
 
@@ -220,6 +223,10 @@ class NopythonRewrites(FunctionPass):
                'pass encountered during compilation of '
                'function "%s"' % (state.func_id.func_name,))
 
+        # The array expressions rewrite is registered when imported, which
+        # `import numba` doesn't do eagerly
+        import numba.np.ufunc.array_exprs  # noqa: F401
+
         pp = postproc.PostProcessor(state.func_ir)
         pp.run(True)
         with fallback_context(state, msg):
@@ -364,6 +371,12 @@ class NativeLowering(LoweringPass):
                     mangler=targetctx.mangler, inline=flags.forceinline,
                     noalias=flags.noalias)
 
+            if flags.profile:
+                from numba.core.lineprofile import LineProfile
+                profile = LineProfile(interp, cycles=flags.profile.cycles)
+                profile.type_annotation = state.get('type_annotation')
+                metadata['line_profile'] = profile
+
             with targetctx.push_code_library(library):
                 lower = lowering.Lower(targetctx, library, fndesc, interp,
                                        metadata=metadata)
@@ -433,7 +446,13 @@ class NoPythonBackend(LoweringPass):
         """
         if state.library is None:
             codegen = state.targetctx.codegen()
-            state.library = codegen.create_library(state.func_id.func_qualname)
+            if state.flags.opt_level is None:
+                state.library = codegen.create_library(
+                    state.func_id.func_qualname)
+            else:
+                state.library = codegen.create_library(
+                    state.func_id.func_qualname,
+                    opt_level=state.flags.opt_level)
             # Enable object caching upfront, so that the library can
             # be later serialized.
             state.library.enable_object_caching()
@@ -785,3 +804,338 @@ class PreLowerStripPhis(FunctionPass):
 
         func_ir.blocks = newblocks
         return func_ir
+
+
+@register_pass(mutates_CFG=False, analysis_only=True)
+class StackAllocArrays(AnalysisPass):
+    """Find the arrays of constant shape, constructed by np.empty(),
+    np.zeros(), np.ones(), or np.array() or np.asarray() of a tuple, which do
+    not escape the function, so that the lowering allocates them on the
+    stack, with no MemInfo (see config.STACK_ARRAY_MAX_BYTES).
+
+    An array escapes unless it is only indexed, has its attributes or
+    reductions taken, is copied from or is the operand of an arithmetic
+    operation.  As the stack buffer of an allocation is reused each time it
+    executes, no alias of the array may also be alive after it.
+
+    The result is ``metadata['stack_arrays']``, mapping the variables the
+    arrays are assigned to, to the name of the constructor and the shape.
+    """
+
+    _name = "stack_alloc_arrays"
+
+    # The attributes of an array which do not reference it
+    _attrs = frozenset(['shape', 'size', 'ndim', 'itemsize', 'nbytes'])
+    # The methods of an array which neither return a view of it nor keep a
+    # reference to it
+    _methods = frozenset(['sum', 'prod', 'min', 'max', 'mean', 'var', 'std',
+                          'argmin', 'argmax', 'any', 'all', 'copy', 'fill'])
+
+    def __init__(self):
+        AnalysisPass.__init__(self)
+
+    def run_pass(self, state):
+        func_ir = state.func_ir
+        stack_arrays = {}
+        state.metadata['stack_arrays'] = stack_arrays
+        if (config.STACK_ARRAY_MAX_BYTES <= 0 or
+                func_ir.generator_info is not None or
+                any(isinstance(stmt, Parfor)
+                    for block in func_ir.blocks.values()
+                    for stmt in block.body)):
+            # The stack frame of a generator does not survive the yields, and
+            # the arrays used by the parfor bodies are not tracked
+            return False
+
+        func_ir._definitions = build_definitions(func_ir.blocks)
+        candidates = self._find_candidates(state.targetctx, func_ir,
+                                           state.typemap)
+        if not candidates:
+            return False
+
+        live_after = self._compute_live_after(func_ir)
+        for name, (label, index, func_name, shape) in candidates.items():
+            holders = self._find_holders(func_ir, state.typemap, name)
+            if holders is None:
+                continue
+            # Another alias alive after the allocation would share the buffer
+            # with the new array
+            if holders & live_after[label][index] - {name}:
+                continue
+            stack_arrays[name] = func_name, shape
+        return False
+
+    def _find_candidates(self, targetctx, func_ir, typemap):
+        """Return the array constructor calls, assigned to variables defined
+        once, of constant shapes and small enough to be allocated on the stack.
+        """
+        candidates = {}
+        for label, block in func_ir.blocks.items():
+            for index, stmt in enumerate(block.body):
+                if not (isinstance(stmt, ir.Assign) and
+                        isinstance(stmt.value, ir.Expr) and
+                        stmt.value.op == 'call'):
+                    continue
+                name = stmt.target.name
+                expr = stmt.value
+                arrtype = typemap[name]
+                if not (isinstance(arrtype, types.Array) and
+                        arrtype.layout == 'C' and arrtype.mutable and
+                        isinstance(arrtype.dtype,
+                                   (types.Number, types.Boolean)) and
+                        len(func_ir._definitions[name]) == 1 and
+                        1 <= len(expr.args) <= 2 and
+                        expr.vararg is None and
+                        all(kw == 'dtype' for kw, _ in expr.kws)):
+                    continue
+                callname = guard(find_callname, func_ir, expr, typemap)
+                if callname is None or callname[1] != 'numpy':
+                    continue
+                func_name = callname[0]
+                if func_name in ('empty', 'zeros', 'ones'):
+                    shape = guard(self._get_const_shape, func_ir,
+                                  expr.args[0])
+                elif func_name in ('array', 'asarray'):
+                    shape = self._get_tuple_shape(typemap[expr.args[0].name])
+                else:
+                    continue
+                if shape is None or len(shape) != arrtype.ndim:
+                    continue
+                nbytes = targetctx.get_abi_sizeof(
+                    targetctx.get_data_type(arrtype.dtype))
+                for s in shape:
+                    nbytes *= s
+                if nbytes <= config.STACK_ARRAY_MAX_BYTES:
+                    candidates[name] = label, index, func_name, shape
+        return candidates
+
+    def _get_const_shape(self, func_ir, var):
+        """Return the shape defined by the constant integer or tuple of
+        integers *var*.
+        """
+        var_def = get_definition(func_ir, var)
+        if isinstance(var_def, ir.Expr) and var_def.op == 'build_tuple':
+            shape = tuple(find_const(func_ir, item) for item in var_def.items)
+        else:
+            shape = find_const(func_ir, var)
+            if not isinstance(shape, tuple):
+                shape = (shape,)
+        require(all(isinstance(s, int) and s >= 0 for s in shape))
+        return shape
+
+    def _get_tuple_shape(self, ty):
+        """Return the shape of the array converted from the (nested) tuple
+        of scalars of type *ty*.
+        """
+        if isinstance(ty, (types.Number, types.Boolean)):
+            return ()
+        if isinstance(ty, types.BaseTuple) and len(ty) > 0:
+            inner = set(self._get_tuple_shape(t) for t in ty)
+            if len(inner) == 1 and None not in inner:
+                return (len(ty),) + inner.pop()
+        return None
+
+    def _find_holders(self, func_ir, typemap, name):
+        """Return the variables holding the array assigned to *name*, i.e.
+        its aliases and the methods bound to it, or None if it escapes.
+        """
+        holders = {name}
+        changed = True
+        while changed:
+            changed = False
+            for block in func_ir.blocks.values():
+                for stmt in block.body:
+                    used = {v.name for v in stmt.list_vars()} & holders
+                    if isinstance(stmt, ir.Assign):
+                        used.discard(stmt.target.name)
+                    if not used:
+                        continue
+                    new = self._use_holders(func_ir, typemap, stmt, holders)
+                    if new is None:
+                        return None
+                    if new - holders:
+                        holders |= new
+                        changed = True
+        return holders
+
+    def _use_holders(self, func_ir, typemap, stmt, holders):
+        """Return the variables *stmt*, which uses the *holders* of an array,
+        makes hold the array, or None if the array escapes through *stmt*.
+        """
+        def held(*vs):
+            return any(v.name in holders for v in vs)
+
+        if isinstance(stmt, ir.Del):
+            return set()
+        if isinstance(stmt, (ir.SetItem, ir.StaticSetItem)):
+            index = getattr(stmt, 'index_var', None) or stmt.index
+            if isinstance(index, ir.Var) and held(index):
+                return None
+            if held(stmt.value) and not isinstance(typemap[stmt.target.name],
+                                                   types.Array):
+                # Stored in a container
+                return None
+            return set()
+        if not isinstance(stmt, ir.Assign):
+            return None
+
+        target = stmt.target.name
+        value = stmt.value
+        if isinstance(value, ir.Var):
+            return {target}
+        if not isinstance(value, ir.Expr):
+            return None
+        if value.op in ('getitem', 'static_getitem'):
+            index = value.index if value.op == 'getitem' else value.index_var
+            if (isinstance(index, ir.Var) and held(index) or
+                    not isinstance(typemap[target],
+                                   (types.Number, types.Boolean))):
+                # A view of the array, or an advanced indexing
+                return None
+            return set()
+        if value.op == 'getattr':
+            if value.attr in self._attrs:
+                return set()
+            if (value.attr in self._methods and
+                    isinstance(typemap[target], types.BoundFunction)):
+                return {target}
+            return None
+        if value.op == 'call':
+            args = list(value.args) + [v for _, v in value.kws]
+            if value.vararg is not None:
+                args.append(value.vararg)
+            if held(*args):
+                if (len(value.args) == 1 and not value.kws and
+                        guard(find_callname, func_ir, value,
+                              typemap) == ('len', 'builtins')):
+                    return set()
+                return None
+            # The call of a method bound to the array
+            return set()
+        if value.op == 'inplace_binop':
+            return {target} if held(value.lhs) else set()
+        if value.op in ('binop', 'unary', 'arrayexpr'):
+            return set()
+        return None
+
+    def _compute_live_after(self, func_ir):
+        """Return the variables alive after each statement, by block label
+        and statement index.
+        """
+        blocks = func_ir.blocks
+        cfg = compute_cfg_from_blocks(blocks)
+        usedefs = compute_use_defs(blocks)
+        live_map = compute_live_map(cfg, blocks, usedefs.usemap,
+                                    usedefs.defmap)
+        live_after = {}
+        for label, block in blocks.items():
+            live = set()
+            for succ, _ in cfg.successors(label):
+                live |= live_map[succ]
+            after = [None] * len(block.body)
+            for index in reversed(range(len(block.body))):
+                stmt = block.body[index]
+                after[index] = frozenset(live)
+                if isinstance(stmt, ir.Assign):
+                    live.discard(stmt.target.name)
+                    value = stmt.value
+                    if isinstance(value, ir.Var):
+                        live.add(value.name)
+                    elif isinstance(value, ir.Inst):
+                        live |= {v.name for v in value.list_vars()}
+                else:
+                    live |= {v.name for v in stmt.list_vars()}
+            live_after[label] = after
+        return live_after
+
+
+@register_pass(mutates_CFG=False, analysis_only=True)
+class ThreadLocalRefct(StackAllocArrays):
+    """Find the variables holding the arrays allocated by the function, by
+    numpy constructors or array expressions, which do not escape it, so that
+    the lowering updates their reference counts with non-atomic operations:
+    the MemInfo of such an array is only ever seen by the calling thread.
+
+    The arrays escape as in StackAllocArrays, except that their views also
+    hold them.  All the variables holding an array must be defined once, as
+    another definition could store a shared value to them.
+
+    The result is ``metadata['thread_local']``, the set of these variables.
+    """
+
+    _name = "thread_local_refct"
+
+    # The numpy functions returning a new array
+    _constructors = frozenset(['empty', 'zeros', 'ones', 'full', 'empty_like',
+                               'zeros_like', 'ones_like', 'full_like',
+                               'arange', 'linspace', 'array', 'copy'])
+
+    def __init__(self):
+        StackAllocArrays.__init__(self)
+
+    def run_pass(self, state):
+        func_ir = state.func_ir
+        thread_local = set()
+        state.metadata['thread_local'] = thread_local
+        if (not state.flags.nrt or
+                func_ir.generator_info is not None or
+                any(isinstance(stmt, Parfor)
+                    for block in func_ir.blocks.values()
+                    for stmt in block.body)):
+            # The state of a generator can be resumed by any thread, and the
+            # arrays used by the parfor bodies are shared by the threads
+            return False
+
+        func_ir._definitions = build_definitions(func_ir.blocks)
+        for name in self._find_allocations(func_ir, state.typemap):
+            if name in thread_local:
+                continue
+            holders = self._find_holders(func_ir, state.typemap, name)
+            if holders is None:
+                continue
+            if all(len(func_ir._definitions[h]) == 1 for h in holders):
+                thread_local |= holders
+        return False
+
+    def _find_allocations(self, func_ir, typemap):
+        """Return the variables, defined once, the arrays allocated by the
+        function are assigned to.
+        """
+        allocations = []
+        for block in func_ir.blocks.values():
+            for stmt in block.body:
+                if not (isinstance(stmt, ir.Assign) and
+                        isinstance(stmt.value, ir.Expr)):
+                    continue
+                name = stmt.target.name
+                expr = stmt.value
+                if not (isinstance(typemap[name], types.Array) and
+                        len(func_ir._definitions[name]) == 1):
+                    continue
+                if expr.op == 'call':
+                    callname = guard(find_callname, func_ir, expr, typemap)
+                    if (callname is None or callname[1] != 'numpy' or
+                            callname[0] not in self._constructors):
+                        continue
+                elif expr.op not in ('arrayexpr', 'binop'):
+                    continue
+                allocations.append(name)
+        return allocations
+
+    def _use_holders(self, func_ir, typemap, stmt, holders):
+        if isinstance(stmt, ir.Assign) and isinstance(stmt.value, ir.Expr):
+            value = stmt.value
+            target = stmt.target.name
+            # A view shares the MemInfo of the array
+            if value.op in ('getitem', 'static_getitem'):
+                index = (value.index if value.op == 'getitem'
+                         else value.index_var)
+                if (value.value.name in holders and
+                        not (isinstance(index, ir.Var) and
+                             index.name in holders) and
+                        isinstance(typemap[target], types.Array)):
+                    return {target}
+            if value.op == 'getattr' and value.attr == 'T':
+                return {target}
+        return StackAllocArrays._use_holders(self, func_ir, typemap, stmt,
+                                             holders)
@@ -22,6 +22,7 @@ from collections import OrderedDict, defaultdict
 from functools import reduce
 
 from numba.core import types, utils, typing, ir, config
+from numba.core.compiler_lock import registry_lock
 from numba.core.typing.templates import Signature
 from numba.core.errors import (TypingError, UntypedAttributeError,
                                new_error_context, termcolor, UnsupportedError,
@@ -841,14 +842,16 @@ def register_dispatcher(disp):
     assert callable(disp)
     assert callable(disp.py_func)
     name = disp.py_func.__name__
-    _temporary_dispatcher_map[name] = disp
-    _temporary_dispatcher_map_ref_count[name] += 1
+    with registry_lock:
+        _temporary_dispatcher_map[name] = disp
+        _temporary_dispatcher_map_ref_count[name] += 1
     try:
         yield
     finally:
-        _temporary_dispatcher_map_ref_count[name] -= 1
-        if not _temporary_dispatcher_map_ref_count[name]:
-            del _temporary_dispatcher_map[name]
+        with registry_lock:
+            _temporary_dispatcher_map_ref_count[name] -= 1
+            if not _temporary_dispatcher_map_ref_count[name]:
+                del _temporary_dispatcher_map[name]
 
 
 typeinfer_extensions = {}
@@ -1,5 +1,6 @@
 from abc import ABCMeta, abstractmethod, abstractproperty
 import itertools
+import threading
 import weakref
 
 import numpy as np
@@ -22,6 +23,9 @@ def _autoincr():
     return n
 
 _typecache = {}
+# Interning must be atomic for types created concurrently from different
+# threads, otherwise equal types could get different type codes.
+_typecache_lock = threading.RLock()
 
 def _on_type_disposal(wr, _pop=_typecache.pop):
     _pop(wr, None)
@@ -47,14 +51,15 @@ class _TypeMetaclass(ABCMeta):
     def _intern(cls, inst):
         # Try to intern the created instance
         wr = weakref.ref(inst, _on_type_disposal)
-        orig = _typecache.get(wr)
-        orig = orig and orig()
-        if orig is not None:
-            return orig
-        else:
-            inst._code = _autoincr()
-            _typecache[wr] = wr
-            return inst
+        with _typecache_lock:
+            orig = _typecache.get(wr)
+            orig = orig and orig()
+            if orig is not None:
+                return orig
+            else:
+                inst._code = _autoincr()
+                _typecache[wr] = wr
+                return inst
 
     def __call__(cls, *args, **kwargs):
         """
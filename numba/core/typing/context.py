@@ -1,4 +1,4 @@
-from collections import defaultdict
+from collections import defaultdict, namedtuple
 from collections.abc import Sequence
 import types as pytypes
 import weakref
@@ -7,7 +7,8 @@ import contextlib
 import operator
 
 import numba
-from numba.core import types, errors
+from numba.core import types, errors, config
+from numba.core.compiler_lock import registry_lock
 from numba.core.typeconv import Conversion, rules
 from numba.core.typing import templates
 from .typeof import typeof, Purpose
@@ -15,6 +16,18 @@ from .typeof import typeof, Purpose
 from numba.core import utils
 
 
+# The maximum number of function type resolutions memoized by a typing
+# context; they are all forgotten beyond it
+_RESOLUTION_CACHE_SIZE = 8192
+
+# The function types whose resolution depends on more than the argument
+# types (e.g. on the compiled overloads), and is never memoized
+_UNCACHED_FUNCTION_TYPES = (types.Dispatcher, types.RecursiveCall)
+
+ResolutionCacheInfo = namedtuple('ResolutionCacheInfo',
+                                 ('hits', 'misses', 'currsize'))
+
+
 class Rating(object):
     __slots__ = 'promote', 'safe_convert', "unsafe_convert"
 
@@ -41,12 +54,22 @@ class Rating(object):
 
 class CallStack(Sequence):
     """
-    A compile-time call stack
+    A compile-time call stack.
+
+    The stack is kept per-thread: each thread only ever sees the frames of
+    the compilation it is running.
     """
 
     def __init__(self):
-        self._stack = []
-        self._lock = threading.RLock()
+        self._tls = threading.local()
+
+    @property
+    def _stack(self):
+        try:
+            return self._tls.stack
+        except AttributeError:
+            stack = self._tls.stack = []
+            return stack
 
     def __getitem__(self, index):
         """
@@ -64,13 +87,11 @@ class CallStack(Sequence):
         if self.match(func_id.func, args):
             msg = "compiler re-entrant to the same function signature"
             raise RuntimeError(msg)
-        self._lock.acquire()
         self._stack.append(CallFrame(typeinfer, func_id, args))
         try:
             yield
         finally:
             self._stack.pop()
-            self._lock.release()
 
     def finditer(self, py_func):
         """
@@ -139,6 +160,14 @@ class BaseContext(object):
         self._globals = utils.UniqueDict()
         self.tm = rules.default_type_manager
         self.callstack = CallStack()
+        # Memoized function type resolutions, {func: {(args, kws): sig}}
+        self._resolutions = {}
+        self._resolutions_size = 0
+        # Incremented whenever all the memoized resolutions become invalid,
+        # i.e. when new declarations are installed
+        self._resolutions_generation = 0
+        self._resolution_hits = 0
+        self._resolution_misses = 0
 
         # Initialize
         self.init()
@@ -148,6 +177,7 @@ class BaseContext(object):
         Initialize the typing context.  Can be overridden by subclasses.
         """
 
+    @registry_lock
     def refresh(self):
         """
         Refresh context with new declarations from known registries.
@@ -190,8 +220,83 @@ class BaseContext(object):
     def resolve_function_type(self, func, args, kws):
         """
         Resolve function type *func* for argument types *args* and *kws*.
-        A signature is returned.
+        A signature is returned.  Successful resolutions are memoized until
+        new declarations are installed.
+        """
+        key = self._get_resolution_key(func, args, kws)
+        if key is None:
+            return self._resolve_function_type(func, args, kws)
+        try:
+            res = self._resolutions[func][key]
+        except KeyError:
+            self._resolution_misses += 1
+        else:
+            self._resolution_hits += 1
+            return res
+        generation = self._resolutions_generation
+        res = self._resolve_function_type(func, args, kws)
+        if res is not None:
+            # Invalidations happen under the registry lock
+            with registry_lock:
+                if generation == self._resolutions_generation:
+                    self._memoize_resolution(func, key, res)
+        return res
+
+    def _memoize_resolution(self, func, key, res):
+        if self._resolutions_size >= _RESOLUTION_CACHE_SIZE:
+            self._resolutions.clear()
+            self._resolutions_size = 0
+        resolutions = self._resolutions.setdefault(func, {})
+        if key not in resolutions:
+            self._resolutions_size += 1
+        resolutions[key] = res
+
+    def _get_resolution_key(self, func, args, kws):
         """
+        Return the key of the resolution of *func* in the memoized
+        resolutions of *func*, or None if it must not be memoized.
+        """
+        if (not config.RESOLUTION_CACHE
+                or isinstance(func, _UNCACHED_FUNCTION_TYPES)):
+            return None
+        key = (tuple(args), tuple(sorted(dict(kws).items())) if kws else ())
+        try:
+            hash(func)
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def _invalidate_resolutions(self, func=None):
+        """
+        Forget the memoized resolutions of the function type *func*, or all
+        of them if None.  Only the latter discards the resolutions in flight,
+        as the resolutions of a function type do not depend on the other
+        types.
+        """
+        if func is None:
+            self._resolutions_generation += 1
+            self._resolutions.clear()
+            self._resolutions_size = 0
+            return
+        try:
+            removed = self._resolutions.pop(func, None)
+        except TypeError:
+            # Unhashable, cannot have been memoized
+            return
+        if removed:
+            self._resolutions_size -= len(removed)
+
+    def resolution_cache_info(self):
+        """
+        Return the hits, misses and current size of the memoized function
+        type resolutions, as a ResolutionCacheInfo named tuple.
+        """
+        return ResolutionCacheInfo(self._resolution_hits,
+                                   self._resolution_misses,
+                                   self._resolutions_size)
+
+    def _resolve_function_type(self, func, args, kws):
         # Prefer user definition first
         try:
             res = self._resolve_user_function_type(func, args, kws)
@@ -414,6 +519,7 @@ class BaseContext(object):
         Load target-specific registries.  Can be overridden by subclasses.
         """
 
+    @registry_lock
     def install_registry(self, registry):
         """
         Install a *registry* (a templates.Registry instance) of function,
@@ -474,23 +580,31 @@ class BaseContext(object):
         """
         Remove the registered type for global value *gv*.
         """
+        # The resolutions of the removed type are not needed anymore
+        existing = self._lookup_global(gv)
+        if existing is not None:
+            self._invalidate_resolutions(existing)
         try:
             gv = weakref.ref(gv)
         except TypeError:
             pass
         del self._globals[gv]
 
+    @registry_lock
     def insert_global(self, gv, gty):
         self._insert_global(gv, gty)
 
     def insert_attributes(self, at):
         key = at.key
         self._attributes[key].append(at)
+        self._invalidate_resolutions()
 
     def insert_function(self, ft):
         key = ft.key
         self._functions[key].append(ft)
+        self._invalidate_resolutions()
 
+    @registry_lock
     def insert_user_function(self, fn, ft):
         """Insert a user function.
 
@@ -14,6 +14,7 @@ import numba
 from numba.core import types, utils
 from numba.core.errors import TypingError, InternalError
 from numba.core.cpu_options import InlineOptions
+from numba.core.compiler_lock import registry_lock
 
 # info store for inliner callback functions e.g. cost model
 _inline_info = namedtuple('inline_info',
@@ -604,7 +605,9 @@ class _OverloadFunctionTemplate(AbstractTemplate):
         jitdecor = jit(nopython=True, **self._jit_options)
         disp = jitdecor(pyfunc)
         if cache_key is not None:
-            self._impl_cache[cache_key] = disp, args
+            # Keep the dispatcher built first by concurrent compilations,
+            # so that the overload is compiled once
+            disp, args = self._impl_cache.setdefault(cache_key, (disp, args))
         return disp, args
 
     def get_impl_key(self, sig):
@@ -682,6 +685,14 @@ class _IntrinsicTemplate(AbstractTemplate):
         try:
             return self._impl_cache[cache_key]
         except KeyError:
+            pass
+        # The lowering must be registered once, even with concurrent
+        # compilation
+        with registry_lock:
+            try:
+                return self._impl_cache[cache_key]
+            except KeyError:
+                pass
             result = self._definition_func(self.context, *args, **kws)
             if result is None:
                 return
@@ -399,6 +399,30 @@ class PreserveIR(AnalysisPass):
         return False
 
 
+@register_pass(mutates_CFG=False, analysis_only=True)
+class CacheUntypedIR(AnalysisPass):
+    """
+    Stores a copy of the IR produced by the untyped passes in the
+    compilation's UntypedIRCache, for the later specializations of the
+    function to start type inference from.
+    """
+
+    _name = "cache_untyped_ir"
+
+    def __init__(self):
+        AnalysisPass.__init__(self)
+
+    def run_pass(self, state):
+        cache = state.untyped_ir_cache
+        # With partial type inference (literal_unroll) the IR depends on
+        # all the argument types
+        if (cache is not None and cache.accepts(state.flags) and
+                state.typemap is None):
+            cache.put(state.args, state.return_type, state.flags,
+                      state.func_ir)
+        return False
+
+
 @register_pass(mutates_CFG=False, analysis_only=True)
 class FindLiterallyCalls(FunctionPass):
     """Find calls to `numba.literally()` and signal if its requirement is not
@@ -0,0 +1,161 @@
+"""
+Support for the perf map files naming JIT-compiled code for the Linux
+``perf`` tool and other native profilers (e.g. ``py-spy --native``).
+
+A perf map file is named ``/tmp/perf-<pid>.map`` and has one
+``<start> <size> <symbol name>`` line, in hexadecimal, per function.
+"""
+import os
+import struct
+import threading
+
+from numba.core import itanium_mangler
+
+# ELF constants
+_ELFCLASS64 = 2
+_ELFDATA2LSB = 1
+_SHT_SYMTAB = 2
+_STT_FUNC = 2
+_SHN_UNDEF = 0
+_SHN_LORESERVE = 0xff00
+
+# Symbol bindings
+STB_LOCAL = 0
+STB_GLOBAL = 1
+STB_WEAK = 2
+
+# The prefixes of the symbol names of the wrappers not mangled as a
+# namespace (see numba.core.funcdesc)
+_WRAPPER_PREFIXES = ('cfunc.',)
+
+
+class FunctionSymbol(object):
+    """
+    A function defined by an ELF object file, at *offset* in its section
+    *section*.
+    """
+    __slots__ = ('name', 'section', 'offset', 'size', 'binding')
+
+    def __init__(self, name, section, offset, size, binding):
+        self.name = name
+        self.section = section
+        self.offset = offset
+        self.size = size
+        self.binding = binding
+
+
+def iter_function_symbols(buf):
+    """
+    Iterate over the defined function symbols of the relocatable ELF object
+    file *buf*, yielding FunctionSymbol instances.  Nothing is yielded for
+    other object file formats.
+    """
+    if buf[:4] != b'\x7fELF':
+        return
+    endian = '<' if buf[5] == _ELFDATA2LSB else '>'
+    if buf[4] == _ELFCLASS64:
+        shoff, = struct.unpack_from(endian + 'Q', buf, 0x28)
+        shentsize, shnum = struct.unpack_from(endian + 'HH', buf, 0x3a)
+        # sh_type, sh_offset, sh_size, sh_link, sh_entsize
+        shdr = endian + 'IIQQQQII8xQ'
+        sym = endian + 'IBBHQQ'
+    else:
+        shoff, = struct.unpack_from(endian + 'I', buf, 0x20)
+        shentsize, shnum = struct.unpack_from(endian + 'HH', buf, 0x2e)
+        shdr = endian + 'IIIIIIII4xI'
+        sym = endian + 'IIIBBH'
+    sections = []
+    for i in range(shnum):
+        (_, sh_type, _, _, sh_offset, sh_size, sh_link, _,
+         sh_entsize) = struct.unpack_from(shdr, buf, shoff + i * shentsize)
+        sections.append((sh_type, sh_offset, sh_size, sh_link, sh_entsize))
+    for sh_type, sh_offset, sh_size, sh_link, sh_entsize in sections:
+        if sh_type != _SHT_SYMTAB or not sh_entsize:
+            continue
+        strtab_offset = sections[sh_link][1]
+        for pos in range(sh_offset, sh_offset + sh_size, sh_entsize):
+            if buf[4] == _ELFCLASS64:
+                (st_name, st_info, _, st_shndx, st_value,
+                 st_size) = struct.unpack_from(sym, buf, pos)
+            else:
+                (st_name, st_value, st_size, st_info, _,
+                 st_shndx) = struct.unpack_from(sym, buf, pos)
+            if (st_info & 0xf != _STT_FUNC or st_shndx == _SHN_UNDEF
+                    or st_shndx >= _SHN_LORESERVE):
+                continue
+            start = strtab_offset + st_name
+            name = bytes(buf[start:buf.index(b'\0', start)]).decode()
+            yield FunctionSymbol(name, st_shndx, st_value, st_size,
+                                 st_info >> 4)
+
+
+def demangle(name):
+    """
+    Return the readable form of the symbol name *name*, i.e. the Python
+    qualified name and signature of a compiled function, or *name* itself
+    if it was not mangled by Numba.
+    """
+    prefix = ''
+    for wrapper_prefix in _WRAPPER_PREFIXES:
+        if name.startswith(wrapper_prefix):
+            prefix = wrapper_prefix
+            name = name[len(prefix):]
+            break
+    try:
+        return prefix + itanium_mangler.demangle(name)
+    except ValueError:
+        return prefix + name
+
+
+def get_function_addresses(symbols, get_address):
+    """
+    Return the (address, size, name) of the function *symbols* of an object
+    file, once loaded.  *get_address* returns the address of a non-local
+    symbol; the local symbols are located relative to the non-local ones of
+    their section, preferably non-weak (as another definition of a weak
+    symbol may have been loaded first).
+    """
+    bases = {}
+    for binding in (STB_GLOBAL, STB_WEAK):
+        for sym in symbols:
+            if sym.binding == binding and sym.section not in bases:
+                bases[sym.section] = get_address(sym.name) - sym.offset
+    return [(bases[sym.section] + sym.offset, sym.size, sym.name)
+            for sym in symbols if sym.section in bases and sym.size]
+
+
+class PerfMap(object):
+    """
+    The perf map file of the current process, opened on first use (and
+    reopened in forked processes).
+    """
+
+    def __init__(self, directory='/tmp'):
+        self._directory = directory
+        self._lock = threading.Lock()
+        self._file = None
+        self._pid = None
+
+    @property
+    def filename(self):
+        return os.path.join(self._directory, 'perf-%d.map' % os.getpid())
+
+    def write(self, entries):
+        """
+        Write the (address, size, symbol name) *entries*.
+        """
+        lines = ''.join('%x %x %s\n' % (addr, size, demangle(name))
+                        for addr, size, name in entries)
+        if not lines:
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._file = open(self.filename, 'a')
+                self._pid = os.getpid()
+            self._file.write(lines)
+            # Profilers may read the file at any time
+            self._file.flush()
+
+
+# The perf map of the process
+perf_map = PerfMap()
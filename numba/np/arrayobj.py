@@ -3425,6 +3425,62 @@ def _zero_fill_array(context, builder, ary):
     cgutils.memset(builder, ary.data, builder.mul(ary.itemsize, ary.nitems), 0)
 
 
+def _stack_nd_impl(context, builder, arrtype, shape):
+    """Like _empty_nd_impl(), but the array of the constant *shape* (a tuple
+    of Python ints) is allocated in the stack frame of the function being
+    lowered, with no MemInfo.  The buffer is allocated once, in the entry
+    block, so the array must neither outlive the function nor be alive
+    when the allocation executes again.
+    """
+    assert arrtype.layout == 'C'
+    ary = make_array(arrtype)(context, builder)
+
+    datatype = context.get_data_type(arrtype.dtype)
+    itemsize = get_itemsize(context, arrtype)
+    nitems = functools.reduce(operator.mul, shape, 1)
+    buf = cgutils.alloca_once(builder, ir.ArrayType(datatype, nitems))
+
+    strides = [itemsize]
+    for dimension_size in reversed(shape[1:]):
+        strides.append(strides[-1] * dimension_size)
+    strides = tuple(reversed(strides)) if shape else ()
+
+    intp_t = context.get_value_type(types.intp)
+    populate_array(ary,
+                   data=builder.bitcast(buf, datatype.as_pointer()),
+                   shape=[intp_t(s) for s in shape],
+                   strides=[intp_t(s) for s in strides],
+                   itemsize=itemsize,
+                   meminfo=None)
+    return ary
+
+
+def numpy_stack_array(context, builder, func_name, sig, args, shape):
+    """
+    Lower a call to the array constructor np.<func_name>() (np.empty(),
+    np.zeros(), np.ones(), or np.array() or np.asarray() of a tuple), of the
+    constant *shape*, as an array allocated on the stack.  This is for the
+    arrays proven not to escape the function by the StackAllocArrays pass.
+    """
+    arrtype = sig.return_type
+    ary = _stack_nd_impl(context, builder, arrtype, shape)
+    if func_name == 'zeros':
+        _zero_fill_array(context, builder, ary)
+    elif func_name == 'ones':
+        one = context.get_constant(arrtype.dtype, 1)
+        with cgutils.for_range(builder, ary.nitems) as loop:
+            ptr = builder.gep(ary.data, [loop.index])
+            store_item(context, builder, arrtype, one, ptr)
+    elif func_name in ('array', 'asarray'):
+        shapes = cgutils.unpack_tuple(builder, ary.shape, arrtype.ndim)
+        strides = cgutils.unpack_tuple(builder, ary.strides, arrtype.ndim)
+        assign_sequence_to_array(context, builder, ary.data, shapes, strides,
+                                 arrtype, sig.args[0], args[0])
+    else:
+        assert func_name == 'empty', func_name
+    return ary._getvalue()
+
+
 def _parse_shape(context, builder, ty, val):
     """
     Parse the shape argument to an array constructor.
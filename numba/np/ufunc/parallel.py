@@ -367,6 +367,12 @@ def _launch_threads():
             if _is_initialized:
                 return
 
+            if config.NRT_SINGLE_THREADED:
+                raise RuntimeError("The threading layer cannot be launched "
+                                   "as NUMBA_NRT_SINGLE_THREADED is set: the "
+                                   "reference counts of the NRT are not "
+                                   "atomic.")
+
             def select_known_backend(backend):
                 """
                 Loads a specific threading layer backend based on string
@@ -54,6 +54,10 @@ def other_function(x, y):
 def get_global_objmode(x):
     return K * x
 
+@jit(nopython=True, pickle_code=True)
+def hypot_pickle_code(x, y):
+    return other_function(x, y) + K
+
 import numpy as np
 import numpy.random as nprand
 
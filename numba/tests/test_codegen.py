@@ -6,7 +6,9 @@ Tests for numba.targets.codegen.
 import warnings
 import base64
 import ctypes
+import os
 import pickle
+import re
 import subprocess
 import sys
 import weakref
@@ -16,7 +18,8 @@ import llvmlite.binding as ll
 import unittest
 from numba.core.codegen import JITCPUCodegen
 from numba.core.compiler_lock import global_compiler_lock
-from numba.tests.support import TestCase
+from numba.misc import perfmap
+from numba.tests.support import TestCase, override_config
 
 
 asm_sum = r"""
@@ -46,6 +49,14 @@ asm_sum_outer = """
 """    # noqa: E501
 
 
+asm_sum_inner_inline = """
+    define i32 @"__main__.ising_element_update$1.array(int8,_2d,_C).int64.int64"(i32 %.1, i32 %.2) alwaysinline {
+      %.3 = add i32 %.1, %.2
+      ret i32 %.3
+    }
+"""    # noqa: E501
+
+
 ctypes_sum_ty = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_int, ctypes.c_int)
 
 
@@ -143,6 +154,17 @@ class JITCPUCodegenTestCase(TestCase):
         state = library.serialize_using_object_code()
         self._check_serialize_unserialize(state)
 
+    def test_unserialize_object_code_without_references(self):
+        # The 'object' format predating the referenced libraries
+        library = self.compile_module(asm_sum_outer, asm_sum_inner)
+        library.enable_object_caching()
+        name, kind, data = library.serialize_using_object_code()
+        self.assertEqual(kind, 'object2')
+        object_code, shared_bitcode, referenced = data
+        self.assertEqual(referenced, ())
+        state = (name, 'object', (object_code, shared_bitcode))
+        self._check_serialize_unserialize(state)
+
     def test_unserialize_other_process_object_code(self):
         library = self.compile_module(asm_sum_outer, asm_sum_inner)
         library.enable_object_caching()
@@ -188,6 +210,94 @@ class JITCPUCodegenTestCase(TestCase):
         self.assertIn("Inspection disabled", str(w[0].message))
         self.assertIn("sum", str(raises.exception))
 
+    # Linking by reference tests.
+
+    def compile_module_by_reference(self, asm, linking_asm):
+        with override_config('LINK_BY_REFERENCE', 1):
+            library = self.compile_module(asm, linking_asm)
+            library.enable_object_caching()
+            library.finalize()
+        return library
+
+    def test_link_by_reference(self):
+        library = self.compile_module_by_reference(asm_sum_outer,
+                                                   asm_sum_inner)
+        [linking_library] = library._linking_libraries
+        self.assertEqual(library._referenced_libraries, [linking_library])
+        # The callee is only declared in the caller
+        inner = library.get_function(
+            "__main__.ising_element_update$1.array(int8,_2d,_C).int64.int64")
+        self.assertTrue(inner.is_declaration)
+        ptr = library.get_pointer_to_function("sum")
+        cfunc = ctypes_sum_ty(ptr)
+        self.assertEqual(cfunc(2, 3), 5)
+
+    def test_link_by_reference_inline(self):
+        library = self.compile_module_by_reference(asm_sum_outer,
+                                                   asm_sum_inner_inline)
+        self.assertEqual(library._referenced_libraries, [])
+        ptr = library.get_pointer_to_function("sum")
+        cfunc = ctypes_sum_ty(ptr)
+        self.assertEqual(cfunc(2, 3), 5)
+
+    def test_link_by_reference_serialize_object_code(self):
+        library = self.compile_module_by_reference(asm_sum_outer,
+                                                   asm_sum_inner)
+        state = library.serialize_using_object_code()
+        self._check_serialize_unserialize(state)
+
+    def test_link_by_reference_unserialize_other_process(self):
+        library = self.compile_module_by_reference(asm_sum_outer,
+                                                   asm_sum_inner)
+        state = library.serialize_using_object_code()
+        self._check_unserialize_other_process(state)
+
+    # Perf map tests
+
+    @unittest.skipUnless(sys.platform.startswith('linux'), 'needs ELF')
+    def test_perf_map_symbols(self):
+        library = self.compile_module(asm_sum_outer, asm_sum_inner)
+        library.enable_object_caching()
+        library.finalize()
+        symbols = list(perfmap.iter_function_symbols(
+            library._get_compiled_object()))
+        names = [sym.name for sym in symbols]
+        self.assertIn("sum", names)
+        entries = perfmap.get_function_addresses(
+            symbols, library.get_pointer_to_function)
+        [(addr, size)] = [(addr, size) for addr, size, name in entries
+                          if name == "sum"]
+        self.assertEqual(addr, library.get_pointer_to_function("sum"))
+        self.assertGreater(size, 0)
+
+    @unittest.skipUnless(sys.platform.startswith('linux'), 'needs ELF')
+    def test_perf_map(self):
+        code = """if 1:
+            import os
+            from numba import njit
+
+            @njit
+            def add(x, y):
+                return x + y
+
+            add(1, 2)
+            print(os.getpid())
+            """
+        env = dict(os.environ, NUMBA_PERF_MAP='1')
+        out = subprocess.check_output([sys.executable, '-c', code], env=env)
+        filename = '/tmp/perf-%d.map' % int(out)
+        try:
+            with open(filename) as f:
+                lines = f.read().splitlines()
+        finally:
+            os.unlink(filename)
+        names = [line.split(' ', 2)[2] for line in lines]
+        sig = r'\$\d+\(int64, int64\)'
+        self.assertTrue(any(re.match(r'__main__\.add' + sig, name)
+                            for name in names), names)
+        self.assertTrue(any(re.match(r'cpython\.__main__\.add' + sig, name)
+                            for name in names), names)
+
     # Lifetime tests
 
     @unittest.expectedFailure  # MCJIT removeModule leaks and it is disabled
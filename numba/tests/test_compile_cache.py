@@ -1,9 +1,38 @@
+import os
+import sys
 import unittest
 from contextlib import contextmanager
 
 import llvmlite.llvmpy.core as lc
 
 from numba.core import types, typing, callconv, cpu
+from numba.core.caching import _has_untagged_symbols
+from numba.core.registry import cpu_target
+from numba.tests.support import (TestCase, override_config, temp_directory,
+                                 import_dynamic)
+
+
+_unhashable_global = object()
+
+
+_user_module_source = '''
+from numba.extending import overload
+
+def user_func(x):
+    pass
+
+@overload(user_func)
+def ol_user_func(x):
+    def impl(x):
+        return x * 3
+    return impl
+'''
+
+
+def _make_calling_helper(func):
+    def helper(x):
+        return func(x) + 1
+    return helper
 
 
 class TestCompileCache(unittest.TestCase):
@@ -13,9 +42,9 @@ class TestCompileCache(unittest.TestCase):
     '''
 
     @contextmanager
-    def _context_builder_sig_args(self):
-        typing_context = typing.Context()
-        context = cpu.CPUContext(typing_context)
+    def _context_builder_sig_args(self, context=None):
+        if context is None:
+            context = cpu.CPUContext(typing.Context())
         lib = context.codegen().create_library('testing')
         with context.push_code_library(lib):
             module = lc.Module("test_module")
@@ -131,5 +160,184 @@ class TestCompileCache(unittest.TestCase):
             self.assertEqual(2, len(context.cached_internal_func))
 
 
+def _times2(i):
+    return 2 * i
+
+
+def _use_unhashable_global(i):
+    return i if _unhashable_global else 0
+
+
+
+class TestPersistentCompileCache(TestCase):
+    '''
+    Tests for the persistent cache of internally compiled functions
+    (NUMBA_CACHE_INTERNAL).
+    '''
+
+    def setUp(self):
+        self.cache_dir = temp_directory('test_persistent_compile_cache')
+        self.internal_dir = os.path.join(self.cache_dir, 'internal')
+
+    @contextmanager
+    def _persistent_cache(self):
+        with override_config('CACHE_INTERNAL', 1), \
+                override_config('CACHE_DIR', self.cache_dir):
+            yield
+
+    _context_builder_sig_args = TestCompileCache._context_builder_sig_args
+
+    def test_reuse_across_contexts(self):
+        with self._persistent_cache():
+            with self._context_builder_sig_args() as (
+                context, builder, sig, args,
+            ):
+                cres1 = context.compile_subroutine(builder, _times2, sig)
+            self.assertEqual(len(os.listdir(self.internal_dir)), 1)
+
+            # A fresh context (as in a new process) loads it from disk
+            with self._context_builder_sig_args() as (
+                context, builder, sig, args,
+            ):
+                def fail(*args, **kwargs):
+                    self.fail("internal function compiled again")
+                context._compile_subroutine_no_cache = fail
+                cres2 = context.compile_subroutine(builder, _times2, sig)
+                context.compile_internal(builder, _times2, sig, args)
+            self.assertEqual(cres1.fndesc.mangled_name,
+                             cres2.fndesc.mangled_name)
+            self.assertEqual(cres1.signature, cres2.signature)
+            self.assertEqual(len(os.listdir(self.internal_dir)), 1)
+
+    def test_disabled(self):
+        with override_config('CACHE_DIR', self.cache_dir):
+            with self._context_builder_sig_args() as (
+                context, builder, sig, args,
+            ):
+                self.assertIsNone(context.get_internal_function_cache())
+                context.compile_subroutine(builder, _times2, sig)
+        self.assertFalse(os.path.exists(self.internal_dir))
+
+    def test_index_key(self):
+        def make_closure(x):
+            def f(z):
+                return x + z
+            return f
+
+        with self._persistent_cache():
+            with self._context_builder_sig_args() as (
+                context, builder, sig, args,
+            ):
+                cache = context.get_internal_function_cache()
+
+                def key(impl, sig=sig, locals={}, context=context):
+                    return cache.index_key(impl, sig, locals, context)
+
+                base_key = key(_times2)
+                self.assertIsNotNone(base_key)
+                self.assertEqual(key(_times2), key(_times2))
+                self.assertEqual(key(make_closure(1)), key(make_closure(1)))
+                self.assertNotEqual(key(make_closure(1)),
+                                    key(make_closure(2)))
+                self.assertNotEqual(key(make_closure(1)), key(_times2))
+                sig2 = typing.signature(types.float64, types.float64)
+                self.assertNotEqual(key(_times2), key(_times2, sig=sig2))
+                self.assertNotEqual(key(_times2),
+                                    key(_times2, locals={'i': types.int64}))
+                np_context = context.subtarget(
+                    error_model=callconv.create_error_model('numpy', context))
+                self.assertNotEqual(key(_times2),
+                                    key(_times2, context=np_context))
+                # Globals which can't be described aren't cached
+                self.assertIsNone(key(_use_unhashable_global))
+                # Config changing the generated code
+                for name, value in [('OPT', 0), ('NRT_SINGLE_THREADED', 1),
+                                    ('NRT_TRACE_ALLOC', 1),
+                                    ('STACK_ARRAY_MAX_BYTES', 0)]:
+                    with override_config(name, value):
+                        self.assertNotEqual(key(_times2), base_key)
+
+    def test_unique_names(self):
+        with self._persistent_cache():
+            with self._context_builder_sig_args() as (
+                context, builder, sig, args,
+            ):
+                cache = context.get_internal_function_cache()
+                key = cache.index_key(_times2, sig, {}, context)
+                cres = context.compile_subroutine(builder, _times2, sig)
+            # The key is folded into the symbols, unlike the counter
+            # making them unique in this process only
+            tag = '$k%s$' % (cache.symbol_tag(key),)
+            self.assertIn(tag, cres.fndesc.unique_name)
+
+    def test_untagged_symbols(self):
+        def check(names, expected):
+            class FakeLibrary(object):
+                def get_defined_symbols(self):
+                    return names
+
+            self.assertIs(_has_untagged_symbols(FakeLibrary()), expected)
+
+        tagged = '_ZN5numba5tests3foo$24k0123456789abcdef$2412Ex'
+        untagged = '_ZN5numba5tests3bar$2412Ex'
+        check(set(), False)
+        check({'NRT_incref', tagged}, False)
+        check({tagged + '$2enext'}, False)
+        check({tagged, untagged}, True)
+        check({untagged}, True)
+
+    def test_user_implementations(self):
+        # A helper including an @overload from outside Numba isn't saved:
+        # the overload's source isn't part of the key
+        module_dir = temp_directory(self.id())
+        with open(os.path.join(module_dir, 'internal_user_mod.py'), 'w') as f:
+            f.write(_user_module_source)
+        sys.path.insert(0, module_dir)
+        try:
+            mod = import_dynamic('internal_user_mod')
+        finally:
+            sys.path.remove(module_dir)
+        helper = _make_calling_helper(mod.user_func)
+        # The overload is compiled and registered in the global context
+        target_context = cpu_target.target_context
+        with self._persistent_cache():
+            with self._context_builder_sig_args(target_context) as (
+                context, builder, sig, args,
+            ):
+                cache = context.get_internal_function_cache()
+                self.assertIsNotNone(cache.index_key(helper, sig, {},
+                                                     context))
+                context.compile_subroutine(builder, helper, sig)
+                context.compile_subroutine(builder, _times2, sig)
+            # Only the helper implemented by Numba alone was saved
+            self.assertEqual(len(os.listdir(self.internal_dir)), 1)
+
+    def test_invalid_file(self):
+        with self._persistent_cache():
+            with self._context_builder_sig_args() as (
+                context, builder, sig, args,
+            ):
+                context.compile_subroutine(builder, _times2, sig)
+            [filename] = os.listdir(self.internal_dir)
+            path = os.path.join(self.internal_dir, filename)
+            with open(path, 'rb') as f:
+                data = f.read()
+            for bad_data in (data[:len(data) // 2], b'garbage'):
+                with open(path, 'wb') as f:
+                    f.write(bad_data)
+                # Compiled again, and saved afresh
+                with self._context_builder_sig_args() as (
+                    context, builder, sig, args,
+                ):
+                    context.compile_subroutine(builder, _times2, sig)
+                with self._context_builder_sig_args() as (
+                    context, builder, sig, args,
+                ):
+                    def fail(*args, **kwargs):
+                        self.fail("internal function compiled again")
+                    context._compile_subroutine_no_cache = fail
+                    context.compile_subroutine(builder, _times2, sig)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,119 @@
+import json
+import os
+import tracemalloc
+from io import StringIO
+
+from numba import njit
+from numba.core import compile_profiler
+from numba.tests.support import TestCase, override_config, temp_directory
+import unittest
+
+
+class TestCompileProfiler(TestCase):
+
+    def setUp(self):
+        compile_profiler.reset()
+
+    def tearDown(self):
+        compile_profiler.reset()
+
+    def compile_foo(self):
+        @njit
+        def foo(x):
+            return x + 1
+
+        foo(1)
+        [sig] = foo.signatures
+        return foo.get_metadata(sig)['compile_profile']
+
+    def test_metadata(self):
+        events = self.compile_foo()
+        names = {(ev.category, ev.name) for ev in events}
+        self.assertIn(('nopython', 'nopython_type_inference'), names)
+        self.assertIn(('nopython', 'nopython_backend'), names)
+        self.assertIn(('llvm', 'function_optimization'), names)
+        self.assertIn(('llvm', 'module_optimization'), names)
+        self.assertIn(('llvm', 'finalize_object'), names)
+        for ev in events:
+            self.assertGreaterEqual(ev.duration, 0)
+            # Allocations are only traced when profiling
+            self.assertIsNone(ev.allocated)
+        # Nothing is recorded process-wide by default
+        self.assertEqual(compile_profiler.get_events(), [])
+
+    def test_nested_compilation(self):
+        @njit
+        def bar(x):
+            return x * 2
+
+        @njit
+        def foo(x):
+            return bar(x) + 1
+
+        foo(1)
+        [foo_sig] = foo.signatures
+        [bar_sig] = bar.signatures
+        foo_events = foo.get_metadata(foo_sig)['compile_profile']
+        bar_events = bar.get_metadata(bar_sig)['compile_profile']
+        # The callee's events are recorded in its own metadata only
+        self.assertTrue(bar_events)
+        foo_ids = set(map(id, foo_events))
+        self.assertFalse(any(id(ev) in foo_ids for ev in bar_events))
+
+    def test_process_wide(self):
+        with override_config('COMPILE_PROFILE', 1):
+            events = self.compile_foo()
+        recorded = compile_profiler.get_events()
+        for ev in events:
+            self.assertIn(ev, recorded)
+        if not tracemalloc.is_tracing():
+            # The allocations are only traced if tracemalloc is
+            self.assertTrue(all(ev.allocated is None for ev in recorded))
+
+        report = compile_profiler.aggregate()
+        stats = report[('nopython', 'nopython_type_inference')]
+        self.assertEqual(stats.count, 1)
+        durations = [s.duration for s in report.values()]
+        self.assertEqual(durations, sorted(durations, reverse=True))
+
+        out = StringIO()
+        compile_profiler.print_report(file=out)
+        self.assertIn('nopython_type_inference', out.getvalue())
+
+        compile_profiler.reset()
+        self.assertEqual(compile_profiler.get_events(), [])
+
+    def test_enable(self):
+        was_tracing = tracemalloc.is_tracing()
+        compile_profiler.enable()
+        self.assertTrue(tracemalloc.is_tracing())
+        events = self.compile_foo()
+        recorded = compile_profiler.get_events()
+        for ev in events:
+            self.assertIn(ev, recorded)
+        self.assertTrue(all(ev.allocated is not None for ev in recorded))
+        compile_profiler.reset()
+        # tracemalloc is only stopped if enable() started it
+        self.assertEqual(tracemalloc.is_tracing(), was_tracing)
+        self.compile_foo()
+        self.assertEqual(compile_profiler.get_events(), [])
+
+    def test_chrome_trace(self):
+        compile_profiler.enable()
+        self.compile_foo()
+        events = compile_profiler.get_events()
+        path = os.path.join(temp_directory('test_compile_profiler'),
+                            'trace.json')
+        compile_profiler.dump_chrome_trace(path)
+        with open(path) as f:
+            trace = json.load(f)['traceEvents']
+        self.assertEqual(len(trace), len(events))
+        for entry, ev in zip(trace, events):
+            self.assertEqual(entry['name'], ev.name)
+            self.assertEqual(entry['cat'], ev.category)
+            self.assertEqual(entry['ph'], 'X')
+            self.assertEqual(entry['args'], {'allocated': ev.allocated})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,12 @@
+import threading
 import unittest
 from numba.core.compiler_lock import (
     global_compiler_lock,
     require_global_compiler_lock,
+    serial_compiler_lock,
+    DispatcherLock,
 )
-from numba.tests.support import TestCase
+from numba.tests.support import TestCase, override_config
 
 
 class TestCompilerLock(TestCase):
@@ -18,6 +21,44 @@ class TestCompilerLock(TestCase):
 
         func()
 
+    def test_serial_lock(self):
+        with override_config('CONCURRENT_COMPILATION', 0):
+            with serial_compiler_lock:
+                require_global_compiler_lock()
+        with override_config('CONCURRENT_COMPILATION', 1):
+            with serial_compiler_lock:
+                self.assertFalse(global_compiler_lock.is_locked())
+
+    def test_dispatcher_lock_serial(self):
+        with override_config('CONCURRENT_COMPILATION', 0):
+            with DispatcherLock():
+                require_global_compiler_lock()
+
+    def test_dispatcher_lock_nested_does_not_block(self):
+        outer, inner = DispatcherLock(), DispatcherLock()
+        held = threading.Event()
+        done = threading.Event()
+
+        def hold_inner():
+            with inner:
+                held.set()
+                done.wait()
+
+        with override_config('CONCURRENT_COMPILATION', 1):
+            th = threading.Thread(target=hold_inner)
+            th.start()
+            held.wait()
+            try:
+                with outer:
+                    self.assertFalse(global_compiler_lock.is_locked())
+                    # A nested acquisition must not wait for the lock held
+                    # by the other thread (this would deadlock otherwise).
+                    with inner:
+                        pass
+            finally:
+                done.set()
+                th.join()
+
 
 if __name__ == '__main__':
     unittest.main()
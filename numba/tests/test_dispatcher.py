@@ -1,4 +1,6 @@
+import concurrent.futures
 import errno
+import gc
 import multiprocessing
 import os
 import platform
@@ -6,6 +8,7 @@ import shutil
 import subprocess
 import sys
 import threading
+import time
 import warnings
 import inspect
 import pickle
@@ -21,11 +24,11 @@ from numba import _dispatcher
 from numba.core.compiler import compile_isolated
 from numba.core.errors import NumbaWarning
 from numba.tests.support import (TestCase, temp_directory, import_dynamic,
-                                 override_env_config, capture_cache_log,
-                                 captured_stdout)
+                                 override_config, override_env_config,
+                                 capture_cache_log, captured_stdout)
 from numba.np.numpy_support import as_dtype
-from numba.core.caching import _UserWideCacheLocator
-from numba.core.dispatcher import Dispatcher
+from numba.core.caching import _UserWideCacheLocator, BoundedCacheStore
+from numba.core.dispatcher import Dispatcher, TIER_QUICK, TIER_OPTIMIZED
 from numba.tests.support import skip_parfors_unsupported, needs_lapack
 
 import llvmlite.binding as ll
@@ -42,6 +45,11 @@ try:
 except ImportError:
     pygments = None
 
+try:
+    import sqlite3
+except ImportError:
+    sqlite3 = None
+
 _is_armv7l = platform.machine() == 'armv7l'
 
 
@@ -85,6 +93,15 @@ def bad_generated_usecase(x, y=5):
     return impl
 
 
+_untyped_ir_offset = 1
+
+
+def untyped_ir_usecase(x, y=None):
+    if y is None:
+        return x + _untyped_ir_offset
+    return x - y
+
+
 def dtype_generated_usecase(a, b, dtype=None):
     if isinstance(dtype, (types.misc.NoneType, types.misc.Omitted)):
         out_dtype = np.result_type(*(np.dtype(ary.dtype.name)
@@ -960,6 +977,692 @@ class TestDispatcherMethods(TestCase):
         self.assertEqual(exp_f, got_f)
 
 
+class _DeferredExecutor(object):
+    """
+    A minimal executor running each submitted task on its own thread, once
+    the `go` event is set.
+    """
+
+    def __init__(self):
+        self.go = threading.Event()
+        self.threads = []
+
+    def submit(self, fn, *args, **kwargs):
+        def run():
+            self.go.wait()
+            fn(*args, **kwargs)
+        th = threading.Thread(target=run)
+        th.start()
+        self.threads.append(th)
+
+    def join(self):
+        self.go.set()
+        for th in self.threads:
+            th.join()
+
+
+class TestPrecompile(TestCase):
+
+    def test_precompile(self):
+        @jit(nopython=True)
+        def foo(x):
+            return x + 1
+
+        futs = foo.precompile(["int64(int64)", "float64(float64)"])
+        self.assertEqual(len(futs), 2)
+        entry_points = [f.result(timeout=60) for f in futs]
+        self.assertEqual(len(foo.signatures), 2)
+        self.assertEqual(entry_points,
+                         [foo.overloads[sig].entry_point
+                          for sig in foo.signatures])
+        self.assertPreciseEqual(foo(1), 2)
+        self.assertPreciseEqual(foo(1.5), 2.5)
+        # The calls didn't trigger any further compilation
+        self.assertEqual(sum(foo.stats.cache_misses.values()), 2)
+        # Precompiling existing signatures is a no-op
+        [fut] = foo.precompile(["int64(int64)"])
+        self.assertIs(fut.result(), entry_points[0])
+        self.assertEqual(sum(foo.stats.cache_misses.values()), 2)
+
+    def test_call_waits_for_precompile(self):
+        @jit(nopython=True)
+        def foo(x):
+            return x + 1
+
+        executor = _DeferredExecutor()
+        [fut] = foo.precompile(["intp(intp)"], executor=executor)
+        results = []
+        caller = threading.Thread(target=lambda: results.append(foo(1)))
+        caller.start()
+        # The call is waiting on the background compilation
+        caller.join(timeout=0.5)
+        self.assertTrue(caller.is_alive())
+        self.assertFalse(fut.done())
+        executor.join()
+        caller.join()
+        self.assertEqual(results, [2])
+        self.assertTrue(fut.done())
+        self.assertEqual(len(foo.signatures), 1)
+        self.assertEqual(sum(foo.stats.cache_misses.values()), 1)
+
+    def test_precompile_error(self):
+        @jit(nopython=True)
+        def foo(x):
+            return x.not_an_attribute
+
+        [fut] = foo.precompile(["int64(int64)"])
+        self.assertIsInstance(fut.exception(timeout=60), errors.TypingError)
+        self.assertEqual(foo.signatures, [])
+
+    def test_precompile_executor_shut_down(self):
+        @jit(nopython=True)
+        def foo(x):
+            return x + 1
+
+        executor = concurrent.futures.ThreadPoolExecutor(1)
+        executor.shutdown()
+        with self.assertRaises(RuntimeError):
+            foo.precompile(["intp(intp)"], executor=executor)
+        # Calls don't wait for the compilation which never got submitted
+        results = []
+        caller = threading.Thread(target=lambda: results.append(foo(1)))
+        caller.start()
+        caller.join(timeout=60)
+        self.assertFalse(caller.is_alive())
+        self.assertEqual(results, [2])
+
+    def test_precompile_cancelled(self):
+        @jit(nopython=True)
+        def foo(x):
+            return x + 1
+
+        executor = _DeferredExecutor()
+        [fut] = foo.precompile(["intp(intp)"], executor=executor)
+        self.assertTrue(fut.cancel())
+        # The call compiles the signature itself
+        self.assertPreciseEqual(foo(1), 2)
+        executor.join()
+        self.assertEqual(len(foo.signatures), 1)
+        self.assertEqual(foo._pending_compiles, {})
+
+    def test_precompile_disabled(self):
+        @jit("int64(int64)", nopython=True)
+        def foo(x):
+            return x + 1
+
+        with self.assertRaises(RuntimeError) as raises:
+            foo.precompile(["float64(float64)"])
+        self.assertIn("compilation disabled", str(raises.exception))
+
+
+class TestTieredCompilation(TestCase):
+
+    def test_tier_up(self):
+        # The specialization never gets hot, and is tiered up by hand
+        with override_config('TIER_UP_CALLS', 10 ** 9), \
+                override_config('TIERED_OPT', 0):
+            @jit(nopython=True, tiered=True)
+            def foo(x):
+                return x + 1
+
+            self.assertPreciseEqual(foo(1), 2)
+        [sig] = foo.signatures
+        quick = foo.overloads[sig]
+        self.assertEqual(foo.stats.tiers, {sig: TIER_QUICK})
+        self.assertEqual(quick.library._opt_level, 0)
+
+        foo._tier_up(sig, quick)
+        self.assertEqual(foo.stats.tiers, {sig: TIER_OPTIMIZED})
+        optimized = foo.overloads[sig]
+        self.assertIsNot(optimized, quick)
+        self.assertIsNone(optimized.library._opt_level)
+        self.assertEqual(foo.signatures, [sig])
+        self.assertPreciseEqual(foo(1), 2)
+        self.assertPreciseEqual(foo(1.5), 2.5)
+        self.assertEqual(sum(foo.stats.cache_misses.values()), 2)
+        # A stale tier-up is ignored
+        foo._tier_up(sig, quick)
+        self.assertIs(foo.overloads[sig], optimized)
+
+    def test_retired_tier(self):
+        with override_config('TIER_UP_CALLS', 10 ** 9):
+            @jit(nopython=True, tiered=True)
+            def foo(x):
+                return x + 1
+
+            @jit(nopython=True)
+            def bar(x):
+                return foo(x) * 2
+
+            self.assertPreciseEqual(bar(1), 4)
+        [sig] = foo.signatures
+        quick = foo.overloads[sig]
+        library = weakref.ref(quick.library)
+        entry_point = weakref.ref(quick.entry_point)
+        foo._tier_up(sig, quick)
+        del quick
+        gc.collect()
+        # The dispatcher doesn't keep the quick tier alive, but the caller
+        # compiled against it does
+        self.assertIsNone(entry_point())
+        self.assertIsNotNone(library())
+        self.assertPreciseEqual(bar(1), 4)
+        del bar
+        gc.collect()
+        self.assertIsNone(library())
+
+    def test_background_tier_up(self):
+        with override_config('TIER_UP_CALLS', 4):
+            @jit(nopython=True, tiered=True)
+            def foo(x):
+                return x * 2
+
+            # The compiling call isn't counted
+            self.assertPreciseEqual(foo(3), 6)
+            [sig] = foo.signatures
+            for _ in range(2):
+                self.assertPreciseEqual(foo(3), 6)
+            # A map() counts once for the same argument types
+            self.assertEqual(foo.map([3, 3, 3]), [6, 6, 6])
+            # Not hot yet
+            self.assertEqual(foo.stats.tiers, {sig: TIER_QUICK})
+            self.assertPreciseEqual(foo(3), 6)
+            deadline = time.time() + 60
+            while foo.stats.tiers[sig] != TIER_OPTIMIZED:
+                self.assertLess(time.time(), deadline)
+                time.sleep(0.01)
+        self.assertPreciseEqual(foo(3), 6)
+        self.assertEqual(foo.signatures, [sig])
+
+    def test_recompile(self):
+        with override_config('TIER_UP_CALLS', 10 ** 9):
+            @jit(nopython=True, tiered=True)
+            def foo(x):
+                return x + 1
+
+            foo(1)
+            [sig] = foo.signatures
+            quick = foo.overloads[sig]
+            foo.recompile()
+            # The new overload is tiered afresh
+            self.assertEqual(foo.stats.tiers, {sig: TIER_QUICK})
+            foo._tier_up(sig, quick)
+            self.assertIsNot(foo.overloads[sig], quick)
+            self.assertEqual(foo.stats.tiers, {sig: TIER_QUICK})
+
+    def test_not_tiered(self):
+        @jit(nopython=True)
+        def foo(x):
+            return x + 1
+
+        foo(1)
+        self.assertEqual(foo.stats.tiers, {})
+        [cres] = foo.overloads.values()
+        self.assertIsNone(cres.library._opt_level)
+
+
+class TestUntypedIRCache(TestCase):
+
+    def test_reuse(self):
+        @jit(nopython=True)
+        def foo(x, y):
+            acc = 0
+            for i in range(x):
+                acc += i * y
+            return acc
+
+        cache = foo._compiler._untyped_ir_cache
+        self.assertPreciseEqual(foo(3, 2), 6)
+        [stored] = cache._irs.values()
+        expected = cache._copy(stored)
+
+        self.assertPreciseEqual(foo(3, 2.5), 7.5)
+        self.assertPreciseEqual(foo(np.int8(3), np.int8(2)), np.int64(6))
+        # The stored IR was reused and left untouched by the compilations
+        self.assertEqual(list(cache._irs.values()), [stored])
+        self.assertTrue(stored.equal_ir(expected))
+        # Each specialization still has its own function identity
+        unique_names = {cres.fndesc.unique_name
+                        for cres in foo.overloads.values()}
+        self.assertEqual(len(unique_names), 3)
+
+    def test_argument_key(self):
+        # The branch on y is pruned depending on its type
+        foo = jit(nopython=True)(untyped_ir_usecase)
+        cache = foo._compiler._untyped_ir_cache
+        self.assertPreciseEqual(foo(1), 1 + _untyped_ir_offset)
+        self.assertPreciseEqual(foo(1, None), 1 + _untyped_ir_offset)
+        self.assertPreciseEqual(foo(1, 3), -2)
+        self.assertPreciseEqual(foo(1.5, 3), -1.5)
+        # Omitted, None and any other type of y
+        self.assertEqual(len(cache._irs), 3)
+
+    def test_rebound_global(self):
+        global _untyped_ir_offset
+        foo = jit(nopython=True)(untyped_ir_usecase)
+        cache = foo._compiler._untyped_ir_cache
+        self.assertPreciseEqual(foo(1), 2)
+        old = _untyped_ir_offset
+        _untyped_ir_offset = 10
+        try:
+            # The new specialization sees the new value
+            self.assertPreciseEqual(foo(1.5), 11.5)
+            self.assertPreciseEqual(foo(1), 2)
+            [stored] = cache._irs.values()
+            self.assertPreciseEqual(foo(np.int8(1)), np.int64(11))
+            self.assertEqual(list(cache._irs.values()), [stored])
+        finally:
+            _untyped_ir_offset = old
+
+    def test_rebound_freevar(self):
+        offset = 1
+
+        @jit(nopython=True)
+        def foo(x):
+            return x + offset
+
+        self.assertPreciseEqual(foo(1), 2)
+        offset = 10
+        self.assertPreciseEqual(foo(1.5), 11.5)
+
+    def test_recompile(self):
+        @jit(nopython=True)
+        def foo(x):
+            return x + 1
+
+        cache = foo._compiler._untyped_ir_cache
+        self.assertPreciseEqual(foo(1), 2)
+        [stored] = cache._irs.values()
+        foo.recompile()
+        self.assertPreciseEqual(foo(1), 2)
+        # The untyped passes ran afresh
+        [new_stored] = cache._irs.values()
+        self.assertIsNot(new_stored, stored)
+
+    def test_not_cached(self):
+        f = generated_jit(nopython=True)(generated_usecase)
+        self.assertIsNone(f._compiler._untyped_ir_cache)
+        self.assertPreciseEqual(f(1, 2), -1)
+
+        # May fall back to object mode
+        @jit
+        def foo(x):
+            return x + 1
+
+        self.assertPreciseEqual(foo(1), 2)
+        self.assertEqual(foo._compiler._untyped_ir_cache._irs, {})
+
+
+class TestOverloadTableCap(TestCase):
+
+    def test_last_uses(self):
+        @jit(nopython=True, max_overloads=2)
+        def foo(x):
+            return x
+
+        foo(1)
+        foo(1.5)
+        int_entry, float_entry = [cres.entry_point
+                                  for cres in foo.overloads.values()]
+        uses = dict(foo._last_uses())
+        self.assertLess(uses[int_entry], uses[float_entry])
+        foo(2)
+        uses = dict(foo._last_uses())
+        self.assertGreater(uses[int_entry], uses[float_entry])
+
+    def test_last_uses_untracked(self):
+        # Without max_overloads or tiered, calls don't track the uses
+        @jit(nopython=True)
+        def foo(x):
+            return x
+
+        foo(1)
+        foo(1.5)
+        before = foo._last_uses()
+        foo(2)
+        self.assertEqual(foo._last_uses(), before)
+
+    def test_eviction(self):
+        @jit(nopython=True, max_overloads=2)
+        def foo(x):
+            return x + 1
+
+        self.assertPreciseEqual(foo(1), 2)
+        self.assertPreciseEqual(foo(1.5), 2.5)
+        float_cres = foo.overloads[(types.float64,)]
+        library = weakref.ref(float_cres.library)
+        del float_cres
+        # Make the int overload the most recently used
+        self.assertPreciseEqual(foo(2), 3)
+        self.assertPreciseEqual(foo(1j), 1 + 1j)
+        self.assertEqual(foo.signatures, [(typeof(1),), (types.complex128,)])
+        self.assertEqual(foo.stats.evictions, 1)
+        # The dispatcher doesn't keep the evicted overload's library alive
+        gc.collect()
+        self.assertIsNone(library())
+
+        # An evicted overload is compiled again when called
+        self.assertPreciseEqual(foo(1.5), 2.5)
+        self.assertEqual(len(foo.overloads), 2)
+        self.assertEqual(foo.stats.evictions, 2)
+        self.assertIn((types.float64,), foo.overloads)
+
+    def test_callers_unaffected(self):
+        @jit(nopython=True, max_overloads=1)
+        def foo(x):
+            return x + 1
+
+        @jit(nopython=True)
+        def bar(x):
+            return foo(x) * 2
+
+        self.assertPreciseEqual(bar(1), 4)
+        self.assertPreciseEqual(foo(1.5), 2.5)
+        self.assertEqual(foo.stats.evictions, 1)
+        self.assertPreciseEqual(bar(1), 4)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError) as raises:
+            jit(nopython=True, max_overloads=0)(add)
+        self.assertIn("max_overloads must be at least 1",
+                      str(raises.exception))
+
+
+class TestLeanCompilation(TestCase):
+
+    def check_lean(self, foo, sig):
+        cres = foo.overloads[sig]
+        self.assertIsNone(cres.type_annotation)
+        self.assertIsNone(cres.fndesc.typemap)
+        self.assertNotIn('preserved_ir', cres.metadata)
+        sizes = foo.get_retained_sizes(sig)
+        self.assertEqual(sizes['llvm_ir'], 0)
+        self.assertEqual(sizes['type_annotation'], 0)
+        self.assertGreater(sizes['linking_bitcode'], 0)
+        # The module owned by the JIT engine isn't released
+        self.assertGreater(sizes['engine_ir'], 0)
+        with self.assertRaises(RuntimeError) as raises:
+            foo.inspect_llvm(sig)
+        self.assertIn("was released", str(raises.exception))
+        with self.assertRaises(RuntimeError) as raises:
+            foo.inspect_types(file=StringIO())
+        self.assertIn("was released", str(raises.exception))
+
+    def test_lean(self):
+        @jit(nopython=True, lean=True)
+        def foo(x):
+            return x + 1
+
+        @jit(nopython=True)
+        def bar(x):
+            return foo(x) * 2
+
+        self.assertPreciseEqual(foo(1), 2)
+        self.check_lean(foo, (types.intp,))
+        # Lean overloads can still be called and linked into callers
+        self.assertPreciseEqual(foo(2), 3)
+        self.assertPreciseEqual(bar(1), 4)
+        # The module for linking is only parsed again once
+        library = foo.overloads[(types.intp,)].library
+        self.assertIs(library._get_module_for_linking(),
+                      library._get_module_for_linking())
+
+    def test_config(self):
+        with override_config('LEAN_COMPILE', 1):
+            foo = jit(nopython=True)(add)
+            not_lean = jit(nopython=True, lean=False)(add)
+        self.assertPreciseEqual(foo(1, 2), 3)
+        self.check_lean(foo, (types.intp, types.intp))
+        self.assertPreciseEqual(not_lean(1, 2), 3)
+        self.assertIsNotNone(not_lean.overloads[(types.intp, types.intp)]
+                             .type_annotation)
+
+    def test_retained_sizes(self):
+        foo = jit(nopython=True)(add)
+        lean = jit(nopython=True, lean=True)(add)
+        foo(1, 2)
+        lean(1, 2)
+        sig = (types.intp, types.intp)
+        sizes = foo.get_retained_sizes()[sig]
+        self.assertEqual(set(sizes), {'llvm_ir', 'engine_ir',
+                                      'linking_bitcode', 'object_code',
+                                      'type_annotation', 'metadata'})
+        self.assertGreater(sizes['engine_ir'], 0)
+        self.assertGreater(sizes['type_annotation'], 0)
+        lean_sizes = lean.get_retained_sizes(sig)
+        self.assertEqual(lean_sizes['engine_ir'], sizes['engine_ir'])
+        self.assertLess(sum(lean_sizes.values()), sum(sizes.values()))
+
+    def test_cache(self):
+        def foo(x):
+            return x * 2
+
+        with override_config('CACHE_DIR', temp_directory(self.id())):
+            cached = jit(nopython=True, cache=True, lean=True)(foo)
+            self.assertPreciseEqual(cached(2), 4)
+            self.check_lean(cached, (types.intp,))
+            self.assertEqual(cached.stats.cache_misses[(types.intp,)], 1)
+            # The lean overload was saved with everything needed to run it
+            loaded = jit(nopython=True, cache=True, lean=True)(foo)
+            self.assertPreciseEqual(loaded(3), 6)
+            self.assertEqual(loaded.stats.cache_hits[(types.intp,)], 1)
+
+
+class TestSpecialize(TestCase):
+
+    def test_specialize(self):
+        foo = jit(nopython=True)(add)
+        spec = foo.specialize("float64(float64, float64)")
+        self.assertEqual(spec.signature, types.float64(types.float64,
+                                                       types.float64))
+        self.assertEqual(foo.signatures, [(types.float64, types.float64)])
+        self.assertPreciseEqual(spec(1.5, 2.0), 3.5)
+        self.assertIn("Specialization add(float64, float64)", repr(spec))
+        # Existing overloads are reused
+        self.assertPreciseEqual(foo(1, 2), 3)
+        spec = foo.specialize((types.intp, types.intp))
+        self.assertIs(spec._cres, foo.overloads[(types.intp, types.intp)])
+        self.assertPreciseEqual(spec(1, 2), 3)
+
+    def test_checks(self):
+        foo = jit(nopython=True)(add)
+        spec = foo.specialize("float64(float64, float64)")
+        with self.assertRaises(TypeError) as raises:
+            spec(1, 2.0)
+        self.assertIn("argument 0 does not have the type",
+                      str(raises.exception))
+        with self.assertRaises(TypeError) as raises:
+            spec(1.0)
+        self.assertIn("expected 2 arguments, got 1", str(raises.exception))
+        with self.assertRaises(TypeError) as raises:
+            spec(1.0, y=2.0)
+        self.assertIn("only take positional arguments",
+                      str(raises.exception))
+        # No new overload was compiled
+        self.assertEqual(len(foo.overloads), 1)
+
+    def test_arrays(self):
+        @jit(nopython=True)
+        def total(arr):
+            return arr.sum()
+
+        arr = np.arange(10.0)
+        spec = total.specialize((typeof(arr),))
+        self.assertPreciseEqual(spec(arr), 45.0)
+        with self.assertRaises(TypeError):
+            spec(arr[::2])
+        with self.assertRaises(TypeError):
+            spec(np.arange(10))
+
+    def test_unchecked(self):
+        foo = jit(nopython=True)(add)
+        spec = foo.specialize("int64(int64, int64)", unchecked=True)
+        self.assertTrue(spec.unchecked)
+        self.assertPreciseEqual(spec(1, 2), 3)
+        with self.assertRaises(TypeError):
+            spec(1)
+
+    def test_eviction(self):
+        foo = jit(nopython=True, max_overloads=1)(add)
+        spec = foo.specialize("float64(float64, float64)")
+        foo(1, 2)
+        self.assertEqual(foo.stats.evictions, 1)
+        # The specialization keeps its compiled code alive
+        self.assertPreciseEqual(spec(1.5, 2.0), 3.5)
+
+    def test_compilation_disabled(self):
+        foo = jit("intp(intp, intp)", nopython=True)(add)
+        self.assertPreciseEqual(foo.specialize("intp(intp, intp)")(1, 2), 3)
+        with self.assertRaises(RuntimeError):
+            foo.specialize("float64(float64, float64)")
+
+
+class TestMap(TestCase):
+
+    def test_map(self):
+        @jit(nopython=True)
+        def foo(x):
+            return x * 2
+
+        self.assertEqual(foo.map(range(5)), [0, 2, 4, 6, 8])
+        self.assertEqual(foo.map([]), [])
+        # Mixed argument types compile the needed overloads
+        self.assertPreciseEqual(foo.map([1, 1.5, 2, 1j]), [2, 3.0, 4, 2j])
+        self.assertEqual(len(foo.overloads), 3)
+
+    def test_starmap(self):
+        foo = jit(nopython=True)(add)
+        self.assertEqual(foo.starmap([(1, 2), [3, 4], iter((5, 6))]),
+                         [3, 7, 11])
+        self.assertEqual(foo.signatures, [(types.intp, types.intp)])
+
+    def test_out(self):
+        foo = jit(nopython=True)(add)
+        out = np.zeros(4)
+        res = foo.starmap(zip(range(3), [0.5] * 3), out=out)
+        self.assertIs(res, out)
+        self.assertPreciseEqual(out, np.array([0.5, 1.5, 2.5, 0.0]))
+        with self.assertRaises(IndexError):
+            foo.starmap([(1, 2)] * 5, out=out)
+
+    def test_folded_arguments(self):
+        @jit(nopython=True)
+        def foo(x, y=1):
+            return x + y
+
+        self.assertEqual(foo.map([1, 2]), [2, 3])
+        self.assertEqual(foo.starmap([(1,), (1, 5)]), [2, 6])
+
+    def test_errors(self):
+        foo = jit(nopython=True)(add)
+        with self.assertRaises(TypeError):
+            foo.starmap([(1,)])
+        with self.assertRaises(errors.TypingError):
+            foo.starmap([(1, 2), (1, "a")])
+
+        def gen():
+            yield (1, 2)
+            raise ZeroDivisionError
+
+        with self.assertRaises(ZeroDivisionError):
+            foo.starmap(gen())
+
+    def test_compilation_disabled(self):
+        foo = jit("float64(float64, float64)", nopython=True)(add)
+        # Conversions are allowed, as for regular calls
+        self.assertPreciseEqual(foo.starmap([(1, 2), (1.5, 2)]), [3.0, 3.5])
+
+
+def profiled_loop(n):
+    acc = 0
+    for i in range(n):
+        acc += i
+    return acc
+
+
+class TestLineProfile(TestCase):
+
+    def get_lines(self, func):
+        first = func.__code__.co_firstlineno
+        # The lines of the assignment, the loop header, the loop body and
+        # the return statement
+        return first + 1, first + 2, first + 3, first + 4
+
+    def check_hits(self, profile, n):
+        init, header, body, ret = self.get_lines(profiled_loop)
+        stats = profile.get_stats()
+        self.assertEqual(list(stats), [init, header, body, ret])
+        self.assertEqual(stats[init].hits, 1)
+        self.assertGreater(stats[header].hits, n)
+        self.assertEqual(stats[body].hits, n)
+        self.assertEqual(stats[ret].hits, 1)
+
+    def test_hits(self):
+        foo = jit(nopython=True, profile=True)(profiled_loop)
+        self.assertPreciseEqual(foo(10), 45)
+        profile = foo.line_profile((types.intp,))
+        self.check_hits(profile, 10)
+        self.assertIsNone(profile.cycles)
+        self.assertEqual(list(foo.line_profile()), [(types.intp,)])
+        # The counts accumulate over calls
+        foo(5)
+        self.assertEqual(profile.get_stats()[self.get_lines(foo)[2]].hits,
+                         15)
+        profile.reset()
+        foo(3)
+        self.check_hits(profile, 3)
+
+    def test_cycles(self):
+        foo = jit(nopython=True, profile='cycles')(profiled_loop)
+        self.assertPreciseEqual(foo(1000), 499500)
+        profile = foo.line_profile((types.intp,))
+        self.check_hits(profile, 1000)
+        for st in profile.get_stats().values():
+            self.assertIsInstance(st.cycles, int)
+        text = profile.format()
+        self.assertIn("acc += i", text)
+        self.assertIn("Cycles", text)
+
+    @unittest.skipIf(jinja2 is None, "please install the 'jinja2' package")
+    def test_html_annotate(self):
+        foo = jit(nopython=True, profile=True)(profiled_loop)
+        foo(10)
+        buf = StringIO()
+        foo.line_profile((types.intp,)).html_annotate(buf)
+        self.assertIn('class="line_profile"', buf.getvalue())
+
+    def test_counters_kept_alive(self):
+        foo = jit(nopython=True, profile=True, max_overloads=1)(
+            profiled_loop)
+
+        @jit(nopython=True)
+        def bar(n):
+            return foo(n)
+
+        self.assertPreciseEqual(bar(10), 45)
+        profile = weakref.ref(foo.line_profile((types.intp,)))
+        # Evict the profiled overload: its counters are still written to
+        # by the copy of its code linked into bar
+        self.assertPreciseEqual(foo(np.int32(3)), 3)
+        self.assertEqual(foo.stats.evictions, 1)
+        gc.collect()
+        self.assertIsNotNone(profile())
+        self.assertPreciseEqual(bar(10), 45)
+
+    def test_not_profiled(self):
+        foo = jit(nopython=True)(profiled_loop)
+        foo(10)
+        self.assertEqual(foo.line_profile(), {})
+        with self.assertRaises(ValueError) as raises:
+            foo.line_profile((types.intp,))
+        self.assertIn("was not compiled with profile=True",
+                      str(raises.exception))
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            jit(nopython=True, profile='lines')(profiled_loop)(1)
+
+
 class BaseCacheTest(TestCase):
     # This class is also used in test_cfunc.py.
 
@@ -1268,6 +1971,52 @@ class TestCache(BaseCacheUsecasesTest):
         f = mod.add_objmode_usecase
         self.assertPreciseEqual(f(2, 3), 15)
 
+    def test_content_hash_touch(self):
+        # With content hashing, touching the source file (as reinstalling
+        # the package would) doesn't invalidate the cache
+        with override_config('CACHE_CONTENT_HASH', 1):
+            mod = self.import_module()
+            mod.add_usecase(2, 3)
+            self.check_hits(mod.add_usecase, 0, 1)
+
+            st = os.stat(self.modfile)
+            os.utime(self.modfile, (st.st_atime + 10, st.st_mtime + 10))
+
+            mod = self.import_module()
+            f = mod.add_usecase
+            self.assertPreciseEqual(f(2, 3), 6)
+            self.check_hits(f, 1, 0)
+
+    def test_content_hash_lazy(self):
+        # The content hash is computed when the cache is first used, not
+        # when the function is decorated
+        with override_config('CACHE_CONTENT_HASH', 1):
+            mod = self.import_module()
+            f = mod.add_usecase
+            self.assertNotIn('_cache_file', vars(f._cache))
+            self.assertPreciseEqual(f(2, 3), 6)
+            self.assertIn('_cache_file', vars(f._cache))
+            self.check_hits(f, 0, 1)
+
+    def test_content_hash_invalidate(self):
+        # With content hashing, changing the source still invalidates the
+        # cache, even if the timestamp and size are unchanged
+        with override_config('CACHE_CONTENT_HASH', 1):
+            mod = self.import_module()
+            mod.add_usecase(2, 3)
+            st = os.stat(self.modfile)
+
+            with open(self.modfile) as f:
+                source = f.read()
+            with open(self.modfile, "w") as f:
+                f.write(source.replace("Z = 1\n", "Z = 9\n", 1))
+            os.utime(self.modfile, (st.st_atime, st.st_mtime))
+
+            mod = self.import_module()
+            f = mod.add_usecase
+            self.assertPreciseEqual(f(2, 3), 14)
+            self.check_hits(f, 0, 1)
+
     def test_recompile(self):
         # Explicit call to recompile() should overwrite the cache
         mod = self.import_module()
@@ -1521,6 +2270,203 @@ class TestCacheWithCpuSetting(BaseCacheUsecasesTest):
         self.assertEqual(key_generic[1][2], my_cpu_features)
 
 
+@unittest.skipIf(sqlite3 is None, "requires SQLite")
+class _SameRepr(object):
+    """
+    Distinct values with the same representation, as the types of
+    same-named classes.
+    """
+
+    def __init__(self, value):
+        self.value = value
+
+    def __repr__(self):
+        return '_SameRepr'
+
+    def __eq__(self, other):
+        return isinstance(other, _SameRepr) and other.value == self.value
+
+    def __hash__(self):
+        return hash(self.value)
+
+
+class TestBoundedCache(BaseCacheUsecasesTest):
+    """
+    Tests for the size-bounded cache store (NUMBA_CACHE_MAX_SIZE).
+    """
+
+    def test_cache_reuse(self):
+        with override_config('CACHE_MAX_SIZE', 2 ** 30):
+            mod = self.import_module()
+            mod.add_usecase(2, 3)
+            mod.add_usecase(2.5, 3.5)
+            mod.add_objmode_usecase(2, 3)
+            self.check_hits(mod.add_usecase, 0, 2)
+            # A single database holds all entries
+            self.check_pycache(1)
+
+            mod2 = self.import_module()
+            self.assertIsNot(mod, mod2)
+            f = mod2.add_usecase
+            self.assertPreciseEqual(f(2, 3), 6)
+            self.check_hits(f, 1, 0)
+            self.assertPreciseEqual(f(2.5, 3.5), 7.0)
+            self.check_hits(f, 2, 0)
+            f = mod2.add_objmode_usecase
+            self.assertPreciseEqual(f(2, 3), 6)
+            self.check_hits(f, 1, 0)
+            self.check_pycache(1)
+
+    def count_entries(self):
+        db_path = os.path.join(self.cache_dir, BoundedCacheStore._db_name)
+        conn = sqlite3.connect(db_path)
+        try:
+            return conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        finally:
+            conn.close()
+
+    def test_cache_reuse_other_process(self):
+        with override_config('CACHE_MAX_SIZE', 2 ** 30):
+            mod = self.import_module()
+            mod.add_usecase(2, 3)
+            mod.add_usecase(2.5, 3.5)
+            self.check_hits(mod.add_usecase, 0, 2)
+        entries = self.count_entries()
+
+        # The entries are found by another process, rather than saved again
+        code = """if 1:
+            import sys
+
+            sys.path.insert(0, %(tempdir)r)
+            mod = __import__(%(modname)r)
+            f = mod.add_usecase
+            assert f(2, 3) == 6
+            assert f(2.5, 3.5) == 7.0
+            print(sum(f.stats.cache_hits.values()),
+                  sum(f.stats.cache_misses.values()))
+            """ % dict(tempdir=self.tempdir, modname=self.modname)
+        env = dict(os.environ, NUMBA_CACHE_MAX_SIZE=str(2 ** 30))
+        out = subprocess.check_output([sys.executable, '-c', code], env=env)
+        self.assertEqual(out.decode().split(), ['2', '0'])
+        self.assertEqual(self.count_entries(), entries)
+
+    def test_cache_invalidate(self):
+        with override_config('CACHE_MAX_SIZE', 2 ** 30):
+            mod = self.import_module()
+            f = mod.add_usecase
+            self.assertPreciseEqual(f(2, 3), 6)
+
+            with open(self.modfile, "a") as f:
+                f.write("\nZ = 10\n")
+
+            mod = self.import_module()
+            f = mod.add_usecase
+            self.assertPreciseEqual(f(2, 3), 15)
+            self.check_hits(f, 0, 1)
+
+    def make_store(self, name, stamp=1, max_size=250):
+        store = BoundedCacheStore(self.tempdir, name, stamp, max_size)
+        # Deterministic access times
+        store._clock = self._clock
+        return store
+
+    def test_store_eviction(self):
+        self._clock = iter(range(1000)).__next__
+        payload = b'x' * 100
+        foo = self.make_store('foo')
+        bar = self.make_store('bar')
+        foo.save('a', payload)
+        bar.save('b', payload)
+        # Loading refreshes the entry, so 'b' is evicted first
+        self.assertEqual(foo.load('a'), payload)
+        foo.save('c', payload)
+        self.assertIsNone(bar.load('b'))
+        self.assertEqual(foo.load('a'), payload)
+        self.assertEqual(foo.load('c'), payload)
+        # An entry too large for the store evicts everything
+        bar.save('d', payload * 3)
+        for store, key in [(foo, 'a'), (foo, 'c'), (bar, 'd')]:
+            self.assertIsNone(store.load(key))
+
+    def test_store_stale(self):
+        self._clock = iter(range(1000)).__next__
+        self.make_store('foo', stamp=1).save('a', 42)
+        self.make_store('bar', stamp=1).save('a', 43)
+        self.assertIsNone(self.make_store('foo', stamp=2).load('a'))
+        self.assertEqual(self.make_store('foo', stamp=1).load('a'), 42)
+        # Saving with a new stamp drops the stale entries of the function
+        self.make_store('foo', stamp=2).save('b', 44)
+        self.assertIsNone(self.make_store('foo', stamp=1).load('a'))
+        self.assertEqual(self.make_store('bar', stamp=1).load('a'), 43)
+        self.make_store('foo', stamp=2).flush()
+        self.assertIsNone(self.make_store('foo', stamp=2).load('b'))
+        self.assertEqual(self.make_store('bar', stamp=1).load('a'), 43)
+
+    def test_store_same_digest(self):
+        # Keys with the same digest are told apart by equality
+        self._clock = iter(range(1000)).__next__
+        store = self.make_store('foo')
+        store.save(_SameRepr(1), 42)
+        self.assertIsNone(store.load(_SameRepr(2)))
+        store.save(_SameRepr(2), 43)
+        self.assertEqual(store.load(_SameRepr(1)), 42)
+        self.assertEqual(store.load(_SameRepr(2)), 43)
+        store.save(_SameRepr(1), 44)
+        self.assertEqual(store.load(_SameRepr(1)), 44)
+        with store._connect() as conn:
+            [(count,)] = conn.execute("SELECT COUNT(*) FROM entries")
+        self.assertEqual(count, 2)
+
+    def test_store_locked(self):
+        self._clock = iter(range(1000)).__next__
+        store = self.make_store('foo')
+        store.save('a', 42)
+        other = self.make_store('foo')
+        other._timeout = 0.01
+        # Another process holds the write lock
+        with store._transaction():
+            with warnings.catch_warnings(record=True) as w:
+                warnings.simplefilter('always', NumbaWarning)
+                other.flush()
+        self.assertEqual(len(w), 1)
+        self.assertIn("Cannot flush the cache entries", str(w[0].message))
+        self.assertEqual(store.load('a'), 42)
+
+    def get_atimes(self, store):
+        with store._connect() as conn:
+            return conn.execute("SELECT key, atime FROM entries").fetchall()
+
+    def test_store_load_while_locked(self):
+        self._clock = iter(range(1000)).__next__
+        store = self.make_store('foo')
+        store.save('a', 42)
+        atimes = self.get_atimes(store)
+        # Another process holds the write lock: loading doesn't wait for
+        # it, the access time is just not updated
+        other = self.make_store('foo')
+        with store._transaction():
+            t = time.time()
+            self.assertEqual(other.load('a'), 42)
+            self.assertLess(time.time() - t, other._timeout / 2)
+        self.assertEqual(self.get_atimes(store), atimes)
+        self.assertEqual(other.load('a'), 42)
+        self.assertNotEqual(self.get_atimes(store), atimes)
+
+    def test_store_schema(self):
+        self._clock = iter(range(1000)).__next__
+        store = self.make_store('foo')
+        store.save('a', 42)
+        with store._connect() as conn:
+            [(version,)] = conn.execute("PRAGMA user_version")
+            [(mode,)] = conn.execute("PRAGMA journal_mode")
+        self.assertEqual(version, BoundedCacheStore._schema_version)
+        self.assertEqual(mode, 'wal')
+        # The schema is only created once
+        other = self.make_store('foo')
+        other._schema = ["invalid statement"]
+        self.assertEqual(other.load('a'), 42)
+
+
 class TestMultiprocessCache(BaseCacheTest):
 
     # Nested multiprocessing.Pool raises AssertionError:
@@ -1,10 +1,11 @@
+import os
 import sys
 import types
 import warnings
 
 import pkg_resources
 
-from numba.tests.support import TestCase
+from numba.tests.support import TestCase, override_config, temp_directory
 
 
 class TestEntrypoints(TestCase):
@@ -113,3 +114,50 @@ class TestEntrypoints(TestCase):
             # remove fake module
             if mod.__name__ in sys.modules:
                 del sys.modules[mod.__name__]
+
+    def test_entrypoint_cache(self):
+        from numba.core import entrypoints
+
+        scans = []
+        expected = [('_test_numba_extension', ['init_func'])]
+
+        def scan_entry_points():
+            scans.append(None)
+            return expected
+
+        cache_dir = temp_directory('test_entrypoint_cache')
+        path_dir = temp_directory('test_entrypoint_cache_path')
+        orig_scan_entry_points = entrypoints._scan_entry_points
+        # The cache is only used if pkg_resources is not imported yet
+        orig_pkg_resources = sys.modules.pop('pkg_resources')
+        entrypoints._scan_entry_points = scan_entry_points
+        try:
+            with override_config('CACHE_DIR', cache_dir):
+                for _ in range(2):
+                    self.assertEqual(entrypoints._get_init_entry_points(),
+                                     expected)
+                self.assertEqual(len(scans), 1)
+                # Changing sys.path requires a new scan
+                sys.path.append(path_dir)
+                try:
+                    for _ in range(2):
+                        self.assertEqual(entrypoints._get_init_entry_points(),
+                                         expected)
+                    self.assertEqual(len(scans), 2)
+                    # Other files than distributions don't matter...
+                    with open(os.path.join(path_dir, 'foo.py'), 'w'):
+                        pass
+                    entrypoints._get_init_entry_points()
+                    self.assertEqual(len(scans), 2)
+                    # ...but installing one requires a new scan
+                    os.mkdir(os.path.join(path_dir, 'foo-1.0.dist-info'))
+                    entrypoints._get_init_entry_points()
+                    self.assertEqual(len(scans), 3)
+                finally:
+                    sys.path.remove(path_dir)
+                # The scan without path_dir is still cached
+                entrypoints._get_init_entry_points()
+                self.assertEqual(len(scans), 3)
+        finally:
+            sys.modules['pkg_resources'] = orig_pkg_resources
+            entrypoints._scan_entry_points = orig_scan_entry_points
@@ -48,3 +48,44 @@ class TestNumbaImport(TestCase):
         modlist = set(eval(out.strip()))
         unexpected = set(blacklist) & set(modlist)
         self.assertFalse(unexpected, "some modules unexpectedly imported")
+
+    def test_lazy_attributes(self):
+        """
+        Some top-level numba attributes are only imported on first access.
+        """
+        # (numba.experimental and numba.cpython.charseq are not listed: the
+        # target context, created on import by numba.typed, needs them)
+        lazy_modules = [
+            'numba.core.withcontexts',
+            'numba.np.ufunc',
+            'pkg_resources',
+            ]
+        code = """if 1:
+            import sys
+            # Some llvmlite versions import pkg_resources themselves
+            import llvmlite.binding
+            preloaded = list(sys.modules)
+            import numba
+            modules = list(sys.modules)
+
+            from numba.np.ufunc import vectorize, get_num_threads
+            from numba.core.withcontexts import objmode_context
+            assert numba.vectorize is vectorize
+            assert numba.get_num_threads is get_num_threads
+            assert numba.objmode is objmode_context
+            assert 'jitclass' in dir(numba)
+            from numba import *
+            assert guvectorize is numba.guvectorize
+            print((preloaded, modules))
+            """
+
+        popen = subprocess.Popen([sys.executable, "-c", code],
+                                 stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        out, err = popen.communicate()
+        if popen.returncode != 0:
+            raise AssertionError("process failed with code %s: stderr follows\n%s\n"
+                                 % (popen.returncode, err.decode()))
+
+        preloaded, modlist = eval(out.strip())
+        unexpected = set(lazy_modules) & (set(modlist) - set(preloaded))
+        self.assertFalse(unexpected, "some modules unexpectedly imported")
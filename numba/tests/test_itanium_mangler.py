@@ -3,6 +3,7 @@
 import re
 
 from numba import int32, int64, uint32, uint64, float32, float64
+from numba.core import types
 from numba.core.types import range_iter32_type
 from numba.core import itanium_mangler
 import unittest
@@ -78,6 +79,29 @@ class TestItaniumManager(unittest.TestCase):
         got = itanium_mangler.mangle_identifier(name)
         self.assertRegexpMatches(got, r'^\d+f(\$[a-z0-9][a-z0-9])+z$')
 
+    def test_demangle(self):
+        def check(ident, args, expect):
+            got = itanium_mangler.demangle(itanium_mangler.mangle(ident, args))
+            self.assertEqual(expect, got)
+
+        check("what", [int32, float32], "what(int32, float32)")
+        check("__main__.foo$1", [int64, uint64, float64],
+              "__main__.foo$1(int64, uint64, float64)")
+        check(u'mod.f∂ƒ©z', [], u'mod.f∂ƒ©z()')
+        check("2nd", [types.UniTuple(int32, 2), 123],
+              "2nd(UniTuple(int32, 2), 123)")
+        check("pkg.f", [types.float64[:, ::1]],
+              "pkg.f(Array(float64, 2, C, mutable, aligned))")
+        # Wrappers are mangled in a namespace
+        mangled = itanium_mangler.prepend_namespace(
+            itanium_mangler.mangle("pkg.f", [int64]), "cpython")
+        self.assertEqual("cpython.pkg.f(int64)",
+                         itanium_mangler.demangle(mangled))
+
+        for invalid in ("foo", "_Z", "_ZN3fooE#", "_Z5foo"):
+            with self.assertRaises(ValueError):
+                itanium_mangler.demangle(invalid)
+
 
 if __name__ == '__main__':
     unittest.main()
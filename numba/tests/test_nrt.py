@@ -1,13 +1,15 @@
+import json
 import math
 import os
 import platform
+import subprocess
 import sys
 import re
 
 import numpy as np
 
 from numba import njit
-from numba.core import typing, types
+from numba.core import config, typing, types
 from numba.core.compiler import compile_isolated, Flags
 from numba.core.runtime import (
     rtsys,
@@ -24,7 +26,7 @@ import numba.core.typing.cffi_utils as cffi_support
 from numba.core.unsafe.nrt import NRT_get_api
 
 from numba.tests.support import (MemoryLeakMixin, TestCase, temp_directory,
-                                 import_dynamic)
+                                 import_dynamic, override_config)
 from numba.core import cpu
 import unittest
 
@@ -281,6 +283,434 @@ class TestTracemalloc(unittest.TestCase):
         self.assertLess(stat.size, N * 0.01)
 
 
+class TestAllocators(unittest.TestCase):
+    """
+    Test the selection of the NRT allocator, and the pooled allocator.
+    """
+
+    def test_set_allocator(self):
+        @njit
+        def alloc():
+            return np.empty(10)
+
+        self.assertEqual(rtsys.allocator, config.NRT_ALLOCATOR)
+        with self.assertRaises(ValueError) as raises:
+            rtsys.set_allocator('jemalloc')
+        self.assertIn("unknown NRT allocator 'jemalloc'",
+                      str(raises.exception))
+        # Setting the current allocator is a no-op
+        arr = alloc()
+        rtsys.set_allocator(rtsys.allocator)
+        other = 'system' if rtsys.allocator == 'pool' else 'pool'
+        with self.assertRaises(RuntimeError) as raises:
+            rtsys.set_allocator(other)
+        self.assertIn("memory is allocated", str(raises.exception))
+        del arr
+
+    def test_pool_allocator(self):
+        code = """if 1:
+            import json
+            import threading
+            import numpy as np
+            from numba import njit
+            from numba.core.runtime import rtsys
+
+            @njit
+            def churn(n):
+                acc = 0.0
+                for i in range(n):
+                    acc += np.ones(i % 50 + 1).sum()
+                return acc
+
+            @njit
+            def alloc(n):
+                return np.ones(n)
+
+            expected = churn(1000)
+            results = []
+            threads = [threading.Thread(target=lambda: results.append(
+                           churn(1000))) for i in range(4)]
+            for t in threads:
+                t.start()
+            # The statistics can be read while other threads allocate
+            while any(t.is_alive() for t in threads):
+                rtsys.get_pool_stats()
+            for t in threads:
+                t.join()
+            small, large = alloc(10), alloc(10 ** 5)
+            stats = rtsys.get_pool_stats()
+            print(json.dumps({
+                'allocator': rtsys.allocator,
+                'ok': results == [expected] * 4,
+                'small': small.sum(), 'large': large.sum(),
+                'stats': stats._asdict(),
+            }))
+            """
+        env = dict(os.environ, NUMBA_NRT_ALLOCATOR='pool')
+        out = subprocess.check_output([sys.executable, '-c', code], env=env)
+        res = json.loads(out.decode())
+        self.assertEqual(res['allocator'], 'pool')
+        self.assertTrue(res['ok'])
+        self.assertEqual((res['small'], res['large']), (10.0, 1e5))
+        stats = res['stats']
+        self.assertGreaterEqual(stats['allocs'], 5 * 1000)
+        # Once the other threads exited, the statistics are exact: the live
+        # allocations are the live blocks plus the large array
+        live = sum(cls[1] for cls in stats['size_classes'])
+        self.assertEqual(stats['allocs'] - stats['frees'], live + 1)
+        # The two arrays are live
+        self.assertGreaterEqual(stats['requested_bytes'], 8 * (10 ** 5 + 10))
+        self.assertGreaterEqual(stats['used_bytes'], stats['requested_bytes'])
+        self.assertGreater(stats['cached_bytes'], 0)
+        self.assertGreaterEqual(stats['reserved_bytes'],
+                                stats['used_bytes'] + stats['cached_bytes'])
+        self.assertGreater(stats['fragmentation'], 0)
+        self.assertLess(stats['fragmentation'], 1)
+        block_sizes = [cls[0] for cls in stats['size_classes']]
+        self.assertEqual(block_sizes, sorted(block_sizes))
+        self.assertEqual(len(block_sizes), 40)
+        self.assertGreater(sum(cls[2] for cls in stats['size_classes']), 0)
+
+
+class TestAllocationTracing(TestCase):
+    """
+    Test the tracing of the NRT allocations by source line.
+    """
+
+    def get_sites(self, func):
+        filename = func.py_func.__code__.co_filename
+        return {site.lineno: site for site in rtsys.get_allocation_sites()
+                if site.filename == filename
+                and site.qualname == func.py_func.__qualname__}
+
+    def test_trace_alloc(self):
+        def foo(n):
+            kept = np.empty(n)
+            for i in range(n):
+                tmp = np.empty(n)
+                tmp[0] = i
+            return kept
+
+        with override_config('NRT_TRACE_ALLOC', 1):
+            cfoo = njit(foo)
+            res = cfoo(10)
+        first = foo.__code__.co_firstlineno
+        sites = self.get_sites(cfoo)
+        self.assertEqual(set(sites), {first + 1, first + 3})
+        kept = sites[first + 1]
+        self.assertEqual((kept.allocs, kept.frees), (1, 0))
+        self.assertEqual(kept.alloc_bytes, res.nbytes)
+        self.assertEqual(kept.live_bytes, res.nbytes)
+        tmp = sites[first + 3]
+        self.assertEqual((tmp.allocs, tmp.frees), (10, 10))
+        self.assertEqual(tmp.alloc_bytes, 10 * 10 * 8)
+        self.assertEqual(tmp.live_bytes, 0)
+        # The returned array is freed with its site traced
+        del res
+        self.assertEqual(self.get_sites(cfoo)[first + 1].live_bytes, 0)
+        # The sites are ordered by live bytes
+        sites = rtsys.get_allocation_sites()
+        self.assertEqual(sites, sorted(sites, key=lambda site: (
+            site.live_bytes, site.alloc_bytes), reverse=True))
+
+    def test_containers(self):
+        def foo(n):
+            lst = []
+            for i in range(n):
+                lst.append(i)
+            d = {}
+            d[1] = 2.0
+            return len(lst) + len(d)
+
+        with override_config('NRT_TRACE_ALLOC', 1):
+            cfoo = njit(foo)
+            self.assertPreciseEqual(cfoo(100), 101)
+        sites = self.get_sites(cfoo)
+        self.assertTrue(sites)
+        for site in sites.values():
+            self.assertEqual(site.allocs, site.frees)
+            self.assertEqual(site.live_bytes, 0)
+        # The growth of the list is accounted to the site creating it
+        lst = sites[foo.__code__.co_firstlineno + 1]
+        self.assertGreaterEqual(lst.alloc_bytes, 100 * 8)
+
+    def test_outermost_site(self):
+        # Allocations made by library implementations and by the traced
+        # functions called are accounted to the caller's statement
+        def callee(n):
+            return np.ones(n)
+
+        def foo(n):
+            a = np.ones(n)
+            b = np.concatenate((a, a))
+            c = ccallee(n)
+            return a.sum() + b.sum() + c.sum()
+
+        with override_config('NRT_TRACE_ALLOC', 1):
+            ccallee = njit(callee)
+            cfoo = njit(foo)
+            self.assertPreciseEqual(cfoo(10), 40.0)
+        first = foo.__code__.co_firstlineno
+        sites = self.get_sites(cfoo)
+        self.assertEqual(set(sites), {first + 1, first + 2, first + 3})
+        for lineno, size in [(first + 1, 10 * 8), (first + 2, 20 * 8),
+                             (first + 3, 10 * 8)]:
+            site = sites[lineno]
+            self.assertEqual((site.allocs, site.frees), (1, 1))
+            self.assertEqual(site.alloc_bytes, size)
+        self.assertEqual(self.get_sites(ccallee), {})
+        for site in rtsys.get_allocation_sites():
+            self.assertNotIn('arrayobj', site.filename)
+        # Called on its own, the callee traces its allocations
+        ccallee(10)
+        sites = self.get_sites(ccallee)
+        self.assertEqual(list(sites), [callee.__code__.co_firstlineno + 1])
+
+    def test_not_traced(self):
+        @njit
+        def foo(n):
+            return np.empty(n)
+
+        foo(10)
+        self.assertEqual(self.get_sites(foo), {})
+
+    def test_sites_per_thread(self):
+        # Concurrent lowerings (sharing the NRT context, e.g. in subtargets)
+        # don't see each other's allocation sites
+        import threading
+        from numba.core.registry import cpu_target
+
+        # Use a subtarget: the NRT context is cached on first access and
+        # the base context has the NRT disabled.
+        nrt = cpu_target.target_context.subtarget(enable_nrt=True).nrt
+        seen = []
+        with nrt.alloc_site('main'):
+            thread = threading.Thread(
+                target=lambda: seen.append(list(nrt._alloc_sites)))
+            thread.start()
+            thread.join()
+            self.assertEqual(nrt._alloc_sites, ['main'])
+        self.assertEqual(seen, [[]])
+        self.assertEqual(nrt._alloc_sites, [])
+
+
+class TestStackArrays(MemoryLeakMixin, TestCase):
+    """
+    Test the stack allocation of the arrays which do not escape.
+    """
+
+    def check(self, pyfunc, args, stack_arrays):
+        cfunc = njit(pyfunc)
+        expected = pyfunc(*args)
+        init_stats = rtsys.get_allocation_stats()
+        got = cfunc(*args)
+        cur_stats = rtsys.get_allocation_stats()
+        self.assertPreciseEqual(got, expected)
+        metadata = cfunc.get_metadata(cfunc.signatures[0])
+        self.assertEqual(sorted(metadata['stack_arrays'].values()),
+                         sorted(stack_arrays))
+        if not stack_arrays:
+            self.assertGreater(cur_stats.alloc, init_stats.alloc)
+        return cfunc, cur_stats.alloc - init_stats.alloc
+
+    def test_temporaries(self):
+        def foo(n):
+            acc = 0.0
+            for i in range(n):
+                a = np.empty(3)
+                a[0] = i
+                a[1] = a[0] * 2
+                a[2] = len(a)
+                b = np.zeros((2, 2), dtype=np.int32)
+                b[1, 1] += i
+                c = np.ones(4)
+                c *= i
+                d = np.array((i, 1.5, 2))
+                acc += a.sum() + b[1, 1] + c[3] + d.max() + (a + d).sum()
+            return acc
+
+        _, allocs = self.check(foo, (10,), [('array', (3,)),
+                                            ('empty', (3,)),
+                                            ('ones', (4,)),
+                                            ('zeros', (2, 2))])
+        # Only the temporary of ``a + d`` is allocated by the NRT
+        self.assertEqual(allocs, 10)
+
+    def test_nested_tuple(self):
+        def foo(x, y):
+            a = np.asarray(((x, y), (y, x)))
+            return a[0, 1] - a[1, 1] + a.shape[0]
+
+        self.check(foo, (2, 5), [('asarray', (2, 2))])
+
+    def test_escaping(self):
+        def returned(n):
+            a = np.zeros(3)
+            a[0] = n
+            return a
+
+        def stored(n):
+            lst = []
+            for i in range(n):
+                a = np.zeros(3)
+                a[0] = i
+                lst.append(a)
+            return lst[1][0]
+
+        def view(n):
+            a = np.zeros(4)
+            b = a[1:]
+            b[0] = n
+            return b
+
+        def passed(n):
+            a = np.zeros(3)
+            return np.sum(a) + n
+
+        for pyfunc in (returned, stored, view, passed):
+            with self.subTest(pyfunc.__name__):
+                self.check(pyfunc, (5,), [])
+
+    def test_alias_across_iterations(self):
+        # The array of the previous iteration is alive after the allocation
+        # of the next one, they cannot share its buffer
+        def foo(n):
+            prev = np.zeros(2)
+            acc = 0.0
+            for i in range(n):
+                cur = np.zeros(2)
+                cur[0] = i
+                acc += cur[0] - prev[0]
+                prev = cur
+            return acc
+
+        self.check(foo, (10,), [('zeros', (2,))])
+
+    def test_max_bytes(self):
+        def foo(n):
+            a = np.zeros(16)
+            a[0] = n
+            return a.sum()
+
+        with override_config('STACK_ARRAY_MAX_BYTES', 64):
+            self.check(foo, (3,), [])
+        with override_config('STACK_ARRAY_MAX_BYTES', 128):
+            self.check(foo, (3,), [('zeros', (16,))])
+        with override_config('STACK_ARRAY_MAX_BYTES', 0):
+            self.check(foo, (3,), [])
+
+
+class TestThreadLocalRefct(MemoryLeakMixin, TestCase):
+    """
+    Test the non-atomic reference counting of the arrays which do not escape.
+    """
+
+    def check(self, pyfunc, args, thread_local):
+        cfunc = njit(pyfunc)
+        self.assertPreciseEqual(cfunc(*args), pyfunc(*args))
+        metadata = cfunc.get_metadata(cfunc.signatures[0])
+        # The user variables, without the versions of their SSA definitions
+        got = set(name.split('.')[0] for name in metadata['thread_local']
+                  if not name.startswith('$'))
+        self.assertEqual(got, set(thread_local))
+        return cfunc
+
+    def test_temporaries(self):
+        def foo(n):
+            acc = 0.0
+            for i in range(n):
+                a = np.ones(i + 1)
+                b = a[1:]
+                c = a + b.sum()
+                d = c.T
+                acc += a.sum() + d[0] + len(b)
+            return acc
+
+        cfunc = self.check(foo, (10,), ['a', 'b', 'c', 'd'])
+        # The arrays are released in each iteration
+        llvm_ir = cfunc.inspect_llvm(cfunc.signatures[0])
+        self.assertIn('call void @NRT_decref_local(', llvm_ir)
+
+    def test_escaping(self):
+        def returned(n):
+            a = np.zeros(3)
+            b = a[1:]
+            b[0] = n
+            return b
+
+        def stored(n):
+            lst = []
+            for i in range(n):
+                a = np.zeros(3)
+                a[0] = i
+                lst.append(a)
+            return lst[1][0]
+
+        def passed(n):
+            a = np.zeros(3)
+            return np.sum(a) + n
+
+        def redefined(x, n):
+            a = np.zeros(3)
+            if n > 2:
+                a = x
+            return a.sum()
+
+        for pyfunc, args in ((returned, (5,)), (stored, (5,)),
+                             (passed, (5,)), (redefined, (np.ones(3), 5))):
+            with self.subTest(pyfunc.__name__):
+                self.check(pyfunc, args, [])
+
+    def test_single_threaded(self):
+        # The switch is read when the NRT is initialized
+        code = """if 1:
+            import json
+            import numpy as np
+            from numba import njit, prange
+            from numba.core.runtime import rtsys
+
+            @njit
+            def foo(n):
+                lst = []
+                for i in range(n):
+                    lst.append(np.ones(i + 1))
+                acc = 0.0
+                for a in lst:
+                    acc += a.sum()
+                return acc
+
+            @njit(parallel=True)
+            def bar(n):
+                acc = 0
+                for i in prange(n):
+                    acc += i
+                return acc
+
+            res = foo(10)
+            stats = rtsys.get_allocation_stats()
+            try:
+                bar(10)
+            except Exception as e:
+                # Raised when the parallel function is compiled or run
+                error = str(e)
+            else:
+                error = None
+            print(json.dumps({
+                'res': res,
+                'leaked': stats.alloc != stats.free,
+                'atomic': 'atomicrmw' in rtsys.library.get_llvm_str(),
+                'error': error,
+            }))
+            """
+        env = dict(os.environ, NUMBA_NRT_SINGLE_THREADED='1')
+        out = subprocess.check_output([sys.executable, '-c', code], env=env)
+        res = json.loads(out.decode())
+        self.assertEqual(res['res'], 55.0)
+        self.assertFalse(res['leaked'])
+        self.assertFalse(res['atomic'])
+        self.assertIn('NUMBA_NRT_SINGLE_THREADED', res['error'])
+
+
 class TestNRTIssue(MemoryLeakMixin, TestCase):
     def test_issue_with_refct_op_pruning(self):
         """
@@ -458,7 +888,8 @@ br i1 %.294, label %B42, label %B160
         before_decrefs = [ln for ln in input_lines if 'NRT_decref' in ln]
 
         # prune
-        output_ir = nrtopt._remove_redundant_nrt_refct(input_ir)
+        output_ir = nrtopt._remove_redundant_nrt_refct(input_ir,
+                                                       cross_block=False)
         output_lines = list(output_ir.splitlines())
         after_increfs = [ln for ln in output_lines if 'NRT_incref' in ln]
         after_decrefs = [ln for ln in output_lines if 'NRT_decref' in ln]
@@ -482,6 +913,202 @@ br i1 %.294, label %B42, label %B160
         # no other lines
         self.assertEqual(len(list(pruned_lines.splitlines())), len(combined))
 
+    def get_refct_ops(self, llvmir):
+        return [ln.strip() for ln in llvmir.splitlines()
+                if 'NRT_incref' in ln or 'NRT_decref' in ln]
+
+    def test_refct_pruning_across_blocks(self):
+        # The increfs of the arguments in the entry block are balanced by
+        # the decrefs of the exit block, once the pairs within the loop body
+        # are pruned
+        output_ir = nrtopt._remove_redundant_nrt_refct(self.sample_llvm_ir)
+        self.assertEqual(self.get_refct_ops(output_ir), [])
+
+    def test_refct_pruning_unbalanced(self):
+        conditional = """
+define void @"f"(i8* %arr, i1 %c) {
+entry:
+  tail call void @NRT_incref(i8* %arr)
+  br i1 %c, label %a, label %b
+
+a:
+  tail call void @NRT_decref(i8* %arr)
+  br label %b
+
+b:
+  ret void
+}
+"""
+        decref_between = """
+define void @"f"(i8* %arr, i8* %other, i1 %c) {
+entry:
+  tail call void @NRT_incref(i8* %arr)
+  br i1 %c, label %a, label %b
+
+a:
+  tail call void @NRT_decref(i8* %other)
+  br label %b
+
+b:
+  tail call void @NRT_decref(i8* %arr)
+  ret void
+}
+"""
+        incref_in_loop = """
+define void @"f"(i8* %arr, i1 %c) {
+entry:
+  br label %body
+
+body:
+  tail call void @NRT_incref(i8* %arr)
+  br i1 %c, label %body, label %exit
+
+exit:
+  tail call void @NRT_decref(i8* %arr)
+  ret void
+}
+"""
+        for input_ir in (conditional, decref_between, incref_in_loop):
+            output_ir = nrtopt._remove_redundant_nrt_refct(input_ir)
+            self.assertEqual(self.get_refct_ops(output_ir),
+                             self.get_refct_ops(input_ir))
+
+        # With no decref between them, the pair is pruned
+        diamond = decref_between.replace(
+            "tail call void @NRT_decref(i8* %other)", "%x = add i64 1, 2")
+        output_ir = nrtopt._remove_redundant_nrt_refct(diamond)
+        self.assertEqual(self.get_refct_ops(output_ir), [])
+
+    def test_refct_pruning_replaced_item(self):
+        # a = lst[0]; <branch>; lst[0] = new; use(a): the decref of the
+        # replaced item, an alias of %a, is between the pair on %a
+        input_ir = """
+define double @"f"(i8* %lst, i8* %new, i1 %c) {
+entry:
+  %a = call i8* @getitem(i8* %lst, i64 0)
+  tail call void @NRT_incref(i8* %a)
+  br i1 %c, label %then, label %join
+
+then:
+  %x = add i64 1, 2
+  br label %join
+
+join:
+  %old = call i8* @getitem(i8* %lst, i64 0)
+  call void @setitem(i8* %lst, i64 0, i8* %new)
+  tail call void @NRT_decref(i8* %old)
+  %r = call double @use(i8* %a)
+  tail call void @NRT_decref(i8* %a)
+  ret double %r
+}
+"""
+        output_ir = nrtopt._remove_redundant_nrt_refct(input_ir)
+        self.assertEqual(self.get_refct_ops(output_ir),
+                         self.get_refct_ops(input_ir))
+
+        @njit
+        def replaced_item(c):
+            lst = [np.arange(4.0)]
+            a = lst[0]
+            if c:
+                b = 1.0
+            else:
+                b = 2.0
+            lst[0] = np.zeros(4)
+            return a.sum() + b
+
+        with override_config('NRT_REFCT_PRUNING', 'dataflow'):
+            self.assertEqual(replaced_item(True), 7.0)
+            self.assertEqual(replaced_item(False), 8.0)
+
+    def test_refct_operands(self):
+        lines = ['tail call void @NRT_decref(i8* %a)',
+                 'tail call void @NRT_decref(i8* noalias %"b c")',
+                 'tail call void @NRT_decref(i8* null)',
+                 'tail call void @NRT_decref(i8* bitcast (i8** @g to i8*))']
+        blk = nrtopt._BasicBlock('', None)
+        blk.lines = lines
+        self.assertEqual(list(blk.refct_ops(nrtopt._regex_decref)),
+                         [(0, '%a'), (1, '%"b c"'), (2, None), (3, None)])
+        # The pairs on constants are not pruned across blocks
+        input_ir = """
+define void @"f"(i1 %c) {
+entry:
+  tail call void @NRT_incref(i8* bitcast (i8** @g to i8*))
+  br i1 %c, label %a, label %b
+
+a:
+  br label %b
+
+b:
+  tail call void @NRT_decref(i8* bitcast (i8** @g to i8*))
+  ret void
+}
+"""
+        output_ir = nrtopt._remove_redundant_nrt_refct(input_ir)
+        self.assertEqual(self.get_refct_ops(output_ir),
+                         self.get_refct_ops(input_ir))
+
+    loop_llvm_ir = """
+define void @"f"(i8* %arr, i64 %n) {
+entry:
+  %c = icmp sgt i64 %n, 0
+  br i1 %c, label %loop.preheader, label %exit
+
+loop.preheader:
+  br label %loop
+
+loop:
+  %i = phi i64 [ 0, %loop.preheader ], [ %i.next, %loop.latch ]
+  %item = call i8* @getitem(i8* %arr, i64 %i)
+  tail call void @NRT_incref(i8* $PAIRED)
+  br label %loop.latch
+
+loop.latch:
+  tail call void @NRT_decref(i8* $OTHER)
+  tail call void @NRT_decref(i8* $PAIRED)
+  %i.next = add i64 %i, 1
+  %d = icmp slt i64 %i.next, %n
+  br i1 %d, label %loop, label %loop.exit
+
+loop.exit:
+  %r = phi i64 [ %i.next, %loop.latch ]
+  br label %exit
+
+exit:
+  ret void
+}
+"""
+
+    def get_loop_llvm_ir(self, paired, other):
+        return self.loop_llvm_ir.replace('$PAIRED', paired).replace(
+            '$OTHER', other)
+
+    def test_refct_hoisting_out_of_loops(self):
+        input_ir = self.get_loop_llvm_ir('%arr', '%item')
+        output_ir = nrtopt._remove_redundant_nrt_refct(input_ir)
+        blocks = dict((blk.name, self.get_refct_ops('\n'.join(blk.lines)))
+                      for blk in nrtopt._FunctionCFG(
+                          output_ir.strip().splitlines()).blocks)
+        # The pair on %arr is moved out of the loop, the decref of %item
+        # prevents from pruning it
+        self.assertEqual(blocks['loop.preheader'],
+                         ['tail call void @NRT_incref(i8* %arr)'])
+        self.assertEqual(blocks['loop'], [])
+        self.assertEqual(blocks['loop.latch'],
+                         ['tail call void @NRT_decref(i8* %item)'])
+        self.assertEqual(blocks['loop.exit'],
+                         ['tail call void @NRT_decref(i8* %arr)'])
+        # After the phis
+        self.assertIn(' = phi ', output_ir.split('NRT_decref(i8* %arr)')[0]
+                      .split('loop.exit:')[1])
+
+        # Not with a value defined in the loop
+        variant_ir = self.get_loop_llvm_ir('%item', '%arr')
+        output_ir = nrtopt._remove_redundant_nrt_refct(variant_ir)
+        self.assertEqual(self.get_refct_ops(output_ir),
+                         self.get_refct_ops(variant_ir))
+
     @unittest.skip("Pass removed as it was buggy. Re-enable when fixed.")
     def test_refct_pruning_with_branches(self):
         '''testcase from #2350'''
@@ -516,7 +1143,8 @@ br i1 %.294, label %B42, label %B160
 
         # Test there are no reference count operations
         llvmir = str(extend.inspect_llvm(extend.signatures[0]))
-        refops = list(re.finditer(r'(NRT_incref|NRT_decref)\([^\)]+\)', llvmir))
+        refops = list(re.finditer(
+            r'(NRT_incref|NRT_decref)(_local)?\([^\)]+\)', llvmir))
         self.assertEqual(len(refops), 0)
 
     @linux_only
@@ -10,7 +10,7 @@ import numpy as np
 import unittest
 from numba import njit
 from numba.core.runtime import rtsys
-from numba.tests.support import TestCase
+from numba.tests.support import TestCase, override_config
 
 
 class TestNrtRefCt(TestCase):
@@ -32,7 +32,9 @@ class TestNrtRefCt(TestCase):
 
         n = 10
         init_stats = rtsys.get_allocation_stats()
-        foo(n)
+        # The temporary must not be allocated on the stack
+        with override_config('STACK_ARRAY_MAX_BYTES', 0):
+            foo(n)
         cur_stats = rtsys.get_allocation_stats()
         self.assertEqual(cur_stats.alloc - init_stats.alloc, n)
         self.assertEqual(cur_stats.free - init_stats.free, n)
@@ -6,7 +6,7 @@ import sys
 
 import numpy as np
 
-from numba import jit
+from numba import jit, typeof
 from numba.tests.support import needs_blas
 import unittest
 
@@ -23,7 +23,7 @@ def np_dot(a, b):
 
 class TestProfiler(unittest.TestCase):
 
-    def check_profiler_dot(self, pyfunc):
+    def check_profiler_dot(self, pyfunc, specialize=False):
         """
         Make sure the jit-compiled function shows up in the profile stats
         as a regular Python function.
@@ -33,6 +33,8 @@ class TestProfiler(unittest.TestCase):
         cfunc = jit(nopython=True)(pyfunc)
         # Warm up JIT
         cfunc(a, b)
+        if specialize:
+            cfunc = cfunc.specialize((typeof(a), typeof(b)))
         p = profiler.Profile()
         p.enable()
         try:
@@ -50,6 +52,9 @@ class TestProfiler(unittest.TestCase):
     def test_profiler(self):
         self.check_profiler_dot(dot)
 
+    def test_profiler_specialization(self):
+        self.check_profiler_dot(dot, specialize=True)
+
     @needs_blas
     def test_profiler_np_dot(self):
         # Issue #1786: initializing BLAS would crash when profiling
@@ -58,7 +63,7 @@ class TestProfiler(unittest.TestCase):
 
             import numpy as np
 
-            from numba import jit
+            from numba import jit, typeof
             from numba.tests.test_profiler import np_dot
 
             cfunc = jit(nopython=True)(np_dot)
@@ -11,6 +11,19 @@ import unittest
 from numba.core import registry
 
 
+class _Reduced(object):
+    """
+    Pickles as the given reduction of another object.
+    """
+
+    def __init__(self, rebuild, args):
+        self.rebuild = rebuild
+        self.args = args
+
+    def __reduce__(self):
+        return self.rebuild, self.args
+
+
 class TestDispatcherPickling(TestCase):
 
     def run_with_protocols(self, meth, *args, **kwargs):
@@ -165,6 +178,66 @@ class TestDispatcherPickling(TestCase):
         g.disable_compile()
         self.assertEqual(g(2, 4), 13)
 
+    def check_pickle_code(self, reduced, compiled):
+        pickled = pickle.dumps(reduced)
+        code = """if 1:
+            import pickle
+
+            func = pickle.loads({pickled!r})
+            assert ({compiled!r} == bool(func.overloads)), func.overloads
+            res = func(3.0, 4.0)
+            assert res == 8.0, res
+            assert ({compiled!r} != bool(func.stats.cache_misses)), \
+                func.stats.cache_misses
+            """.format(**locals())
+        subprocess.check_call([sys.executable, "-c", code])
+
+    def test_pickle_code(self):
+        """
+        Check that the compiled code is reused by the unpickled function
+        with pickle_code=True.
+        """
+        func = hypot_pickle_code
+        self.assertPreciseEqual(func(3.0, 4.0), 8.0)
+        self.check_pickle_code(func, True)
+
+        # Without pickle_code, only the function is pickled
+        rebuild, args = func.__reduce__()
+        self.assertEqual(len(args[-1][1]), 1)
+        func._pickle_code = False
+        try:
+            self.assertIsNone(func.__reduce__()[1][-1])
+        finally:
+            func._pickle_code = True
+
+    def test_pickle_code_guard(self):
+        """
+        Check that the compiled code is not reused when compiled for
+        another CPU.
+        """
+        func = hypot_pickle_code
+        self.assertPreciseEqual(func(3.0, 4.0), 8.0)
+        rebuild, args = func.__reduce__()
+        (version, magic, single_threaded), payloads = args[-1]
+        other_magic = (magic[0], 'other-cpu', magic[2])
+        guard = (version, other_magic, single_threaded)
+        args = args[:-1] + ((guard, payloads),)
+        self.check_pickle_code(_Reduced(rebuild, args), False)
+
+    def test_pickle_code_guard_nrt_single_threaded(self):
+        """
+        Check that the compiled code is not reused when compiled with
+        another NRT_SINGLE_THREADED setting.
+        """
+        func = hypot_pickle_code
+        self.assertPreciseEqual(func(3.0, 4.0), 8.0)
+        rebuild, args = func.__reduce__()
+        (version, magic, single_threaded), payloads = args[-1]
+        self.assertFalse(single_threaded)
+        guard = (version, magic, True)
+        args = args[:-1] + ((guard, payloads),)
+        self.check_pickle_code(_Reduced(rebuild, args), False)
+
     def test_imp_deprecation(self):
         """
         The imp module was deprecated in v3.4 in favour of importlib
@@ -42,6 +42,23 @@ class TestOverloadSelector(unittest.TestCase):
         self.assertEqual(scoring[(types.Sequence,)], 2)
         self.assertEqual(scoring[(types.Container,)], 3)
 
+    def test_append_during_find(self):
+        # A version appended while a lookup is being computed (e.g. by
+        # another thread) is not hidden by the result of the lookup
+        class Selector(OverloadSelector):
+            def _find(self, sig):
+                out = super(Selector, self)._find(sig)
+                if not appended:
+                    appended.append(True)
+                    self.append(2, (types.Boolean,))
+                return out
+
+        appended = []
+        os = Selector()
+        os.append(1, (types.Any,))
+        self.assertEqual(os.find((types.boolean,)), 1)
+        self.assertEqual(os.find((types.boolean,)), 2)
+
     def test_match(self):
         os = OverloadSelector()
         self.assertTrue(os._match(formal=types.Boolean, actual=types.boolean))
@@ -4,13 +4,15 @@ These tests will cause segfault if fail.
 """
 import threading
 import random
+from concurrent.futures import ThreadPoolExecutor
 
 import numpy as np
 
 from numba import jit, vectorize, guvectorize
+from numba.extending import intrinsic, overload
 
 from numba.tests.support import temp_directory, override_config
-from numba.core import config
+from numba.core import config, types
 import unittest
 
 
@@ -93,5 +95,117 @@ class TestThreadSafety(unittest.TestCase):
                           self.run_guvectorize(nopython=True)])
 
 
+def make_distinct_func(i):
+    def f(x):
+        acc = 0
+        for j in range(x):
+            acc += j * i
+        return acc
+    return jit(nopython=True)(f)
+
+
+def make_distinct_funcs(n):
+    # Independent functions, so that each one needs its own compilation
+    return [make_distinct_func(i) for i in range(n)]
+
+
+def shared_helper(x):
+    pass
+
+
+@overload(shared_helper)
+def ol_shared_helper(x):
+    def impl(x):
+        return np.sort(np.arange(x))[-1]
+    return impl
+
+
+shared_intrinsic_calls = []
+
+
+@intrinsic
+def shared_intrinsic(typingctx, x):
+    shared_intrinsic_calls.append(x)
+
+    def codegen(context, builder, signature, args):
+        return args[0]
+    return x(x), codegen
+
+
+def make_sharing_func(i):
+    # Independent functions sharing an overload, an intrinsic and the
+    # internal implementations of np.sort() and np.arange()
+    def f(x):
+        return shared_intrinsic(shared_helper(x)) + i
+    return jit(nopython=True)(f)
+
+
+class TestConcurrentCompilation(unittest.TestCase):
+    """
+    Tests for NUMBA_CONCURRENT_COMPILATION.
+    """
+
+    def test_concurrent_shared_implementations(self):
+        funcs = [make_sharing_func(i) for i in range(16)]
+        with override_config('CONCURRENT_COMPILATION', 1):
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                results = list(pool.map(lambda fn: fn(10), funcs))
+        self.assertEqual(results, [9 + i for i in range(16)])
+        # The intrinsic was typed and registered once
+        self.assertEqual(shared_intrinsic_calls, [types.intp])
+
+    def test_concurrent_warmup(self):
+        # Warm up many independent dispatchers from a thread pool
+        funcs = make_distinct_funcs(16)
+        with override_config('CONCURRENT_COMPILATION', 1):
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                results = list(pool.map(lambda fn: fn(10), funcs))
+        self.assertEqual(results, [45 * i for i in range(16)])
+        for fn in funcs:
+            self.assertEqual(len(fn.signatures), 1)
+
+    def test_same_dispatcher_compiles_once(self):
+        [fn] = make_distinct_funcs(1)
+        barrier = threading.Barrier(4)
+
+        def compile_it():
+            barrier.wait()
+            return fn.compile('int64(int64)')
+
+        with override_config('CONCURRENT_COMPILATION', 1):
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                futures = [pool.submit(compile_it) for _ in range(4)]
+                entry_points = [f.result() for f in futures]
+        self.assertEqual(len(fn.overloads), 1)
+        self.assertEqual(len(set(map(id, entry_points))), 1)
+        self.assertEqual(sum(fn.stats.cache_misses.values()), 1)
+
+    def check_independent_progress(self, expect_progress):
+        # While a thread holds the compile lock of one dispatcher, another
+        # thread compiles an unrelated dispatcher.
+        blocker, other = make_distinct_funcs(2)
+        done = threading.Event()
+
+        def compile_other():
+            other.compile('int64(int64)')
+            done.set()
+
+        th = threading.Thread(target=compile_other)
+        with blocker._compile_lock:
+            th.start()
+            progressed = done.wait(timeout=60 if expect_progress else 1)
+        th.join()
+        self.assertEqual(progressed, expect_progress)
+        self.assertEqual(other(10), 45)
+
+    def test_independent_dispatchers_concurrent(self):
+        with override_config('CONCURRENT_COMPILATION', 1):
+            self.check_independent_progress(expect_progress=True)
+
+    def test_independent_dispatchers_serial(self):
+        with override_config('CONCURRENT_COMPILATION', 0):
+            self.check_independent_progress(expect_progress=False)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,5 +1,6 @@
 import os, sys, subprocess
 import itertools
+import operator
 
 import numpy as np
 
@@ -7,8 +8,10 @@ from numba.core.compiler import compile_isolated
 from numba import jit
 from numba.core import types, typing, errors, typeinfer, utils
 from numba.core.typeconv import Conversion
+from numba.core.registry import cpu_target
+from numba.core.typing.templates import ConcreteTemplate
 
-from numba.tests.support import TestCase, tag
+from numba.tests.support import TestCase, tag, override_config
 from numba.tests.test_typeconv import CompatibilityTestMixin
 import unittest
 
@@ -486,6 +489,110 @@ class TestResolveOverload(unittest.TestCase):
                           ])
 
 
+class TestResolutionCache(TestCase):
+    """
+    Tests for the memoized function type resolutions of typing contexts.
+    """
+
+    def test_memoized(self):
+        ctx = typing.Context()
+        ctx.refresh()
+        before = ctx.resolution_cache_info()
+        sig = ctx.resolve_function_type(operator.add, (i32, i32), {})
+        self.assertEqual(sig, i64(i64, i64))
+        self.assertIs(ctx.resolve_function_type(operator.add, (i32, i32), {}),
+                      sig)
+        info = ctx.resolution_cache_info()
+        self.assertEqual(info.hits, before.hits + 1)
+        self.assertEqual(info.misses, before.misses + 1)
+        self.assertEqual(info.currsize, before.currsize + 1)
+        # Other argument types are resolved separately
+        self.assertEqual(ctx.resolve_function_type(operator.add,
+                                                   (f64, f64), {}),
+                         f64(f64, f64))
+        self.assertEqual(ctx.resolution_cache_info().misses, info.misses + 1)
+
+    def test_invalidation(self):
+        ctx = typing.Context()
+        ctx.refresh()
+        ctx.resolve_function_type(operator.add, (i32, i32), {})
+        self.assertGreater(ctx.resolution_cache_info().currsize, 0)
+
+        class Template(ConcreteTemplate):
+            key = "some_function"
+            cases = [i32(i32)]
+
+        ctx.insert_function(Template(ctx))
+        self.assertEqual(ctx.resolution_cache_info().currsize, 0)
+        self.assertEqual(ctx.resolve_function_type("some_function",
+                                                   (i32,), {}),
+                         i32(i32))
+        self.assertEqual(ctx.resolution_cache_info().currsize, 1)
+
+    def test_global_invalidation(self):
+        ctx = typing.Context()
+        ctx.refresh()
+
+        def some_function(x):
+            pass
+
+        class Template(ConcreteTemplate):
+            key = some_function
+            cases = [i32(i32)]
+
+        ctx.insert_global(some_function, types.Function(Template))
+        fnty = ctx.resolve_value_type(some_function)
+        self.assertEqual(ctx.resolve_function_type(fnty, (i32,), {}),
+                         i32(i32))
+        ctx.resolve_function_type(operator.add, (i32, i32), {})
+        size = ctx.resolution_cache_info().currsize
+        # Replacing the type of a global only forgets the resolutions of the
+        # replaced type
+        ctx._remove_global(some_function)
+        self.assertEqual(ctx.resolution_cache_info().currsize, size - 1)
+        ctx.insert_global(some_function, types.int32)
+        self.assertEqual(ctx.resolution_cache_info().currsize, size - 1)
+        before = ctx.resolution_cache_info()
+        ctx.resolve_function_type(operator.add, (i32, i32), {})
+        self.assertEqual(ctx.resolution_cache_info().hits, before.hits + 1)
+
+    def test_reused_across_compiles(self):
+        ctx = cpu_target.typing_context
+
+        @jit(nopython=True)
+        def foo(x):
+            return x * 3 + 1
+
+        @jit(nopython=True)
+        def bar(x):
+            return x * 3 + 1
+
+        foo(1)
+        before = ctx.resolution_cache_info()
+        bar(1)
+        info = ctx.resolution_cache_info()
+        # The resolutions of the operators of foo are reused by bar
+        self.assertGreaterEqual(info.hits, before.hits + 2)
+
+    def test_not_memoized(self):
+        ctx = typing.Context()
+        before = ctx.resolution_cache_info()
+        # Failed resolutions
+        try:
+            res = ctx.resolve_function_type(operator.add, (types.none, i32),
+                                            {})
+        except errors.TypingError:
+            res = None
+        self.assertIsNone(res)
+        # Dispatchers, whose resolution depends on their compiled overloads
+        foo = jit(nopython=True)(lambda x: x)
+        ctx.resolve_function_type(ctx.resolve_value_type(foo), (i32,), {})
+        with override_config('RESOLUTION_CACHE', 0):
+            ctx.resolve_function_type(operator.add, (i32, i32), {})
+        self.assertEqual(ctx.resolution_cache_info().currsize,
+                         before.currsize)
+
+
 class TestUnifyUseCases(unittest.TestCase):
     """
     Concrete cases where unification would fail.
@@ -275,8 +275,10 @@ def get_ext_modules():
 
     ext_nrt_python = Extension(name='numba.core.runtime._nrt_python',
                                sources=['numba/core/runtime/_nrt_pythonmod.c',
-                                        'numba/core/runtime/nrt.c'],
+                                        'numba/core/runtime/nrt.c',
+                                        'numba/core/runtime/nrt_pool.c'],
                                depends=['numba/core/runtime/nrt.h',
+                                        'numba/core/runtime/nrt_pool.h',
                                         'numba/_pymodule.h',
                                         'numba/core/runtime/_nrt_python.c'],
                                **np_compile_args)